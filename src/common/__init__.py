@@ -2,36 +2,39 @@
 通用工具模块包
 """
 
-from .system_initializer import (
-    check_dependencies, 
-    get_initialization_order,
-    check_container_health,
-    initialize_container,
-    SERVICE_DEPENDENCIES
-)
+from .lazy_import import lazy_exports
 
-# PyQt6相关导入设为可选
-try:
-    from .app_utils import (
-        set_dpi_awareness,
-        create_manifest_file,
-        set_app_style,
-        is_admin,
-        run_as_admin,
-        create_default_icons,
-        setup_environment
-    )
-    APP_UTILS_AVAILABLE = True
-except ImportError:
-    APP_UTILS_AVAILABLE = False
-    # 提供空实现
-    def set_dpi_awareness(): pass
-    def create_manifest_file(): pass
-    def set_app_style(app): pass
-    def is_admin(): return False
-    def run_as_admin(): pass
-    def create_default_icons(): pass
-    def setup_environment(): pass
+
+def _noop(*args, **kwargs):
+    return None
+
+
+# app_utils依赖PyQt6，不可用时提供空实现
+_APP_UTILS_FALLBACKS = {
+    'set_dpi_awareness': _noop,
+    'create_manifest_file': _noop,
+    'set_app_style': _noop,
+    'is_admin': lambda: False,
+    'run_as_admin': _noop,
+    'create_default_icons': _noop,
+    'setup_environment': _noop,
+}
+
+# 系统初始化(依赖容器和全部服务)与PyQt6相关工具按需导入，
+# 只使用配置等轻量模块时不会加载整个服务层
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    exports={
+        'check_dependencies': ('.system_initializer', 'check_dependencies'),
+        'get_initialization_order': ('.system_initializer', 'get_initialization_order'),
+        'check_container_health': ('.system_initializer', 'check_container_health'),
+        'initialize_container': ('.system_initializer', 'initialize_container'),
+        'SERVICE_DEPENDENCIES': ('.system_initializer', 'SERVICE_DEPENDENCIES'),
+        **{name: ('.app_utils', name) for name in _APP_UTILS_FALLBACKS},
+    },
+    fallbacks=_APP_UTILS_FALLBACKS,
+    flags={'APP_UTILS_AVAILABLE': '.app_utils'},
+)
 
 from .system_cleanup import cleanup
 
@@ -4,7 +4,10 @@
 """
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, Callable, List, Union
+from typing import Dict, Any, Optional, Callable, List, Union, Iterable, FrozenSet
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import threading
 import time
 
 
@@ -44,6 +47,142 @@ class ActionStatus(Enum):
     TIMEOUT = "timeout"
 
 
+class InputDevice:
+    """输入设备常量"""
+    KEYBOARD = "keyboard"
+    MOUSE = "mouse"
+
+
+ALL_INPUT_DEVICES: FrozenSet[str] = frozenset({InputDevice.KEYBOARD, InputDevice.MOUSE})
+
+# 各动作类型占用的输入设备，未列出的类型由执行器处理，保守地占用全部设备
+INPUT_DEVICES_BY_TYPE: Dict[ActionType, FrozenSet[str]] = {
+    ActionType.CLICK: frozenset({InputDevice.MOUSE}),
+    ActionType.MOUSE_MOVE: frozenset({InputDevice.MOUSE}),
+    ActionType.MOUSE_DRAG: frozenset({InputDevice.MOUSE}),
+    ActionType.SCROLL: frozenset({InputDevice.MOUSE}),
+    ActionType.KEY: frozenset({InputDevice.KEYBOARD}),
+    ActionType.WAIT: frozenset(),
+    ActionType.CONDITION: frozenset(),
+    ActionType.EDIT: frozenset(),
+    ActionType.UNDO: frozenset(),
+    ActionType.REDO: frozenset(),
+}
+
+
+class InputArbiter:
+    """输入设备仲裁器
+    
+    每个输入设备一把可重入锁，并行分支中占用同一设备的动作会被串行化，
+    不同设备(如一边按键一边等待)的动作可以同时执行。
+    多个设备的锁按固定顺序获取，避免死锁。
+    """
+    
+    def __init__(self):
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self.contention_count = 0
+    
+    def _get_lock(self, device: str) -> threading.RLock:
+        """获取设备锁"""
+        with self._locks_guard:
+            lock = self._locks.get(device)
+            if lock is None:
+                lock = threading.RLock()
+                self._locks[device] = lock
+            return lock
+    
+    @contextmanager
+    def claim(self, devices: Iterable[str]):
+        """占用一组输入设备直到上下文结束
+        
+        Args:
+            devices: 设备名称集合
+        """
+        locks = [self._get_lock(device) for device in sorted(set(devices))]
+        acquired = []
+        try:
+            for lock in locks:
+                if not lock.acquire(blocking=False):
+                    self.contention_count += 1
+                    lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+_default_arbiter = InputArbiter()
+
+
+def get_input_arbiter() -> InputArbiter:
+    """获取全局输入设备仲裁器
+    
+    同一进程内的所有动作序列共享物理键鼠，因此默认共享同一个仲裁器。
+    """
+    return _default_arbiter
+
+
+class ConditionSignal:
+    """条件信号
+    
+    状态生产者(如画面分析、状态管理)在状态变化时调用notify，
+    等待方只在收到通知时重新评估条件，而不是定时轮询。
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+    
+    def notify(self) -> None:
+        """通知所有等待方状态已变化"""
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+    
+    def wait_for(self, predicate: Callable[[], bool], timeout: float,
+                 fallback_interval: Optional[float] = 0.1) -> bool:
+        """等待条件成立
+        
+        条件在锁外评估，避免条件函数本身触发通知时死锁。
+        
+        Args:
+            predicate: 条件函数
+            timeout: 超时时间（秒）
+            fallback_interval: 未收到通知时的兜底重新评估间隔，通知只会让等待提前结束；
+                None表示只依赖通知
+            
+        Returns:
+            bool: 超时前条件是否成立
+        """
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            with self._condition:
+                version = self._version
+            
+            if predicate():
+                return True
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            
+            wait_time = remaining if fallback_interval is None else min(remaining, fallback_interval)
+            with self._condition:
+                if self._version == version:
+                    self._condition.wait(wait_time)
+
+
+_default_signal = ConditionSignal()
+
+
+def get_condition_signal() -> ConditionSignal:
+    """获取全局条件信号，供未指定信号的条件动作使用"""
+    return _default_signal
+
+
 @dataclass
 class BaseAction:
     """统一的Action基类"""
@@ -158,6 +297,19 @@ class BaseAction:
         
         return self.execute(executor)
     
+    def get_input_devices(self) -> FrozenSet[str]:
+        """获取执行该动作需要占用的输入设备
+        
+        可以通过params["input_devices"]显式声明。
+        
+        Returns:
+            FrozenSet[str]: 输入设备集合
+        """
+        declared = self.params.get("input_devices")
+        if declared is not None:
+            return frozenset(declared)
+        return INPUT_DEVICES_BY_TYPE.get(self.type, ALL_INPUT_DEVICES)
+    
     def reset(self):
         """重置动作状态"""
         self.status = ActionStatus.PENDING
@@ -262,17 +414,29 @@ class AutomationAction(BaseAction):
         return True
     
     def _execute_condition(self, executor: Any) -> bool:
-        """执行条件动作"""
+        """执行条件动作
+        
+        支持三种等待方式：
+        - params["event"]: threading.Event，直接阻塞等待
+        - params["signal"]: ConditionSignal，仅在收到通知时重新评估condition
+        - 仅有condition: 使用全局条件信号，状态管理器和自动化线程在状态或画面
+          更新时通知
+        
+        条件依赖像素、窗口、文件等不会发出通知的来源时，仍按params["poll_interval"]
+        (默认0.1秒)兜底重新评估。
+        """
+        event = self.params.get("event")
+        if event is not None:
+            return event.wait(self.timeout)
+        
         if not self.condition:
             return False
         
-        start_time = time.time()
-        while time.time() - start_time < self.timeout:
-            if self.condition():
-                return True
-            time.sleep(0.1)
-        
-        return False
+        signal = self.params.get("signal") or get_condition_signal()
+        return signal.wait_for(
+            self.condition, self.timeout,
+            fallback_interval=self.params.get("poll_interval", 0.1)
+        )
 
 
 @dataclass
@@ -397,78 +561,129 @@ class MacroAction(BaseAction):
 
 
 class ActionSequence:
-    """动作序列类 - 管理一系列动作的执行"""
+    """动作序列类 - 管理一系列动作的执行
+    
+    并行模式下每个元素(单个动作或嵌套的ActionSequence)作为一个独立分支
+    在线程池中同时执行，占用相同输入设备的动作通过InputArbiter串行化。
+    """
     
     def __init__(self, name: str = "ActionSequence"):
         self.name = name
-        self.actions: List[BaseAction] = []
+        self.actions: List[Union[BaseAction, 'ActionSequence']] = []
         self.current_index = 0
         self.status = ActionStatus.PENDING
         self.parallel_execution = False
+        self.max_workers: Optional[int] = None
+        self._completed_branches = 0
+        self._progress_lock = threading.Lock()
     
-    def add_action(self, action: BaseAction):
+    def add_action(self, action: Union[BaseAction, 'ActionSequence']):
         """添加动作"""
         self.actions.append(action)
     
-    def add_actions(self, actions: List[BaseAction]):
+    def add_actions(self, actions: List[Union[BaseAction, 'ActionSequence']]):
         """批量添加动作"""
         self.actions.extend(actions)
     
-    def execute(self, executor: Optional[Any] = None) -> bool:
-        """执行动作序列"""
+    def execute(self, executor: Optional[Any] = None,
+                arbiter: Optional[InputArbiter] = None) -> bool:
+        """执行动作序列
+        
+        Args:
+            executor: 动作执行器
+            arbiter: 输入设备仲裁器，默认使用全局仲裁器
+        """
         self.status = ActionStatus.RUNNING
+        arbiter = arbiter or get_input_arbiter()
         
         try:
             if self.parallel_execution:
-                return self._execute_parallel(executor)
+                return self._execute_parallel(executor, arbiter)
             else:
-                return self._execute_sequential(executor)
+                return self._execute_sequential(executor, arbiter)
         except Exception as e:
             self.status = ActionStatus.FAILED
             return False
     
-    def _execute_sequential(self, executor: Optional[Any] = None) -> bool:
+    def _run_action(self, action: Union[BaseAction, 'ActionSequence'],
+                    executor: Optional[Any], arbiter: InputArbiter) -> bool:
+        """执行单个动作或嵌套序列，支持重试和回退"""
+        if isinstance(action, ActionSequence):
+            return action.execute(executor, arbiter)
+        
+        devices = action.get_input_devices()
+        for attempt in range(action.retry_count + 1):
+            if attempt > 0:
+                # 重试延迟期间不占用设备，其它分支可以继续使用
+                action.current_retry = attempt
+                if action.delay > 0:
+                    time.sleep(action.delay * attempt)
+            with arbiter.claim(devices):
+                if action.execute(executor):
+                    return True
+        
+        # 尝试执行回退动作(各自占用设备，避免持有一组锁时再申请另一组)
+        for fallback_action in action.fallback_actions:
+            with arbiter.claim(fallback_action.get_input_devices()):
+                if fallback_action.execute(executor):
+                    return True
+        
+        return False
+    
+    def _execute_sequential(self, executor: Optional[Any] = None,
+                            arbiter: Optional[InputArbiter] = None) -> bool:
         """顺序执行动作"""
+        arbiter = arbiter or get_input_arbiter()
+        
         for i, action in enumerate(self.actions):
             self.current_index = i
             
-            # 执行动作，支持重试
-            success = False
-            for attempt in range(action.retry_count + 1):
-                if action.execute(executor):
-                    success = True
-                    break
-                elif attempt < action.retry_count:
-                    action.retry(executor)
-            
-            if not success:
-                # 尝试执行回退动作
-                if action.fallback_actions:
-                    fallback_success = False
-                    for fallback_action in action.fallback_actions:
-                        if fallback_action.execute(executor):
-                            fallback_success = True
-                            break
-                    
-                    if not fallback_success:
-                        self.status = ActionStatus.FAILED
-                        return False
-                else:
-                    self.status = ActionStatus.FAILED
-                    return False
+            if not self._run_action(action, executor, arbiter):
+                self.status = ActionStatus.FAILED
+                return False
         
         self.status = ActionStatus.SUCCESS
         return True
     
-    def _execute_parallel(self, executor: Optional[Any] = None) -> bool:
-        """并行执行动作（简化版本）"""
-        # 这里可以实现真正的并行执行
-        # 目前使用简化的顺序执行
-        return self._execute_sequential(executor)
+    def _execute_parallel(self, executor: Optional[Any] = None,
+                          arbiter: Optional[InputArbiter] = None) -> bool:
+        """并行执行各分支，全部分支成功时序列才成功"""
+        arbiter = arbiter or get_input_arbiter()
+        
+        if not self.actions:
+            self.status = ActionStatus.SUCCESS
+            return True
+        
+        self._completed_branches = 0
+        self.current_index = 0
+        workers = self.max_workers or len(self.actions)
+        
+        def run_branch(branch):
+            try:
+                return self._run_action(branch, executor, arbiter)
+            finally:
+                with self._progress_lock:
+                    self._completed_branches += 1
+                    self.current_index = self._completed_branches
+        
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix=f"{self.name}-branch") as pool:
+            futures = [pool.submit(run_branch, branch) for branch in self.actions]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception:
+                    results.append(False)
+        
+        success = all(results)
+        self.status = ActionStatus.SUCCESS if success else ActionStatus.FAILED
+        return success
     
     def reset(self):
         """重置序列状态"""
         self.current_index = 0
+        self._completed_branches = 0
         self.status = ActionStatus.PENDING
         for action in self.actions:
             action.reset()
@@ -551,5 +766,7 @@ ZZZAction = GameSpecificAction  # ZZZ游戏动作别名
 __all__ = [
     'ActionType', 'ActionStatus', 'BaseAction', 'AutomationAction', 
     'BattleAction', 'GameSpecificAction', 'UIAction', 'MacroAction',
-    'ActionSequence', 'ActionFactory', 'Action', 'EditAction', 'ZZZAction'
+    'ActionSequence', 'ActionFactory', 'Action', 'EditAction', 'ZZZAction',
+    'InputDevice', 'InputArbiter', 'get_input_arbiter',
+    'ConditionSignal', 'get_condition_signal'
 ] 
\ No newline at end of file
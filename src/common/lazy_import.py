@@ -0,0 +1,301 @@
+"""
+重型依赖的延迟加载
+
+torch、torchvision、ultralytics、onnxruntime、cv2等库导入一次要几十到几百毫秒，
+而很多命令(查看配置、导出配置、命令行模式)根本用不到它们。这里提供：
+
+- is_available: 只查找模块规格判断是否安装，不执行模块代码
+- get_version: 从安装元数据读取版本号，不导入模块
+- lazy_import / lazy_attr: 第一次真正使用时才导入的代理对象
+- lazy_exports: 包__init__按需导出子模块中的名称(PEP 562)
+
+is_available只能说明已安装，安装损坏(缺少动态库、版本不兼容等)时要到真正导入才会失败。
+代理对象把导入时的任何异常统一转换为ImportError并记住，调用方按"未安装"处理即可回退。
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@lru_cache(maxsize=None)
+def is_available(name: str) -> bool:
+    """
+    检查模块是否已安装(不执行模块代码)
+
+    用于启动时的快速检查；安装损坏时仍返回True，真正导入失败由代理对象处理。
+
+    Args:
+        name: 模块名，子模块只检查顶层包是否存在
+
+    Returns:
+        bool: 是否安装
+    """
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    top_level = name.partition(".")[0]
+    try:
+        return importlib.util.find_spec(top_level) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=None)
+def _distributions_for(import_name: str) -> Tuple[str, ...]:
+    """导入名对应的发行包名，例如cv2 -> opencv-python"""
+    from importlib import metadata
+
+    try:
+        mapping = metadata.packages_distributions()
+    except Exception:
+        return ()
+    return tuple(mapping.get(import_name.partition(".")[0], ()))
+
+
+def get_version(import_name: str, distribution: Optional[str] = None) -> Optional[str]:
+    """
+    读取已安装依赖的版本号(不导入模块)
+
+    依次尝试：指定的发行包名、与导入名相同的发行包、元数据中的导入名映射；
+    都找不到时，如果模块已经被导入过则读取其__version__。
+
+    Args:
+        import_name: 导入名，例如"cv2"
+        distribution: 发行包名，例如"opencv-python"
+
+    Returns:
+        Optional[str]: 版本号，未安装时返回None
+    """
+    # importlib.metadata本身导入就要几十毫秒，只在读取版本时加载
+    from importlib import metadata
+
+    candidates: List[str] = []
+    if distribution:
+        candidates.append(distribution)
+    candidates.append(import_name.partition(".")[0])
+    candidates.extend(_distributions_for(import_name))
+
+    for candidate in candidates:
+        try:
+            return metadata.version(candidate)
+        except metadata.PackageNotFoundError:
+            continue
+        except Exception:
+            break
+
+    module = sys.modules.get(import_name)
+    if module is not None:
+        version = getattr(module, "__version__", None)
+        if version is not None:
+            return str(version)
+    return None
+
+
+def parse_version(version: Optional[str], parts: int = 2) -> Tuple[int, ...]:
+    """把版本号转换为整数元组用于比较，例如"4.8.0.76" -> (4, 8)"""
+    numbers: List[int] = []
+    for piece in (version or "").split(".")[:parts]:
+        digits = ""
+        for char in piece:
+            if not char.isdigit():
+                break
+            digits += char
+        numbers.append(int(digits) if digits else 0)
+    while len(numbers) < parts:
+        numbers.append(0)
+    return tuple(numbers)
+
+
+def _as_import_error(name: str, error: BaseException) -> ImportError:
+    """把导入模块时的异常转换为ImportError"""
+    if isinstance(error, ImportError):
+        return error
+    converted = ImportError(f"{name} 已安装但导入失败: {error!r}", name=name)
+    converted.__cause__ = error
+    return converted
+
+
+class LazyModule(ModuleType):
+    """
+    延迟导入的模块代理
+
+    创建时不导入目标模块，第一次访问属性时才导入，之后的属性访问直接转发。
+    目标模块未安装或导入失败时，访问属性抛出ImportError；
+    失败结果会被记住，之后的访问不再重复尝试导入。
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_error"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    error = self.__dict__["_lazy_error"]
+                    if error is None:
+                        try:
+                            module = importlib.import_module(self.__name__)
+                        except Exception as e:
+                            error = self.__dict__["_lazy_error"] = _as_import_error(self.__name__, e)
+                    if error is not None:
+                        raise error
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        """目标模块是否已经导入"""
+        return self.__dict__["_lazy_module"] is not None
+
+    @property
+    def is_importable(self) -> bool:
+        """真正导入一次，检查模块是否可用(安装损坏时为False)"""
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._load(), name, value)
+
+    def __dir__(self) -> Iterable[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    创建延迟导入的模块代理
+
+    用法::
+
+        torch = lazy_import("torch")
+        TORCH_AVAILABLE = is_available("torch")
+    """
+    return LazyModule(name)
+
+
+class LazyAttribute:
+    """延迟导入的模块属性(类或函数)，调用或访问属性时才导入"""
+
+    def __init__(self, module: str, attr: str):
+        self._module = lazy_import(module)
+        self._attr = attr
+        self._target: Any = None
+
+    def resolve(self) -> Any:
+        """
+        导入并返回目标属性
+
+        Raises:
+            ImportError: 模块未安装、导入失败或缺少该属性
+        """
+        if self._target is None:
+            module = self._module._load()
+            try:
+                self._target = getattr(module, self._attr)
+            except AttributeError as e:
+                raise ImportError(f"无法从 {module.__name__} 导入 {self._attr}", name=module.__name__) from e
+        return self._target
+
+    @property
+    def is_importable(self) -> bool:
+        """真正导入一次，检查属性是否可用"""
+        try:
+            self.resolve()
+        except ImportError:
+            return False
+        return True
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy attribute {self._module.__name__}.{self._attr}>"
+
+
+def lazy_attr(module: str, attr: str) -> LazyAttribute:
+    """
+    创建延迟导入的模块属性
+
+    用法::
+
+        YOLO = lazy_attr("ultralytics", "YOLO")
+        model = YOLO("yolov5n.pt")  # 这里才导入ultralytics
+    """
+    return LazyAttribute(module, attr)
+
+
+_NO_FALLBACK = object()
+
+
+def lazy_exports(package: str, exports: Dict[str, Tuple[str, str]],
+                 fallbacks: Optional[Dict[str, Any]] = None,
+                 flags: Optional[Dict[str, str]] = None,
+                 default: Any = _NO_FALLBACK) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    为包生成按需导出的__getattr__和__dir__(PEP 562)
+
+    Args:
+        package: 包名(传入__name__)
+        exports: 导出名 -> (相对模块名, 属性名)
+        fallbacks: 导入失败时使用的替代值
+        flags: 可用性标记名 -> 相对模块名，访问时检查该模块能否导入
+        default: 没有替代值时导入失败返回的值，不提供则抛出ImportError
+
+    Returns:
+        (__getattr__, __dir__)
+    """
+    fallbacks = fallbacks or {}
+    flags = flags or {}
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name: str) -> Any:
+        if name in flags:
+            try:
+                importlib.import_module(flags[name], package)
+                value = True
+            except Exception:
+                # 未安装或安装损坏的依赖都视为不可用
+                value = False
+        elif name in exports:
+            module_name, attr = exports[name]
+            try:
+                value = getattr(importlib.import_module(module_name, package), attr)
+            except ImportError:
+                if name in fallbacks:
+                    value = fallbacks[name]
+                elif default is not _NO_FALLBACK:
+                    value = default
+                else:
+                    raise
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        # 缓存到模块命名空间，之后的访问不再经过__getattr__
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports) | set(flags))
+
+    return __getattr__, __dir__
@@ -0,0 +1,520 @@
+"""
+共享系统指标采样器
+
+CPU、内存、磁盘、网络和进程指标由一个后台线程按固定频率统一采样，
+各个性能监控器只读取最近一次的快照，不在调用线程中执行psutil调用，
+也不会因为cpu_percent(interval=...)而阻塞。
+
+指标按组(METRIC_GROUPS)采样，订阅者登记自己需要的组和间隔，
+每组按订阅它的最小间隔采样，未到期的组沿用上一次的值；没有订阅者时线程退出。
+进程总数需要遍历所有pid，开销较大，按slow_interval单独降频采样。
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import psutil
+
+
+@dataclass(frozen=True)
+class ProcessSnapshot:
+    """单个进程的指标快照"""
+
+    pid: int
+    cpu_percent: float = 0.0
+    memory_rss: int = 0
+    memory_vms: int = 0
+    memory_percent: float = 0.0
+    num_threads: int = 0
+    num_fds: Optional[int] = None
+    create_time: float = 0.0
+    name: str = ""
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """一次采样的系统指标快照(只读，可在线程间共享)"""
+
+    timestamp: float
+    cpu_percent: float = 0.0
+    cpu_count: int = 0
+    memory_total: int = 0
+    memory_available: int = 0
+    memory_used: int = 0
+    memory_percent: float = 0.0
+    disk_total: int = 0
+    disk_used: int = 0
+    disk_free: int = 0
+    disk_percent: float = 0.0
+    disk_read_bytes: int = 0
+    disk_write_bytes: int = 0
+    disk_read_count: int = 0
+    disk_write_count: int = 0
+    net_bytes_sent: int = 0
+    net_bytes_recv: int = 0
+    net_packets_sent: int = 0
+    net_packets_recv: int = 0
+    process_count: int = 0
+    # 当前进程和被监视的其他进程，键为pid
+    processes: Dict[int, ProcessSnapshot] = field(default_factory=dict)
+    # 本次采样耗时(秒)
+    sample_duration: float = 0.0
+
+    def process(self, pid: Optional[int] = None) -> Optional[ProcessSnapshot]:
+        """
+        获取进程快照
+
+        Args:
+            pid: 进程ID，默认为当前进程
+
+        Returns:
+            Optional[ProcessSnapshot]: 进程不存在或未被监视时返回None
+        """
+        return self.processes.get(_SELF_PID if pid is None else pid)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return asdict(self)
+
+
+_SELF_PID = psutil.Process().pid
+
+# 指标分组，各组独立按需采样
+METRIC_GROUPS: Tuple[str, ...] = ("cpu", "memory", "disk", "disk_io", "network", "processes")
+
+# 磁盘占用、进程总数等变化缓慢的指标的建议采样间隔(秒)
+SLOW_METRIC_INTERVAL = 10.0
+
+# 订阅的指标: 组名列表(使用同一间隔)或 组名 -> 间隔
+MetricSpec = Union[Iterable[str], Mapping[str, float]]
+
+# 快照回调: 在采样线程中调用
+SnapshotListener = Callable[[SystemSnapshot], None]
+
+
+class MetricsSampler:
+    """系统指标采样器"""
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        slow_interval: float = SLOW_METRIC_INTERVAL,
+        history_size: int = 600,
+        disk_path: str = "/",
+    ):
+        """
+        初始化采样器
+
+        Args:
+            interval: 没有订阅者指定间隔时的默认采样间隔(秒)
+            slow_interval: 进程总数等高开销指标的采样间隔(秒)
+            history_size: 保留的快照数量
+            disk_path: 统计磁盘占用的路径
+        """
+        self.default_interval = max(0.01, interval)
+        self.slow_interval = max(0.0, slow_interval)
+        self.disk_path = disk_path
+        self.logger = logging.getLogger("MetricsSampler")
+
+        self._condition = threading.Condition()
+        self._subscribers: "weakref.WeakKeyDictionary[Any, Dict[str, float]]" = weakref.WeakKeyDictionary()
+        self._listeners: List[SnapshotListener] = []
+        self._watched: Dict[int, psutil.Process] = {}
+        self._history: Deque[SystemSnapshot] = deque(maxlen=max(1, history_size))
+        self._latest: Optional[SystemSnapshot] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # 采样状态(只在持有_sample_lock时访问)
+        self._sample_lock = threading.Lock()
+        self._self_process = psutil.Process()
+        self._cpu_count = psutil.cpu_count() or 0
+        self._process_count = 0
+        self._last_slow_sample = 0.0
+        # 各组最近一次采样的时间(time.monotonic)
+        self._sampled_at: Dict[str, float] = {}
+        self._samples = 0
+
+    # ---- 订阅 ----
+
+    def register(self, owner: Any, interval: Optional[float] = None,
+                 metrics: Optional[MetricSpec] = None) -> None:
+        """
+        登记订阅者，按需启动采样线程
+
+        订阅者被垃圾回收后自动注销。再次登记会替换之前的订阅。
+
+        Args:
+            owner: 订阅者对象
+            interval: 要求的采样间隔(秒)，None使用默认间隔
+            metrics: 需要的指标组(见METRIC_GROUPS)，可以是组名列表(都使用interval)
+                或 组名 -> 间隔 的字典；None表示所有组
+
+        Raises:
+            ValueError: 未知的指标组
+        """
+        default = max(0.01, interval or self.default_interval)
+        if metrics is None:
+            requested = dict.fromkeys(METRIC_GROUPS, default)
+        elif isinstance(metrics, Mapping):
+            requested = {name: max(0.01, value or default) for name, value in metrics.items()}
+        else:
+            requested = dict.fromkeys(metrics, default)
+        _check_groups(requested)
+
+        with self._condition:
+            self._subscribers[owner] = requested
+            self._condition.notify_all()
+        self._ensure_thread()
+
+    def unregister(self, owner: Any) -> None:
+        """注销订阅者；没有订阅者时采样线程自行退出"""
+        with self._condition:
+            self._subscribers.pop(owner, None)
+            self._condition.notify_all()
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """添加快照回调(在采样线程中调用，应尽快返回)"""
+        with self._condition:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: SnapshotListener) -> None:
+        """移除快照回调"""
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def watch_process(self, pid: int) -> bool:
+        """
+        监视其他进程，其指标随每次采样一起收集
+
+        Returns:
+            bool: 进程存在返回True
+        """
+        try:
+            process = psutil.Process(pid)
+            process.cpu_percent(None)  # 初始化CPU计数基准
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        with self._sample_lock:
+            self._watched[pid] = process
+        return True
+
+    def unwatch_process(self, pid: int) -> None:
+        """停止监视进程"""
+        with self._sample_lock:
+            self._watched.pop(pid, None)
+
+    @property
+    def interval(self) -> float:
+        """当前最短的采样间隔：所有订阅者要求的最小值"""
+        with self._condition:
+            return self._current_interval()
+
+    @property
+    def group_intervals(self) -> Dict[str, float]:
+        """各指标组当前的采样间隔，没有订阅者的组不在其中"""
+        with self._condition:
+            return self._group_intervals()
+
+    def _group_intervals(self) -> Dict[str, float]:
+        intervals: Dict[str, float] = {}
+        for requested in list(self._subscribers.values()):
+            for name, value in requested.items():
+                intervals[name] = min(value, intervals.get(name, value))
+        return intervals
+
+    def _current_interval(self) -> float:
+        intervals = self._group_intervals()
+        return min(intervals.values()) if intervals else self.default_interval
+
+    def is_running(self) -> bool:
+        """采样线程是否在运行"""
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    # ---- 读取 ----
+
+    def latest(self) -> Optional[SystemSnapshot]:
+        """获取最近一次快照，不阻塞；尚未采样时返回None"""
+        return self._latest
+
+    def snapshot(self, metrics: Optional[Iterable[str]] = None) -> SystemSnapshot:
+        """
+        获取最近一次快照
+
+        尚未采样过时立即采样所有组。需要的组没有被采样线程维护(没有订阅者或线程未运行)
+        且已超过默认间隔时，在调用线程中只补采这些组(全部为非阻塞调用)。
+
+        Args:
+            metrics: 调用方要读取的指标组，None表示所有组
+        """
+        latest = self._latest
+        if latest is None:
+            return self.sample()
+
+        groups = METRIC_GROUPS if metrics is None else tuple(metrics)
+        _check_groups(groups)
+        with self._condition:
+            maintained = self._group_intervals() if self.is_running() else {}
+        now = time.monotonic()
+        stale = [
+            name for name in groups
+            if name not in maintained
+            and now - self._sampled_at.get(name, float("-inf")) > self.default_interval
+        ]
+        if stale:
+            latest = self.sample(stale)
+        return latest
+
+    def history(self, duration: Optional[float] = None) -> List[SystemSnapshot]:
+        """
+        获取历史快照
+
+        Args:
+            duration: 只返回最近duration秒内的快照，None返回全部
+        """
+        with self._condition:
+            snapshots = list(self._history)
+        if duration is None:
+            return snapshots
+        cutoff = time.time() - duration
+        return [s for s in snapshots if s.timestamp >= cutoff]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取采样器自身的统计信息"""
+        latest = self._latest
+        with self._condition:
+            return {
+                "running": self.is_running(),
+                "interval": self._current_interval(),
+                "group_intervals": self._group_intervals(),
+                "subscribers": len(self._subscribers),
+                "watched_processes": len(self._watched),
+                "samples": self._samples,
+                "last_sample_ms": latest.sample_duration * 1000 if latest else 0.0,
+            }
+
+    # ---- 采样 ----
+
+    def sample(self, metrics: Optional[Iterable[str]] = None) -> SystemSnapshot:
+        """
+        立即采样并发布快照
+
+        Args:
+            metrics: 要采样的指标组，None表示所有组；其余组沿用上一次快照的值
+        """
+        groups = METRIC_GROUPS if metrics is None else tuple(metrics)
+        _check_groups(groups)
+        with self._sample_lock:
+            snapshot = self._collect(groups)
+            self._samples += 1
+            # 在_sample_lock内发布，下一次部分采样一定基于这次的结果
+            with self._condition:
+                self._latest = snapshot
+                self._history.append(snapshot)
+                listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                self.logger.error(f"指标快照回调失败: {e}")
+        return snapshot
+
+    def _collect(self, groups: Iterable[str]) -> SystemSnapshot:
+        """收集指定组的指标(需持有_sample_lock)，其余组沿用上一次快照"""
+        started = time.perf_counter()
+        now = time.time()
+        values: Dict[str, Any] = {"timestamp": now, "cpu_count": self._cpu_count}
+        groups = set(groups)
+        previous = self._latest
+        if previous is None:
+            # 第一次采样收集所有组，快照中不会出现从未采样过的字段
+            groups = set(METRIC_GROUPS)
+
+        if "cpu" in groups:
+            try:
+                # interval=None返回自上次调用以来的CPU占用，不阻塞
+                values["cpu_percent"] = psutil.cpu_percent(interval=None)
+            except Exception as e:
+                self.logger.debug(f"采样CPU失败: {e}")
+
+        if "memory" in groups:
+            try:
+                memory = psutil.virtual_memory()
+                values.update(
+                    memory_total=memory.total,
+                    memory_available=memory.available,
+                    memory_used=memory.used,
+                    memory_percent=memory.percent,
+                )
+            except Exception as e:
+                self.logger.debug(f"采样内存失败: {e}")
+
+        if "disk" in groups:
+            try:
+                disk = psutil.disk_usage(self.disk_path)
+                values.update(
+                    disk_total=disk.total,
+                    disk_used=disk.used,
+                    disk_free=disk.free,
+                    disk_percent=disk.percent,
+                )
+            except Exception as e:
+                self.logger.debug(f"采样磁盘占用失败: {e}")
+
+        if "disk_io" in groups:
+            try:
+                disk_io = psutil.disk_io_counters()
+                if disk_io is not None:
+                    values.update(
+                        disk_read_bytes=disk_io.read_bytes,
+                        disk_write_bytes=disk_io.write_bytes,
+                        disk_read_count=disk_io.read_count,
+                        disk_write_count=disk_io.write_count,
+                    )
+            except Exception as e:
+                self.logger.debug(f"采样磁盘IO失败: {e}")
+
+        if "network" in groups:
+            try:
+                net_io = psutil.net_io_counters()
+                if net_io is not None:
+                    values.update(
+                        net_bytes_sent=net_io.bytes_sent,
+                        net_bytes_recv=net_io.bytes_recv,
+                        net_packets_sent=net_io.packets_sent,
+                        net_packets_recv=net_io.packets_recv,
+                    )
+            except Exception as e:
+                self.logger.debug(f"采样网络IO失败: {e}")
+
+        if not self._process_count or now - self._last_slow_sample >= self.slow_interval:
+            try:
+                self._process_count = len(psutil.pids())
+            except Exception as e:
+                self.logger.debug(f"统计进程数失败: {e}")
+            self._last_slow_sample = now
+        values["process_count"] = self._process_count
+
+        if "processes" in groups:
+            processes = {}
+            own = _process_snapshot(self._self_process)
+            if own is not None:
+                processes[own.pid] = own
+            for pid, process in list(self._watched.items()):
+                snapshot = _process_snapshot(process)
+                if snapshot is None:
+                    # 进程已退出
+                    del self._watched[pid]
+                else:
+                    processes[pid] = snapshot
+            values["processes"] = processes
+
+        sampled_at = time.monotonic()
+        for name in groups:
+            self._sampled_at[name] = sampled_at
+
+        values["sample_duration"] = time.perf_counter() - started
+        if previous is None:
+            return SystemSnapshot(**values)
+        return replace(previous, **values)
+
+    def _ensure_thread(self) -> None:
+        """启动采样线程"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="MetricsSampler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """采样线程主循环：每次只采样到期的组"""
+        # 各组在本线程中计划的上一次采样时间，从采样开始计时，采样耗时不累积到间隔中
+        scheduled: Dict[str, float] = {}
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping or not self._subscribers:
+                        self._thread = None
+                        return
+                    # 订阅变化(如要求更短的间隔)时会被唤醒，按新间隔重新计算
+                    now = time.monotonic()
+                    next_due = {
+                        name: scheduled.get(name, float("-inf")) + interval
+                        for name, interval in self._group_intervals().items()
+                    }
+                    due = [name for name, at in next_due.items() if at <= now]
+                    if due:
+                        break
+                    self._condition.wait(min(next_due.values()) - now)
+
+            for name in due:
+                scheduled[name] = now
+            try:
+                self.sample(due)
+            except Exception as e:
+                self.logger.error(f"采样系统指标失败: {e}")
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """停止采样线程(订阅者仍保留，再次register时重新启动)"""
+        with self._condition:
+            self._stopping = True
+            thread = self._thread
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+
+def _check_groups(groups: Iterable[str]) -> None:
+    """检查指标组名"""
+    unknown = [name for name in groups if name not in METRIC_GROUPS]
+    if unknown:
+        raise ValueError(f"未知的指标组: {', '.join(unknown)}")
+
+
+def _process_snapshot(process: psutil.Process) -> Optional[ProcessSnapshot]:
+    """采集单个进程的指标，进程已退出时返回None"""
+    try:
+        with process.oneshot():
+            memory = process.memory_info()
+            try:
+                num_fds = process.num_fds()
+            except (AttributeError, psutil.AccessDenied):
+                num_fds = None
+            return ProcessSnapshot(
+                pid=process.pid,
+                cpu_percent=process.cpu_percent(None),
+                memory_rss=memory.rss,
+                memory_vms=memory.vms,
+                memory_percent=process.memory_percent(),
+                num_threads=process.num_threads(),
+                num_fds=num_fds,
+                create_time=process.create_time(),
+                name=process.name(),
+            )
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return None
+    except psutil.AccessDenied:
+        return ProcessSnapshot(pid=process.pid)
+
+
+_global_sampler: Optional[MetricsSampler] = None
+_global_lock = threading.Lock()
+
+
+def get_metrics_sampler() -> MetricsSampler:
+    """获取全局共享的采样器实例"""
+    global _global_sampler
+    if _global_sampler is None:
+        with _global_lock:
+            if _global_sampler is None:
+                _global_sampler = MetricsSampler()
+    return _global_sampler
@@ -1,19 +1,87 @@
 """模块发现器
 
 负责扫描项目目录，发现Python模块并构建模块信息。
+
+每个文件只读取和解析一次(语法校验、导入提取、行数统计)，解析结果按
+路径、修改时间和大小缓存到磁盘，再次启动时只重新解析变化的文件。
+冷扫描时文件较多则用多进程并行解析。
 """
 
 import os
 import ast
+import json
 import fnmatch
 import logging
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 from .module_types import ModuleInfo, ModuleType, ModuleStatus, ModuleManagerConfig
 
 
+# 缓存格式版本，解析结果的结构变化时递增
+DISCOVERY_CACHE_VERSION = 1
+
+# 待解析文件少于此数量时不启动进程池(进程启动开销大于收益)
+PARALLEL_PARSE_THRESHOLD = 64
+
+# 可以包含子语句的字段(函数/类体、分支、异常处理、match分支)
+_STATEMENT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def parse_source(content: str) -> Dict[str, Any]:
+    """解析源码，一次得到语法有效性、原始导入列表和行数
+    
+    Args:
+        content: 源码文本
+        
+    Returns:
+        {'valid': bool, 'imports': List[str], 'line_count': int}
+    """
+    line_count = content.count('\n') + (1 if content and not content.endswith('\n') else 0)
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return {'valid': False, 'imports': [], 'line_count': line_count}
+    
+    # import只能出现在语句中，只遍历语句块而不进入表达式，比ast.walk快得多
+    imports = []
+    pending = deque(tree.body)
+    while pending:
+        node = pending.popleft()
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                imports.append(node.module)
+        else:
+            for field in _STATEMENT_FIELDS:
+                children = getattr(node, field, None)
+                if children:
+                    pending.extend(children)
+    
+    return {'valid': True, 'imports': imports, 'line_count': line_count}
+
+
+def parse_file(file_path: str) -> Dict[str, Any]:
+    """读取并解析文件(模块级函数，可在子进程中执行)
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        parse_source的结果，无法读取或解码时valid为False
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError):
+        return {'valid': False, 'imports': [], 'line_count': 0}
+    return parse_source(content)
+
+
 class ModuleDiscovery:
     """模块发现器
     
@@ -34,6 +102,15 @@ class ModuleDiscovery:
         self._discovered_modules: Dict[str, ModuleInfo] = {}
         self._dependency_cache: Dict[str, Set[str]] = {}
         
+        # 解析结果缓存: 绝对路径 -> {mtime_ns, size, valid, imports, line_count}
+        self._parse_cache: Dict[str, Dict[str, Any]] = {}
+        self._parse_cache_dirty = False
+        self._cache_file = self._resolve_cache_file()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._prefetched: Set[str] = set()
+        self._load_parse_cache()
+        
     def _setup_logging(self) -> None:
         """设置日志记录"""
         if self.config.log_discoveries:
@@ -57,14 +134,17 @@ class ModuleDiscovery:
             self.logger.warning(f"目录不存在: {root_path}")
             return discovered_modules
         
-        # 递归遍历目录
-        for current_path in root_path_obj.rglob("*.py"):
-            # 检查是否应该排除此文件
-            if self._should_exclude(current_path):
-                continue
-            
+        hits, misses = self._cache_hits, self._cache_misses
+        
+        # 递归遍历目录(被排除的目录整体跳过)
+        candidates = list(self._iter_python_files(root_path_obj))
+        
+        # 冷扫描时并行解析缓存中没有或已变化的文件
+        self._prefetch(candidates)
+        
+        for current_path, stat_info in candidates:
             try:
-                module_info = self.extract_module_info(str(current_path))
+                module_info = self._build_module_info(str(current_path), stat_info)
                 if module_info:
                     discovered_modules.append(module_info)
                     self._discovered_modules[module_info.path] = module_info
@@ -72,9 +152,38 @@ class ModuleDiscovery:
             except Exception as e:
                 self.logger.error(f"提取模块信息失败 {current_path}: {e}")
         
-        self.logger.info(f"扫描完成，发现 {len(discovered_modules)} 个模块")
+        self._prune_parse_cache(root_path_obj, candidates)
+        self.save_cache()
+        
+        self.logger.info(
+            f"扫描完成，发现 {len(discovered_modules)} 个模块 "
+            f"(解析 {self._cache_misses - misses} 个，缓存命中 {self._cache_hits - hits} 个)"
+        )
         return discovered_modules
     
+    def _iter_python_files(self, root_path: Path):
+        """遍历目录下未被排除的.py文件
+        
+        Yields:
+            (文件路径, os.stat_result)
+        """
+        for dir_path, dir_names, file_names in os.walk(root_path):
+            current_dir = Path(dir_path)
+            # 原地修改dir_names以剪枝，排除规则匹配的是路径子串，目录被排除时其下文件必然也被排除
+            dir_names[:] = sorted(
+                name for name in dir_names if not self._should_exclude(current_dir / name)
+            )
+            for file_name in sorted(file_names):
+                if not file_name.endswith('.py'):
+                    continue
+                file_path = current_dir / file_name
+                if self._should_exclude(file_path):
+                    continue
+                try:
+                    yield file_path, file_path.stat()
+                except OSError:
+                    continue
+    
     def _should_exclude(self, file_path: Path) -> bool:
         """检查文件是否应该被排除
         
@@ -115,12 +224,8 @@ class ModuleDiscovery:
         
         # 检查是否为有效的Python文件
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 尝试解析AST以验证语法
-                ast.parse(content)
-                return True
-        except (SyntaxError, UnicodeDecodeError, FileNotFoundError):
+            return self._get_parse_result(file_path, path_obj.stat())['valid']
+        except OSError:
             return False
     
     def extract_module_info(self, file_path: str) -> Optional[ModuleInfo]:
@@ -132,26 +237,43 @@ class ModuleDiscovery:
         Returns:
             模块信息对象，如果提取失败则返回None
         """
-        if not self.is_python_module(file_path):
+        path_obj = Path(file_path)
+        if path_obj.suffix != '.py':
             return None
         
         try:
-            path_obj = Path(file_path)
+            stat_info = path_obj.stat()
+        except OSError:
+            return None
+        
+        return self._build_module_info(file_path, stat_info)
+    
+    def _build_module_info(self, file_path: str, stat_info: os.stat_result) -> Optional[ModuleInfo]:
+        """根据(可能来自缓存的)解析结果构建模块信息
+        
+        Args:
+            file_path: 文件路径
+            stat_info: 文件状态
             
+        Returns:
+            模块信息对象，文件不是有效的Python模块时返回None
+        """
+        parsed = self._get_parse_result(file_path, stat_info)
+        if not parsed['valid']:
+            return None
+        
+        try:
             # 计算相对路径和模块名
             relative_path = self._get_relative_path(file_path)
             module_name = self._path_to_module_name(relative_path)
             
             # 获取文件统计信息
-            stat_info = path_obj.stat()
             file_size = stat_info.st_size
             last_modified = datetime.fromtimestamp(stat_info.st_mtime)
             
-            # 计算行数
-            line_count = self._count_lines(file_path)
-            
-            # 提取依赖关系
-            dependencies = self._extract_dependencies(file_path)
+            # 行数和依赖关系来自同一次解析
+            line_count = parsed['line_count']
+            dependencies = self._filter_dependencies(parsed['imports'])
             
             # 创建模块信息
             module_info = ModuleInfo(
@@ -244,31 +366,18 @@ class ModuleDiscovery:
         Returns:
             依赖模块列表
         """
-        dependencies = []
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 解析AST
-            tree = ast.parse(content)
-            
-            # 遍历AST节点，查找import语句
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        dependencies.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        dependencies.append(node.module)
-            
-            # 过滤和清理依赖
-            dependencies = self._filter_dependencies(dependencies)
-            
-        except (SyntaxError, FileNotFoundError, UnicodeDecodeError) as e:
+            parsed = self._get_parse_result(file_path, Path(file_path).stat())
+        except OSError as e:
             self.logger.warning(f"提取依赖失败 {file_path}: {e}")
+            return []
+        
+        if not parsed['valid']:
+            self.logger.warning(f"提取依赖失败 {file_path}: 无法解析")
+            return []
         
-        return dependencies
+        # 过滤和清理依赖
+        return self._filter_dependencies(parsed['imports'])
     
     def _filter_dependencies(self, dependencies: List[str]) -> List[str]:
         """过滤和清理依赖列表
@@ -404,7 +513,149 @@ class ModuleDiscovery:
         return self._discovered_modules.copy()
     
     def clear_cache(self) -> None:
-        """清空发现缓存"""
+        """清空发现缓存(包括磁盘上的解析结果缓存)"""
         self._discovered_modules.clear()
         self._dependency_cache.clear()
-        self.logger.info("模块发现缓存已清空")
\ No newline at end of file
+        self._parse_cache.clear()
+        self._parse_cache_dirty = False
+        if self._cache_file and self._cache_file.exists():
+            try:
+                self._cache_file.unlink()
+            except OSError as e:
+                self.logger.warning(f"删除模块发现缓存失败: {e}")
+        self.logger.info("模块发现缓存已清空")
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取解析缓存统计
+        
+        Returns:
+            缓存文件、条目数、命中和解析次数
+        """
+        return {
+            'cache_file': str(self._cache_file) if self._cache_file else None,
+            'entries': len(self._parse_cache),
+            'hits': self._cache_hits,
+            'misses': self._cache_misses
+        }
+    
+    # ---- 解析结果缓存 ----
+    
+    def _resolve_cache_file(self) -> Optional[Path]:
+        """缓存文件路径，未启用缓存时返回None"""
+        cache_file = getattr(self.config, 'discovery_cache_file', None)
+        if not self.config.cache_enabled or not cache_file:
+            return None
+        return Path(cache_file)
+    
+    def _load_parse_cache(self) -> None:
+        """从磁盘加载解析结果缓存，文件损坏或版本不符时忽略"""
+        if not self._cache_file or not self._cache_file.exists():
+            return
+        
+        try:
+            with open(self._cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != DISCOVERY_CACHE_VERSION:
+                self.logger.info("模块发现缓存版本不符，将重新解析")
+                return
+            self._parse_cache = data.get('entries', {})
+            self.logger.debug(f"已加载模块发现缓存: {len(self._parse_cache)} 个文件")
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"加载模块发现缓存失败: {e}")
+            self._parse_cache = {}
+    
+    def save_cache(self) -> bool:
+        """把解析结果缓存写入磁盘(先写临时文件再替换)
+        
+        Returns:
+            是否写入了文件
+        """
+        if not self._cache_file or not self._parse_cache_dirty:
+            return False
+        
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self._cache_file.with_name(self._cache_file.name + '.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'version': DISCOVERY_CACHE_VERSION, 'entries': self._parse_cache},
+                    f, ensure_ascii=False, separators=(',', ':')
+                )
+            os.replace(temp_file, self._cache_file)
+            self._parse_cache_dirty = False
+            return True
+        except OSError as e:
+            self.logger.warning(f"保存模块发现缓存失败: {e}")
+            return False
+    
+    @staticmethod
+    def _cache_key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+    
+    def _lookup(self, key: str, stat_info: os.stat_result) -> Optional[Dict[str, Any]]:
+        """缓存中路径、修改时间和大小都一致的解析结果"""
+        entry = self._parse_cache.get(key)
+        if (entry and entry.get('mtime_ns') == stat_info.st_mtime_ns
+                and entry.get('size') == stat_info.st_size):
+            return entry
+        return None
+    
+    def _store(self, key: str, stat_info: os.stat_result, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        entry = dict(parsed, mtime_ns=stat_info.st_mtime_ns, size=stat_info.st_size)
+        self._parse_cache[key] = entry
+        self._parse_cache_dirty = True
+        return entry
+    
+    def _get_parse_result(self, file_path: str, stat_info: os.stat_result) -> Dict[str, Any]:
+        """获取文件的解析结果，缓存失效时重新解析"""
+        key = self._cache_key(file_path)
+        entry = self._lookup(key, stat_info)
+        if entry is not None:
+            if key in self._prefetched:
+                # 本次扫描刚并行解析的结果，已计入解析次数
+                self._prefetched.discard(key)
+            else:
+                self._cache_hits += 1
+            return entry
+        
+        self._cache_misses += 1
+        return self._store(key, stat_info, parse_file(file_path))
+    
+    def _prefetch(self, candidates: List[Tuple[Path, os.stat_result]]) -> None:
+        """并行解析缓存中没有或已变化的文件"""
+        stale = [
+            (self._cache_key(str(path)), str(path), stat_info)
+            for path, stat_info in candidates
+            if self._lookup(self._cache_key(str(path)), stat_info) is None
+        ]
+        
+        workers = self.config.discovery_workers or os.cpu_count() or 1
+        if len(stale) < PARALLEL_PARSE_THRESHOLD or workers <= 1:
+            return  # 逐个解析
+        
+        # 进程池模块导入较慢，只在需要并行解析时加载
+        from concurrent.futures import ProcessPoolExecutor
+        
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, 8)) as executor:
+                results = executor.map(
+                    parse_file, [file_path for _, file_path, _ in stale],
+                    chunksize=max(1, len(stale) // (workers * 4))
+                )
+                for (key, _, stat_info), parsed in zip(stale, results):
+                    self._store(key, stat_info, parsed)
+                    self._cache_misses += 1
+                    self._prefetched.add(key)
+        except Exception as e:
+            # 进程池不可用(如受限环境)时退回逐个解析
+            self.logger.warning(f"并行解析失败，改为逐个解析: {e}")
+    
+    def _prune_parse_cache(self, root_path: Path, candidates: List[Tuple[Path, os.stat_result]]) -> None:
+        """删除扫描目录下已不存在的文件的缓存条目"""
+        root = self._cache_key(str(root_path)) + os.sep
+        seen = {self._cache_key(str(path)) for path, _ in candidates}
+        removed = [key for key in self._parse_cache if key.startswith(root) and key not in seen]
+        for key in removed:
+            del self._parse_cache[key]
+        if removed:
+            self._parse_cache_dirty = True
\ No newline at end of file
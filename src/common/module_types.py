@@ -184,6 +184,8 @@ class ModuleManagerConfig:
     max_cache_size: int = 1000
     cache_ttl_seconds: int = 3600
     enable_profiling: bool = False
+    discovery_cache_file: Optional[str] = "cache/module_discovery.json"  # 模块发现的解析结果缓存，None表示不持久化
+    discovery_workers: int = 0  # 冷扫描并行解析的进程数，0表示按CPU核数，1表示不并行
     log_level: str = "INFO"
     log_imports: bool = False
     log_discoveries: bool = True
@@ -207,6 +209,8 @@ class ModuleManagerConfig:
             max_cache_size=performance_config.get('max_cache_size', 1000),
             cache_ttl_seconds=performance_config.get('cache_ttl_seconds', 3600),
             enable_profiling=performance_config.get('enable_profiling', False),
+            discovery_cache_file=performance_config.get('discovery_cache_file', "cache/module_discovery.json"),
+            discovery_workers=performance_config.get('discovery_workers', 0),
             log_level=logging_config.get('level', 'INFO'),
             log_imports=logging_config.get('log_imports', False),
             log_discoveries=logging_config.get('log_discoveries', True)
@@ -1,10 +1,10 @@
 import time
-import psutil
 import threading
 from typing import Dict, List, Any
 from dataclasses import dataclass
 from datetime import datetime
 from .logger import GameLogger
+from .metrics_sampler import get_metrics_sampler
 
 @dataclass
 class PerformanceMetrics:
@@ -20,6 +20,9 @@ class PerformanceMetrics:
 class PerformanceMonitor:
     """性能监控器"""
     
+    # 读取的指标组
+    METRIC_GROUPS = ("cpu", "memory", "disk_io", "network")
+    
     def __init__(self, logger: GameLogger, interval: float = 1.0):
         """
         初始化性能监控器
@@ -33,18 +36,25 @@ class PerformanceMonitor:
         self.metrics: List[PerformanceMetrics] = []
         self.is_monitoring = False
         self.monitor_thread = None
+        self._stop_event = threading.Event()
         self.lock = threading.Lock()
         
+        # 系统指标由共享采样器在后台采集，这里只读取快照
+        self.sampler = get_metrics_sampler()
+        
         # 初始化基准值
         self._init_baseline()
         
     def _init_baseline(self):
         """初始化性能基准值"""
+        snapshot = self.sampler.snapshot(self.METRIC_GROUPS)
         self.baseline = {
-            'cpu_percent': psutil.cpu_percent(),
-            'memory_percent': psutil.virtual_memory().percent,
-            'disk_io': psutil.disk_io_counters(),
-            'network_io': psutil.net_io_counters()
+            'cpu_percent': snapshot.cpu_percent,
+            'memory_percent': snapshot.memory_percent,
+            'disk_read_bytes': snapshot.disk_read_bytes,
+            'disk_write_bytes': snapshot.disk_write_bytes,
+            'net_bytes_sent': snapshot.net_bytes_sent,
+            'net_bytes_recv': snapshot.net_bytes_recv
         }
         
     def start(self):
@@ -53,6 +63,8 @@ class PerformanceMonitor:
             return
             
         self.is_monitoring = True
+        self._stop_event.clear()
+        self.sampler.register(self, self.interval, metrics=self.METRIC_GROUPS)
         self.monitor_thread = threading.Thread(target=self._monitor_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
@@ -64,6 +76,8 @@ class PerformanceMonitor:
             return
             
         self.is_monitoring = False
+        self._stop_event.set()
+        self.sampler.unregister(self)
         if self.monitor_thread:
             self.monitor_thread.join()
         self.logger.info("性能监控已停止")
@@ -82,21 +96,22 @@ class PerformanceMonitor:
                 # 检查性能异常
                 self._check_performance(metrics)
                 
-                # 等待下一次收集
-                time.sleep(self.interval)
+                # 等待下一次收集，停止时立即唤醒
+                self._stop_event.wait(self.interval)
             except Exception as e:
                 self.logger.error(f"性能监控出错: {str(e)}")
                 
     def _collect_metrics(self) -> PerformanceMetrics:
-        """收集性能指标"""
+        """收集性能指标(读取共享采样器的最新快照)"""
+        snapshot = self.sampler.snapshot(self.METRIC_GROUPS)
         return PerformanceMetrics(
-            timestamp=time.time(),
-            cpu_percent=psutil.cpu_percent(),
-            memory_percent=psutil.virtual_memory().percent,
-            disk_io_read=psutil.disk_io_counters().read_bytes - self.baseline['disk_io'].read_bytes,
-            disk_io_write=psutil.disk_io_counters().write_bytes - self.baseline['disk_io'].write_bytes,
-            network_io_sent=psutil.net_io_counters().bytes_sent - self.baseline['network_io'].bytes_sent,
-            network_io_recv=psutil.net_io_counters().bytes_recv - self.baseline['network_io'].bytes_recv
+            timestamp=snapshot.timestamp,
+            cpu_percent=snapshot.cpu_percent,
+            memory_percent=snapshot.memory_percent,
+            disk_io_read=snapshot.disk_read_bytes - self.baseline['disk_read_bytes'],
+            disk_io_write=snapshot.disk_write_bytes - self.baseline['disk_write_bytes'],
+            network_io_sent=snapshot.net_bytes_sent - self.baseline['net_bytes_sent'],
+            network_io_recv=snapshot.net_bytes_recv - self.baseline['net_bytes_recv']
         )
         
     def _check_performance(self, metrics: PerformanceMetrics):
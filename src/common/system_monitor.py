@@ -9,6 +9,8 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from .metrics_sampler import SLOW_METRIC_INTERVAL, MetricsSampler, get_metrics_sampler
+
 @dataclass
 class SystemMetrics:
     """系统指标"""
@@ -34,16 +36,22 @@ class PerformanceAlert:
 class SystemMonitor:
     """系统资源监控器"""
     
-    def __init__(self, check_interval: float = 5.0):
+    # _collect_metrics读取的指标组(进程总数由采样器单独降频统计)
+    _METRIC_GROUPS = ("cpu", "memory", "disk", "network")
+    
+    def __init__(self, check_interval: float = 5.0, sampler: Optional[MetricsSampler] = None):
         """
         初始化监控器
         
         Args:
             check_interval: 检查间隔（秒）
+            sampler: 系统指标采样器，默认使用全局共享实例
         """
         self.check_interval = check_interval
+        self.sampler = sampler or get_metrics_sampler()
         self.is_monitoring = False
         self.monitor_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         
         # 性能阈值
         self.thresholds = {
@@ -74,12 +82,22 @@ class SystemMonitor:
             return
         
         self.is_monitoring = True
+        self._stop_event.clear()
+        # 磁盘占用变化缓慢，降频采样
+        self.sampler.register(self, metrics={
+            "cpu": self.check_interval,
+            "memory": self.check_interval,
+            "network": self.check_interval,
+            "disk": max(self.check_interval, SLOW_METRIC_INTERVAL),
+        })
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
     
     def stop_monitoring(self):
         """停止监控"""
         self.is_monitoring = False
+        self._stop_event.set()
+        self.sampler.unregister(self)
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5.0)
     
@@ -103,45 +121,35 @@ class SystemMonitor:
                 if self.optimization_enabled:
                     self._perform_optimization(metrics)
                 
-                time.sleep(self.check_interval)
+                # 停止时立即唤醒，不必等满一个间隔
+                self._stop_event.wait(self.check_interval)
                 
             except Exception as e:
                 print(f"监控循环错误: {e}")
-                time.sleep(self.check_interval)
+                self._stop_event.wait(self.check_interval)
     
     def _collect_metrics(self) -> SystemMetrics:
-        """收集系统指标"""
+        """收集系统指标
+        
+        读取共享采样器的最新快照：CPU使用率是两次采样之间的平均值，
+        不再阻塞1秒；进程数由采样器降频统计，不再每次遍历所有pid。
+        """
         try:
-            # CPU使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # 内存信息
-            memory = psutil.virtual_memory()
-            
-            # 磁盘信息
-            disk = psutil.disk_usage('/')
-            
-            # 进程数量
-            process_count = len(psutil.pids())
-            
-            # 网络IO
-            net_io = psutil.net_io_counters()
-            network_io = {
-                'bytes_sent': net_io.bytes_sent,
-                'bytes_recv': net_io.bytes_recv,
-                'packets_sent': net_io.packets_sent,
-                'packets_recv': net_io.packets_recv
-            }
-            
+            snapshot = self.sampler.snapshot(self._METRIC_GROUPS)
             return SystemMetrics(
-                timestamp=time.time(),
-                cpu_percent=cpu_percent,
-                memory_percent=memory.percent,
-                memory_available=memory.available,
-                disk_percent=disk.percent,
-                disk_free=disk.free,
-                process_count=process_count,
-                network_io=network_io
+                timestamp=snapshot.timestamp,
+                cpu_percent=snapshot.cpu_percent,
+                memory_percent=snapshot.memory_percent,
+                memory_available=snapshot.memory_available,
+                disk_percent=snapshot.disk_percent,
+                disk_free=snapshot.disk_free,
+                process_count=snapshot.process_count,
+                network_io={
+                    'bytes_sent': snapshot.net_bytes_sent,
+                    'bytes_recv': snapshot.net_bytes_recv,
+                    'packets_sent': snapshot.net_packets_sent,
+                    'packets_recv': snapshot.net_packets_recv
+                }
             )
             
         except Exception as e:
@@ -56,6 +56,73 @@ class IWindowEventHandler(ABC):
         pass
 
 
+class IWindowStateBackend(ABC):
+    """窗口状态后端接口
+    
+    为窗口状态跟踪器提供窗口枚举、单窗口查询和变化事件推送，
+    使跟踪逻辑与具体平台(Win32钩子、测试替身等)解耦。
+    """
+    
+    @abstractmethod
+    def enumerate_windows(self) -> List[WindowInfo]:
+        """枚举当前所有顶层窗口
+        
+        Returns:
+            窗口信息列表
+        """
+        pass
+    
+    @abstractmethod
+    def query_window(self, handle: int) -> Optional[WindowInfo]:
+        """查询单个窗口的最新状态
+        
+        Args:
+            handle: 窗口句柄
+            
+        Returns:
+            窗口信息，窗口不存在或不需要跟踪时返回None
+        """
+        pass
+    
+    @abstractmethod
+    def start(self, callback: Callable[[str, int], None]) -> None:
+        """开始推送窗口变化事件
+        
+        Args:
+            callback: 事件回调，参数为(WindowEventType常量, 窗口句柄)
+            
+        Raises:
+            WindowManagerError: 启动失败
+        """
+        pass
+    
+    @abstractmethod
+    def stop(self) -> None:
+        """停止推送窗口变化事件"""
+        pass
+    
+    def set_target_process(self, process_id: Optional[int]) -> None:
+        """设置需要推送显示、隐藏、位置和标题变化事件的目标进程
+        
+        默认后端推送所有进程的事件，忽略此设置。
+        
+        Args:
+            process_id: 目标进程ID，None表示没有目标
+        """
+        pass
+    
+    def tracks_process(self, process_id: int) -> bool:
+        """检查后端是否推送指定进程窗口的状态变化事件
+        
+        Args:
+            process_id: 进程ID
+            
+        Returns:
+            不推送时返回False，调用方需要自行重新查询该进程的窗口
+        """
+        return True
+
+
 class IWindowManager(ABC):
     """统一窗口管理器接口
     
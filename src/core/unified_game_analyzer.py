@@ -14,14 +14,13 @@ from typing import Dict, List, Optional, Tuple, Any
 import cv2
 import numpy as np
 
-# 可选的深度学习支持
-try:
-    import torch
-    from torchvision import models, transforms
-    from PIL import Image
-    DEEP_LEARNING_AVAILABLE = True
-except ImportError:
-    DEEP_LEARNING_AVAILABLE = False
+# 可选的深度学习支持，加载特征提取模型时才导入
+from ..common.lazy_import import is_available, lazy_import
+
+torch = lazy_import("torch")
+models = lazy_import("torchvision.models")
+transforms = lazy_import("torchvision.transforms")
+DEEP_LEARNING_AVAILABLE = all(is_available(name) for name in ("torch", "torchvision", "PIL"))
 
 # 修复导入路径
 import sys
@@ -30,6 +29,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ..services.logger import GameLogger
 from ..services.image_processor import ImageProcessor
 from ..services.config import Config
+from ..performance.tracing import span, traced
 
 
 @dataclass
@@ -130,10 +130,16 @@ class UnifiedGameAnalyzer:
             ])
             
             self.logger.info("深度学习模型初始化成功")
+        except ImportError as e:
+            # 已安装但导入失败(安装损坏)，与未安装一样回退
+            self.logger.warning(f"深度学习库导入失败，将仅使用传统图像处理方法: {e}")
+            self.model = None
+            self.transform = None
         except Exception as e:
             self.logger.error(f"深度学习模型初始化失败: {e}")
             self.model = None
     
+    @traced("analyzer.frame", category="analyzer")
     def analyze_frame(self, frame: Optional[np.ndarray]) -> Dict[str, Any]:
         """
         分析游戏画面帧 - 主要分析入口
@@ -146,7 +152,8 @@ class UnifiedGameAnalyzer:
         """
         try:
             # 输入验证和预处理
-            processed_frame = self._preprocess_frame(frame)
+            with span("analyzer.preprocess", category="analyzer"):
+                processed_frame = self._preprocess_frame(frame)
             if processed_frame is None:
                 return self._get_default_state()
             
@@ -156,11 +163,13 @@ class UnifiedGameAnalyzer:
             state["timestamp"] = self.image_processor.get_current_timestamp()
             
             # 传统图像处理分析
-            traditional_results = self._analyze_traditional(processed_frame)
+            with span("analyzer.traditional", category="analyzer"):
+                traditional_results = self._analyze_traditional(processed_frame)
             
             # 深度学习分析（如果可用）
             if self.model is not None:
-                deep_learning_results = self._analyze_deep_learning(processed_frame)
+                with span("analyzer.deep_learning", category="analyzer"):
+                    deep_learning_results = self._analyze_deep_learning(processed_frame)
                 # 合并结果
                 state.update(deep_learning_results)
             
@@ -248,12 +257,14 @@ class UnifiedGameAnalyzer:
         
         try:
             # 场景检测
-            scene = self._detect_scene(frame)
+            with span("analyzer.scene_match", category="analyzer"):
+                scene = self._detect_scene(frame)
             if scene:
                 results["scene"] = scene
             
             # UI元素检测
-            ui_elements = self._detect_ui_elements(frame)
+            with span("analyzer.ui_match", category="analyzer"):
+                ui_elements = self._detect_ui_elements(frame)
             if ui_elements:
                 results["ui_elements"] = ui_elements
             
@@ -35,66 +35,157 @@ import jedi
 
 
 class PythonHighlighter(QSyntaxHighlighter):
-    """Python语法高亮器"""
+    """Python语法高亮器
+
+    每个文本块只用一个组合正则扫描一遍，标识符通过字典查表区分关键字和内置函数。
+    跨行的三引号字符串通过块状态传递给下一块；QSyntaxHighlighter只在块状态
+    变化时继续重新高亮后续块，因此一次编辑通常只重新高亮被修改的块。
+    """
+
+    # 块状态
+    STATE_NORMAL = 0
+    STATE_SINGLE_TRIPLE = 1  # 位于单引号三引号字符串内
+    STATE_DOUBLE_TRIPLE = 2  # 位于双引号三引号字符串内
+
+    _TRIPLE_QUOTES = {STATE_SINGLE_TRIPLE: "'''", STATE_DOUBLE_TRIPLE: '"""'}
+
+    # 组合词法规则，分支顺序即优先级
+    _TOKEN_RE = re.compile(
+        r"""
+        (?P<comment>\#.*)
+        | (?P<triple>(?:[rRbBuUfF]{1,2})?(?:'{3}|"{3}))
+        | (?P<string>(?:[rRbBuUfF]{1,2})?
+            (?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'))
+        | (?P<number>\b(?:0[xXoObB][0-9a-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b)
+        | (?P<word>[^\W\d]\w*)
+        """,
+        re.VERBOSE,
+    )
+
+    # 标识符 -> 格式名
+    _WORD_KINDS: Dict[str, str] = {
+        **{word: "builtin" for word in dir(builtins) if not word.startswith("_")},
+        **{word: "keyword" for word in keyword.kwlist},
+    }
+
+    # 紧跟在这些关键字后的标识符使用对应格式
+    _NAME_KINDS = {"def": "function", "class": "class"}
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        # 语法高亮规则
-        self.highlighting_rules = []
+        self.formats: Dict[str, QTextCharFormat] = {}
 
         # 关键字格式
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor("#FF6B8B"))
         keyword_format.setFontWeight(700)
-
-        keywords = keyword.kwlist
-        for word in keywords:
-            pattern = r"\b" + word + r"\b"
-            self.highlighting_rules.append((pattern, keyword_format))
+        self.formats["keyword"] = keyword_format
 
         # 内置函数格式
         builtin_format = QTextCharFormat()
         builtin_format.setForeground(QColor("#66D9EF"))
-
-        builtins_list = dir(builtins)
-        for word in builtins_list:
-            if not word.startswith("_"):
-                pattern = r"\b" + word + r"\b"
-                self.highlighting_rules.append((pattern, builtin_format))
+        self.formats["builtin"] = builtin_format
 
         # 字符串格式
         string_format = QTextCharFormat()
         string_format.setForeground(QColor("#A6E22E"))
-        self.highlighting_rules.append((r'"[^"\\]*(\\.[^"\\]*)*"', string_format))
-        self.highlighting_rules.append((r"'[^'\\]*(\\.[^'\\]*)*'", string_format))
+        self.formats["string"] = string_format
 
         # 注释格式
         comment_format = QTextCharFormat()
         comment_format.setForeground(QColor("#75715E"))
-        self.highlighting_rules.append((r"#[^\n]*", comment_format))
+        self.formats["comment"] = comment_format
 
         # 数字格式
         number_format = QTextCharFormat()
         number_format.setForeground(QColor("#AE81FF"))
-        self.highlighting_rules.append((r"\b\d+\b", number_format))
+        self.formats["number"] = number_format
 
         # 类名格式
         class_format = QTextCharFormat()
         class_format.setForeground(QColor("#A6E22E"))
         class_format.setFontWeight(700)
-        self.highlighting_rules.append((r"\bclass\s+\w+\b", class_format))
+        self.formats["class"] = class_format
 
         # 函数名格式
         function_format = QTextCharFormat()
         function_format.setForeground(QColor("#F92672"))
-        self.highlighting_rules.append((r"\bdef\s+\w+\b", function_format))
+        self.formats["function"] = function_format
 
     def highlightBlock(self, text: str):
         """高亮文本块"""
-        for pattern, format in self.highlighting_rules:
-            for match in re.finditer(pattern, text):
-                self.setFormat(match.start(), match.end() - match.start(), format)
+        string_format = self.formats["string"]
+        self.setCurrentBlockState(self.STATE_NORMAL)
+
+        pos = 0
+        state = self.previousBlockState()
+        if state in self._TRIPLE_QUOTES:
+            pos = self._close_triple(text, 0, 0, state)
+            if pos < 0:
+                return
+
+        name_kind = None
+        length = len(text)
+        while pos < length:
+            match = self._TOKEN_RE.search(text, pos)
+            if match is None:
+                break
+
+            kind = match.lastgroup
+            start, end = match.span()
+            pos = end
+
+            if kind == "word":
+                word = match.group()
+                if name_kind is not None:
+                    self.setFormat(start, end - start, self.formats[name_kind])
+                    name_kind = None
+                    continue
+                word_kind = self._WORD_KINDS.get(word)
+                if word_kind is not None:
+                    self.setFormat(start, end - start, self.formats[word_kind])
+                name_kind = self._NAME_KINDS.get(word)
+                continue
+
+            name_kind = None
+            if kind == "triple":
+                quote = match.group()[-3:]
+                state = (
+                    self.STATE_SINGLE_TRIPLE if quote == "'''" else self.STATE_DOUBLE_TRIPLE
+                )
+                pos = self._close_triple(text, start, end, state)
+                if pos < 0:
+                    return
+            elif kind == "string":
+                self.setFormat(start, end - start, string_format)
+            else:
+                self.setFormat(start, end - start, self.formats[kind])
+
+    def _close_triple(self, text: str, start: int, search_from: int, state: int) -> int:
+        """
+        查找三引号字符串的结束位置并设置格式
+
+        Returns:
+            int: 字符串结束后的位置；未结束时返回-1并设置块状态
+        """
+        quote = self._TRIPLE_QUOTES[state]
+        pos = search_from
+        while True:
+            close = text.find(quote, pos)
+            if close < 0:
+                self.setFormat(start, len(text) - start, self.formats["string"])
+                self.setCurrentBlockState(state)
+                return -1
+            # 跳过被转义的引号
+            backslashes = 0
+            while close - backslashes - 1 >= search_from and text[close - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                end = close + 3
+                self.setFormat(start, end - start, self.formats["string"])
+                return end
+            pos = close + 1
 
 
 class CodeEditor(QTextEdit):
@@ -2,9 +2,12 @@
 决策引擎
 负责游戏状态分析和行为决策
 """
+import bisect
 import logging
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Tuple, FrozenSet
 
 import cv2
 import numpy as np
@@ -19,6 +22,8 @@ class Rule:
     action: Callable[[Dict[str, Any]], None]
     priority: int = 0
     description: str = ""
+    # 条件读取的状态键(顶层键或data中的键)，None表示每次决策都需要评估
+    reads: Optional[Tuple[str, ...]] = None
 
 
 class DecisionEngineError(Exception):
@@ -80,7 +85,15 @@ class StateValidator:
 
 
 class DecisionEngine:
-    """决策引擎类"""
+    """决策引擎类
+
+    规则在注册时按优先级插入有序列表，并按读取的状态键建立索引，
+    决策时只评估所需键都存在于当前状态中的规则。同一帧(两次状态更新之间)
+    内条件结果会被缓存，共享同一条件函数的规则只评估一次。
+    """
+
+    # 决策延迟统计窗口大小
+    LATENCY_WINDOW = 1000
 
     def __init__(self) -> None:
         """初始化决策引擎"""
@@ -90,6 +103,29 @@ class DecisionEngine:
         self.actions: Dict[str, Callable] = {}
         self.state_validator = StateValidator()
 
+        # 按(-优先级, 注册顺序)排好序的规则
+        self._ranked_rules: List[Rule] = []
+        self._rank_keys: List[Tuple[int, int]] = []
+        self._rule_ranks: Dict[str, Tuple[int, int]] = {}
+        self._rule_seq = 0
+
+        # 状态键 -> 读取该键的规则名称；未声明读取键的规则总是候选
+        self._key_index: Dict[str, List[str]] = {}
+        self._unindexed_rules: List[str] = []
+        self._candidate_cache: Dict[FrozenSet[str], List[Rule]] = {}
+
+        # 帧内条件缓存，状态变化时失效
+        self._frame = 0
+        self._memo_frame = -1
+        self._condition_memo: Dict[int, bool] = {}
+
+        # 决策延迟统计
+        self._latencies: deque = deque(maxlen=self.LATENCY_WINDOW)
+        self._decision_count = 0
+        self._matched_count = 0
+        self._rules_evaluated = 0
+        self._memo_hits = 0
+
     def register_rule(self, rule: Rule) -> None:
         """
         注册决策规则
@@ -110,6 +146,21 @@ class DecisionEngine:
             raise DecisionEngineError("规则的条件和动作必须是可调用对象")
 
         self.rules[rule.name] = rule
+
+        rank = (-rule.priority, self._rule_seq)
+        self._rule_seq += 1
+        position = bisect.bisect_right(self._rank_keys, rank)
+        self._rank_keys.insert(position, rank)
+        self._ranked_rules.insert(position, rule)
+        self._rule_ranks[rule.name] = rank
+
+        if rule.reads is None:
+            self._unindexed_rules.append(rule.name)
+        else:
+            for key in set(rule.reads):
+                self._key_index.setdefault(key, []).append(rule.name)
+        self._candidate_cache.clear()
+
         self.logger.info(f"规则'{rule.name}'已注册")
 
     def register_action(
@@ -157,6 +208,7 @@ class DecisionEngine:
                 return
 
             self.state.update(state_update)
+            self._frame += 1
             self.logger.debug(f"状态已更新: {state_update}")
 
         except Exception as e:
@@ -179,26 +231,113 @@ class DecisionEngine:
             if not self.rules:
                 raise DecisionEngineError("没有注册任何规则")
 
-            sorted_rules = sorted(
-                self.rules.values(), key=lambda x: x.priority, reverse=True
-            )
+            started = time.perf_counter()
+            matched: Optional[str] = None
 
-            for rule in sorted_rules:
+            if self._memo_frame != self._frame:
+                self._condition_memo.clear()
+                self._memo_frame = self._frame
+
+            for rule in self._get_candidate_rules():
                 try:
-                    if rule.condition(self.state):
+                    if self._evaluate_condition(rule):
                         rule.action(self.state)
-                        self.logger.info(f"执行规则: {rule.name}")
-                        return rule.name
+                        # 动作可能修改状态，之后的缓存结果不再可靠
+                        self._frame += 1
+                        matched = rule.name
+                        break
                 except Exception as e:
                     self.logger.error(f"规则'{rule.name}'执行失败: {e}")
                     continue
 
-            self.logger.debug("没有满足条件的规则")
-            return None
+            self._record_decision(time.perf_counter() - started, matched)
+            if matched is None:
+                self.logger.debug("没有满足条件的规则")
+            else:
+                self.logger.debug(f"执行规则: {matched}")
+            return matched
 
         except Exception as e:
             raise DecisionEngineError(f"决策失败: {str(e)}") from e
 
+    def _get_candidate_rules(self) -> List[Rule]:
+        """获取读取键都存在于当前状态中的规则(按优先级排序)"""
+        present = set(self.state.keys())
+        data = self.state.get("data")
+        if isinstance(data, dict):
+            present.update(data.keys())
+        present_keys = frozenset(present)
+
+        candidates = self._candidate_cache.get(present_keys)
+        if candidates is not None:
+            return candidates
+
+        names = set(self._unindexed_rules)
+        for key in present_keys:
+            for name in self._key_index.get(key, ()):
+                if name not in names and all(
+                    k in present_keys for k in self.rules[name].reads
+                ):
+                    names.add(name)
+
+        candidates = sorted(
+            (self.rules[name] for name in names),
+            key=lambda rule: self._rule_ranks[rule.name],
+        )
+        self._candidate_cache[present_keys] = candidates
+        return candidates
+
+    def _evaluate_condition(self, rule: Rule) -> bool:
+        """评估规则条件，同一帧内复用相同条件函数的结果"""
+        key = id(rule.condition)
+        result = self._condition_memo.get(key)
+        if result is not None:
+            self._memo_hits += 1
+            return result
+
+        self._rules_evaluated += 1
+        try:
+            result = bool(rule.condition(self.state))
+        except Exception:
+            # 本帧内不再重复评估出错的条件
+            self._condition_memo[key] = False
+            raise
+        self._condition_memo[key] = result
+        return result
+
+    def _record_decision(self, latency: float, matched: Optional[str]) -> None:
+        """记录单次决策的耗时"""
+        self._latencies.append(latency)
+        self._decision_count += 1
+        if matched is not None:
+            self._matched_count += 1
+
+    def get_decision_metrics(self) -> Dict[str, Any]:
+        """
+        获取决策延迟统计
+
+        Returns:
+            Dict: 决策次数、最近窗口内的延迟(毫秒)和条件评估统计
+        """
+        latencies = sorted(self._latencies)
+        count = len(latencies)
+        metrics = {
+            "decisions": self._decision_count,
+            "matched": self._matched_count,
+            "rules_evaluated": self._rules_evaluated,
+            "memo_hits": self._memo_hits,
+            "avg_latency_ms": 0.0,
+            "p95_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "last_latency_ms": 0.0,
+        }
+        if count:
+            metrics["avg_latency_ms"] = sum(latencies) / count * 1000
+            metrics["p95_latency_ms"] = latencies[min(count - 1, int(count * 0.95))] * 1000
+            metrics["max_latency_ms"] = latencies[-1] * 1000
+            metrics["last_latency_ms"] = self._latencies[-1] * 1000
+        return metrics
+
     def execute_action(self, action_name: str) -> bool:
         """
         执行动作
@@ -217,7 +356,8 @@ class DecisionEngine:
                 raise DecisionEngineError(f"未知的动作: {action_name}")
 
             self.actions[action_name](self.state)
-            self.logger.info(f"执行动作: {action_name}")
+            self._frame += 1
+            self.logger.debug(f"执行动作: {action_name}")
             return True
 
         except Exception as e:
@@ -268,11 +408,19 @@ class DecisionEngine:
     def clear_state(self) -> None:
         """清除当前状态"""
         self.state.clear()
+        self._frame += 1
         self.logger.info("状态已清除")
 
     def clear_rules(self) -> None:
         """清除所有规则"""
         self.rules.clear()
+        self._ranked_rules.clear()
+        self._rank_keys.clear()
+        self._rule_ranks.clear()
+        self._key_index.clear()
+        self._unindexed_rules.clear()
+        self._candidate_cache.clear()
+        self._condition_memo.clear()
         self.logger.info("规则已清除")
 
     def clear_actions(self) -> None:
@@ -313,7 +461,5 @@ class DecisionEngine:
                 "priority": rule.priority,
                 "description": rule.description,
             }
-            for rule in sorted(
-                self.rules.values(), key=lambda x: x.priority, reverse=True
-            )
+            for rule in self._ranked_rules
         ]
@@ -3,13 +3,21 @@
 """
 import logging
 import time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 
 import keyboard
 import pyautogui
 import win32con
 import win32gui
 
+from .color_probe import (
+    ScreenFrame,
+    bounding_region,
+    find_color,
+    match_points,
+    sample_colors,
+)
+
 
 class ActionExecutorError(Exception):
     """动作执行器相关错误"""
@@ -294,13 +302,30 @@ class ActionExecutor:
         clicks = params.get("clicks", 0)
         pyautogui.scroll(clicks)
 
-    def get_pixel_color(self, x: int, y: int) -> Any:
+    def capture_frame(self, region: Optional[Any] = None) -> ScreenFrame:
+        """
+        截取一帧画面，供多次取色和颜色搜索共用。
+
+        Args:
+            region: 截取区域 (x, y, width, height)，None表示全屏
+
+        Returns:
+            ScreenFrame: 画面及其屏幕原点
+        """
+        if region is not None:
+            region = tuple(int(v) for v in region)
+            image = pyautogui.screenshot(region=region)
+            return ScreenFrame.from_image(image, origin=(region[0], region[1]))
+        return ScreenFrame.from_image(pyautogui.screenshot())
+
+    def get_pixel_color(self, x: int, y: int, frame: Optional[ScreenFrame] = None) -> Any:
         """
         获取指定位置的像素颜色。
 
         Args:
             x: X坐标
             y: Y坐标
+            frame: 已截取的画面，None时单独取色
 
         Returns:
             Any: RGB颜色值
@@ -310,18 +335,71 @@ class ActionExecutor:
         """
         if x < 0 or y < 0:
             raise ValueError("Coordinates cannot be negative")
+        if frame is not None:
+            return sample_colors(frame, [(x, y)])[0]
         return pyautogui.pixel(x, y)
 
-    def search_color(self, color: Any, region: Optional[Any] = None) -> Optional[Any]:
+    def get_pixel_colors(
+        self, points: Sequence[Any], frame: Optional[ScreenFrame] = None
+    ) -> List[Any]:
+        """
+        批量获取像素颜色，所有点只截取一次画面。
+
+        Args:
+            points: 坐标列表 [(x, y), ...]
+            frame: 已截取的画面，None时截取包含所有点的最小区域
+
+        Returns:
+            List[Any]: 每个点的RGB颜色，画面外的点为None
+        """
+        if not points:
+            return []
+        if frame is None:
+            frame = self.capture_frame(bounding_region(points))
+        return sample_colors(frame, points)
+
+    def check_pixels(
+        self, checks: Sequence[Sequence[Any]], frame: Optional[ScreenFrame] = None
+    ) -> List[bool]:
+        """
+        批量检查像素颜色，所有检查在同一帧画面上向量化完成。
+
+        Args:
+            checks: 检查列表，每项为 (x, y, color) 或 (x, y, color, tolerance)
+            frame: 已截取的画面，None时截取包含所有点的最小区域
+
+        Returns:
+            List[bool]: 每项检查是否匹配
+        """
+        if not checks:
+            return []
+
+        points = [(check[0], check[1]) for check in checks]
+        colors = [check[2] for check in checks]
+        tolerances = [check[3] if len(check) > 3 else 0 for check in checks]
+
+        if frame is None:
+            frame = self.capture_frame(bounding_region(points))
+        return match_points(frame, points, colors, tolerances).tolist()
+
+    def search_color(
+        self,
+        color: Any,
+        region: Optional[Any] = None,
+        tolerance: int = 0,
+        frame: Optional[ScreenFrame] = None,
+    ) -> Optional[Any]:
         """
         在屏幕上搜索指定颜色。
 
         Args:
             color: RGB颜色值
-            region: 搜索区域 (x, y, width, height)
+            region: 搜索区域 (x, y, width, height)，None表示全屏
+            tolerance: 每通道容差
+            frame: 已截取的画面，None时截取搜索区域
 
         Returns:
-            Optional[Any]: 找到的位置，未找到则返回None
+            Optional[Any]: 找到的第一个位置(按行优先)，未找到则返回None
 
         Raises:
             ValueError: 参数无效
@@ -335,15 +413,45 @@ class ActionExecutor:
             raise ValueError("Invalid region parameters")
 
         try:
-            pos = (
-                pyautogui.pixelMatchesColor(region[0], region[1], color)
-                if region
-                else None
-            )
-            return (region[0], region[1]) if pos else None
-        except Exception:
+            if frame is None:
+                frame = self.capture_frame(region)
+            return find_color(frame, color, tolerance, region)
+        except Exception as e:
+            self.logger.debug(f"颜色搜索失败: {e}")
             return None
 
+    def search_colors(
+        self, queries: Sequence[Sequence[Any]], frame: Optional[ScreenFrame] = None
+    ) -> List[Optional[Any]]:
+        """
+        批量搜索颜色，所有搜索共用一帧画面。
+
+        Args:
+            queries: 搜索列表，每项为 (color, region) 或 (color, region, tolerance)，
+                region为None表示整个画面
+            frame: 已截取的画面，None时截取覆盖所有区域的最小范围
+
+        Returns:
+            List[Optional[Any]]: 每项搜索找到的位置
+        """
+        if not queries:
+            return []
+
+        if frame is None:
+            regions = [query[1] for query in queries]
+            if any(region is None for region in regions):
+                frame = self.capture_frame()
+            else:
+                corners = []
+                for x, y, w, h in regions:
+                    corners.extend([(x, y), (x + w - 1, y + h - 1)])
+                frame = self.capture_frame(bounding_region(corners))
+
+        return [
+            find_color(frame, query[0], query[2] if len(query) > 2 else 0, query[1])
+            for query in queries
+        ]
+
     def activate_window(self, window_title: str) -> bool:
         """
         激活指定窗口
@@ -0,0 +1,205 @@
+"""
+颜色探测模块，在同一帧画面上批量完成取色、颜色比对和区域颜色搜索。
+"""
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+Color = Tuple[int, int, int]
+Point = Tuple[int, int]
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+
+
+@dataclass
+class ScreenFrame:
+    """
+    一帧屏幕画面。
+
+    Attributes:
+        pixels: RGB像素数组，形状为(高, 宽, 3)
+        origin: 画面左上角对应的屏幕坐标
+    """
+
+    pixels: np.ndarray
+    origin: Point = (0, 0)
+
+    @classmethod
+    def from_image(cls, image: Any, origin: Point = (0, 0)) -> "ScreenFrame":
+        """
+        从截图(PIL图像或数组)创建画面。
+
+        Args:
+            image: 截图，RGB或RGBA
+            origin: 截图左上角的屏幕坐标
+
+        Returns:
+            ScreenFrame: 画面对象
+        """
+        pixels = np.asarray(image)
+        if pixels.ndim != 3 or pixels.shape[2] < 3:
+            raise ValueError("Screenshot must be an RGB image")
+        return cls(pixels[:, :, :3], origin)
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    def contains_region(self, region: Region) -> bool:
+        """判断屏幕区域是否完全位于画面内"""
+        x, y, w, h = region
+        left, top = self.origin
+        return (
+            x >= left and y >= top
+            and x + w <= left + self.width and y + h <= top + self.height
+        )
+
+
+def bounding_region(points: Iterable[Point]) -> Region:
+    """
+    计算包含所有点的最小区域。
+
+    Args:
+        points: 屏幕坐标
+
+    Returns:
+        Region: (x, y, width, height)
+    """
+    coords = np.asarray(list(points), dtype=np.int64).reshape(-1, 2)
+    if len(coords) == 0:
+        raise ValueError("No points given")
+    x0, y0 = coords.min(axis=0)
+    x1, y1 = coords.max(axis=0)
+    return int(x0), int(y0), int(x1 - x0 + 1), int(y1 - y0 + 1)
+
+
+def _local_indices(frame: ScreenFrame, points: Sequence[Point]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """把屏幕坐标换算为画面内下标，返回(xs, ys, 是否在画面内)"""
+    coords = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    xs = coords[:, 0] - frame.origin[0]
+    ys = coords[:, 1] - frame.origin[1]
+    inside = (xs >= 0) & (ys >= 0) & (xs < frame.width) & (ys < frame.height)
+    return np.where(inside, xs, 0), np.where(inside, ys, 0), inside
+
+
+def sample_colors(frame: ScreenFrame, points: Sequence[Point]) -> List[Optional[Color]]:
+    """
+    批量读取像素颜色。
+
+    Args:
+        frame: 画面
+        points: 屏幕坐标
+
+    Returns:
+        List[Optional[Color]]: 每个点的RGB颜色，画面外的点为None
+    """
+    if len(points) == 0:
+        return []
+    xs, ys, inside = _local_indices(frame, points)
+    colors = frame.pixels[ys, xs].tolist()
+    return [tuple(c) if ok else None for c, ok in zip(colors, inside.tolist())]
+
+
+def match_points(
+    frame: ScreenFrame,
+    points: Sequence[Point],
+    colors: Sequence[Color],
+    tolerances: Any = 0,
+) -> np.ndarray:
+    """
+    批量判断像素颜色是否与期望颜色匹配。
+
+    每个通道的差值都不超过容差时视为匹配。
+
+    Args:
+        frame: 画面
+        points: 屏幕坐标，长度N
+        colors: 期望RGB颜色，长度N
+        tolerances: 容差，标量或长度N的序列
+
+    Returns:
+        np.ndarray: 长度N的布尔数组，画面外的点为False
+    """
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    xs, ys, inside = _local_indices(frame, points)
+    actual = frame.pixels[ys, xs].astype(np.int16)
+    expected = np.asarray(colors, dtype=np.int16).reshape(-1, 3)
+    tolerance = np.broadcast_to(np.asarray(tolerances, dtype=np.int16), (len(actual),))
+
+    diff = np.abs(actual - expected).max(axis=1)
+    return (diff <= tolerance) & inside
+
+
+def color_mask(frame: ScreenFrame, color: Color, tolerance: int = 0,
+               region: Optional[Region] = None) -> Tuple[np.ndarray, Point]:
+    """
+    计算区域内与颜色匹配的像素掩码。
+
+    Args:
+        frame: 画面
+        color: RGB颜色
+        tolerance: 每通道容差
+        region: 屏幕区域，None表示整个画面
+
+    Returns:
+        Tuple[np.ndarray, Point]: (布尔掩码, 掩码左上角的屏幕坐标)
+    """
+    left, top = 0, 0
+    pixels = frame.pixels
+    if region is not None:
+        x, y, w, h = region
+        left = max(0, x - frame.origin[0])
+        top = max(0, y - frame.origin[1])
+        right = min(frame.width, x - frame.origin[0] + w)
+        bottom = min(frame.height, y - frame.origin[1] + h)
+        pixels = pixels[top:max(top, bottom), left:max(left, right)]
+
+    target = np.asarray(color, dtype=np.int16)
+    if tolerance <= 0:
+        mask = (pixels == target.astype(pixels.dtype)).all(axis=2)
+    else:
+        mask = (np.abs(pixels.astype(np.int16) - target) <= tolerance).all(axis=2)
+    return mask, (frame.origin[0] + left, frame.origin[1] + top)
+
+
+def find_color(frame: ScreenFrame, color: Color, tolerance: int = 0,
+               region: Optional[Region] = None) -> Optional[Point]:
+    """
+    在区域内查找第一个匹配颜色的像素(按行优先顺序)。
+
+    Returns:
+        Optional[Point]: 屏幕坐标，未找到返回None
+    """
+    mask, (left, top) = color_mask(frame, color, tolerance, region)
+    if mask.size == 0:
+        return None
+    index = int(np.argmax(mask))
+    row, col = divmod(index, mask.shape[1])
+    if not mask[row, col]:
+        return None
+    return left + col, top + row
+
+
+def find_all_colors(frame: ScreenFrame, color: Color, tolerance: int = 0,
+                    region: Optional[Region] = None, limit: Optional[int] = None) -> List[Point]:
+    """
+    查找区域内所有匹配颜色的像素。
+
+    Args:
+        limit: 最多返回的数量
+
+    Returns:
+        List[Point]: 按行优先排列的屏幕坐标
+    """
+    mask, (left, top) = color_mask(frame, color, tolerance, region)
+    rows, cols = np.nonzero(mask)
+    if limit is not None:
+        rows, cols = rows[:limit], cols[:limit]
+    return list(zip((cols + left).tolist(), (rows + top).tolist()))
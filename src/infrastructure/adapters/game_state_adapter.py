@@ -10,6 +10,8 @@ import json
 from datetime import datetime
 from enum import Enum
 
+from ..repositories.state_store import Durability, WriteBehindStore
+from ...common.action_system import get_condition_signal
 from ...core.interfaces.services import (
     IGameStateService, ILoggerService, IConfigService, IErrorHandler,
     GameState
@@ -44,6 +46,9 @@ class GameStateServiceAdapter(IGameStateService):
         self._max_history_size = 100
         self._auto_save_enabled = True
         self._state_file_path = None
+        self._persistence_durability = Durability.INTERVAL
+        self._persistence_interval = 1.0
+        self._persistence: Optional[WriteBehindStore] = None
         
         # 统计
         self._state_changes = 0
@@ -118,6 +123,9 @@ class GameStateServiceAdapter(IGameStateService):
             self._max_history_size = self._config_service.get('game_state.max_history_size', 100)
             self._auto_save_enabled = self._config_service.get('game_state.auto_save_enabled', True)
             self._state_file_path = self._config_service.get('game_state.save_file_path', 'game_state.json')
+            self._persistence_durability = self._config_service.get(
+                'game_state.persistence_durability', Durability.INTERVAL)
+            self._persistence_interval = self._config_service.get('game_state.persistence_interval', 1.0)
     
     def _load_saved_state(self) -> None:
         """加载保存的状态"""
@@ -143,26 +151,59 @@ class GameStateServiceAdapter(IGameStateService):
         except Exception as e:
             self._handle_error(e, {'operation': '_load_saved_state', 'file_path': self._state_file_path})
     
+    def _build_save_data(self) -> Dict[str, Any]:
+        """构建要保存的状态快照(复制容器，避免后台写入时被修改)"""
+        return {
+            'current_state': self._current_state.value,
+            'state_data': dict(self._state_data),
+            'state_history': self._state_history[-50:],  # 只保存最近50条历史
+            'last_saved': time.time()
+        }
+    
+    def _get_persistence(self) -> Optional[WriteBehindStore]:
+        """获取状态文件的写后缓存，首次使用时创建"""
+        if self._persistence is None and self._state_file_path:
+            try:
+                self._persistence = WriteBehindStore(
+                    self._state_file_path,
+                    self._build_save_data,
+                    durability=self._persistence_durability,
+                    interval=self._persistence_interval,
+                    on_error=lambda e: self._handle_error(
+                        e, {'operation': '_save_state', 'file_path': self._state_file_path}),
+                    name='GameStatePersistence'
+                )
+            except Exception as e:
+                self._handle_error(e, {'operation': '_get_persistence', 'file_path': self._state_file_path})
+        return self._persistence
+    
     def _save_state(self) -> None:
-        """保存状态"""
+        """保存状态
+        
+        只标记状态已变更，由写后缓存按持久化模式合并写入。
+        """
         if not self._auto_save_enabled or not self._state_file_path:
             return
         
-        try:
-            save_data = {
-                'current_state': self._current_state.value,
-                'state_data': self._state_data,
-                'state_history': self._state_history[-50:],  # 只保存最近50条历史
-                'last_saved': time.time()
-            }
-            
-            with open(self._state_file_path, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            
-            self._log_debug(f"游戏状态已保存: {self._state_file_path}")
+        persistence = self._get_persistence()
+        if persistence is not None:
+            persistence.mark_dirty()
+    
+    def flush_state(self) -> bool:
+        """立即写入尚未保存的状态
         
-        except Exception as e:
-            self._handle_error(e, {'operation': '_save_state', 'file_path': self._state_file_path})
+        Returns:
+            bool: 写入成功或无需写入时返回True
+        """
+        if self._persistence is None:
+            return True
+        return self._persistence.flush()
+    
+    def shutdown(self) -> None:
+        """停止后台写入并保存剩余的状态"""
+        if self._persistence is not None:
+            self._persistence.close()
+            self._persistence = None
     
     def _log_info(self, message: str, **kwargs) -> None:
         """记录信息日志"""
@@ -279,8 +320,9 @@ class GameStateServiceAdapter(IGameStateService):
             # 记录状态变化
             self._record_state_change(old_state, state, data)
             
-            # 通知监听器
+            # 通知监听器和等待状态条件的动作
             self._notify_listeners(old_state, state, data)
+            get_condition_signal().notify()
             
             self._log_info(f"游戏状态已更新: {old_state.value} -> {state.value}")
             
@@ -331,6 +373,7 @@ class GameStateServiceAdapter(IGameStateService):
             
             # 更新内部数据
             self._state_data[key] = value
+            get_condition_signal().notify()
             
             # 自动保存
             if self._auto_save_enabled:
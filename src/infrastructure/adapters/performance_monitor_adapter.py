@@ -10,11 +10,13 @@ import threading
 import psutil
 import json
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict
 
 from ...core.interfaces.services import (
     IPerformanceMonitor, ILoggerService, IConfigService, IErrorHandler
 )
+from ...common.metrics_sampler import SLOW_METRIC_INTERVAL, get_metrics_sampler
+from ..repositories.metric_store import MetricStore
 
 
 class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
@@ -37,9 +39,13 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         self._is_monitoring = False
         self._monitor_thread = None
         self._monitor_lock = threading.Lock()
+        self._stop_event = threading.Event()
         
-        # 性能指标存储
-        self._metrics_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        # 系统和进程指标由共享采样器在后台采集，监控循环只读取快照
+        self._sampler = get_metrics_sampler()
+        
+        # 性能指标存储(列式环形缓冲区 + 1秒/1分钟汇总 + 分位数草图)
+        self._metrics_history = MetricStore(raw_capacity=1000)
         self._current_metrics: Dict[str, Any] = {}
         self._metric_callbacks: Dict[str, List[Callable]] = defaultdict(list)
         self._alert_thresholds: Dict[str, Dict[str, float]] = {}
@@ -50,6 +56,7 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         self._history_size = 1000
         self._auto_save_enabled = True
         self._save_file_path = None
+        self._binary_log_path = None
         self._enable_system_metrics = True
         self._enable_process_metrics = True
         self._enable_custom_metrics = True
@@ -116,10 +123,18 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
             self._enable_system_metrics = self._config_service.get('performance_monitor.enable_system_metrics', True)
             self._enable_process_metrics = self._config_service.get('performance_monitor.enable_process_metrics', True)
             self._enable_custom_metrics = self._config_service.get('performance_monitor.enable_custom_metrics', True)
+            self._binary_log_path = self._config_service.get('performance_monitor.binary_log_path', None)
             
             # 更新历史大小
-            for metric_name in self._metrics_history:
-                self._metrics_history[metric_name] = deque(self._metrics_history[metric_name], maxlen=self._history_size)
+            self._metrics_history.set_raw_capacity(self._history_size)
+            
+            # 每次采样追加到二进制日志，长时间运行的完整历史保存在磁盘上
+            if self._binary_log_path:
+                try:
+                    self._metrics_history.attach_log(self._binary_log_path)
+                except (OSError, ValueError) as e:
+                    # 文件不可写，或不是指标日志/中间损坏：不记录二进制日志，继续监控
+                    self._handle_error(e, {'operation': '_load_configuration', 'file_path': self._binary_log_path})
     
     def _setup_default_thresholds(self) -> None:
         """设置默认阈值"""
@@ -150,36 +165,49 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
             self._handle_error(e, {'operation': '_get_system_info'})
             return {}
     
+    _SYSTEM_METRIC_GROUPS = ("cpu", "memory", "disk", "network")
+    
+    def _sampler_metrics(self) -> Dict[str, float]:
+        """按启用的指标登记采样组，磁盘占用变化缓慢，降频采样"""
+        metrics = {}
+        if self._enable_system_metrics:
+            metrics.update(cpu=self._monitor_interval, memory=self._monitor_interval,
+                           network=self._monitor_interval,
+                           disk=max(self._monitor_interval, SLOW_METRIC_INTERVAL))
+        if self._enable_process_metrics:
+            metrics['processes'] = self._monitor_interval
+        return metrics
+    
     def _collect_system_metrics(self) -> Dict[str, Any]:
-        """收集系统指标"""
+        """收集系统指标(读取共享采样器的最新快照)"""
         metrics = {}
         
         try:
             if self._enable_system_metrics:
+                snapshot = self._sampler.snapshot(self._SYSTEM_METRIC_GROUPS)
+                
                 # CPU 使用率
-                metrics['cpu_percent'] = psutil.cpu_percent(interval=None)
-                metrics['cpu_count'] = psutil.cpu_count()
+                metrics['cpu_percent'] = snapshot.cpu_percent
+                metrics['cpu_count'] = snapshot.cpu_count
                 
                 # 内存使用情况
-                memory = psutil.virtual_memory()
-                metrics['memory_total'] = memory.total
-                metrics['memory_available'] = memory.available
-                metrics['memory_used'] = memory.used
-                metrics['memory_percent'] = memory.percent
+                metrics['memory_total'] = snapshot.memory_total
+                metrics['memory_available'] = snapshot.memory_available
+                metrics['memory_used'] = snapshot.memory_used
+                metrics['memory_percent'] = snapshot.memory_percent
                 
                 # 磁盘使用情况
-                disk = psutil.disk_usage('/')
-                metrics['disk_total'] = disk.total
-                metrics['disk_used'] = disk.used
-                metrics['disk_free'] = disk.free
-                metrics['disk_usage_percent'] = (disk.used / disk.total) * 100
+                metrics['disk_total'] = snapshot.disk_total
+                metrics['disk_used'] = snapshot.disk_used
+                metrics['disk_free'] = snapshot.disk_free
+                if snapshot.disk_total:
+                    metrics['disk_usage_percent'] = (snapshot.disk_used / snapshot.disk_total) * 100
                 
                 # 网络统计
-                net_io = psutil.net_io_counters()
-                metrics['network_bytes_sent'] = net_io.bytes_sent
-                metrics['network_bytes_recv'] = net_io.bytes_recv
-                metrics['network_packets_sent'] = net_io.packets_sent
-                metrics['network_packets_recv'] = net_io.packets_recv
+                metrics['network_bytes_sent'] = snapshot.net_bytes_sent
+                metrics['network_bytes_recv'] = snapshot.net_bytes_recv
+                metrics['network_packets_sent'] = snapshot.net_packets_sent
+                metrics['network_packets_recv'] = snapshot.net_packets_recv
         
         except Exception as e:
             self._handle_error(e, {'operation': '_collect_system_metrics'})
@@ -187,32 +215,33 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         return metrics
     
     def _collect_process_metrics(self) -> Dict[str, Any]:
-        """收集进程指标"""
+        """收集进程指标(读取共享采样器的最新快照)"""
         metrics = {}
         
         try:
             if self._enable_process_metrics:
+                process = self._sampler.snapshot(("processes",)).process(self._process.pid)
+                if process is None:
+                    return metrics
+                
                 # 进程 CPU 使用率
-                metrics['process_cpu_percent'] = self._process.cpu_percent()
+                metrics['process_cpu_percent'] = process.cpu_percent
                 
                 # 进程内存使用情况
-                memory_info = self._process.memory_info()
-                metrics['process_memory_rss'] = memory_info.rss
-                metrics['process_memory_vms'] = memory_info.vms
-                metrics['process_memory_mb'] = memory_info.rss / (1024 * 1024)
+                metrics['process_memory_rss'] = process.memory_rss
+                metrics['process_memory_vms'] = process.memory_vms
+                metrics['process_memory_mb'] = process.memory_rss / (1024 * 1024)
                 
                 # 进程线程数
-                metrics['process_num_threads'] = self._process.num_threads()
+                metrics['process_num_threads'] = process.num_threads
                 
-                # 进程文件描述符数（Windows 上可能不可用）
-                try:
-                    metrics['process_num_fds'] = self._process.num_fds()
-                except (AttributeError, psutil.AccessDenied):
-                    pass
+                # 进程文件描述符数（Windows 上不可用）
+                if process.num_fds is not None:
+                    metrics['process_num_fds'] = process.num_fds
                 
                 # 进程运行时间
-                create_time = self._process.create_time()
-                metrics['process_uptime'] = time.time() - create_time
+                if process.create_time:
+                    metrics['process_uptime'] = time.time() - process.create_time
         
         except Exception as e:
             self._handle_error(e, {'operation': '_collect_process_metrics'})
@@ -287,12 +316,7 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
                 self._current_metrics = metrics
                 
                 # 存储历史数据
-                for metric_name, value in metrics.items():
-                    if isinstance(value, (int, float)):
-                        self._metrics_history[metric_name].append({
-                            'value': value,
-                            'timestamp': start_time
-                        })
+                self._metrics_history.append_sample(metrics, start_time)
                 
                 # 检查告警
                 self._check_alerts(metrics)
@@ -313,11 +337,11 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
                 sleep_time = max(0, self._monitor_interval - elapsed)
                 
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    self._stop_event.wait(sleep_time)
             
             except Exception as e:
                 self._handle_error(e, {'operation': '_monitor_loop'})
-                time.sleep(self._monitor_interval)
+                self._stop_event.wait(self._monitor_interval)
         
         self._log_info("性能监控循环已停止")
     
@@ -368,6 +392,8 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
                 self._is_monitoring = True
                 self._monitoring_start_time = time.time()
                 self._total_samples = 0
+                self._stop_event.clear()
+                self._sampler.register(self, metrics=self._sampler_metrics())
                 
                 # 启动监控线程
                 self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
@@ -399,6 +425,8 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
                         return False
                 
                 self._is_monitoring = False
+                self._stop_event.set()
+                self._sampler.unregister(self)
                 
                 # 等待监控线程结束
                 if self._monitor_thread and self._monitor_thread.is_alive():
@@ -454,12 +482,8 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
             if metric_name not in self._metrics_history:
                 return []
             
-            history = list(self._metrics_history[metric_name])
-            
-            if limit is not None:
-                history = history[-limit:]
-            
-            return history
+            timestamps, values = self._metrics_history.history(metric_name, limit)
+            return self._to_history_items(timestamps, values)
         
         except Exception as e:
             self._handle_error(e, {'operation': 'get_metric_history', 'metric_name': metric_name})
@@ -472,7 +496,7 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         try:
             result = {}
             
-            for metric_name in self._metrics_history:
+            for metric_name in self._metrics_history.names():
                 result[metric_name] = self.get_metric_history(metric_name, limit)
             
             return result
@@ -574,15 +598,15 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         try:
             current_metrics = self.get_current_metrics()
             
-            # 计算平均值
+            # 计算平均值(在列式缓冲区上向量化计算)
             averages = {}
-            for metric_name, history in self._metrics_history.items():
-                if history:
-                    values = [item['value'] for item in history if isinstance(item['value'], (int, float))]
-                    if values:
-                        averages[f"{metric_name}_avg"] = sum(values) / len(values)
-                        averages[f"{metric_name}_min"] = min(values)
-                        averages[f"{metric_name}_max"] = max(values)
+            for metric_name in self._metrics_history.names():
+                stats = self._metrics_history.summary(metric_name, percentiles=(95,))
+                if stats.get('count'):
+                    averages[f"{metric_name}_avg"] = stats['avg']
+                    averages[f"{metric_name}_min"] = stats['min']
+                    averages[f"{metric_name}_max"] = stats['max']
+                    averages[f"{metric_name}_p95"] = stats['p95']
             
             # 监控统计
             monitoring_duration = 0
@@ -657,7 +681,10 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
                     'enable_process_metrics': self._enable_process_metrics,
                     'enable_custom_metrics': self._enable_custom_metrics
                 },
-                'metrics_history': {name: list(history)[-100:] for name, history in self._metrics_history.items()},  # 只保存最近100条
+                'metrics_history': {
+                    name: self._to_history_items(*self._metrics_history.history(name, 100))
+                    for name in self._metrics_history.names()
+                },  # 只保存最近100条
                 'saved_at': time.time(),
                 'version': '1.0'
             }
@@ -665,6 +692,8 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
             with open(self._save_file_path, 'w', encoding='utf-8') as f:
                 json.dump(save_data, f, ensure_ascii=False, indent=2)
             
+            self._metrics_history.flush_log()
+            
             self._log_debug(f"性能监控数据已保存: {self._save_file_path}")
             return True
         
@@ -681,22 +710,12 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
             # 过滤时间范围
             filtered_history = {}
             
-            for metric_name, history in self._metrics_history.items():
-                filtered_data = []
-                
-                for item in history:
-                    timestamp = item.get('timestamp', 0)
-                    
-                    if start_time is not None and timestamp < start_time:
-                        continue
-                    
-                    if end_time is not None and timestamp > end_time:
-                        continue
-                    
-                    filtered_data.append(item)
-                
-                if filtered_data:
-                    filtered_history[metric_name] = filtered_data
+            for metric_name in self._metrics_history.names():
+                timestamps, values = self._metrics_history.history(
+                    metric_name, start_time=start_time, end_time=end_time
+                )
+                if len(timestamps):
+                    filtered_history[metric_name] = self._to_history_items(timestamps, values)
             
             # 准备导出数据
             export_data = {
@@ -722,4 +741,78 @@ class PerformanceMonitorServiceAdapter(IPerformanceMonitor):
         
         except Exception as e:
             self._handle_error(e, {'operation': 'export_metrics', 'file_path': file_path})
-            return False
\ No newline at end of file
+            return False
+    
+    def get_metric_rollup(self, metric_name: str, resolution: str = '1s',
+                          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取指标的汇总历史
+        
+        Args:
+            metric_name: 指标名称
+            resolution: 汇总分辨率，'1s'(保留1小时)或'1m'(保留24小时)
+            limit: 只返回最近limit个桶
+        
+        Returns:
+            List[Dict]: 每个桶的start、count、avg、min、max
+        """
+        self._ensure_performance_monitor_loaded()
+        
+        try:
+            buckets = self._metrics_history.rollup(metric_name, resolution, limit)
+            if not buckets:
+                return []
+            return [
+                {
+                    'start': float(start),
+                    'count': int(count),
+                    'avg': float(avg),
+                    'min': float(low),
+                    'max': float(high)
+                }
+                for start, count, avg, low, high in zip(
+                    buckets['start'], buckets['count'], buckets['avg'], buckets['min'], buckets['max']
+                )
+            ]
+        
+        except Exception as e:
+            self._handle_error(e, {'operation': 'get_metric_rollup', 'metric_name': metric_name})
+            return []
+    
+    def get_metric_percentiles(self, metric_name: str,
+                               percentiles: tuple = (50, 95, 99)) -> Dict[str, float]:
+        """获取指标在整个监控期间的分位数(流式草图估计，相对误差约1%)"""
+        self._ensure_performance_monitor_loaded()
+        
+        try:
+            stats = self._metrics_history.summary(metric_name, percentiles)
+            return {f"p{p:g}": stats[f"p{p:g}"] for p in percentiles} if stats else {}
+        
+        except Exception as e:
+            self._handle_error(e, {'operation': 'get_metric_percentiles', 'metric_name': metric_name})
+            return {}
+    
+    def export_metrics_binary(self, file_path: str, start_time: Optional[float] = None,
+                              end_time: Optional[float] = None) -> bool:
+        """以只追加的二进制格式导出指标历史(可用read_metric_log读取)"""
+        self._ensure_performance_monitor_loaded()
+        
+        try:
+            written = self._metrics_history.export_binary(file_path, start_time, end_time)
+            self._log_info(f"性能指标已导出到二进制文件: {file_path} ({written}条)")
+            return True
+        
+        except Exception as e:
+            self._handle_error(e, {'operation': 'export_metrics_binary', 'file_path': file_path})
+            return False
+    
+    def get_history_memory_usage(self) -> int:
+        """指标历史占用的内存(字节)"""
+        return self._metrics_history.memory_usage()
+    
+    @staticmethod
+    def _to_history_items(timestamps, values) -> List[Dict[str, Any]]:
+        """列式数据转换为原有的{'value', 'timestamp'}列表格式"""
+        return [
+            {'value': value, 'timestamp': timestamp}
+            for timestamp, value in zip(timestamps.tolist(), values.tolist())
+        ]
@@ -99,7 +99,8 @@ class ConfigProvider:
             "templates": {
                 "base_path": "templates",
                 "cache_size": 100,
-                "auto_reload": True
+                "auto_reload": True,
+                "reload_interval": 1.0
             },
             "supported_games": ["genshin", "starrail", "zzz", "arknights"]
         }
@@ -0,0 +1,624 @@
+"""
+指标历史的列式存储
+
+每个指标的原始采样保存在定长numpy环形缓冲区中(时间戳和数值都是float64，
+字节计数等大整数在float32下会丢失精度)，
+同时按1秒、1分钟两级分辨率汇总(次数/总和/最小/最大)，
+并用对数分桶的流式分位数草图统计整个会话的p50/p95/p99。
+
+按默认容量(原始1000条、秒级1小时、分钟级24小时)，每个指标约占200KB，
+几十个指标连续运行数小时也只需几MB内存。
+
+二进制日志为只追加格式，崩溃后已写入的记录仍可读取，续写时先截掉末尾不完整的记录：
+    文件头: b"PMET2\\n"
+    指标定义: b"N" + uint16 编号 + uint16 长度 + UTF-8 名称
+    采样记录: b"S" + uint16 编号 + float64 时间戳 + float64 数值
+旧版b"PMET1\\n"日志的数值为float32，仍可读取和续写。
+"""
+import math
+import struct
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# 汇总分辨率: 名称 -> (桶宽秒数, 默认保留桶数)
+DEFAULT_ROLLUPS: Dict[str, Tuple[float, int]] = {
+    "1s": (1.0, 3600),
+    "1m": (60.0, 1440),
+}
+
+
+class RingColumn:
+    """时间戳/数值两列的定长环形缓冲区"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._times = np.zeros(self.capacity, dtype=np.float64)
+        self._values = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        """追加一条采样，满时覆盖最旧的采样"""
+        index = (self._head + self._count) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """按时间顺序返回(时间戳, 数值)两列的副本"""
+        order = (self._head + np.arange(self._count)) % self.capacity
+        return self._times[order], self._values[order]
+
+    def tail(self, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """最近limit条采样"""
+        limit = min(max(limit, 0), self._count)
+        order = (self._head + np.arange(self._count - limit, self._count)) % self.capacity
+        return self._times[order], self._values[order]
+
+    def resize(self, capacity: int) -> None:
+        """调整容量，保留最近的采样"""
+        times, values = self.tail(capacity)
+        self.__init__(capacity)
+        count = len(times)
+        self._times[:count] = times
+        self._values[:count] = values
+        self._count = count
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+
+
+class RollupColumn:
+    """固定分辨率的汇总环形缓冲区
+
+    当前桶在内存中累积，时间进入下一个桶时写入环形缓冲区。
+    """
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = float(resolution)
+        self.capacity = max(1, capacity)
+        self._starts = np.zeros(self.capacity, dtype=np.float64)
+        self._counts = np.zeros(self.capacity, dtype=np.uint32)
+        self._sums = np.zeros(self.capacity, dtype=np.float64)
+        self._mins = np.zeros(self.capacity, dtype=np.float64)
+        self._maxs = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+        self._open_start: Optional[float] = None
+        self._open = [0, 0.0, math.inf, -math.inf]  # 次数, 总和, 最小, 最大
+
+    def add(self, timestamp: float, value: float) -> None:
+        """累加一条采样"""
+        start = math.floor(timestamp / self.resolution) * self.resolution
+        if self._open_start is None:
+            self._open_start = start
+        elif start > self._open_start:
+            self._commit()
+            self._open_start = start
+        # 时间回退(时钟调整)的采样计入当前桶
+        bucket = self._open
+        bucket[0] += 1
+        bucket[1] += value
+        if value < bucket[2]:
+            bucket[2] = value
+        if value > bucket[3]:
+            bucket[3] = value
+
+    def _commit(self) -> None:
+        """把当前桶写入环形缓冲区"""
+        count, total, low, high = self._open
+        if count:
+            index = (self._head + self._count) % self.capacity
+            self._starts[index] = self._open_start
+            self._counts[index] = count
+            self._sums[index] = total
+            self._mins[index] = low
+            self._maxs[index] = high
+            if self._count < self.capacity:
+                self._count += 1
+            else:
+                self._head = (self._head + 1) % self.capacity
+        self._open = [0, 0.0, math.inf, -math.inf]
+
+    def buckets(self, limit: Optional[int] = None, include_open: bool = True) -> Dict[str, np.ndarray]:
+        """
+        按时间顺序返回汇总桶
+
+        Returns:
+            Dict: start/count/avg/min/max 五列
+        """
+        order = (self._head + np.arange(self._count)) % self.capacity
+        starts = self._starts[order]
+        counts = self._counts[order].astype(np.int64)
+        sums = self._sums[order]
+        mins = self._mins[order]
+        maxs = self._maxs[order]
+
+        if include_open and self._open[0]:
+            starts = np.append(starts, self._open_start)
+            counts = np.append(counts, self._open[0])
+            sums = np.append(sums, self._open[1])
+            mins = np.append(mins, self._open[2])
+            maxs = np.append(maxs, self._open[3])
+
+        if limit is not None:
+            starts, counts, sums, mins, maxs = (
+                column[-limit:] if limit > 0 else column[:0]
+                for column in (starts, counts, sums, mins, maxs)
+            )
+        avgs = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        return {"start": starts, "count": counts, "avg": avgs, "min": mins, "max": maxs}
+
+    def __len__(self) -> int:
+        return self._count + (1 if self._open[0] else 0)
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._open_start = None
+        self._open = [0, 0.0, math.inf, -math.inf]
+
+
+class QuantileSketch:
+    """
+    流式分位数草图
+
+    按相对误差alpha对数分桶(DDSketch的思路)：任意分位数的估计值
+    与真实值的相对误差不超过alpha，内存只与数值跨越的数量级有关。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self._zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """加入一个数值"""
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value > 1e-12:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._positive[key] = self._positive.get(key, 0) + 1
+        elif value < -1e-12:
+            key = math.ceil(math.log(-value) / self._log_gamma)
+            self._negative[key] = self._negative.get(key, 0) + 1
+        else:
+            self._zero += 1
+
+    def _value(self, key: int) -> float:
+        """桶的代表值(使相对误差最小)"""
+        return 2 * math.exp(key * self._log_gamma) / (1 + math.exp(self._log_gamma))
+
+    def quantile(self, q: float) -> float:
+        """
+        估计分位数
+
+        Args:
+            q: 分位(0-1)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for key in sorted(self._negative, reverse=True):
+            cumulative += self._negative[key]
+            if cumulative > rank:
+                return max(-self._value(key), self.min)
+        cumulative += self._zero
+        if cumulative > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            cumulative += self._positive[key]
+            if cumulative > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """合并另一个相同精度的草图"""
+        for key, count in other._positive.items():
+            self._positive[key] = self._positive.get(key, 0) + count
+        for key, count in other._negative.items():
+            self._negative[key] = self._negative.get(key, 0) + count
+        self._zero += other._zero
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._positive) + len(self._negative) + (1 if self._zero else 0)
+
+
+class MetricSeries:
+    """单个指标的原始采样、多级汇总和分位数草图"""
+
+    def __init__(self, raw_capacity: int = 1000,
+                 rollups: Optional[Dict[str, Tuple[float, int]]] = None,
+                 relative_accuracy: float = 0.01):
+        self.raw = RingColumn(raw_capacity)
+        self.rollups = {
+            name: RollupColumn(resolution, capacity)
+            for name, (resolution, capacity) in (rollups or DEFAULT_ROLLUPS).items()
+        }
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.total = 0.0
+
+    def append(self, timestamp: float, value: float) -> None:
+        self.raw.append(timestamp, value)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, value)
+        self.sketch.add(value)
+        self.total += value
+
+    def nbytes(self) -> int:
+        """占用的数组内存(字节)"""
+        size = self.raw._times.nbytes + self.raw._values.nbytes
+        for rollup in self.rollups.values():
+            size += sum(column.nbytes for column in (
+                rollup._starts, rollup._counts, rollup._sums, rollup._mins, rollup._maxs
+            ))
+        return size
+
+
+class MetricStore:
+    """多个指标的列式历史存储(线程安全)"""
+
+    def __init__(self, raw_capacity: int = 1000,
+                 rollups: Optional[Dict[str, Tuple[float, int]]] = None,
+                 relative_accuracy: float = 0.01):
+        """
+        初始化存储
+
+        Args:
+            raw_capacity: 每个指标保留的原始采样数
+            rollups: 汇总分辨率，名称 -> (桶宽秒数, 保留桶数)，默认1秒和1分钟
+            relative_accuracy: 分位数草图的相对误差
+        """
+        self.raw_capacity = max(1, raw_capacity)
+        self.rollup_config = dict(rollups or DEFAULT_ROLLUPS)
+        self.relative_accuracy = relative_accuracy
+        self._series: Dict[str, MetricSeries] = {}
+        self._lock = threading.Lock()
+        self._log: Optional["BinaryMetricLog"] = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._series
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._series)
+
+    def append(self, name: str, timestamp: float, value: float) -> None:
+        """追加一个指标的采样"""
+        with self._lock:
+            self._append(name, timestamp, value)
+
+    def append_sample(self, metrics: Dict[str, Any], timestamp: float) -> int:
+        """
+        追加一次采样中的所有数值指标
+
+        Returns:
+            int: 追加的指标数
+        """
+        appended = 0
+        with self._lock:
+            for name, value in metrics.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._append(name, timestamp, float(value))
+                    appended += 1
+        return appended
+
+    def _append(self, name: str, timestamp: float, value: float) -> None:
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = MetricSeries(
+                self.raw_capacity, self.rollup_config, self.relative_accuracy
+            )
+        series.append(timestamp, value)
+        if self._log is not None:
+            self._log.append(name, timestamp, value)
+
+    def set_raw_capacity(self, capacity: int) -> None:
+        """调整每个指标保留的原始采样数"""
+        with self._lock:
+            self.raw_capacity = max(1, capacity)
+            for series in self._series.values():
+                series.raw.resize(self.raw_capacity)
+
+    def history(self, name: str, limit: Optional[int] = None,
+                start_time: Optional[float] = None,
+                end_time: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        原始采样
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 按时间排序的(时间戳, 数值)
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.float64)
+            if limit is not None and start_time is None and end_time is None:
+                return series.raw.tail(limit)
+            times, values = series.raw.arrays()
+
+        # 时钟回退时时间戳不一定单调，用掩码而不是二分过滤
+        mask = np.ones(len(times), dtype=bool)
+        if start_time is not None:
+            mask &= times >= start_time
+        if end_time is not None:
+            mask &= times <= end_time
+        times, values = times[mask], values[mask]
+        if limit is not None:
+            first = max(len(times) - max(limit, 0), 0)
+            times, values = times[first:], values[first:]
+        return times, values
+
+    def rollup(self, name: str, resolution: str = "1s", limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        汇总桶
+
+        Args:
+            name: 指标名称
+            resolution: 汇总分辨率名称，如'1s'、'1m'
+            limit: 只返回最近limit个桶
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return {}
+            if resolution not in series.rollups:
+                raise ValueError(f"未知的汇总分辨率: {resolution}")
+            return series.rollups[resolution].buckets(limit)
+
+    def summary(self, name: str, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[str, float]:
+        """
+        指标统计
+
+        avg/min/max/count针对保留的原始窗口；total_count和p*针对整个会话(草图估计)。
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return {}
+            _, values = series.raw.arrays()
+            result = {
+                "count": int(len(values)),
+                "total_count": series.sketch.count,
+                "session_avg": series.total / series.sketch.count if series.sketch.count else 0.0,
+            }
+            if len(values):
+                result.update(
+                    avg=float(values.mean()),
+                    min=float(values.min()),
+                    max=float(values.max()),
+                    last=float(values[-1]),
+                )
+            for p in percentiles:
+                result[f"p{p:g}"] = series.sketch.quantile(p / 100.0)
+            return result
+
+    def memory_usage(self) -> int:
+        """所有指标占用的数组内存(字节)"""
+        with self._lock:
+            return sum(series.nbytes() for series in self._series.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    # ---- 二进制日志 ----
+
+    def attach_log(self, path: Union[str, Path]) -> "BinaryMetricLog":
+        """之后的每条采样都追加到二进制日志"""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = BinaryMetricLog(path)
+            return self._log
+
+    def detach_log(self) -> None:
+        """关闭二进制日志"""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def flush_log(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.flush()
+
+    def export_binary(self, path: Union[str, Path],
+                      start_time: Optional[float] = None,
+                      end_time: Optional[float] = None) -> int:
+        """
+        把保留的原始采样追加导出到二进制日志
+
+        Returns:
+            int: 写入的采样数
+        """
+        written = 0
+        log = BinaryMetricLog(path)
+        try:
+            for name in self.names():
+                times, values = self.history(name, start_time=start_time, end_time=end_time)
+                log.extend(name, times, values)
+                written += len(times)
+        finally:
+            log.close()
+        return written
+
+
+_MAGIC = b"PMET2\n"
+_NAME_HEADER = struct.Struct("<cHH")
+
+# 文件头 -> (采样记录结构, 批量写入用的记录dtype)
+_FORMATS: Dict[bytes, Tuple[struct.Struct, np.dtype]] = {
+    b"PMET1\n": (
+        struct.Struct("<cHdf"),
+        np.dtype([("tag", "S1"), ("id", "<u2"), ("t", "<f8"), ("v", "<f4")]),
+    ),
+    _MAGIC: (
+        struct.Struct("<cHdd"),
+        np.dtype([("tag", "S1"), ("id", "<u2"), ("t", "<f8"), ("v", "<f8")]),
+    ),
+}
+
+
+class BinaryMetricLog:
+    """只追加的二进制指标日志"""
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = 64 * 1024):
+        """
+        打开日志，已有文件续写
+
+        Raises:
+            ValueError: 已有文件不是指标日志或中间损坏
+        """
+        self.path = Path(path)
+        if self.path.parent and not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._sample, self._record_dtype = _FORMATS[_MAGIC]
+        self._ids: Dict[str, int] = {}
+        # 打开时截掉的不完整记录字节数
+        self.truncated_bytes = 0
+
+        data = self.path.read_bytes() if self.path.exists() else b""
+        valid = 0
+        if len(data) >= len(_MAGIC) or not any(magic.startswith(data) for magic in _FORMATS):
+            # 续写已有文件时沿用其格式和指标编号
+            magic = data[:len(_MAGIC)]
+            if magic in _FORMATS:
+                self._sample, self._record_dtype = _FORMATS[magic]
+            valid = len(magic)
+            for kind, metric_id, payload, valid in _iter_records(data):
+                if kind == "N":
+                    self._ids[payload] = metric_id
+        if valid < len(data):
+            # 上次写入中断留下的半条记录，不截掉的话后面追加的记录都会错位
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+            self.truncated_bytes = len(data) - valid
+
+        self._file: Optional[BinaryIO] = open(self.path, "ab", buffering=buffer_size)
+        if valid == 0:
+            self._file.write(_MAGIC)
+
+    def _id(self, name: str) -> int:
+        metric_id = self._ids.get(name)
+        if metric_id is None:
+            metric_id = self._ids[name] = len(self._ids)
+            encoded = name.encode("utf-8")
+            self._file.write(_NAME_HEADER.pack(b"N", metric_id, len(encoded)) + encoded)
+        return metric_id
+
+    def append(self, name: str, timestamp: float, value: float) -> None:
+        self._file.write(self._sample.pack(b"S", self._id(name), timestamp, value))
+
+    def extend(self, name: str, times: np.ndarray, values: np.ndarray) -> None:
+        """批量追加一个指标的采样"""
+        if not len(times):
+            return
+        records = np.zeros(len(times), dtype=self._record_dtype)
+        records["tag"] = b"S"
+        records["id"] = self._id(name)
+        records["t"] = times
+        records["v"] = values
+        self._file.write(records.tobytes())
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _iter_records(data: bytes):
+    """
+    解析日志内容，逐条产生(类型, 编号, 内容, 记录结束偏移)
+
+    类型为'N'时内容是指标名称，为'S'时是(时间戳, 数值)；末尾不完整的记录不产生。
+    """
+    magic = data[:len(_MAGIC)]
+    if magic not in _FORMATS:
+        raise ValueError("不是指标日志文件")
+    sample = _FORMATS[magic][0]
+    offset = len(magic)
+    size = len(data)
+    while offset < size:
+        tag = data[offset:offset + 1]
+        if tag == b"S":
+            if offset + sample.size > size:
+                break  # 末尾不完整的记录(写入中断)
+            _, metric_id, timestamp, value = sample.unpack_from(data, offset)
+            offset += sample.size
+            yield "S", metric_id, (timestamp, value), offset
+        elif tag == b"N":
+            if offset + _NAME_HEADER.size > size:
+                break
+            _, metric_id, length = _NAME_HEADER.unpack_from(data, offset)
+            if offset + _NAME_HEADER.size + length > size:
+                break
+            offset += _NAME_HEADER.size
+            name = data[offset:offset + length].decode("utf-8")
+            offset += length
+            yield "N", metric_id, name, offset
+        else:
+            raise ValueError(f"指标日志在偏移{offset}处损坏")
+
+
+def read_metric_names(path: Union[str, Path]) -> Dict[str, int]:
+    """读取日志中已定义的指标编号"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data:
+        return {}
+    return {name: metric_id for kind, metric_id, name, _ in _iter_records(data) if kind == "N"}
+
+
+def read_metric_log(path: Union[str, Path]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    读取二进制指标日志
+
+    Returns:
+        Dict: 指标名称 -> (时间戳, 数值)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    names: Dict[int, str] = {}
+    samples: Dict[int, List[Tuple[float, float]]] = {}
+    for kind, metric_id, payload, _ in _iter_records(data):
+        if kind == "N":
+            names[metric_id] = payload
+        else:
+            samples.setdefault(metric_id, []).append(payload)
+
+    result = {}
+    for metric_id, rows in samples.items():
+        columns = np.asarray(rows, dtype=np.float64)
+        result[names.get(metric_id, str(metric_id))] = (columns[:, 0], columns[:, 1])
+    return result
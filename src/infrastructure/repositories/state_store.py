@@ -0,0 +1,296 @@
+"""
+状态持久化(写后缓存)
+
+状态变更只标记为脏，由后台线程合并一段时间内的多次变更后写入一次；
+写入时先写临时文件再原子替换，进程在写入过程中崩溃也不会损坏已有文件。
+持久化时机由Durability配置：
+- immediate: 每次变更都在调用线程中写入，不丢失任何更新
+- interval: 后台线程最多延迟interval秒写入，崩溃时最多丢失这段时间内的更新
+- on_shutdown: 只在flush/close或进程退出时写入
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+
+class Durability:
+    """持久化时机"""
+
+    IMMEDIATE = "immediate"
+    INTERVAL = "interval"
+    ON_SHUTDOWN = "on_shutdown"
+
+    ALL = (IMMEDIATE, INTERVAL, ON_SHUTDOWN)
+
+
+def dumps_compact(data: Any) -> str:
+    """紧凑格式的JSON序列化"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def atomic_write_json(path: Union[str, Path], data: Any, fsync: bool = True) -> None:
+    """
+    原子写入JSON文件
+
+    Args:
+        path: 目标文件
+        data: 可JSON序列化的数据
+        fsync: 是否在替换前fsync
+    """
+    atomic_write_text(path, dumps_compact(data), fsync)
+
+
+def atomic_write_text(path: Union[str, Path], payload: str, fsync: bool = True) -> None:
+    """
+    原子写入文本文件
+
+    数据先写入同目录的临时文件，刷新到磁盘后再替换目标文件。
+    """
+    path = Path(path)
+    if path.parent and not path.parent.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBehindStore:
+    """
+    写后缓存的状态文件
+
+    snapshot在写入时调用，返回当前要保存的数据。后台写入时snapshot
+    与调用方的修改可能并发，字典在迭代中被修改时会重试取快照。
+    """
+
+    SNAPSHOT_RETRIES = 3
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        snapshot: Callable[[], Any],
+        durability: str = Durability.INTERVAL,
+        interval: float = 1.0,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        name: str = "StateStore",
+    ):
+        """
+        初始化状态存储
+
+        Args:
+            path: 状态文件路径
+            snapshot: 返回待保存数据的函数
+            durability: 持久化时机，见Durability
+            interval: interval模式下的最长写入延迟(秒)
+            on_error: 写入失败时的回调
+            name: 后台线程名称
+        """
+        if durability not in Durability.ALL:
+            raise ValueError(f"未知的持久化模式: {durability}")
+
+        self.path = Path(path)
+        self.snapshot = snapshot
+        self.durability = durability
+        self.interval = max(0.0, interval)
+        self.on_error = on_error
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+        self._condition = threading.Condition()
+        # 写入锁保证同一时间只有一个线程在写文件，写入顺序与版本顺序一致
+        self._write_lock = threading.Lock()
+        self._dirty_version = 0
+        self._written_version = 0
+        self._dirty_since: Optional[float] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self._marks = 0
+        self._writes = 0
+        self._failures = 0
+        self._last_write_ms = 0.0
+
+        if durability != Durability.IMMEDIATE:
+            _register_for_exit(self)
+
+    @property
+    def dirty(self) -> bool:
+        """是否有尚未写入的变更"""
+        with self._condition:
+            return self._dirty_version > self._written_version
+
+    def mark_dirty(self) -> None:
+        """标记状态已变更，按持久化模式安排写入"""
+        with self._condition:
+            if self._closed:
+                return
+            self._dirty_version += 1
+            self._marks += 1
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._condition.notify_all()
+
+        if self.durability == Durability.IMMEDIATE:
+            self._write()
+        elif self.durability == Durability.INTERVAL and self._thread is None:
+            self._start()
+
+    def flush(self) -> bool:
+        """
+        在调用线程中写入所有未保存的变更
+
+        Returns:
+            bool: 没有失败(包括无需写入)时返回True
+        """
+        if not self.dirty:
+            return True
+        return self._write()
+
+    def close(self) -> bool:
+        """
+        停止后台线程并写入剩余的变更
+
+        Returns:
+            bool: 最后一次写入是否成功
+        """
+        with self._condition:
+            if self._closed:
+                return True
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        return self.flush()
+
+    def _start(self) -> None:
+        """启动后台写入线程"""
+        with self._condition:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """后台线程：脏数据存在interval秒后写入一次"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._dirty_version > self._written_version
+                )
+                if self._closed:
+                    return
+                deadline = (self._dirty_since or time.monotonic()) + self.interval
+                # 等待期间的变更合并到同一次写入
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+
+            if not self._write():
+                # 写入失败后等待一个周期再重试，避免空转
+                with self._condition:
+                    self._condition.wait(max(self.interval, 0.1))
+
+    def _serialize_snapshot(self) -> str:
+        """取快照并序列化，并发修改导致迭代出错时重试"""
+        for attempt in range(self.SNAPSHOT_RETRIES):
+            try:
+                return dumps_compact(self.snapshot())
+            except RuntimeError:
+                if attempt == self.SNAPSHOT_RETRIES - 1:
+                    raise
+        return ""
+
+    def _write(self) -> bool:
+        """写入当前快照"""
+        with self._write_lock:
+            with self._condition:
+                version = self._dirty_version
+                if version <= self._written_version:
+                    return True
+
+            started = time.perf_counter()
+            try:
+                atomic_write_text(self.path, self._serialize_snapshot())
+            except Exception as e:
+                with self._condition:
+                    self._failures += 1
+                self.logger.error(f"保存状态文件失败 {self.path}: {e}")
+                if self.on_error is not None:
+                    self.on_error(e)
+                return False
+
+            with self._condition:
+                self._written_version = version
+                self._writes += 1
+                self._last_write_ms = (time.perf_counter() - started) * 1000
+                if self._dirty_version == version:
+                    self._dirty_since = None
+                else:
+                    self._dirty_since = time.monotonic()
+                self._condition.notify_all()
+            return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取写入统计
+
+        Returns:
+            Dict: 变更次数、写入次数、被合并的变更数、失败次数和最近一次写入耗时
+        """
+        with self._condition:
+            return {
+                "durability": self.durability,
+                "changes": self._marks,
+                "writes": self._writes,
+                "coalesced": max(0, self._marks - self._writes),
+                "failures": self._failures,
+                "pending": self._dirty_version > self._written_version,
+                "last_write_ms": self._last_write_ms,
+            }
+
+
+_live_stores: "weakref.WeakSet[WriteBehindStore]" = weakref.WeakSet()
+_exit_hook_lock = threading.Lock()
+_exit_hook_registered = False
+
+
+def _register_for_exit(store: WriteBehindStore) -> None:
+    """登记存储，进程退出时写入未保存的变更"""
+    global _exit_hook_registered
+    with _exit_hook_lock:
+        _live_stores.add(store)
+        if not _exit_hook_registered:
+            atexit.register(_flush_all_stores)
+            _exit_hook_registered = True
+
+
+def _flush_all_stores() -> None:
+    """进程退出时关闭所有存储"""
+    for store in list(_live_stores):
+        try:
+            store.close()
+        except Exception:
+            pass
@@ -0,0 +1,288 @@
+"""
+模板包
+
+把模板目录编译为单个带索引的文件：元数据与预解码的RGB/灰度像素
+数据存放在一起，打开时内存映射，读取模板不再需要解析JSON或解码PNG。
+重新编译时对比源文件指纹，未变化的模板直接从旧包复制像素数据。
+"""
+from typing import Dict, Any, Optional, List, Tuple
+from pathlib import Path
+import json
+import logging
+import os
+import struct
+import numpy as np
+import cv2
+
+
+PACK_MAGIC = b"GATPACK\x00"
+PACK_VERSION = 1
+DEFAULT_PACK_NAME = "templates.pack"
+
+# 头部: 魔数, 版本, 索引偏移, 索引长度
+_HEADER = struct.Struct("<8sIQQ")
+# 像素数据按64字节对齐，便于向量化读取
+_ALIGNMENT = 64
+
+# 与TemplateRepository.get_template_image一致的图像格式优先级
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+logger = logging.getLogger(__name__)
+
+
+class TemplatePackError(Exception):
+    """模板包相关错误"""
+
+
+def _file_fingerprint(entry: os.DirEntry) -> List[int]:
+    """源文件指纹: [修改时间(纳秒), 大小]"""
+    stat = entry.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def scan_template_sources(base_path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    扫描模板目录，收集每个模板的源文件指纹
+
+    Args:
+        base_path: 模板目录
+
+    Returns:
+        Dict: 模板ID -> {'json': 指纹或None, 'image': [文件名, 修改时间, 大小]或None}
+    """
+    sources: Dict[str, Dict[str, Any]] = {}
+    images: Dict[str, Tuple[int, os.DirEntry]] = {}
+
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stem, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext == ".json":
+                sources.setdefault(stem, {"json": None, "image": None})
+                sources[stem]["json"] = _file_fingerprint(entry)
+            elif ext in IMAGE_EXTENSIONS:
+                rank = IMAGE_EXTENSIONS.index(ext)
+                if stem not in images or rank < images[stem][0]:
+                    images[stem] = (rank, entry)
+
+    for stem, (_, entry) in images.items():
+        sources.setdefault(stem, {"json": None, "image": None})
+        sources[stem]["image"] = [entry.name] + _file_fingerprint(entry)
+
+    return sources
+
+
+class TemplatePack:
+    """
+    只读模板包
+
+    像素数据通过np.memmap映射，get_image/get_gray返回映射上的只读视图；
+    需要长期持有时应复制，包在重新编译时会被关闭。
+    """
+
+    def __init__(self, path: Path, entries: Dict[str, Dict[str, Any]], data: np.memmap):
+        self.path = Path(path)
+        self.entries = entries
+        # 最近一次确认与源目录一致时的目录修改时间，0表示尚未校验
+        self.dir_mtime_ns = 0
+        self._data: Optional[np.memmap] = data
+
+    @classmethod
+    def open(cls, path: Path) -> "TemplatePack":
+        """
+        打开模板包
+
+        Raises:
+            TemplatePackError: 文件格式无效时抛出
+        """
+        path = Path(path)
+        try:
+            data = np.memmap(path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError) as e:
+            raise TemplatePackError(f"无法映射模板包 {path}: {e}") from e
+
+        if len(data) < _HEADER.size:
+            raise TemplatePackError(f"模板包过短: {path}")
+
+        magic, version, index_offset, index_length = _HEADER.unpack(
+            bytes(data[: _HEADER.size])
+        )
+        if magic != PACK_MAGIC:
+            raise TemplatePackError(f"不是模板包文件: {path}")
+        if version != PACK_VERSION:
+            raise TemplatePackError(f"不支持的模板包版本: {version}")
+        if index_offset + index_length > len(data):
+            raise TemplatePackError(f"模板包索引越界: {path}")
+
+        index = json.loads(bytes(data[index_offset:index_offset + index_length]).decode("utf-8"))
+        return cls(path, index["entries"], data)
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def matches_sources(self, sources: Dict[str, Dict[str, Any]]) -> bool:
+        """检查包内容是否与源文件指纹完全一致"""
+        if len(sources) != len(self.entries):
+            return False
+        return all(
+            self.get_sources(template_id) == template_sources
+            for template_id, template_sources in sources.items()
+        )
+
+    def ids(self) -> List[str]:
+        """获取包内所有模板ID"""
+        return list(self.entries.keys())
+
+    def get_metadata(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """获取模板元数据"""
+        entry = self.entries.get(template_id)
+        if entry is None:
+            return None
+        return entry.get("meta")
+
+    def get_sources(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """获取编译时的源文件指纹"""
+        entry = self.entries.get(template_id)
+        if entry is None:
+            return None
+        return entry["sources"]
+
+    def get_image(self, template_id: str) -> Optional[np.ndarray]:
+        """获取RGB图像(只读视图)"""
+        return self._view(template_id, "rgb")
+
+    def get_gray(self, template_id: str) -> Optional[np.ndarray]:
+        """获取灰度图像(只读视图)"""
+        return self._view(template_id, "gray")
+
+    def _view(self, template_id: str, kind: str) -> Optional[np.ndarray]:
+        """从映射中切出像素数据"""
+        entry = self.entries.get(template_id)
+        if entry is None or self._data is None:
+            return None
+        layout = entry.get(kind)
+        if layout is None:
+            return None
+        offset, shape = layout[0], tuple(layout[1])
+        size = int(np.prod(shape))
+        return self._data[offset:offset + size].reshape(shape)
+
+    @property
+    def closed(self) -> bool:
+        """内存映射是否已关闭"""
+        return self._data is None
+
+    def close(self) -> None:
+        """关闭内存映射"""
+        data, self._data = self._data, None
+        if data is not None and getattr(data, "_mmap", None) is not None:
+            data._mmap.close()
+
+
+def _decode_image(path: Path) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """解码图像为(RGB, 灰度)"""
+    image = cv2.imread(str(path))
+    if image is None:
+        return None
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return rgb, gray
+
+
+def _write_aligned(f, array: np.ndarray) -> List[Any]:
+    """对齐写入像素数组，返回[偏移, 形状]"""
+    padding = (-f.tell()) % _ALIGNMENT
+    if padding:
+        f.write(b"\x00" * padding)
+    offset = f.tell()
+    f.write(np.ascontiguousarray(array, dtype=np.uint8).tobytes())
+    return [offset, list(array.shape)]
+
+
+def build_template_pack(
+    base_path: Path,
+    pack_path: Path,
+    previous: Optional[TemplatePack] = None,
+    sources: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[TemplatePack, Dict[str, int]]:
+    """
+    增量编译模板包
+
+    源文件指纹与旧包一致的模板直接复用旧包中的元数据和像素数据，
+    只有新增或修改的模板会重新解析/解码。新包先写入临时文件再原子替换。
+
+    Args:
+        base_path: 模板目录
+        pack_path: 模板包路径
+        previous: 旧模板包(会被关闭)
+        sources: 已扫描的源文件指纹，为None时重新扫描
+
+    Returns:
+        (新模板包, 统计信息{'reused', 'compiled', 'removed'})
+    """
+    base_path = Path(base_path)
+    pack_path = Path(pack_path)
+    if sources is None:
+        sources = scan_template_sources(base_path)
+    stats = {"reused": 0, "compiled": 0, "removed": 0}
+
+    if previous is not None:
+        stats["removed"] = sum(1 for template_id in previous.ids() if template_id not in sources)
+
+    temp_path = pack_path.with_name(pack_path.name + ".tmp")
+    entries: Dict[str, Dict[str, Any]] = {}
+
+    with open(temp_path, "wb") as f:
+        f.write(b"\x00" * _HEADER.size)
+
+        for template_id in sorted(sources):
+            template_sources = sources[template_id]
+            meta = None
+            pixels = None
+
+            if previous is not None and previous.get_sources(template_id) == template_sources:
+                meta = previous.get_metadata(template_id)
+                rgb = previous.get_image(template_id)
+                if rgb is not None:
+                    pixels = (rgb, previous.get_gray(template_id))
+                stats["reused"] += 1
+            else:
+                if template_sources["json"] is not None:
+                    try:
+                        with open(base_path / f"{template_id}.json", "r", encoding="utf-8") as jf:
+                            meta = json.load(jf)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Skipping invalid template metadata '{template_id}': {e}")
+                if template_sources["image"] is not None:
+                    pixels = _decode_image(base_path / template_sources["image"][0])
+                stats["compiled"] += 1
+
+            entry: Dict[str, Any] = {"sources": template_sources, "meta": meta}
+            if pixels is not None:
+                entry["rgb"] = _write_aligned(f, pixels[0])
+                entry["gray"] = _write_aligned(f, pixels[1])
+            entries[template_id] = entry
+
+        # 写入索引前先关闭旧包，Windows上被映射的文件无法替换
+        if previous is not None:
+            previous.close()
+
+        index_offset = f.tell()
+        index_bytes = json.dumps({"entries": entries}, ensure_ascii=False).encode("utf-8")
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, index_offset, len(index_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp_path, pack_path)
+
+    pack = TemplatePack.open(pack_path)
+    # 包文件本身的写入也会改变目录修改时间，替换完成后再记录
+    pack.dir_mtime_ns = base_path.stat().st_mtime_ns
+    return pack, stats
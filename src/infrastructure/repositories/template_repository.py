@@ -4,37 +4,99 @@
 管理游戏界面模板数据和图像
 支持模板的增删改查和图像处理
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Hashable
+from collections import OrderedDict
 from pathlib import Path
 import json
 import logging
+import time
 import numpy as np
 import cv2
 from dependency_injector.wiring import inject, Provide
 from typing import TYPE_CHECKING
 
 from ...core.interfaces.repositories import ITemplateRepository, IConfigRepository
+from .template_pack import (
+    TemplatePack, TemplatePackError, DEFAULT_PACK_NAME, IMAGE_EXTENSIONS,
+    build_template_pack, scan_template_sources,
+)
 
 if TYPE_CHECKING:
     from ...application.containers.main_container import MainContainer
 
 
+class LRUCache:
+    """带命中率统计的LRU缓存"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> Any:
+        """读取缓存项，命中时移到最近使用端"""
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入缓存项，超出容量时淘汰最久未使用的项"""
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """移除缓存项"""
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存项(保留命中统计)"""
+        self._items.clear()
+
+    def hit_rate(self) -> float:
+        """获取命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 class TemplateRepository(ITemplateRepository):
     """
     模板仓储实现
     
-    管理游戏界面模板的存储、加载和搜索
+    管理游戏界面模板的存储、加载和搜索。
+    启用模板包时，模板元数据和预解码的像素数据从内存映射的编译包读取，
+    通过本仓储修改过的模板在下一次重新编译前直接读取源文件。
     """
     
     @inject
     def __init__(self, config_repository: IConfigRepository = Provide['config_repository']):
         self._config_repository = config_repository
         self._logger = logging.getLogger(__name__)
-        self._cache = {}
-        self._image_cache = {}
         self._base_path = None
         self._cache_size = 100
         self._auto_reload = True
+        self._reload_interval = 1.0
+        self._last_source_check = float('-inf')
+        self._cache = LRUCache(self._cache_size)
+        self._image_cache = LRUCache(self._cache_size)
+        self._use_pack = True
+        self._pack_path: Optional[Path] = None
+        self._pack: Optional[TemplatePack] = None
+        self._dirty_ids = set()  # 源文件已被本仓储修改、包内数据已过期的模板
+        self._pack_stats = {"builds": 0, "reused": 0, "compiled": 0, "removed": 0}
         self._initialized = False
     
     def _ensure_initialized(self) -> bool:
@@ -45,11 +107,19 @@ class TemplateRepository(ITemplateRepository):
                 self._base_path = Path(template_config.get('base_path', 'templates'))
                 self._cache_size = template_config.get('cache_size', 100)
                 self._auto_reload = template_config.get('auto_reload', True)
+                self._reload_interval = template_config.get('reload_interval', 1.0)
+                self._use_pack = template_config.get('use_pack', True)
+                self._cache = LRUCache(self._cache_size)
+                self._image_cache = LRUCache(self._cache_size)
                 
                 # 确保模板目录存在
                 self._base_path.mkdir(parents=True, exist_ok=True)
                 
                 self._initialized = True
+                
+                if self._use_pack:
+                    self._pack_path = self._base_path / template_config.get('pack_file', DEFAULT_PACK_NAME)
+                    self._open_pack()
                 return True
             except Exception as e:
                 self._logger.error(f"Failed to initialize template repository: {str(e)}")
@@ -62,9 +132,20 @@ class TemplateRepository(ITemplateRepository):
             return None
         
         try:
+            self._check_sources()
+            
             # 检查缓存
-            if template_id in self._cache:
-                return self._cache[template_id]
+            template_data = self._cache.get(template_id)
+            if template_data is not None:
+                return template_data
+            
+            # 从模板包加载
+            pack = self._current_pack()
+            if pack is not None and template_id not in self._dirty_ids:
+                template_data = pack.get_metadata(template_id)
+                if template_data is not None:
+                    self._add_to_cache(template_id, template_data)
+                return template_data
             
             # 从文件加载
             template_path = self._base_path / f"{template_id}.json"
@@ -100,6 +181,7 @@ class TemplateRepository(ITemplateRepository):
             
             # 更新缓存
             self._add_to_cache(template_id, template_data)
+            self._dirty_ids.add(template_id)
             
             return True
             
@@ -124,11 +206,9 @@ class TemplateRepository(ITemplateRepository):
                 image_path.unlink()
             
             # 从缓存中删除
-            if template_id in self._cache:
-                del self._cache[template_id]
-            
-            if template_id in self._image_cache:
-                del self._image_cache[template_id]
+            self._cache.pop(template_id)
+            self._evict_images(template_id)
+            self._dirty_ids.add(template_id)
             
             return True
             
@@ -144,9 +224,7 @@ class TemplateRepository(ITemplateRepository):
         try:
             templates = []
             
-            # 扫描模板目录
-            for template_file in self._base_path.glob("*.json"):
-                template_id = template_file.stem
+            for template_id in self._list_template_ids():
                 template_data = self.get_template(template_id)
                 
                 if template_data:
@@ -173,15 +251,26 @@ class TemplateRepository(ITemplateRepository):
             return None
         
         try:
+            self._check_sources()
+            
             # 检查图像缓存
-            if template_id in self._image_cache:
-                return self._image_cache[template_id]
+            image = self._image_cache.get(template_id)
+            if image is not None:
+                return image
+            
+            # 从模板包读取预解码的数据
+            pack = self._current_pack()
+            if pack is not None and template_id not in self._dirty_ids:
+                image = pack.get_image(template_id)
+                if image is None:
+                    return None
+                return self._add_image_to_cache(template_id, image)
             
             # 从文件加载图像
             image_path = self._base_path / f"{template_id}.png"
             if not image_path.exists():
                 # 尝试其他格式
-                for ext in ['.jpg', '.jpeg', '.bmp']:
+                for ext in IMAGE_EXTENSIONS[1:]:
                     alt_path = self._base_path / f"{template_id}{ext}"
                     if alt_path.exists():
                         image_path = alt_path
@@ -206,6 +295,34 @@ class TemplateRepository(ITemplateRepository):
             self._logger.error(f"Failed to get template image '{template_id}': {str(e)}")
             return None
     
+    def get_template_gray(self, template_id: str) -> Optional[np.ndarray]:
+        """获取模板灰度图像(模板包中已预先转换)"""
+        if not self._ensure_initialized():
+            return None
+        
+        try:
+            self._check_sources()
+            
+            key = (template_id, 'gray')
+            gray = self._image_cache.get(key)
+            if gray is not None:
+                return gray
+            
+            pack = self._current_pack()
+            if pack is not None and template_id not in self._dirty_ids:
+                gray = pack.get_gray(template_id)
+            else:
+                image = self.get_template_image(template_id)
+                gray = None if image is None else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            
+            if gray is None:
+                return None
+            return self._add_image_to_cache(key, gray)
+            
+        except Exception as e:
+            self._logger.error(f"Failed to get template gray image '{template_id}': {str(e)}")
+            return None
+    
     def save_template_image(self, template_id: str, image: np.ndarray) -> bool:
         """保存模板图像"""
         if not self._ensure_initialized():
@@ -224,7 +341,9 @@ class TemplateRepository(ITemplateRepository):
             
             if success:
                 # 更新图像缓存
+                self._evict_images(template_id)
                 self._add_image_to_cache(template_id, image)
+                self._dirty_ids.add(template_id)
                 return True
             else:
                 return False
@@ -303,39 +422,154 @@ class TemplateRepository(ITemplateRepository):
     def _add_to_cache(self, template_id: str, template_data: Dict[str, Any]) -> None:
         """添加到缓存"""
         try:
-            # 如果缓存满了，删除最旧的项
-            if len(self._cache) >= self._cache_size:
-                oldest_key = next(iter(self._cache))
-                del self._cache[oldest_key]
-            
-            self._cache[template_id] = template_data
+            self._cache.put(template_id, template_data)
             
         except Exception as e:
             self._logger.error(f"Failed to add to cache: {str(e)}")
     
-    def _add_image_to_cache(self, template_id: str, image: np.ndarray) -> None:
-        """添加图像到缓存"""
+    def _add_image_to_cache(self, key: Hashable, image: np.ndarray) -> np.ndarray:
+        """添加图像到缓存，返回缓存的副本
+        
+        缓存保存副本：模板包重新编译时旧的内存映射会被关闭。
+        """
+        image = image.copy()
         try:
-            # 如果缓存满了，删除最旧的项
-            if len(self._image_cache) >= self._cache_size:
-                oldest_key = next(iter(self._image_cache))
-                del self._image_cache[oldest_key]
-            
-            self._image_cache[template_id] = image.copy()
+            self._image_cache.put(key, image)
             
         except Exception as e:
             self._logger.error(f"Failed to add image to cache: {str(e)}")
+        return image
+    
+    def _evict_images(self, template_id: str) -> None:
+        """移除模板的所有图像缓存"""
+        self._image_cache.pop(template_id)
+        self._image_cache.pop((template_id, 'gray'))
+    
+    def _open_pack(self) -> None:
+        """打开模板包，不存在或无效时编译"""
+        if self._pack_path.exists():
+            try:
+                self._pack = TemplatePack.open(self._pack_path)
+            except TemplatePackError as e:
+                self._logger.warning(f"Template pack is invalid, rebuilding: {str(e)}")
+                self._pack = None
+        
+        if self._pack is None or self._auto_reload:
+            self.refresh_pack()
+    
+    def _check_sources(self) -> None:
+        """节流检查源文件指纹
+        
+        原地覆盖已有模板的JSON或图像不会改变目录修改时间，因此启用自动重载时
+        每隔reload_interval秒逐个比较源文件的(修改时间, 大小)，变化时增量重新编译。
+        """
+        if self._pack is None or not self._auto_reload:
+            return
+        now = time.monotonic()
+        if now - self._last_source_check < self._reload_interval:
+            return
+        self._last_source_check = now
+        self.refresh_pack()
+    
+    def _current_pack(self) -> Optional[TemplatePack]:
+        """获取当前模板包
+        
+        启用自动重载时检查目录修改时间，新增或删除模板后立即扫描源文件指纹；
+        原地修改由_check_sources节流检测。
+        """
+        if self._pack is None:
+            return None
+        
+        if self._auto_reload:
+            try:
+                if self._base_path.stat().st_mtime_ns != self._pack.dir_mtime_ns:
+                    self.refresh_pack()
+            except OSError as e:
+                self._logger.error(f"Failed to check template directory: {str(e)}")
+        
+        return self._pack
+    
+    def _list_template_ids(self) -> List[str]:
+        """获取所有带元数据的模板ID"""
+        pack = self._current_pack()
+        if pack is None:
+            return [template_file.stem for template_file in self._base_path.glob("*.json")]
+        
+        template_ids = [
+            template_id for template_id, entry in pack.entries.items()
+            if entry.get('meta') is not None and template_id not in self._dirty_ids
+        ]
+        template_ids.extend(
+            template_id for template_id in sorted(self._dirty_ids)
+            if (self._base_path / f"{template_id}.json").exists()
+        )
+        return template_ids
+    
+    def refresh_pack(self, force: bool = False) -> bool:
+        """
+        按源文件指纹增量重新编译模板包
+        
+        Args:
+            force: 为True时即使指纹一致也重新编译
+            
+        Returns:
+            bool: 是否成功
+        """
+        if not self._ensure_initialized() or not self._use_pack:
+            return False
+        
+        try:
+            self._last_source_check = time.monotonic()
+            dir_mtime_ns = self._base_path.stat().st_mtime_ns
+            sources = scan_template_sources(self._base_path)
+            
+            if self._pack is not None and not force and self._pack.matches_sources(sources):
+                self._pack.dir_mtime_ns = dir_mtime_ns
+                self._dirty_ids.clear()
+                return True
+            
+            self._pack, stats = build_template_pack(
+                self._base_path, self._pack_path, previous=self._pack, sources=sources
+            )
+            self._dirty_ids.clear()
+            # 源文件已变化，缓存中的旧数据不再可靠
+            self._cache.clear()
+            self._image_cache.clear()
+            
+            self._pack_stats["builds"] += 1
+            for key, value in stats.items():
+                self._pack_stats[key] += value
+            self._logger.debug(
+                f"Template pack rebuilt: {stats['compiled']} compiled, "
+                f"{stats['reused']} reused, {stats['removed']} removed"
+            )
+            return True
+            
+        except Exception as e:
+            self._logger.error(f"Failed to build template pack: {str(e)}")
+            if self._pack is not None and self._pack.closed:
+                self._pack = None
+            return False
     
     def clear_cache(self) -> None:
-        """清空缓存"""
+        """清空缓存，下一次访问时重新检查源文件"""
         self._cache.clear()
         self._image_cache.clear()
+        self._last_source_check = float('-inf')
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
+        hits = self._cache.hits + self._image_cache.hits
+        total = hits + self._cache.misses + self._image_cache.misses
         return {
             'template_cache_size': len(self._cache),
             'image_cache_size': len(self._image_cache),
             'max_cache_size': self._cache_size,
-            'cache_hit_rate': 0.0  # 可以添加命中率统计
-        }
\ No newline at end of file
+            'cache_hit_rate': hits / total if total else 0.0,
+            'template_cache_hit_rate': self._cache.hit_rate(),
+            'image_cache_hit_rate': self._image_cache.hit_rate(),
+            'pack_templates': len(self._pack) if self._pack is not None else 0,
+            'pack_builds': self._pack_stats['builds'],
+            'pack_compiled': self._pack_stats['compiled'],
+            'pack_reused': self._pack_stats['reused'],
+        }
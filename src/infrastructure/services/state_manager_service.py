@@ -16,6 +16,7 @@ from typing import TYPE_CHECKING
 
 from ...core.interfaces.services import IStateManager, IGameAnalyzer
 from ...core.interfaces.repositories import IConfigRepository
+from ...common.action_system import get_condition_signal
 
 if TYPE_CHECKING:
     from ...application.containers.main_container import MainContainer
@@ -125,8 +126,9 @@ class StateManagerService(IStateManager):
             # 更新时间戳
             self._current_state['system_info']['timestamp'] = time.time()
             
-            # 通知订阅者
+            # 通知订阅者和等待状态条件的动作
             self._notify_subscribers('state_updated', self._current_state)
+            get_condition_signal().notify()
             
             # 自动保存检查
             if self._auto_save_enabled:
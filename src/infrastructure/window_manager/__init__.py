@@ -6,6 +6,7 @@
 主要组件:
 - UnifiedWindowManager: 统一的窗口管理器实现
 - WindowManagerFactory: 窗口管理器工厂
+- WindowStateTracker: 事件驱动的窗口状态跟踪器
 - LegacyWindowAdapter: 向后兼容适配器
 
 使用示例:
@@ -22,17 +23,30 @@
     window_list = adapter.get_window_list()
 """
 
-from .unified_window_manager import UnifiedWindowManager
-from .window_manager_factory import WindowManagerFactory, get_window_manager_factory
+from .window_state_tracker import WindowStateTracker
 
 # 导出主要接口
 __all__ = [
-    'UnifiedWindowManager',
-    'WindowManagerFactory', 
-    'get_window_manager_factory',
+    'WindowStateTracker',
     'get_window_manager'
 ]
 
+# Win32相关实现仅在Windows平台可用
+try:
+    from .unified_window_manager import UnifiedWindowManager
+    from .window_manager_factory import WindowManagerFactory, get_window_manager_factory
+    __all__.extend(['UnifiedWindowManager', 'WindowManagerFactory', 'get_window_manager_factory'])
+except ImportError:
+    UnifiedWindowManager = None
+    WindowManagerFactory = None
+    get_window_manager_factory = None
+
+try:
+    from .win32_window_backend import Win32WindowStateBackend
+    __all__.append('Win32WindowStateBackend')
+except ImportError:
+    Win32WindowStateBackend = None
+
 # 便捷函数
 def get_window_manager(config=None):
     """获取窗口管理器实例
@@ -2,6 +2,9 @@
 
 这个模块实现了统一的窗口管理器，
 整合了现有的所有窗口管理功能。
+
+启用监控时，窗口状态由WindowStateTracker根据后端推送的事件维护，
+查询操作直接读取缓存；监控不可用时回退到基于超时的缓存刷新。
 """
 
 import logging
@@ -11,12 +14,13 @@ from typing import List, Optional, Dict, Any, Callable
 from dataclasses import dataclass, field
 
 from ...core.interfaces.window_manager import (
-    IWindowManager, IWindowEventHandler, WindowEventType,
+    IWindowManager, IWindowEventHandler, IWindowStateBackend, WindowEventType,
     WindowManagerError, WindowNotFoundError, WindowOperationError
 )
 from ...core.domain.window_models import WindowInfo, WindowListSnapshot, WindowRect
 from ...services.window_manager import GameWindowManager
 from ...infrastructure.adapters.window_adapter import WindowAdapter
+from .window_state_tracker import WindowStateTracker
 
 
 @dataclass
@@ -38,7 +42,8 @@ class UnifiedWindowManager(IWindowManager):
     提供统一的窗口管理接口。
     """
     
-    def __init__(self, config: WindowManagerConfig = None):
+    def __init__(self, config: WindowManagerConfig = None,
+                 window_backend: Optional[IWindowStateBackend] = None):
         self._config = config or WindowManagerConfig()
         self._logger = logging.getLogger(self.__class__.__name__)
         self._logger.setLevel(getattr(logging, self._config.log_level))
@@ -62,8 +67,12 @@ class UnifiedWindowManager(IWindowManager):
         self._event_handlers: List[IWindowEventHandler] = []
         self._event_lock = threading.RLock()
         
-        # 监控线程
-        self._monitor_thread: Optional[threading.Thread] = None
+        # 事件驱动的窗口状态跟踪
+        self._window_backend = window_backend
+        self._tracker: Optional[WindowStateTracker] = None
+        self._target_handle: Optional[int] = None
+        
+        # 自动刷新线程(仅在事件跟踪不可用时使用)
         self._auto_refresh_thread: Optional[threading.Thread] = None
     
     def initialize(self) -> None:
@@ -81,17 +90,21 @@ class UnifiedWindowManager(IWindowManager):
             # 确保适配器初始化
             self._window_adapter._ensure_initialized()
             
+            # 启动监控(事件跟踪会完成首次窗口枚举)
+            if self._config.enable_monitoring:
+                try:
+                    self.start_monitoring()
+                except WindowManagerError as e:
+                    self._logger.warning(f"Event tracking unavailable, falling back to polling: {e}")
+            
             # 初始化窗口列表
-            self.refresh_window_list()
+            if not self._is_tracking():
+                self.refresh_window_list()
             
-            # 启动自动刷新
-            if self._config.enable_auto_refresh:
+            # 事件跟踪不可用时才启动轮询式自动刷新
+            if self._config.enable_auto_refresh and not self._is_tracking():
                 self._start_auto_refresh()
             
-            # 启动监控
-            if self._config.enable_monitoring:
-                self.start_monitoring()
-            
             self._initialized = True
             self._logger.info("Unified window manager initialized successfully")
             
@@ -142,6 +155,16 @@ class UnifiedWindowManager(IWindowManager):
         self._ensure_initialized()
         
         try:
+            # 事件跟踪模式下直接读取跟踪器维护的快照
+            if self._is_tracking():
+                snapshot = self._tracker.get_snapshot()
+                if include_hidden:
+                    return snapshot
+                return WindowListSnapshot(
+                    [w for w in snapshot.windows if w.is_visible],
+                    timestamp=snapshot.timestamp
+                )
+            
             # 检查缓存
             if self._is_cache_valid():
                 cached_snapshot = self._window_list_cache
@@ -185,6 +208,10 @@ class UnifiedWindowManager(IWindowManager):
         self._ensure_initialized()
         
         try:
+            # 事件跟踪模式下窗口状态由事件维护，直接读取缓存
+            if self._is_tracking():
+                return self._tracker.get_window(handle)
+            
             # 检查缓存
             with self._cache_lock:
                 if handle in self._window_cache and self._is_cache_valid():
@@ -516,6 +543,9 @@ class UnifiedWindowManager(IWindowManager):
             if not self.get_window_by_handle(handle):
                 raise WindowNotFoundError(handle)
             
+            if handle != self._target_handle:
+                self.set_target_window(handle)
+            
             # 使用适配器的捕获方法
             if region:
                 result = self._window_adapter.capture_window(handle, region.to_tuple())
@@ -530,6 +560,16 @@ class UnifiedWindowManager(IWindowManager):
             self._logger.error(f"Failed to capture window {handle}: {e}")
             raise WindowOperationError("capture", handle, str(e))
     
+    def set_target_window(self, handle: Optional[int]) -> None:
+        """设置目标窗口
+        
+        事件跟踪模式下后端只为目标窗口所在进程推送位置、显示等高频事件，
+        其它窗口的状态在查询时重新获取。
+        """
+        self._target_handle = handle
+        if self._is_tracking():
+            self._tracker.set_target_window(handle)
+    
     def add_event_handler(self, handler: IWindowEventHandler) -> None:
         """添加事件处理器"""
         with self._event_lock:
@@ -543,22 +583,34 @@ class UnifiedWindowManager(IWindowManager):
                 self._event_handlers.remove(handler)
     
     def start_monitoring(self) -> None:
-        """开始监控窗口事件"""
+        """开始监控窗口事件
+        
+        监控通过窗口状态后端推送的事件维护缓存，取代定时轮询。
+        """
         if self._monitoring:
             return
         
         try:
-            self._monitoring = True
-            self._monitor_thread = threading.Thread(
-                target=self._monitor_windows,
-                name="WindowMonitor",
-                daemon=True
+            if self._window_backend is None:
+                from .win32_window_backend import Win32WindowStateBackend
+                self._window_backend = Win32WindowStateBackend()
+            
+            self._tracker = WindowStateTracker(
+                self._window_backend,
+                event_sink=self._dispatch_event
             )
-            self._monitor_thread.start()
+            self._tracker.start()
+            self._monitoring = True
+            if self._target_handle:
+                self._tracker.set_target_window(self._target_handle)
+            
+            # 跟踪器接管缓存后，轮询式自动刷新不再需要
+            self._stop_auto_refresh()
             self._logger.info("Window monitoring started")
             
         except Exception as e:
             self._monitoring = False
+            self._tracker = None
             self._logger.error(f"Failed to start monitoring: {e}")
             raise WindowManagerError(f"Failed to start monitoring: {e}")
     
@@ -570,8 +622,12 @@ class UnifiedWindowManager(IWindowManager):
         try:
             self._monitoring = False
             
-            if self._monitor_thread and self._monitor_thread.is_alive():
-                self._monitor_thread.join(timeout=5.0)
+            if self._tracker:
+                self._tracker.stop()
+                self._tracker = None
+            
+            # 退出事件跟踪后缓存需要重新按超时刷新
+            self.clear_cache()
             
             self._logger.info("Window monitoring stopped")
             
@@ -579,26 +635,10 @@ class UnifiedWindowManager(IWindowManager):
             self._logger.error(f"Error stopping monitoring: {e}")
             raise WindowManagerError(f"Failed to stop monitoring: {e}")
     
-    def _monitor_windows(self) -> None:
-        """窗口监控线程"""
-        self._logger.info("Window monitoring thread started")
-        
-        try:
-            while self._monitoring and not self._shutdown_requested:
-                try:
-                    # 这里可以实现窗口事件监控逻辑
-                    # 目前只是定期刷新窗口列表
-                    time.sleep(1.0)
-                    
-                except Exception as e:
-                    self._logger.error(f"Error in monitoring loop: {e}")
-                    time.sleep(1.0)
-        
-        except Exception as e:
-            self._logger.error(f"Fatal error in monitoring thread: {e}")
-        
-        finally:
-            self._logger.info("Window monitoring thread stopped")
+    def _is_tracking(self) -> bool:
+        """检查是否处于事件跟踪模式"""
+        tracker = self._tracker
+        return tracker is not None and tracker.is_running()
     
     def _start_auto_refresh(self) -> None:
         """启动自动刷新"""
@@ -621,7 +661,8 @@ class UnifiedWindowManager(IWindowManager):
     
     def _auto_refresh_loop(self) -> None:
         """自动刷新循环"""
-        while not self._shutdown_requested and self._config.enable_auto_refresh:
+        while (not self._shutdown_requested and self._config.enable_auto_refresh
+               and not self._is_tracking()):
             try:
                 time.sleep(self._config.auto_refresh_interval)
                 if not self._shutdown_requested:
@@ -632,6 +673,12 @@ class UnifiedWindowManager(IWindowManager):
     def refresh_window_list(self) -> None:
         """刷新窗口列表缓存"""
         try:
+            # 事件跟踪模式下做一次完整重新同步
+            if self._is_tracking():
+                self._tracker.resync()
+                self._logger.debug("Window list resynchronized")
+                return
+            
             # 清除缓存并重新获取
             with self._cache_lock:
                 self._window_list_cache = None
@@ -682,6 +729,11 @@ class UnifiedWindowManager(IWindowManager):
     
     def _invalidate_window_cache(self, handle: int) -> None:
         """使特定窗口的缓存失效"""
+        # 本进程主动修改了窗口，立即刷新跟踪器中的条目
+        if self._is_tracking():
+            self._tracker.refresh_window(handle)
+            return
+        
         with self._cache_lock:
             if handle in self._window_cache:
                 del self._window_cache[handle]
@@ -693,16 +745,22 @@ class UnifiedWindowManager(IWindowManager):
             if not window_info:
                 return
             
-            with self._event_lock:
-                for handler in self._event_handlers:
-                    try:
-                        handler.on_window_event(event_type, window_info, **kwargs)
-                    except Exception as e:
-                        self._logger.error(f"Error in event handler: {e}")
+            self._dispatch_event(event_type, window_info, **kwargs)
         
         except Exception as e:
             self._logger.error(f"Error emitting event {event_type}: {e}")
     
+    def _dispatch_event(self, event_type: str, window_info: WindowInfo, **kwargs) -> None:
+        """把窗口事件分发给所有事件处理器"""
+        with self._event_lock:
+            handlers = list(self._event_handlers)
+        
+        for handler in handlers:
+            try:
+                handler.on_window_event(event_type, window_info, **kwargs)
+            except Exception as e:
+                self._logger.error(f"Error in event handler: {e}")
+    
     def get_configuration(self) -> Dict[str, Any]:
         """获取配置信息"""
         return {
@@ -727,13 +785,17 @@ class UnifiedWindowManager(IWindowManager):
     
     def get_status(self) -> Dict[str, Any]:
         """获取管理器状态"""
+        tracking = self._is_tracking()
+        
         with self._cache_lock:
-            cache_size = len(self._window_cache)
-            cache_valid = self._is_cache_valid()
+            cache_size = len(self._tracker.get_handles()) if tracking else len(self._window_cache)
+            cache_valid = tracking or self._is_cache_valid()
         
         return {
             'initialized': self._initialized,
             'monitoring': self._monitoring,
+            'event_tracking': tracking,
+            'tracker': self._tracker.get_statistics() if tracking else None,
             'cache_size': cache_size,
             'cache_valid': cache_valid,
             'event_handlers': len(self._event_handlers),
@@ -0,0 +1,271 @@
+"""Win32窗口状态后端
+
+通过SetWinEventHook接收窗口创建、销毁、移动、显示/隐藏、
+标题变化和前台切换事件，为WindowStateTracker提供推送式更新。
+移动等高频事件只对目标窗口所在进程注册。
+"""
+
+import ctypes
+import logging
+import threading
+from ctypes import wintypes
+from typing import Callable, List, Optional
+
+import win32api
+import win32con
+import win32gui
+import win32process
+
+from ...core.interfaces.window_manager import (
+    IWindowStateBackend, WindowEventType, WindowManagerError
+)
+from ...core.domain.window_models import WindowInfo, WindowRect, WindowState
+
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(
+    None,
+    wintypes.HANDLE,   # hWinEventHook
+    wintypes.DWORD,    # event
+    wintypes.HWND,     # hwnd
+    wintypes.LONG,     # idObject
+    wintypes.LONG,     # idChild
+    wintypes.DWORD,    # dwEventThread
+    wintypes.DWORD,    # dwmsEventTime
+)
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+WM_QUIT = 0x0012
+WM_RETARGET = 0x8001  # WM_APP + 1，通知钩子线程重新注册目标进程钩子
+
+# Win32事件到统一窗口事件类型的映射
+_EVENT_MAP = {
+    EVENT_SYSTEM_FOREGROUND: WindowEventType.ACTIVATED,
+    EVENT_SYSTEM_MINIMIZESTART: WindowEventType.STATE_CHANGED,
+    EVENT_SYSTEM_MINIMIZEEND: WindowEventType.STATE_CHANGED,
+    EVENT_OBJECT_CREATE: WindowEventType.CREATED,
+    EVENT_OBJECT_DESTROY: WindowEventType.DESTROYED,
+    EVENT_OBJECT_SHOW: WindowEventType.STATE_CHANGED,
+    EVENT_OBJECT_HIDE: WindowEventType.STATE_CHANGED,
+    EVENT_OBJECT_LOCATIONCHANGE: WindowEventType.MOVED,
+    EVENT_OBJECT_NAMECHANGE: WindowEventType.TITLE_CHANGED,
+}
+
+# 对所有进程注册的事件区间(每个区间一个钩子)
+_HOOK_RANGES = [
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND),
+    (EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY),
+]
+
+# 只对目标进程注册的高频事件区间(显示、隐藏、位置和标题变化)
+_TARGET_HOOK_RANGE = (EVENT_OBJECT_SHOW, EVENT_OBJECT_NAMECHANGE)
+
+
+class Win32WindowStateBackend(IWindowStateBackend):
+    """基于WinEvent钩子的窗口状态后端
+
+    钩子安装在专用线程上，该线程运行消息循环以接收
+    WINEVENT_OUTOFCONTEXT回调。
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._callback: Optional[Callable[[str, int], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._start_error: Optional[str] = None
+        self._target_process_id: Optional[int] = None
+        # 保持回调引用，防止被垃圾回收
+        self._hook_proc = WINEVENTPROC(self._win_event_proc)
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        """枚举所有顶层窗口"""
+        handles: List[int] = []
+
+        def callback(hwnd, result):
+            result.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(callback, handles)
+
+        windows = []
+        for hwnd in handles:
+            window_info = self.query_window(hwnd)
+            if window_info is not None:
+                windows.append(window_info)
+        return windows
+
+    def query_window(self, handle: int) -> Optional[WindowInfo]:
+        """查询单个顶层窗口的状态"""
+        try:
+            if not handle or not win32gui.IsWindow(handle):
+                return None
+
+            # 只跟踪有标题的顶层窗口
+            if win32gui.GetParent(handle):
+                return None
+            title = win32gui.GetWindowText(handle)
+            if not title:
+                return None
+
+            left, top, right, bottom = win32gui.GetWindowRect(handle)
+            _, process_id = win32process.GetWindowThreadProcessId(handle)
+
+            if win32gui.IsIconic(handle):
+                state = WindowState.MINIMIZED
+            elif win32gui.IsZoomed(handle):
+                state = WindowState.MAXIMIZED
+            else:
+                state = WindowState.UNKNOWN
+
+            is_foreground = win32gui.GetForegroundWindow() == handle
+
+            return WindowInfo(
+                handle=handle,
+                title=title,
+                class_name=win32gui.GetClassName(handle),
+                process_id=process_id,
+                rect=WindowRect.from_win32_rect(left, top, right, bottom),
+                state=state,
+                is_visible=bool(win32gui.IsWindowVisible(handle)),
+                is_enabled=bool(win32gui.IsWindowEnabled(handle)),
+                is_active=is_foreground,
+                is_foreground=is_foreground
+            )
+
+        except Exception as e:
+            # 窗口可能在查询过程中被销毁
+            self._logger.debug(f"Failed to query window {handle}: {e}")
+            return None
+
+    def start(self, callback: Callable[[str, int], None]) -> None:
+        """在专用线程中安装钩子并运行消息循环"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._callback = callback
+        self._ready.clear()
+        self._start_error = None
+        self._thread = threading.Thread(
+            target=self._hook_loop,
+            name="WindowEventHook",
+            daemon=True
+        )
+        self._thread.start()
+
+        if not self._ready.wait(timeout=5.0):
+            raise WindowManagerError("Timed out installing window event hooks")
+        if self._start_error:
+            raise WindowManagerError(self._start_error)
+
+    def stop(self) -> None:
+        """退出消息循环并卸载钩子"""
+        if not self._thread:
+            return
+
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self._thread_id = 0
+        self._callback = None
+
+    def set_target_process(self, process_id: Optional[int]) -> None:
+        """设置目标进程，钩子线程随后为其重新注册高频事件钩子"""
+        if process_id == self._target_process_id:
+            return
+
+        self._target_process_id = process_id
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_RETARGET, 0, 0)
+
+    def tracks_process(self, process_id: int) -> bool:
+        """只有目标进程的窗口状态变化会被推送"""
+        return bool(process_id) and process_id == self._target_process_id
+
+    def _hook_target_process(self, target_hook: int) -> int:
+        """在钩子线程上把目标进程钩子切换到当前目标进程"""
+        user32 = ctypes.windll.user32
+        if target_hook:
+            user32.UnhookWinEvent(target_hook)
+            target_hook = 0
+
+        process_id = self._target_process_id
+        if process_id:
+            event_min, event_max = _TARGET_HOOK_RANGE
+            target_hook = user32.SetWinEventHook(
+                event_min, event_max, 0, self._hook_proc, process_id, 0,
+                win32con.WINEVENT_OUTOFCONTEXT
+            )
+            if not target_hook:
+                self._logger.error(f"SetWinEventHook failed for process {process_id}")
+        return target_hook
+
+    def _hook_loop(self) -> None:
+        """钩子线程：安装钩子并泵送消息"""
+        user32 = ctypes.windll.user32
+        hooks = []
+        target_hook = 0
+
+        try:
+            self._thread_id = win32api.GetCurrentThreadId()
+
+            for event_min, event_max in _HOOK_RANGES:
+                hook = user32.SetWinEventHook(
+                    event_min, event_max, 0, self._hook_proc, 0, 0,
+                    win32con.WINEVENT_OUTOFCONTEXT | win32con.WINEVENT_SKIPOWNPROCESS
+                )
+                if not hook:
+                    self._start_error = f"SetWinEventHook failed for events {event_min:#x}-{event_max:#x}"
+                    return
+                hooks.append(hook)
+
+            target_hook = self._hook_target_process(target_hook)
+            self._ready.set()
+
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                if msg.message == WM_RETARGET:
+                    target_hook = self._hook_target_process(target_hook)
+                    continue
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+
+        except Exception as e:
+            self._start_error = str(e)
+            self._logger.error(f"Window event hook thread failed: {e}")
+
+        finally:
+            for hook in hooks:
+                user32.UnhookWinEvent(hook)
+            if target_hook:
+                user32.UnhookWinEvent(target_hook)
+            self._ready.set()
+
+    def _win_event_proc(self, hWinEventHook, event, hwnd, idObject, idChild,
+                        dwEventThread, dwmsEventTime):
+        """WinEvent回调：过滤出窗口级事件并转发"""
+        if idObject != OBJID_WINDOW or idChild != CHILDID_SELF or not hwnd:
+            return
+
+        event_type = _EVENT_MAP.get(event)
+        callback = self._callback
+        if event_type is None or callback is None:
+            return
+
+        try:
+            callback(event_type, hwnd)
+        except Exception as e:
+            self._logger.error(f"Error dispatching window event: {e}")
@@ -0,0 +1,237 @@
+"""窗口状态跟踪器
+
+这个模块实现了事件驱动的窗口状态缓存。
+跟踪器只在后端报告窗口变化时重新查询对应窗口，
+热路径上的查询(如每帧捕获前的几何信息)只读取缓存。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+from ...core.interfaces.window_manager import IWindowStateBackend, WindowEventType
+from ...core.domain.window_models import WindowInfo, WindowListSnapshot
+
+
+WindowEventSink = Callable[[str, WindowInfo], None]
+
+
+class WindowStateTracker:
+    """事件驱动的窗口状态跟踪器
+
+    启动时做一次完整枚举，之后由后端推送的事件增量维护缓存。
+    读操作不加锁，写操作(来自后端事件线程)在锁内替换字典条目。
+    """
+
+    def __init__(self, backend: IWindowStateBackend,
+                 event_sink: Optional[WindowEventSink] = None):
+        self._backend = backend
+        self._event_sink = event_sink
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+        self._windows: Dict[int, WindowInfo] = {}
+        self._snapshot: Optional[WindowListSnapshot] = None
+        self._foreground_handle: Optional[int] = None
+        self._lock = threading.RLock()
+        self._running = False
+
+        # 统计信息
+        self._events_received = 0
+        self._window_queries = 0
+        self._resyncs = 0
+        self._last_event_time = 0.0
+
+    def start(self) -> None:
+        """完整同步一次窗口列表并开始接收后端事件"""
+        if self._running:
+            return
+
+        self.resync()
+        self._backend.start(self._on_backend_event)
+        self._running = True
+        self._logger.info(f"Window state tracking started ({len(self._windows)} windows)")
+
+    def stop(self) -> None:
+        """停止接收后端事件"""
+        if not self._running:
+            return
+
+        self._running = False
+        try:
+            self._backend.stop()
+        finally:
+            self._logger.info("Window state tracking stopped")
+
+    def is_running(self) -> bool:
+        """检查跟踪器是否在运行"""
+        return self._running
+
+    def resync(self) -> None:
+        """重新枚举所有窗口，用于启动或显式刷新"""
+        windows = self._backend.enumerate_windows()
+
+        with self._lock:
+            self._windows = {window.handle: window for window in windows}
+            self._snapshot = None
+            self._foreground_handle = next(
+                (w.handle for w in windows if w.is_foreground), None
+            )
+            self._resyncs += 1
+
+    def get_window(self, handle: int) -> Optional[WindowInfo]:
+        """从缓存读取窗口信息
+
+        后端不推送状态事件的进程(非目标进程)的窗口在读取时重新查询。
+        """
+        window_info = self._windows.get(handle)
+        if window_info is not None and not self._backend.tracks_process(window_info.process_id):
+            return self.refresh_window(handle)
+        return window_info
+
+    def set_target_window(self, handle: Optional[int]) -> None:
+        """设置目标窗口，后端只为其所在进程推送高频状态事件"""
+        window_info = self.refresh_window(handle) if handle else None
+        self._backend.set_target_process(window_info.process_id if window_info else None)
+
+    def get_snapshot(self) -> WindowListSnapshot:
+        """获取窗口列表快照
+
+        快照在窗口集合变化前会被复用，避免每次查询都重建列表。
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = WindowListSnapshot(list(self._windows.values()))
+            return self._snapshot
+
+    def refresh_window(self, handle: int) -> Optional[WindowInfo]:
+        """立即重新查询单个窗口
+
+        用于本进程主动修改窗口(移动、调整大小等)后，
+        不等待后端事件即可读到最新状态。调用方自行发送事件，这里不再通知。
+        """
+        self._window_queries += 1
+        window_info = self._backend.query_window(handle)
+
+        with self._lock:
+            if window_info is None:
+                if self._windows.pop(handle, None) is not None:
+                    self._snapshot = None
+            else:
+                self._windows[handle] = window_info
+                self._snapshot = None
+
+        return window_info
+
+    def _on_backend_event(self, event_type: str, handle: int) -> None:
+        """处理后端推送的窗口事件"""
+        try:
+            self._events_received += 1
+            self._last_event_time = time.time()
+
+            if event_type == WindowEventType.DESTROYED:
+                self._remove_window(handle)
+                return
+
+            # 位置变化事件非常频繁，未跟踪的窗口(子窗口等)直接忽略
+            if event_type == WindowEventType.MOVED and handle not in self._windows:
+                return
+
+            self._window_queries += 1
+            window_info = self._backend.query_window(handle)
+
+            if window_info is None:
+                self._remove_window(handle)
+                return
+
+            with self._lock:
+                previous = self._windows.get(handle)
+                self._windows[handle] = window_info
+                if previous is None or previous.title != window_info.title \
+                        or previous.is_visible != window_info.is_visible:
+                    self._snapshot = None
+                else:
+                    self._replace_in_snapshot(window_info)
+
+            if previous is None:
+                self._notify(WindowEventType.CREATED, window_info)
+            elif event_type == WindowEventType.ACTIVATED:
+                self._on_window_activated(window_info)
+            else:
+                self._notify(self._classify_change(event_type, previous, window_info), window_info)
+
+        except Exception as e:
+            self._logger.error(f"Error handling window event {event_type} for {handle}: {e}")
+
+    def _on_window_activated(self, window_info: WindowInfo) -> None:
+        """处理前台窗口切换，同时刷新失去激活的窗口"""
+        previous_handle = self._foreground_handle
+        self._foreground_handle = window_info.handle
+
+        if previous_handle and previous_handle != window_info.handle:
+            previous_info = self._backend.query_window(previous_handle)
+            if previous_info is not None:
+                with self._lock:
+                    self._windows[previous_handle] = previous_info
+                    self._replace_in_snapshot(previous_info)
+                self._notify(WindowEventType.DEACTIVATED, previous_info)
+
+        self._notify(WindowEventType.ACTIVATED, window_info)
+
+    def _replace_in_snapshot(self, window_info: WindowInfo) -> None:
+        """在快照中原位替换窗口信息(调用方持有锁)"""
+        if self._snapshot is None:
+            return
+        windows = [window_info if w.handle == window_info.handle else w
+                   for w in self._snapshot.windows]
+        self._snapshot = WindowListSnapshot(windows)
+
+    @staticmethod
+    def _classify_change(event_type: str, previous: WindowInfo, current: WindowInfo) -> str:
+        """根据前后状态细化位置变化事件的类型"""
+        if event_type not in (WindowEventType.MOVED, WindowEventType.RESIZED):
+            return event_type
+
+        if (previous.rect.width, previous.rect.height) != (current.rect.width, current.rect.height):
+            return WindowEventType.RESIZED
+        return WindowEventType.MOVED
+
+    def _remove_window(self, handle: int) -> None:
+        """从缓存移除窗口并通知"""
+        with self._lock:
+            window_info = self._windows.pop(handle, None)
+            if window_info is not None:
+                self._snapshot = None
+            if self._foreground_handle == handle:
+                self._foreground_handle = None
+
+        if window_info is not None:
+            self._notify(WindowEventType.DESTROYED, window_info)
+
+    def _notify(self, event_type: str, window_info: WindowInfo) -> None:
+        """把变化转发给事件接收方"""
+        if self._event_sink is None:
+            return
+        try:
+            self._event_sink(event_type, window_info)
+        except Exception as e:
+            self._logger.error(f"Error in window event sink: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取跟踪统计信息"""
+        return {
+            'running': self._running,
+            'tracked_windows': len(self._windows),
+            'events_received': self._events_received,
+            'window_queries': self._window_queries,
+            'resyncs': self._resyncs,
+            'last_event_time': self._last_event_time
+        }
+
+    def get_handles(self) -> List[int]:
+        """获取当前跟踪的窗口句柄"""
+        return list(self._windows.keys())
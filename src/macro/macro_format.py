@@ -0,0 +1,476 @@
+"""
+宏文件格式
+提供紧凑的分块列式二进制宏格式、流式读写、鼠标轨迹简化，
+以及与JSON格式(version 1.0)之间的无损互转
+
+二进制文件结构(小端序):
+    文件头: MAGIC(8字节) + 格式版本(uint16)
+    数据块: 块长度(uint32) + zlib压缩的块内容，重复直到文件结束
+    块内容: 事件数n(uint32)
+            事件类型列 n*uint8
+            时间戳列   n*float64
+            编码方式列 n*uint8 (0=通用JSON, 1=紧凑鼠标事件)
+            紧凑鼠标事件: x列 m*int32, y列 m*int32, 按键掩码列 m*uint8
+            通用事件: 长度列 k*uint32 + 拼接的UTF-8 JSON数据
+"""
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from array import array
+import json
+import struct
+import sys
+import zlib
+import logging
+
+from .macro_recorder import MacroEvent, MacroEventType
+
+
+MAGIC = b"GAMACRO\x00"
+FORMAT_VERSION = 1
+JSON_FORMAT_VERSION = "1.0"
+BINARY_EXTENSION = ".gmacro"
+
+DEFAULT_CHUNK_SIZE = 4096
+
+ENCODING_JSON = 0
+ENCODING_MOUSE = 1
+
+# 紧凑鼠标事件的按键掩码位
+BUTTON_BITS = {"left": 1, "right": 2, "middle": 4}
+
+_HEADER = struct.Struct("<8sH")
+_UINT32 = struct.Struct("<I")
+
+logger = logging.getLogger("MacroFormat")
+
+
+def _to_little_endian(values: array) -> bytes:
+    """把数组转换为小端序字节"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    """从小端序字节读取数组"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _encode_mouse(event: MacroEvent) -> Optional[Tuple[int, int, int]]:
+    """尝试把鼠标事件编码为(x, y, 按键掩码)
+
+    只有数据结构恰好为 {"position": [x, y], "buttons": {left, right, middle}}
+    且均为整数/布尔值时才使用紧凑编码，其余情况回退到JSON以保证无损。
+    """
+    if event.type != MacroEventType.MOUSE_MOVE:
+        return None
+
+    data = event.data
+    if set(data.keys()) != {"position", "buttons"}:
+        return None
+
+    position = data["position"]
+    buttons = data["buttons"]
+    if not isinstance(position, (list, tuple)) or len(position) != 2:
+        return None
+    if not all(type(v) is int and -2**31 <= v < 2**31 for v in position):
+        return None
+    if not isinstance(buttons, dict) or list(buttons.keys()) != list(BUTTON_BITS.keys()):
+        return None
+    if not all(type(v) is bool for v in buttons.values()):
+        return None
+
+    mask = 0
+    for name, bit in BUTTON_BITS.items():
+        if buttons[name]:
+            mask |= bit
+    return position[0], position[1], mask
+
+
+def _decode_mouse(x: int, y: int, mask: int) -> Dict[str, Any]:
+    """解码紧凑鼠标事件数据"""
+    return {
+        "position": [x, y],
+        "buttons": {name: bool(mask & bit) for name, bit in BUTTON_BITS.items()},
+    }
+
+
+def _encode_chunk(events: List[MacroEvent]) -> bytes:
+    """编码一个数据块"""
+    types = array("B")
+    timestamps = array("d")
+    encodings = array("B")
+    xs, ys, masks = array("i"), array("i"), array("B")
+    lengths = array("I")
+    payloads = []
+
+    for event in events:
+        types.append(event.type.value)
+        timestamps.append(event.timestamp)
+
+        compact = _encode_mouse(event)
+        if compact is not None:
+            encodings.append(ENCODING_MOUSE)
+            xs.append(compact[0])
+            ys.append(compact[1])
+            masks.append(compact[2])
+        else:
+            encodings.append(ENCODING_JSON)
+            payload = json.dumps(event.data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            lengths.append(len(payload))
+            payloads.append(payload)
+
+    parts = [
+        _UINT32.pack(len(events)),
+        types.tobytes(),
+        _to_little_endian(timestamps),
+        encodings.tobytes(),
+        _to_little_endian(xs),
+        _to_little_endian(ys),
+        masks.tobytes(),
+        _to_little_endian(lengths),
+    ]
+    parts.extend(payloads)
+    return b"".join(parts)
+
+
+def _decode_chunk(data: bytes) -> List[MacroEvent]:
+    """解码一个数据块"""
+    (count,) = _UINT32.unpack_from(data, 0)
+    offset = _UINT32.size
+
+    def take(typecode: str, n: int) -> array:
+        nonlocal offset
+        size = array(typecode).itemsize * n
+        values = _from_little_endian(typecode, data[offset:offset + size])
+        offset += size
+        return values
+
+    types = take("B", count)
+    timestamps = take("d", count)
+    encodings = take("B", count)
+    compact_count = sum(1 for e in encodings if e == ENCODING_MOUSE)
+    xs = take("i", compact_count)
+    ys = take("i", compact_count)
+    masks = take("B", compact_count)
+    lengths = take("I", count - compact_count)
+
+    events = []
+    compact_index = 0
+    payload_index = 0
+    for i in range(count):
+        if encodings[i] == ENCODING_MOUSE:
+            event_data = _decode_mouse(xs[compact_index], ys[compact_index], masks[compact_index])
+            compact_index += 1
+        else:
+            length = lengths[payload_index]
+            event_data = json.loads(data[offset:offset + length].decode("utf-8"))
+            offset += length
+            payload_index += 1
+
+        events.append(MacroEvent(
+            type=MacroEventType(types[i]),
+            timestamp=timestamps[i],
+            data=event_data,
+        ))
+
+    return events
+
+
+class MacroBinaryWriter:
+    """流式二进制宏写入器
+
+    事件按块缓冲，每满一块压缩写入一次，录制长宏时内存占用恒定。
+    """
+
+    def __init__(self, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE, compress_level: int = 6):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.compress_level = compress_level
+        self.event_count = 0
+        self._buffer: List[MacroEvent] = []
+        self._file = open(filename, "wb")
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+
+    def write(self, event: MacroEvent) -> None:
+        """写入单个事件"""
+        self._buffer.append(event)
+        self.event_count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self._flush_chunk()
+
+    def write_all(self, events: Iterable[MacroEvent]) -> None:
+        """写入多个事件"""
+        for event in events:
+            self.write(event)
+
+    def _flush_chunk(self) -> None:
+        """压缩并写出缓冲的事件"""
+        if not self._buffer:
+            return
+        block = zlib.compress(_encode_chunk(self._buffer), self.compress_level)
+        self._file.write(_UINT32.pack(len(block)))
+        self._file.write(block)
+        self._buffer = []
+
+    def close(self) -> None:
+        """写出剩余事件并关闭文件"""
+        if self._file.closed:
+            return
+        try:
+            self._flush_chunk()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> "MacroBinaryWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class MacroBinaryReader:
+    """流式二进制宏读取器，按块解码并逐个产出事件"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            self._file.close()
+            raise ValueError("宏文件头不完整")
+        magic, version = _HEADER.unpack(header)
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError("不是二进制宏文件")
+        if version != FORMAT_VERSION:
+            self._file.close()
+            raise ValueError(f"不支持的二进制宏版本: {version}")
+
+    def __iter__(self) -> Iterator[MacroEvent]:
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def iter_chunks(self) -> Iterator[List[MacroEvent]]:
+        """逐块读取事件"""
+        while True:
+            size_bytes = self._file.read(_UINT32.size)
+            if not size_bytes:
+                return
+            if len(size_bytes) != _UINT32.size:
+                raise ValueError("宏文件数据块不完整")
+            (size,) = _UINT32.unpack(size_bytes)
+            block = self._file.read(size)
+            if len(block) != size:
+                raise ValueError("宏文件数据块不完整")
+            yield _decode_chunk(zlib.decompress(block))
+
+    def close(self) -> None:
+        """关闭文件"""
+        self._file.close()
+
+    def __enter__(self) -> "MacroBinaryReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def is_binary_macro(filename: str) -> bool:
+    """根据文件头判断是否为二进制宏文件"""
+    try:
+        with open(filename, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def save_binary_macro(filename: str, events: Iterable[MacroEvent],
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, compress_level: int = 6) -> int:
+    """保存为二进制宏文件，返回写入的事件数"""
+    with MacroBinaryWriter(filename, chunk_size, compress_level) as writer:
+        writer.write_all(events)
+        return writer.event_count
+
+
+def iter_macro_events(filename: str) -> Iterator[MacroEvent]:
+    """流式读取宏文件中的事件(自动识别二进制/JSON格式)"""
+    if is_binary_macro(filename):
+        with MacroBinaryReader(filename) as reader:
+            yield from reader
+        return
+
+    yield from json_to_events(_read_json(filename))
+
+
+def load_macro_events(filename: str) -> List[MacroEvent]:
+    """读取宏文件中的全部事件(自动识别二进制/JSON格式)"""
+    return list(iter_macro_events(filename))
+
+
+def events_to_json(events: Iterable[MacroEvent]) -> Dict[str, Any]:
+    """转换为JSON宏数据结构"""
+    return {
+        "version": JSON_FORMAT_VERSION,
+        "events": [
+            {
+                "type": event.type.name,
+                "timestamp": event.timestamp,
+                "data": event.data,
+            }
+            for event in events
+        ],
+    }
+
+
+def json_to_events(macro_data: Dict[str, Any]) -> List[MacroEvent]:
+    """从JSON宏数据结构创建事件列表"""
+    if macro_data.get("version") != JSON_FORMAT_VERSION:
+        raise ValueError("不支持的宏文件版本")
+
+    return [
+        MacroEvent(
+            type=MacroEventType[event["type"]],
+            timestamp=event["timestamp"],
+            data=event["data"],
+        )
+        for event in macro_data["events"]
+    ]
+
+
+def save_json_macro(filename: str, events: Iterable[MacroEvent], indent: Optional[int] = 2) -> None:
+    """保存为JSON宏文件"""
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(events_to_json(events), f, indent=indent)
+
+
+def _read_json(filename: str) -> Dict[str, Any]:
+    """读取JSON宏文件"""
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert_macro_file(source: str, target: str, binary: Optional[bool] = None) -> int:
+    """
+    在JSON和二进制格式之间转换宏文件
+
+    Args:
+        source: 源文件
+        target: 目标文件
+        binary: 目标是否为二进制格式，None时根据扩展名判断
+
+    Returns:
+        int: 转换的事件数
+    """
+    if binary is None:
+        binary = target.endswith(BINARY_EXTENSION)
+
+    if binary:
+        return save_binary_macro(target, iter_macro_events(source))
+
+    events = load_macro_events(source)
+    save_json_macro(target, events)
+    return len(events)
+
+
+def _perpendicular_distance(point: Tuple[float, float], start: Tuple[float, float],
+                            end: Tuple[float, float]) -> float:
+    """点到线段的距离"""
+    px, py = point
+    sx, sy = start
+    ex, ey = end
+    dx, dy = ex - sx, ey - sy
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return ((px - sx) ** 2 + (py - sy) ** 2) ** 0.5
+
+    t = max(0.0, min(1.0, ((px - sx) * dx + (py - sy) * dy) / length_sq))
+    cx, cy = sx + t * dx, sy + t * dy
+    return ((px - cx) ** 2 + (py - cy) ** 2) ** 0.5
+
+
+def _simplify_run(points: List[Tuple[float, float]], tolerance: float) -> List[int]:
+    """Ramer-Douglas-Peucker简化，返回保留点的下标(迭代实现，避免递归过深)"""
+    if len(points) <= 2:
+        return list(range(len(points)))
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        max_distance = 0.0
+        index = start
+        for i in range(start + 1, end):
+            distance = _perpendicular_distance(points[i], points[start], points[end])
+            if distance > max_distance:
+                max_distance = distance
+                index = i
+
+        if max_distance > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return [i for i, kept in enumerate(keep) if kept]
+
+
+def _move_key(event: MacroEvent) -> Optional[Tuple[Any, ...]]:
+    """鼠标移动事件的分组键(按键状态相同的连续移动归为一段)"""
+    if event.type != MacroEventType.MOUSE_MOVE:
+        return None
+    position = event.data.get("position")
+    if not isinstance(position, (list, tuple)) or len(position) != 2:
+        return None
+    buttons = event.data.get("buttons", {})
+    return tuple(sorted(buttons.items())) if isinstance(buttons, dict) else None
+
+
+def simplify_mouse_path(events: List[MacroEvent], tolerance: float = 1.0) -> List[MacroEvent]:
+    """
+    简化连续的鼠标移动轨迹
+
+    对按键状态不变的连续MOUSE_MOVE事件做Ramer-Douglas-Peucker简化，
+    每段的起点和终点始终保留，其余事件的时间戳不变。
+
+    Args:
+        events: 事件列表
+        tolerance: 允许的轨迹偏差(像素)，<=0时不做简化
+
+    Returns:
+        List[MacroEvent]: 简化后的事件列表
+    """
+    if tolerance <= 0:
+        return list(events)
+
+    result: List[MacroEvent] = []
+    run: List[MacroEvent] = []
+    run_key = None
+
+    def flush_run():
+        if not run:
+            return
+        points = [tuple(e.data["position"]) for e in run]
+        result.extend(run[i] for i in _simplify_run(points, tolerance))
+        run.clear()
+
+    for event in events:
+        key = _move_key(event)
+        if key is None or key != run_key:
+            flush_run()
+            run_key = key
+        if key is None:
+            result.append(event)
+        else:
+            run.append(event)
+
+    flush_run()
+
+    if len(result) != len(events):
+        logger.debug(f"鼠标轨迹简化: {len(events)} -> {len(result)} 个事件")
+    return result
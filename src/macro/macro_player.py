@@ -1,6 +1,7 @@
 """
 宏播放器
 实现宏的回放功能，支持速度调节和循环播放
+事件按录制时间戳换算的绝对时间点调度，长宏播放不会累积漂移
 """
 from typing import List, Dict, Optional, Any
 import time
@@ -13,6 +14,7 @@ from dataclasses import dataclass
 from enum import Enum, auto
 
 from .macro_recorder import MacroEvent, MacroEventType
+from .playback_scheduler import PlaybackScheduler, TimingStatistics
 
 
 class PlaybackStatus(Enum):
@@ -49,6 +51,10 @@ class MacroPlayer:
         self.play_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
 
+        # 绝对时间调度器和最近一次播放的时间误差统计
+        self.scheduler = PlaybackScheduler()
+        self.timing_stats: Optional[TimingStatistics] = None
+
         # 事件处理器
         self.event_handlers = {
             MacroEventType.KEY_DOWN: self._handle_key_down,
@@ -57,7 +63,6 @@ class MacroPlayer:
             MacroEventType.MOUSE_UP: self._handle_mouse_up,
             MacroEventType.MOUSE_MOVE: self._handle_mouse_move,
             MacroEventType.MOUSE_WHEEL: self._handle_mouse_wheel,
-            MacroEventType.DELAY: self._handle_delay,
         }
 
     def load_events(self, events: List[MacroEvent]):
@@ -68,6 +73,12 @@ class MacroPlayer:
         self.events = events.copy()
         self.logger.info(f"加载了 {len(events)} 个事件")
 
+    def load_macro(self, filename: str):
+        """从宏文件加载事件(自动识别JSON和二进制格式)"""
+        from .macro_format import load_macro_events
+
+        self.load_events(load_macro_events(filename))
+
     def set_options(self, options: PlaybackOptions):
         """设置播放选项"""
         self.options = options
@@ -97,6 +108,7 @@ class MacroPlayer:
             return
 
         self.status = PlaybackStatus.PAUSED
+        self.scheduler.pause()
         self.logger.info("暂停播放")
 
     def resume(self):
@@ -105,6 +117,7 @@ class MacroPlayer:
             return
 
         self.status = PlaybackStatus.PLAYING
+        self.scheduler.resume()
         self.logger.info("恢复播放")
 
     def stop(self):
@@ -113,6 +126,7 @@ class MacroPlayer:
             return
 
         self.stop_event.set()
+        self.scheduler.stop()
         if self.play_thread:
             self.play_thread.join()
 
@@ -140,34 +154,54 @@ class MacroPlayer:
             self.status = PlaybackStatus.STOPPED
 
     def _play_events(self):
-        """播放事件序列"""
+        """播放事件序列
+
+        每个事件的目标时间由其时间戳相对首个事件换算得到。DELAY事件
+        保证其后的事件至少间隔指定时长，随机延迟会顺延后续所有事件。
+        """
         if not self.events:
             return
 
-        start_time = self.start_time  # <--- Changed this line
-        last_event_time = self.events[0].timestamp
+        speed = self.options.speed
+        first_timestamp = self.events[0].timestamp
+        shift = 0.0  # DELAY事件和随机延迟带来的额外偏移
+        earliest_next = 0.0  # 上一个DELAY事件要求的最早时间点
+
+        self.scheduler.start()
+        if self.status == PlaybackStatus.PAUSED:
+            # 在两次循环之间被暂停
+            self.scheduler.pause()
 
         for event in self.events:
             # 检查是否需要停止
             if self.stop_event.is_set():
                 break
 
-            # 处理暂停
-            while self.status == PlaybackStatus.PAUSED:
-                if self.stop_event.is_set():
-                    return
-                time.sleep(0.1)
-
-            # 计算延时
             if not self.options.skip_delays:
-                delay = (event.timestamp - last_event_time) / self.options.speed
-                if delay > 0:
-                    # 添加随机延迟
-                    if self.options.random_delay > 0:
-                        import random
+                target = (event.timestamp - first_timestamp) / speed + shift
+
+                if target < earliest_next:
+                    shift += earliest_next - target
+                    target = earliest_next
 
-                        delay += random.uniform(0, self.options.random_delay)
-                    time.sleep(delay)
+                # 添加随机延迟
+                if self.options.random_delay > 0:
+                    import random
+
+                    jitter = random.uniform(0, self.options.random_delay)
+                    shift += jitter
+                    target += jitter
+
+                # 等待目标时间点(暂停期间阻塞，停止时返回False)
+                if not self.scheduler.wait_until(target):
+                    break
+
+                if event.type == MacroEventType.DELAY:
+                    earliest_next = target + self._get_delay_duration(event.data)
+                    continue
+
+            elif event.type == MacroEventType.DELAY:
+                continue
 
             # 执行事件
             try:
@@ -177,7 +211,22 @@ class MacroPlayer:
             except Exception as e:
                 self.logger.error("事件执行失败: %s", e, exc_info=True)
 
-            last_event_time = event.timestamp
+        self.timing_stats = self.scheduler.get_statistics()
+        self.logger.info(
+            "播放时间误差: 平均 %.2fms, P95 %.2fms, 最大 %.2fms, 终点漂移 %.2fms",
+            self.timing_stats.mean_abs_error_ms,
+            self.timing_stats.p95_abs_error_ms,
+            self.timing_stats.max_error_ms,
+            self.timing_stats.final_drift_ms,
+        )
+
+    def _get_delay_duration(self, data: Dict) -> float:
+        """获取DELAY事件按播放速度换算后的时长"""
+        try:
+            return max(0.0, data["duration"] / self.options.speed)
+        except Exception as e:
+            self.logger.error("延时参数无效: %s", e, exc_info=True)
+            return 0.0
 
     def _handle_key_down(self, data: Dict):
         """处理按键按下"""
@@ -227,16 +276,6 @@ class MacroPlayer:
         except Exception as e:
             self.logger.error("鼠标滚轮失败: %s", e, exc_info=True)
 
-    def _handle_delay(self, data: Dict):
-        """处理延时"""
-        if not self.options.skip_delays:
-            try:
-                duration = data["duration"] / self.options.speed
-                if duration > 0:
-                    time.sleep(duration)
-            except Exception as e:
-                self.logger.error("延时执行失败: %s", e, exc_info=True)
-
     def get_progress(self) -> Dict[str, Any]:
         """获取播放进度信息"""
         if not self.events or self.status == PlaybackStatus.STOPPED:
@@ -247,12 +286,20 @@ class MacroPlayer:
                 "total_loops": self.options.loop_count,
             }
 
-        total_duration = self.events[-1].timestamp
-        current_time = time.time()
+        total_duration = (
+            self.events[-1].timestamp - self.events[0].timestamp
+        ) / self.options.speed
+        elapsed = self.scheduler.elapsed()
 
         return {
             "status": self.status.name,
-            "progress": min(1.0, (current_time - self.start_time) / total_duration),
+            "progress": min(1.0, elapsed / total_duration) if total_duration > 0 else 1.0,
             "current_loop": self.current_loop + 1,
             "total_loops": self.options.loop_count,
         }
+
+    def get_timing_statistics(self) -> Optional[Dict[str, Any]]:
+        """获取最近一次播放的时间误差统计"""
+        if self.timing_stats is None:
+            return None
+        return self.timing_stats.to_dict()
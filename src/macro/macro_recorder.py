@@ -4,7 +4,6 @@
 """
 from typing import List, Dict, Optional, Any, Tuple
 import time
-import json
 import keyboard
 import mouse
 from dataclasses import dataclass
@@ -209,23 +208,27 @@ class MacroRecorder:
         except Exception as e:
             self.logger.error(f"处理鼠标事件失败: {e}", exc_info=True)
 
-    def save_macro(self, filename: str) -> None:
-        """保存宏到文件"""
+    def save_macro(self, filename: str, simplify_tolerance: float = 0.0) -> None:
+        """
+        保存宏到文件
+
+        Args:
+            filename: 文件名，扩展名为.gmacro时保存为紧凑二进制格式，否则为JSON
+            simplify_tolerance: 鼠标轨迹简化容差(像素)，0表示不简化
+        """
+        from .macro_format import (
+            BINARY_EXTENSION, save_binary_macro, save_json_macro, simplify_mouse_path
+        )
+
         try:
-            macro_data = {
-                "version": "1.0",
-                "events": [
-                    {
-                        "type": event.type.name,
-                        "timestamp": event.timestamp,
-                        "data": event.data,
-                    }
-                    for event in self.events
-                ],
-            }
+            events = self.events
+            if simplify_tolerance > 0:
+                events = simplify_mouse_path(events, simplify_tolerance)
 
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(macro_data, f, indent=2)
+            if filename.endswith(BINARY_EXTENSION):
+                save_binary_macro(filename, events)
+            else:
+                save_json_macro(filename, events)
 
             self.logger.info(f"宏保存到文件: {filename}")
 
@@ -234,22 +237,11 @@ class MacroRecorder:
             raise
 
     def load_macro(self, filename: str) -> List[MacroEvent]:
-        """从文件加载宏"""
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                macro_data = json.load(f)
-
-            if macro_data.get("version") != "1.0":
-                raise ValueError("不支持的宏文件版本")
+        """从文件加载宏(自动识别JSON和二进制格式)"""
+        from .macro_format import load_macro_events
 
-            self.events = [
-                MacroEvent(
-                    type=MacroEventType[event["type"]],
-                    timestamp=event["timestamp"],
-                    data=event["data"],
-                )
-                for event in macro_data["events"]
-            ]
+        try:
+            self.events = load_macro_events(filename)
 
             self.logger.info(f"从文件加载宏: {filename}")
             return self.events
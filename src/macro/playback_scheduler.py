@@ -0,0 +1,178 @@
+"""
+宏播放调度器
+基于单调时钟按绝对时间点调度事件，避免逐事件休眠带来的误差累积
+"""
+from typing import Callable, Dict, Any
+from array import array
+from dataclasses import dataclass, asdict
+import threading
+import time
+
+
+@dataclass
+class TimingStatistics:
+    """播放时间误差统计(单位: 毫秒，正值表示晚于目标时间)"""
+
+    event_count: int = 0
+    mean_error_ms: float = 0.0
+    mean_abs_error_ms: float = 0.0
+    max_error_ms: float = 0.0
+    min_error_ms: float = 0.0
+    p95_abs_error_ms: float = 0.0
+    final_drift_ms: float = 0.0
+    late_events: int = 0  # 误差超过阈值的事件数
+    paused_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return asdict(self)
+
+
+class PlaybackScheduler:
+    """宏播放调度器
+
+    所有事件的目标时间都相对于同一个起点计算，单个事件的休眠误差
+    不会传递给后续事件。粗等待使用条件变量(可被暂停/停止立即唤醒)，
+    在目标时间前很短的窗口内让出CPU自旋以提高精度，并根据观测到的
+    唤醒延迟自适应地提前唤醒。
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.perf_counter,
+        spin_window: float = 0.002,
+        late_threshold: float = 0.005,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            clock: 单调时钟函数
+            spin_window: 目标时间前改为自旋等待的时间窗口(秒)
+            late_threshold: 统计为延迟事件的误差阈值(秒)
+        """
+        self._clock = clock
+        self._spin_window = spin_window
+        self._late_threshold = late_threshold
+
+        self._condition = threading.Condition()
+        self._origin = 0.0
+        self._paused = False
+        self._stopped = False
+        self._pause_started = 0.0
+        self._paused_total = 0.0
+
+        # 条件变量唤醒延迟的指数滑动平均，用于提前唤醒
+        self._wake_latency = 0.0
+
+        self._errors = array("d")
+
+    def start(self) -> None:
+        """以当前时刻作为时间起点"""
+        with self._condition:
+            self._origin = self._clock()
+            self._paused = False
+            self._stopped = False
+            self._paused_total = 0.0
+            self._errors = array("d")
+
+    def elapsed(self) -> float:
+        """获取扣除暂停时间后的播放时长(秒)"""
+        with self._condition:
+            now = self._pause_started if self._paused else self._clock()
+            return now - self._origin - self._paused_total
+
+    def wait_until(self, offset: float) -> bool:
+        """
+        等待到相对起点的目标时间
+
+        Args:
+            offset: 目标时间(秒，相对起点，不含暂停时间)
+
+        Returns:
+            bool: 到达目标时间返回True，被停止返回False
+        """
+        while True:
+            with self._condition:
+                # 暂停时阻塞在条件变量上，不占用CPU
+                while self._paused and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return False
+
+                deadline = self._origin + self._paused_total + offset
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    break
+
+                coarse = remaining - self._spin_window - self._wake_latency
+                if coarse > 0:
+                    expected = self._clock() + coarse
+                    self._condition.wait(coarse)
+                    if not self._paused and not self._stopped:
+                        overshoot = self._clock() - expected
+                        if overshoot > 0:
+                            self._wake_latency += (overshoot - self._wake_latency) * 0.2
+                    continue
+
+            # 最后的短窗口内让出CPU自旋
+            if remaining > 0:
+                time.sleep(0)
+
+        self._record(self._clock() - deadline)
+        return True
+
+    def pause(self) -> None:
+        """暂停调度，暂停时长不计入目标时间"""
+        with self._condition:
+            if self._paused or self._stopped:
+                return
+            self._paused = True
+            self._pause_started = self._clock()
+            self._condition.notify_all()
+
+    def resume(self) -> None:
+        """恢复调度"""
+        with self._condition:
+            if not self._paused:
+                return
+            self._paused_total += self._clock() - self._pause_started
+            self._paused = False
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        """停止调度并唤醒所有等待者"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    @property
+    def is_paused(self) -> bool:
+        """是否处于暂停状态"""
+        return self._paused
+
+    def _record(self, error: float) -> None:
+        """记录单个事件的时间误差"""
+        self._errors.append(error)
+
+    def get_statistics(self) -> TimingStatistics:
+        """获取本次播放的时间误差统计"""
+        errors = self._errors
+        if not errors:
+            return TimingStatistics(paused_seconds=self._paused_total)
+
+        count = len(errors)
+        abs_errors = sorted(abs(e) for e in errors)
+        p95_index = min(count - 1, int(count * 0.95))
+
+        return TimingStatistics(
+            event_count=count,
+            mean_error_ms=sum(errors) / count * 1000,
+            mean_abs_error_ms=sum(abs_errors) / count * 1000,
+            max_error_ms=max(errors) * 1000,
+            min_error_ms=min(errors) * 1000,
+            p95_abs_error_ms=abs_errors[p95_index] * 1000,
+            final_drift_ms=errors[-1] * 1000,
+            late_events=sum(1 for e in errors if e > self._late_threshold),
+            paused_seconds=self._paused_total,
+        )
@@ -14,6 +14,10 @@ from typing import Optional
 # 配置系统导入
 from .common.app_config import init_application_metadata, setup_application_properties
 from .services.config import config, get_config
+from .common.lazy_import import get_version, is_available, parse_version
+
+# 启动阶段不应加载的重型依赖，只在用到对应功能时导入
+HEAVY_DEPENDENCIES = ('torch', 'torchvision', 'ultralytics', 'onnxruntime')
 
 def safe_print(message, fallback_prefix=""):
     """安全的print函数，处理Unicode编码问题"""
@@ -69,17 +73,19 @@ def setup_logging():
         logging.getLogger(__name__).warning(f"使用默认日志配置，配置加载失败: {e}")
 
 def check_dependencies():
-    """检查依赖是否满足"""
+    """检查依赖是否满足
+    
+    只查找模块和读取安装元数据，不导入依赖本身，避免为了读取版本号
+    加载torch等重型库
+    """
     missing_deps = []
     available_deps = {}
     
     # 检查PyQt6
-    try:
-        import PyQt6
-        pyqt6_available = True
-        available_deps['PyQt6'] = PyQt6.__version__ if hasattr(PyQt6, '__version__') else 'unknown'
-    except ImportError:
-        pyqt6_available = False
+    pyqt6_available = is_available('PyQt6')
+    if pyqt6_available:
+        available_deps['PyQt6'] = get_version('PyQt6') or 'unknown'
+    else:
         missing_deps.append("PyQt6")
     
     # 检查桌面自动化核心依赖
@@ -94,12 +100,9 @@ def check_dependencies():
     }
     
     for package_name, import_name in core_deps.items():
-        try:
-            module = __import__(import_name)
-            # 尝试获取版本信息
-            version = getattr(module, '__version__', 'unknown')
-            available_deps[package_name] = version
-        except ImportError:
+        if is_available(import_name):
+            available_deps[package_name] = get_version(import_name, package_name) or 'unknown'
+        else:
             missing_deps.append(package_name)
     
     # 检查AI相关依赖（可选）
@@ -110,11 +113,9 @@ def check_dependencies():
     
     ai_missing = []
     for package_name, import_name in ai_deps.items():
-        try:
-            module = __import__(import_name)
-            version = getattr(module, '__version__', 'unknown')
-            available_deps[package_name] = version
-        except ImportError:
+        if is_available(import_name):
+            available_deps[package_name] = get_version(import_name, package_name) or 'unknown'
+        else:
             ai_missing.append(package_name)
     
     return {
@@ -176,28 +177,24 @@ def validate_dependency_compatibility() -> bool:
     """
     try:
         # 检查numpy版本
-        import numpy as np
-        numpy_version = tuple(map(int, np.__version__.split('.')[:2]))
-        if numpy_version < (1, 20):
-            print(f"⚠️  NumPy版本过低: {np.__version__} (建议 >= 1.20.0)")
+        numpy_version = get_version('numpy')
+        if numpy_version is None:
+            print("❌ NumPy未安装")
+            return False
+        if parse_version(numpy_version) < (1, 20):
+            print(f"⚠️  NumPy版本过低: {numpy_version} (建议 >= 1.20.0)")
             return False
         
         # 检查OpenCV版本
-        try:
-            import cv2
-            opencv_version = tuple(map(int, cv2.__version__.split('.')[:2]))
-            if opencv_version < (4, 5):
-                print(f"⚠️  OpenCV版本过低: {cv2.__version__} (建议 >= 4.5.0)")
-                return False
-        except ImportError:
-            pass
+        opencv_version = get_version('cv2', 'opencv-python')
+        if opencv_version is not None and parse_version(opencv_version) < (4, 5):
+            print(f"⚠️  OpenCV版本过低: {opencv_version} (建议 >= 4.5.0)")
+            return False
         
         # 检查PyQt6版本
-        try:
-            import PyQt6
-            pyqt6_version = getattr(PyQt6, '__version__', '0.0.0')
-            print(f"📱 PyQt6版本: {pyqt6_version}")
-        except ImportError:
+        if is_available('PyQt6'):
+            print(f"📱 PyQt6版本: {get_version('PyQt6') or '0.0.0'}")
+        else:
             print("❌ PyQt6未安装")
         
         return True
@@ -352,6 +349,8 @@ def parse_arguments():
   python main.py --debug               # 调试模式
   python main.py --config-info         # 显示配置信息
   python main.py --config-export config.json  # 导出配置
+  python main.py --profile-startup     # 分析启动导入耗时
+  python main.py --profile-startup --startup-budget 500  # 超出预算时返回1
         """
     )
     
@@ -385,8 +384,40 @@ def parse_arguments():
         help='导出配置到指定文件'
     )
     
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help='分析启动时各模块的导入耗时'
+    )
+    
+    parser.add_argument(
+        '--startup-budget', type=float, metavar='MS',
+        help='启动导入耗时预算（毫秒），与--profile-startup一起使用'
+    )
+    
     return parser.parse_args()
 
+def profile_startup(budget_ms: Optional[float] = None) -> int:
+    """分析启动导入耗时
+    
+    Args:
+        budget_ms: 导入总耗时预算（毫秒）
+        
+    Returns:
+        int: 退出码，超出预算或加载了重型依赖时返回1
+    """
+    from .performance.startup_profiler import profile_imports
+    
+    profile = profile_imports(f"import {__spec__.name if __spec__ else 'src.main'}")
+    print(profile.format_report())
+    
+    violations = profile.check_budget(total_ms=budget_ms, forbidden=HEAVY_DEPENDENCIES)
+    if violations:
+        for violation in violations:
+            print(f"❌ {violation}")
+        return 1
+    print("✅ 启动导入检查通过")
+    return 0
+
 def main():
     """主入口函数"""
     try:
@@ -421,6 +452,9 @@ def main():
             logging.getLogger().setLevel(logging.DEBUG)
             logger.debug("调试模式已启用")
         
+        if args.profile_startup:
+            return profile_startup(args.startup_budget)
+        
         # 处理配置相关命令
         if args.config_info:
             print("📊 配置系统信息:")
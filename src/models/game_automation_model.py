@@ -11,6 +11,8 @@ from ..services.logger import GameLogger
 from ..services.config import Config
 import time
 from ..services.error_handler import ErrorHandler
+from ..performance.tracing import span
+from ..common.action_system import get_condition_signal
 
 class AutomationThread(QThread):
     """自动化线程"""
@@ -78,22 +80,14 @@ class AutomationThread(QThread):
                                 source="AutomationThread.run",
                                 details="窗口无法激活"
                             )
-                            recovery_success = self.recovery_manager.handle_error(error)
-                            
-                            # 发送恢复信号
-                            self.recovery_attempted.emit(recovery_success)
-                            
-                            if recovery_success:
-                                self.logger.info("窗口状态恢复成功")
-                            else:
-                                self.logger.error("窗口状态恢复失败")
-                                time.sleep(2.0)  # 恢复失败时等待较长时间
+                            self._recover_async(error, "窗口状态恢复成功", "窗口状态恢复失败")
                     
                     time.sleep(1.0)  # 等待一秒后再尝试
                     continue
                 
                 # 获取游戏画面
-                frame = self.window_manager.capture_window()
+                with span("capture", category="automation"):
+                    frame = self.window_manager.capture_window()
                 
                 # 检查画面是否有效
                 if frame is None:
@@ -135,7 +129,10 @@ class AutomationThread(QThread):
                 
                 # 分析游戏状态
                 try:
-                    game_state = self.image_processor.analyze_frame(frame)
+                    with span("analyze", category="automation"):
+                        game_state = self.image_processor.analyze_frame(frame)
+                    # 新的画面分析结果，唤醒等待画面状态的条件动作
+                    get_condition_signal().notify()
                     if not game_state:
                         self.logger.warning("分析游戏状态失败：返回空结果")
                         # 状态分析失败处理已简化
@@ -149,9 +146,11 @@ class AutomationThread(QThread):
                 
                 # 根据状态选择并执行操作
                 try:
-                    action = self.auto_operator.select_action(game_state)
+                    with span("decision", category="automation"):
+                        action = self.auto_operator.select_action(game_state)
                     if action:
-                        success = self.auto_operator.execute_action(action)
+                        with span("input", category="automation", action=action.get('type')):
+                            success = self.auto_operator.execute_action(action)
                         if success:
                             self.status_updated.emit(f"执行操作: {action['type']}")
                         else:
@@ -184,8 +183,7 @@ class AutomationThread(QThread):
                 else:
                     error = WindowError(f"未知异常: {str(e)}", 1000)
                     
-                recovery_success = self.recovery_manager.handle_error(error)
-                self.recovery_attempted.emit(recovery_success)
+                self._recover_async(error)
                 
                 time.sleep(1.0)  # 出错时等待较长时间
     
@@ -199,15 +197,7 @@ class AutomationThread(QThread):
         error = WindowError("连续窗口捕获失败", 1002)  # 窗口捕获错误码
         
         # 尝试恢复
-        recovery_success = self.recovery_manager.handle_error(error)
-        
-        # 发送恢复信号
-        self.recovery_attempted.emit(recovery_success)
-        
-        if recovery_success:
-            self.logger.info("窗口捕获恢复成功")
-        else:
-            self.logger.error("窗口捕获恢复失败")
+        self._recover_async(error, "窗口捕获恢复成功", "窗口捕获恢复失败")
     
     def _handle_image_processing_failure(self):
         """处理图像处理失败"""
@@ -219,10 +209,7 @@ class AutomationThread(QThread):
         error = ImageProcessingError("连续图像处理失败", 2000)
         
         # 尝试恢复
-        recovery_success = self.recovery_manager.handle_error(error)
-        
-        # 发送恢复信号
-        self.recovery_attempted.emit(recovery_success)
+        self._recover_async(error)
     
     def _handle_action_failure(self):
         """处理动作执行失败"""
@@ -234,10 +221,21 @@ class AutomationThread(QThread):
         error = ActionError("连续动作执行失败", 3000)
         
         # 尝试恢复
-        recovery_success = self.recovery_manager.handle_error(error)
+        self._recover_async(error)
+    
+    def _recover_async(self, error, success_message: str = None, failure_message: str = None):
+        """在后台线程中恢复，自动化循环继续运行；完成后发送恢复信号"""
+        future = self.recovery_manager.handle_error_async(error)
+        
+        def on_done(done):
+            recovery_success = not done.exception() and done.result()
+            self.recovery_attempted.emit(bool(recovery_success))
+            if recovery_success and success_message:
+                self.logger.info(success_message)
+            elif not recovery_success and failure_message:
+                self.logger.error(failure_message)
         
-        # 发送恢复信号
-        self.recovery_attempted.emit(recovery_success)
+        future.add_done_callback(on_done)
     
     def stop(self):
         """停止自动化任务"""
@@ -434,20 +432,14 @@ class GameAutomationModel(QObject):
                     from ..common.exceptions import WindowError
                     error = WindowError("连续多次窗口捕获失败", 1002)  # 窗口捕获错误码
                     
-                    # 尝试恢复
-                    recovery_success = self.recovery_manager.handle_error(error)
+                    # 在后台恢复，之后的捕获在恢复完成后自然成功
+                    def on_done(done):
+                        if not done.exception() and done.result():
+                            self.logger.info("自动恢复成功")
+                        else:
+                            self.logger.error("自动恢复失败")
                     
-                    if recovery_success:
-                        self.logger.info("自动恢复成功")
-                        
-                        # 尝试再次捕获
-                        frame = self.window_manager.capture_window()
-                        if frame is not None and isinstance(frame, np.ndarray) and frame.size > 0:
-                            self.logger.info("恢复后成功捕获窗口")
-                            self.frame_updated.emit(frame)
-                            return frame
-                    else:
-                        self.logger.error("自动恢复失败")
+                    self.recovery_manager.handle_error_async(error).add_done_callback(on_done)
                 
                 return None
                 
@@ -500,8 +492,8 @@ class GameAutomationModel(QObject):
                 from ..common.exceptions import WindowError
                 error = WindowError(f"捕获窗口时发生异常: {str(e)}", 1000)
                 
-                # 尝试恢复
-                self.recovery_manager.handle_error(error)
+                # 在后台尝试恢复
+                self.recovery_manager.handle_error_async(error)
             
             return None
     
@@ -1,80 +1,239 @@
-from typing import Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from datetime import datetime
 import json
 import os
+import time
 from pathlib import Path
 
+import numpy as np
+
+
+class _StateStats:
+    """单个状态的增量统计
+
+    数值的最小/最大值用单调队列维护：记录按先进先出淘汰，
+    队首过期时弹出即可，追加和淘汰均摊O(1)。
+    """
+
+    __slots__ = ("occurrences", "count", "total", "duration", "_min", "_max")
+
+    def __init__(self):
+        self.occurrences = 0  # 包含该状态的记录数
+        self.count = 0  # 其中数值有效的记录数
+        self.total = 0.0
+        self.duration = 0.0  # 该状态持续出现的时间(秒)
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+    def add_value(self, seq: int, value: float):
+        self.count += 1
+        self.total += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def remove_value(self, seq: int, value: float):
+        self.count -= 1
+        self.total -= value
+        if self._min and self._min[0][0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == seq:
+            self._max.popleft()
+
+    @property
+    def minimum(self) -> float:
+        return self._min[0][1]
+
+    @property
+    def maximum(self) -> float:
+        return self._max[0][1]
+
+
+def _numeric(value: Any) -> Optional[float]:
+    """转换为数值，无法转换时返回None"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
 class StateHistoryModel:
-    """状态历史记录模型"""
-    
+    """状态历史记录模型
+
+    历史记录存放在固定容量的环形缓冲区中，追加为O(1)；
+    每个状态的记录数、数值统计和持续时间随追加/淘汰增量更新，
+    统计查询不随历史长度变慢。按时间范围查询使用二分查找。
+    """
+
     def __init__(self, max_records: int = 1000):
-        self.max_records = max_records
-        self.history: List[Dict] = []
+        self.max_records = max(1, max_records)
         self._init_storage()
-        
+        self.clear_history()
+
     def _init_storage(self):
         """初始化存储目录"""
         self.storage_dir = Path("data/history")
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def history(self) -> List[Dict]:
+        """按时间顺序排列的全部记录"""
+        return self._slice(0, self._count)
+
+    def _slice(self, start: int, stop: int) -> List[Dict]:
+        """按逻辑下标[start, stop)取记录"""
+        return [self._records[(self._head + i) % self.max_records] for i in range(start, stop)]
+
+    def _logical_times(self) -> np.ndarray:
+        """按时间顺序排列的时间戳视图"""
+        first = self._times[self._head:self._head + self._count]
+        if len(first) == self._count:
+            return first
+        return np.concatenate([first, self._times[:self._count - len(first)]])
+
     def add_record(self, state: Dict):
-        """添加状态记录"""
-        self.history.append(state)
-        
-        # 保持记录数量在限制范围内
-        if len(self.history) > self.max_records:
-            self.history = self.history[-self.max_records:]
-            
+        """添加状态记录
+
+        记录中的'timestamp'用作时间戳，缺失时使用当前时间；
+        时间戳早于上一条记录时按上一条记录的时间处理，保持有序。
+        """
+        timestamp = _numeric(state.get('timestamp'))
+        if timestamp is None:
+            timestamp = time.time()
+        if self._count and timestamp < self._last_time:
+            timestamp = self._last_time
+
+        if self._count == self.max_records:
+            self._evict_oldest()
+
+        # 上一条记录中的状态持续到这条记录
+        if self._count:
+            elapsed = timestamp - self._last_time
+            last_record = self._records[(self._head + self._count - 1) % self.max_records]
+            for key in last_record:
+                self._stats[key].duration += elapsed
+
+        index = (self._head + self._count) % self.max_records
+        self._records[index] = state
+        self._times[index] = timestamp
+        self._seqs[index] = self._next_seq
+        self._count += 1
+        self._last_time = timestamp
+
+        for key, value in state.items():
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StateStats()
+            stats.occurrences += 1
+            number = _numeric(value)
+            if number is not None:
+                stats.add_value(self._next_seq, number)
+
+        self._next_seq += 1
+
+    def _evict_oldest(self):
+        """淘汰最旧的记录并更新统计"""
+        index = self._head
+        record = self._records[index]
+        seq = int(self._seqs[index])
+
+        next_index = (index + 1) % self.max_records
+        elapsed = self._times[next_index] - self._times[index] if self._count > 1 else 0.0
+
+        for key, value in record.items():
+            stats = self._stats[key]
+            stats.occurrences -= 1
+            stats.duration -= elapsed
+            number = _numeric(value)
+            if number is not None:
+                stats.remove_value(seq, number)
+            if stats.occurrences == 0:
+                del self._stats[key]
+
+        self._records[index] = None
+        self._head = next_index
+        self._count -= 1
+
     def get_recent_records(self, count: int = 10) -> List[Dict]:
         """获取最近的记录"""
-        return self.history[-count:]
-        
+        count = min(max(count, 0), self._count)
+        return self._slice(self._count - count, self._count)
+
     def get_records_by_state(self, state_name: str) -> List[Dict]:
         """获取指定状态的记录"""
+        if state_name not in self._stats:
+            return []
         return [
             record for record in self.history
             if state_name in record
         ]
-        
+
+    def get_records_between(self, start_time: Optional[float] = None,
+                            end_time: Optional[float] = None) -> List[Dict]:
+        """获取时间范围[start_time, end_time]内的记录(二分查找定位)"""
+        times = self._logical_times()
+        start = 0 if start_time is None else int(np.searchsorted(times, start_time, side='left'))
+        stop = self._count if end_time is None else int(np.searchsorted(times, end_time, side='right'))
+        return self._slice(start, max(start, stop))
+
+    def get_state_counts(self) -> Dict[str, int]:
+        """获取每个状态出现的记录数"""
+        return {key: stats.occurrences for key, stats in self._stats.items()}
+
+    def get_state_durations(self) -> Dict[str, float]:
+        """获取每个状态持续出现的时间(秒)"""
+        return {key: stats.duration for key, stats in self._stats.items()}
+
     def save_to_file(self, filename: Optional[str] = None):
-        """保存历史记录到文件"""
+        """保存历史记录到文件(紧凑JSON)"""
         if filename is None:
             filename = f"state_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
+
         filepath = self.storage_dir / filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
-            
+        temp_path = filepath.with_name(filepath.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.history, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, filepath)
+
     def load_from_file(self, filename: str):
         """从文件加载历史记录"""
         filepath = self.storage_dir / filename
         if filepath.exists():
             with open(filepath, 'r', encoding='utf-8') as f:
-                self.history = json.load(f)
-                
+                records = json.load(f)
+            self.clear_history()
+            for record in records[-self.max_records:]:
+                self.add_record(record)
+
     def clear_history(self):
         """清空历史记录"""
-        self.history = []
-        
+        self._records: List[Optional[Dict]] = [None] * self.max_records
+        self._times = np.zeros(self.max_records, dtype=np.float64)
+        self._seqs = np.zeros(self.max_records, dtype=np.int64)
+        self._head = 0
+        self._count = 0
+        self._next_seq = 0
+        self._last_time = 0.0
+        self._stats: Dict[str, _StateStats] = {}
+
     def get_state_statistics(self, state_name: str) -> Dict:
         """获取状态的统计信息"""
-        records = self.get_records_by_state(state_name)
-        if not records:
+        stats = self._stats.get(state_name)
+        if stats is None or stats.count == 0:
             return {}
-            
-        values = []
-        for record in records:
-            try:
-                value = float(record[state_name])
-                values.append(value)
-            except (ValueError, TypeError):
-                continue
-                
-        if not values:
-            return {}
-            
+
         return {
-            "min": min(values),
-            "max": max(values),
-            "avg": sum(values) / len(values),
-            "count": len(values)
-        } 
\ No newline at end of file
+            "min": stats.minimum,
+            "max": stats.maximum,
+            "avg": stats.total / stats.count,
+            "count": stats.count,
+            "occurrences": stats.occurrences,
+            "duration": stats.duration
+        }
@@ -13,6 +13,8 @@ from dataclasses import dataclass
 from collections import deque
 import numpy as np
 
+from ..common.metrics_sampler import get_metrics_sampler
+
 
 @dataclass
 class PerformanceMetrics:
@@ -54,6 +56,13 @@ class PerformanceMonitor:
         # 响应时间计算
         self.response_times: deque[float] = deque(maxlen=100)
 
+        # 进程指标由共享采样器采集，监控线程只读取快照
+        self.sampler = get_metrics_sampler()
+        self.sample_interval = 0.1
+        # 监控循环10Hz计算FPS，进程CPU/内存每秒采样一次就够了
+        self.process_sample_interval = 1.0
+        self._stop_event = threading.Event()
+
         # 查找目标窗口
         self._find_target_window()
 
@@ -82,6 +91,7 @@ class PerformanceMonitor:
         _, pid = win32process.GetWindowThreadProcessId(self.window_handle)
         try:
             self.process = psutil.Process(pid)
+            self.sampler.watch_process(pid)
             self.logger.info(f"找到目标进程: {self.process.name()} (PID: {pid})")
         except psutil.NoSuchProcess:
             self.logger.error(f"无法获取进程 {pid}")
@@ -97,6 +107,8 @@ class PerformanceMonitor:
             return
 
         self.running = True
+        self._stop_event.clear()
+        self.sampler.register(self, metrics={"processes": self.process_sample_interval})
         self.monitor_thread = threading.Thread(target=self._monitor_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
@@ -106,6 +118,8 @@ class PerformanceMonitor:
     def stop(self):
         """停止监控"""
         self.running = False
+        self._stop_event.set()
+        self.sampler.unregister(self)
         if self.monitor_thread:
             self.monitor_thread.join()
         self.logger.info("停止性能监控")
@@ -124,7 +138,7 @@ class PerformanceMonitor:
                 self.metrics.append(metrics)
 
                 # 每秒收集10次样本
-                time.sleep(0.1)
+                self._stop_event.wait(self.sample_interval)
 
             except Exception as e:
                 self.logger.error(f"监控出错: {e}", exc_info=True)
@@ -136,18 +150,14 @@ class PerformanceMonitor:
         """收集性能指标"""
         now = time.time()
 
-        # CPU使用率
-        try:
-            cpu_percent = self.process.cpu_percent()
-        except:
+        # CPU和内存使用(共享采样器的最新快照)
+        snapshot = self.sampler.snapshot(("processes",)).process(self.process.pid)
+        if snapshot is not None:
+            cpu_percent = snapshot.cpu_percent
+            memory_percent = snapshot.memory_percent
+            memory_used = snapshot.memory_rss
+        else:
             cpu_percent = 0
-
-        # 内存使用
-        try:
-            memory_info = self.process.memory_info()
-            memory_percent = self.process.memory_percent()
-            memory_used = memory_info.rss
-        except:
             memory_percent = 0
             memory_used = 0
 
@@ -217,6 +227,25 @@ class PerformanceMonitor:
         now = time.time()
         return [m for m in self.metrics if now - m.timestamp <= duration]
 
+    def get_metrics_since(self, timestamp: float) -> List[PerformanceMetrics]:
+        """获取指定时间之后的性能指标
+
+        从最新的采样向前扫描，开销只与新增采样数有关。
+
+        Args:
+            timestamp: 起始时间戳(不含)
+
+        Returns:
+            按时间排序的性能指标列表
+        """
+        newer = []
+        for m in reversed(self.metrics):
+            if m.timestamp <= timestamp:
+                break
+            newer.append(m)
+        newer.reverse()
+        return newer
+
     def get_statistics(self, duration: float = 60.0) -> Dict[str, Any]:
         """获取统计信息
 
@@ -13,16 +13,19 @@ from PyQt6.QtWidgets import (
     QTabWidget,
     QTableWidget,
     QTableWidgetItem,
+    QTableView,
+    QHeaderView,
     QFileDialog,
     QMessageBox,
     QSpinBox,
     QGroupBox,
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QPainter, QColor, QPen
 import pyqtgraph as pg
 import numpy as np
 from datetime import datetime
+import time
 import json
 import csv
 import logging
@@ -32,9 +35,100 @@ from .performance_monitor import PerformanceMonitor
 from ..core.types import UnifiedPerformanceMetrics as PerformanceMetrics
 
 
+class RingSeries:
+    """定长环形时间序列
+
+    使用预分配的numpy数组保存(时间, 数值)，追加为O(1)，
+    超出容量后覆盖最旧的数据，不再对Python列表做pop(0)。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._head = 0  # 下一个写入位置
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, time: float, value: float):
+        """追加一个采样点"""
+        self._times[self._head] = time
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self):
+        """清空序列"""
+        self._head = 0
+        self._size = 0
+
+    def latest_time(self) -> Optional[float]:
+        """获取最新采样时间"""
+        if not self._size:
+            return None
+        return float(self._times[self._head - 1])
+
+    def arrays(self) -> tuple:
+        """按时间顺序返回(时间, 数值)数组"""
+        if self._size < self.capacity:
+            return self._times[: self._size], self._values[: self._size]
+        return (
+            np.roll(self._times, -self._head),
+            np.roll(self._values, -self._head),
+        )
+
+    def window(self, max_points: int) -> tuple:
+        """
+        获取用于绘制的数据
+
+        点数超过max_points时按桶做最小/最大值降采样，保留峰值形状，
+        绘制开销只与max_points有关。
+
+        Args:
+            max_points: 最多返回的点数
+
+        Returns:
+            (时间, 数值)数组
+        """
+        times, values = self.arrays()
+        count = len(times)
+        if count <= max_points:
+            return times, values
+
+        buckets = max(1, max_points // 2)
+        bucket_size = count // buckets
+        usable = bucket_size * buckets
+        start = count - usable  # 丢弃最旧的零头，保证最新数据完整
+
+        value_buckets = values[start:].reshape(buckets, bucket_size)
+        time_buckets = times[start:].reshape(buckets, bucket_size)
+        rows = np.arange(buckets)
+        min_idx = value_buckets.argmin(axis=1)
+        max_idx = value_buckets.argmax(axis=1)
+
+        # 每个桶按时间先后输出最小值和最大值
+        first = np.minimum(min_idx, max_idx)
+        second = np.maximum(min_idx, max_idx)
+        out_times = np.empty(buckets * 2, dtype=np.float64)
+        out_values = np.empty(buckets * 2, dtype=np.float64)
+        out_times[0::2] = time_buckets[rows, first]
+        out_times[1::2] = time_buckets[rows, second]
+        out_values[0::2] = value_buckets[rows, first]
+        out_values[1::2] = value_buckets[rows, second]
+        return out_times, out_values
+
+
 class RealTimeChart(pg.PlotWidget):
     """实时图表"""
 
+    # 保持最近10分钟的数据: 10分钟 * 60秒 * 10采样
+    MAX_SAMPLES = 6000
+    # 单条曲线最多绘制的点数
+    MAX_PLOT_POINTS = 1000
+
     def __init__(self, title: str, y_label: str, parent=None):
         super().__init__(parent)
 
@@ -48,26 +142,143 @@ class RealTimeChart(pg.PlotWidget):
         self.showGrid(x=True, y=True)
 
         # 数据
-        self.times = []
-        self.values = []
+        self.series = RingSeries(self.MAX_SAMPLES)
 
         # 曲线
         self.curve = self.plot(pen="b")
 
     def update_data(self, time: float, value: float):
         """更新数据"""
-        self.times.append(time)
-        self.values.append(value)
+        self.series.append(time, value)
+
+        times, values = self.series.window(self.MAX_PLOT_POINTS)
+        # 相对时间，numpy向量运算
+        self.curve.setData(times - time, values)
+
+    def clear_data(self):
+        """清空数据"""
+        self.series.clear()
+        self.curve.setData([], [])
+
+
+class MetricsHistoryModel(QAbstractTableModel):
+    """历史数据表格模型
 
-        # 保持最近10分钟的数据
-        if len(self.times) > 6000:  # 10分钟 * 60秒 * 10采样
-            self.times.pop(0)
-            self.values.pop(0)
+    新采样只追加到末尾、过期采样从头部移除，视图只刷新变化的行；
+    单元格文本在视图请求时才格式化，只有可见行会产生格式化开销。
+    """
 
-        # 更新曲线
-        self.curve.setData(
-            [t - self.times[-1] for t in self.times], self.values  # 相对时间
+    HEADERS = ["时间", "CPU使用率", "内存使用率", "内存使用量", "FPS", "响应时间"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 每行: (时间戳, CPU使用率, 内存使用率, 内存使用量, FPS, 响应时间)
+        self._rows: List[tuple] = []
+        self._start = 0  # 逻辑第一行在_rows中的位置，避免头部删除时搬移列表
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows) - self._start
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        row = self._rows[self._start + index.row()]
+        column = index.column()
+        if column == 0:
+            return datetime.fromtimestamp(row[0]).strftime("%H:%M:%S")
+        if column == 1:
+            return f"{row[1]:.1f}%"
+        if column == 2:
+            return f"{row[2]:.1f}%"
+        if column == 3:
+            return f"{row[3] / 1024 / 1024:.1f} MB"
+        if column == 4:
+            return f"{row[4]:.1f}"
+        return f"{row[5] * 1000:.1f} ms"
+
+    def last_timestamp(self) -> Optional[float]:
+        """获取最后一行的时间戳"""
+        if self.rowCount() == 0:
+            return None
+        return self._rows[-1][0]
+
+    def append_metrics(self, metrics: List[PerformanceMetrics]) -> int:
+        """
+        追加比已有数据更新的采样
+
+        Args:
+            metrics: 按时间排序的性能指标
+
+        Returns:
+            int: 实际追加的行数
+        """
+        last = self.last_timestamp()
+        if last is not None:
+            metrics = [m for m in metrics if m.timestamp > last]
+        if not metrics:
+            return 0
+
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(metrics) - 1)
+        self._rows.extend(
+            (
+                m.timestamp,
+                m.cpu_percent,
+                m.memory_percent,
+                m.memory_used,
+                m.fps,
+                m.response_time,
+            )
+            for m in metrics
         )
+        self.endInsertRows()
+        return len(metrics)
+
+    def trim_before(self, timestamp: float) -> int:
+        """
+        移除早于指定时间的行
+
+        Returns:
+            int: 移除的行数
+        """
+        count = 0
+        total = self.rowCount()
+        while count < total and self._rows[self._start + count][0] < timestamp:
+            count += 1
+        if not count:
+            return 0
+
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        self._start += count
+        # 已移除的部分超过一半时再压缩列表，摊还O(1)
+        if self._start > len(self._rows) // 2:
+            del self._rows[: self._start]
+            self._start = 0
+        self.endRemoveRows()
+        return count
+
+    def clear(self):
+        """清空所有行"""
+        self.beginResetModel()
+        self._rows = []
+        self._start = 0
+        self.endResetModel()
 
 
 class PerformanceView(QWidget):
@@ -162,7 +373,7 @@ class PerformanceView(QWidget):
 
         self.range_combo = QComboBox()
         self.range_combo.addItems(["最近1分钟", "最近5分钟", "最近10分钟", "最近30分钟", "最近1小时"])
-        self.range_combo.currentIndexChanged.connect(self._update_history)
+        self.range_combo.currentIndexChanged.connect(self._on_range_changed)
         range_layout.addWidget(QLabel("时间范围:"))
         range_layout.addWidget(self.range_combo)
         range_layout.addStretch()
@@ -170,10 +381,11 @@ class PerformanceView(QWidget):
         history_layout.addLayout(range_layout)
 
         # 历史数据表格
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels(
-            ["时间", "CPU使用率", "内存使用率", "内存使用量", "FPS", "响应时间"]
+        self.history_model = MetricsHistoryModel(self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        self.history_table.verticalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Fixed
         )
         history_layout.addWidget(self.history_table)
 
@@ -255,47 +467,46 @@ class PerformanceView(QWidget):
         # 更新统计信息
         self._update_statistics()
 
-    def _update_history(self):
-        """更新历史数据"""
-        if not self.monitor:
-            return
-
-        # 获取时间范围
+    def _get_history_duration(self) -> float:
+        """获取当前选择的历史时间范围(秒)"""
         range_text = self.range_combo.currentText()
         if range_text == "最近1分钟":
-            duration = 60
+            return 60
         elif range_text == "最近5分钟":
-            duration = 300
+            return 300
         elif range_text == "最近10分钟":
-            duration = 600
+            return 600
         elif range_text == "最近30分钟":
-            duration = 1800
+            return 1800
         else:  # 最近1小时
-            duration = 3600
-
-        metrics = self.monitor.get_metrics_history(duration)
-
-        # 更新表格
-        self.history_table.setRowCount(len(metrics))
-        for i, m in enumerate(metrics):
-            self.history_table.setItem(
-                i,
-                0,
-                QTableWidgetItem(
-                    datetime.fromtimestamp(m.timestamp).strftime("%H:%M:%S")
-                ),
-            )
-            self.history_table.setItem(i, 1, QTableWidgetItem(f"{m.cpu_percent:.1f}%"))
-            self.history_table.setItem(
-                i, 2, QTableWidgetItem(f"{m.memory_percent:.1f}%")
-            )
-            self.history_table.setItem(
-                i, 3, QTableWidgetItem(f"{m.memory_used / 1024 / 1024:.1f} MB")
-            )
-            self.history_table.setItem(i, 4, QTableWidgetItem(f"{m.fps:.1f}"))
-            self.history_table.setItem(
-                i, 5, QTableWidgetItem(f"{m.response_time * 1000:.1f} ms")
-            )
+            return 3600
+
+    def _on_range_changed(self):
+        """时间范围变化时重新载入历史数据"""
+        self.history_model.clear()
+        self._update_history()
+
+    def _update_history(self):
+        """更新历史数据，只追加新采样并移除过期采样"""
+        if not self.monitor:
+            return
+
+        duration = self._get_history_duration()
+
+        last = self.history_model.last_timestamp()
+        if last is None:
+            metrics = self.monitor.get_metrics_history(duration)
+        else:
+            metrics = self.monitor.get_metrics_since(last)
+
+        scroll_bar = self.history_table.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+        self.history_model.append_metrics(metrics)
+        self.history_model.trim_before(time.time() - duration)
+
+        if at_bottom:
+            self.history_table.scrollToBottom()
 
     def _update_statistics(self):
         """更新统计信息"""
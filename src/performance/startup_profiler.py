@@ -0,0 +1,224 @@
+"""
+启动导入耗时分析
+
+在子进程中用`python -X importtime`执行导入语句，解析每个模块的自身耗时和累计耗时，
+用于找出启动路径上的重型依赖，并在测试中检查启动预算：
+
+    profile = profile_imports("import src.main")
+    print(profile.format_report())
+    profile.assert_budget(total_ms=800, forbidden=("torch", "ultralytics"))
+
+子进程保证测试进程中已经导入的模块不会影响结果。
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)\s*$")
+
+
+class StartupBudgetExceeded(AssertionError):
+    """启动耗时超出预算或加载了禁止的模块"""
+
+    def __init__(self, violations: List[str]):
+        self.violations = violations
+        super().__init__("启动预算检查未通过:\n" + "\n".join(f"  - {v}" for v in violations))
+
+
+@dataclass
+class ImportRecord:
+    """单个模块的导入耗时"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def self_ms(self) -> float:
+        return self.self_us / 1000.0
+
+    @property
+    def cumulative_ms(self) -> float:
+        return self.cumulative_us / 1000.0
+
+    @property
+    def package(self) -> str:
+        """顶层包名"""
+        return self.module.partition(".")[0]
+
+
+def parse_importtime(text: str) -> List[ImportRecord]:
+    """
+    解析`-X importtime`的输出
+
+    Args:
+        text: 子进程的stderr，其它行(警告、异常信息)会被忽略
+
+    Returns:
+        List[ImportRecord]: 按导入完成顺序排列
+    """
+    records = []
+    for line in text.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append(ImportRecord(
+            module=module,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=max(len(indent) - 1, 0) // 2,
+        ))
+    return records
+
+
+class StartupProfile:
+    """一次启动导入的分析结果"""
+
+    def __init__(self, records: List[ImportRecord], statement: str = "", wall_time: float = 0.0):
+        self.records = records
+        self.statement = statement
+        # 子进程总耗时(秒)，包含解释器启动
+        self.wall_time = wall_time
+        self._by_module: Dict[str, ImportRecord] = {r.module: r for r in records}
+
+    @property
+    def total_ms(self) -> float:
+        """所有模块导入耗时之和(毫秒)"""
+        return sum(r.self_us for r in self.records) / 1000.0
+
+    @property
+    def modules(self) -> List[str]:
+        return [r.module for r in self.records]
+
+    def get(self, module: str) -> Optional[ImportRecord]:
+        return self._by_module.get(module)
+
+    def is_loaded(self, module: str) -> bool:
+        """模块或其子模块是否被导入"""
+        prefix = module + "."
+        return any(name == module or name.startswith(prefix) for name in self._by_module)
+
+    def top(self, n: int = 20, by: str = "cumulative") -> List[ImportRecord]:
+        """
+        耗时最多的模块
+
+        Args:
+            n: 数量
+            by: "cumulative"按累计耗时(包含其导入的模块)，"self"按自身耗时
+        """
+        if by not in ("cumulative", "self"):
+            raise ValueError(f"未知的排序方式: {by}")
+        key = (lambda r: r.cumulative_us) if by == "cumulative" else (lambda r: r.self_us)
+        return sorted(self.records, key=key, reverse=True)[:n]
+
+    def by_package(self) -> Dict[str, float]:
+        """按顶层包汇总自身耗时(毫秒)，从大到小排列"""
+        totals: Dict[str, float] = {}
+        for record in self.records:
+            totals[record.package] = totals.get(record.package, 0.0) + record.self_ms
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def format_report(self, limit: int = 20) -> str:
+        """生成文本报告"""
+        lines = [
+            f"启动导入分析: {self.statement}",
+            f"  模块数: {len(self.records)}  导入耗时: {self.total_ms:.1f} ms  "
+            f"进程耗时: {self.wall_time * 1000:.1f} ms",
+            "",
+            f"{'累计(ms)':>10} {'自身(ms)':>10}  模块",
+        ]
+        for record in self.top(limit):
+            lines.append(f"{record.cumulative_ms:>10.1f} {record.self_ms:>10.1f}  {record.module}")
+        lines.append("")
+        lines.append(f"{'自身(ms)':>10}  顶层包")
+        for package, ms in list(self.by_package().items())[:limit]:
+            lines.append(f"{ms:>10.1f}  {package}")
+        return "\n".join(lines)
+
+    def check_budget(self, total_ms: Optional[float] = None,
+                     per_module_ms: Optional[Dict[str, float]] = None,
+                     forbidden: Iterable[str] = ()) -> List[str]:
+        """
+        检查启动预算
+
+        Args:
+            total_ms: 导入总耗时上限
+            per_module_ms: 模块名 -> 累计耗时上限
+            forbidden: 启动时不应加载的模块(包含其子模块)
+
+        Returns:
+            List[str]: 违反预算的描述，为空表示通过
+        """
+        violations = []
+        if total_ms is not None and self.total_ms > total_ms:
+            violations.append(f"导入总耗时 {self.total_ms:.1f} ms 超出预算 {total_ms:.1f} ms")
+        for module, budget in (per_module_ms or {}).items():
+            record = self.get(module)
+            if record is not None and record.cumulative_ms > budget:
+                violations.append(f"{module} 导入耗时 {record.cumulative_ms:.1f} ms 超出预算 {budget:.1f} ms")
+        for module in forbidden:
+            if self.is_loaded(module):
+                record = self.get(module)
+                cost = f" ({record.cumulative_ms:.1f} ms)" if record else ""
+                violations.append(f"启动时加载了 {module}{cost}")
+        return violations
+
+    def assert_budget(self, total_ms: Optional[float] = None,
+                      per_module_ms: Optional[Dict[str, float]] = None,
+                      forbidden: Iterable[str] = ()) -> None:
+        """检查启动预算，不通过时抛出StartupBudgetExceeded"""
+        violations = self.check_budget(total_ms, per_module_ms, forbidden)
+        if violations:
+            raise StartupBudgetExceeded(violations)
+
+
+def profile_imports(statement: str = "import src.main", python: Optional[str] = None,
+                    cwd: Optional[Union[str, Path]] = None, env: Optional[Dict[str, str]] = None,
+                    timeout: float = 120.0, runs: int = 1) -> StartupProfile:
+    """
+    在子进程中执行导入语句并统计各模块导入耗时
+
+    Args:
+        statement: 要执行的Python语句
+        python: 解释器路径，默认使用当前解释器
+        cwd: 工作目录，默认项目根目录
+        env: 额外的环境变量
+        timeout: 子进程超时(秒)
+        runs: 执行次数，返回导入总耗时最少的一次(减少磁盘缓存和系统抖动的影响)
+
+    Returns:
+        StartupProfile: 分析结果
+
+    Raises:
+        RuntimeError: 语句执行失败
+    """
+    command = [python or sys.executable, "-X", "importtime", "-c", statement]
+    process_env = dict(os.environ)
+    process_env.pop("PYTHONPROFILEIMPORTTIME", None)
+    if env:
+        process_env.update(env)
+
+    best: Optional[StartupProfile] = None
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        result = subprocess.run(
+            command, cwd=str(cwd or PROJECT_ROOT), env=process_env,
+            capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=timeout,
+        )
+        wall_time = time.perf_counter() - started
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not _IMPORTTIME_LINE.match(line)]
+            raise RuntimeError(f"执行 {statement!r} 失败(退出码 {result.returncode}):\n" + "\n".join(errors[-20:]))
+        profile = StartupProfile(parse_importtime(result.stderr), statement, wall_time)
+        if best is None or profile.total_ms < best.total_ms:
+            best = profile
+    return best
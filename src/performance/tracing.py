@@ -0,0 +1,335 @@
+"""
+帧处理流水线的分段耗时追踪
+
+在截图、预处理、模板匹配、OCR、决策和输入等阶段埋点，
+按阶段统计耗时直方图，并可导出为Chrome Trace格式
+(chrome://tracing 或 https://ui.perfetto.dev 打开)。
+
+未启用时span()直接返回共享的空上下文，开销只有一次属性判断。
+设置环境变量GAME_TRACE=1可在启动时启用。
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+
+def _bucket_bounds(count: int = 96, low_us: float = 1.0, high_us: float = 60_000_000.0) -> List[float]:
+    """等比分布的直方图桶上界(微秒)，相邻桶约相差20%"""
+    ratio = (high_us / low_us) ** (1.0 / (count - 1))
+    return [low_us * ratio ** i for i in range(count)]
+
+
+_BUCKET_BOUNDS = _bucket_bounds()
+
+
+class StageHistogram:
+    """单个阶段的耗时直方图(对数分桶，分位数误差约10%)"""
+
+    __slots__ = ("count", "total_us", "min_us", "max_us", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_us = 0.0
+        self.min_us = float("inf")
+        self.max_us = 0.0
+        # 最后一个桶收集超出上界的耗时
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def record(self, duration_us: float) -> None:
+        """记录一次耗时"""
+        self.count += 1
+        self.total_us += duration_us
+        if duration_us < self.min_us:
+            self.min_us = duration_us
+        if duration_us > self.max_us:
+            self.max_us = duration_us
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS, duration_us)] += 1
+
+    def percentile(self, p: float) -> float:
+        """
+        估算分位数
+
+        Args:
+            p: 分位(0-100)
+
+        Returns:
+            float: 耗时(微秒)，取所在桶的上界并限制在[min, max]内
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(round(self.count * p / 100.0)))
+        cumulative = 0
+        for index, bucket in enumerate(self.buckets):
+            cumulative += bucket
+            if cumulative >= target:
+                bound = _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else self.max_us
+                return min(max(bound, self.min_us), self.max_us)
+        return self.max_us
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为统计字典(毫秒)"""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total_ms": self.total_us / 1000,
+            "avg_ms": self.total_us / self.count / 1000,
+            "min_ms": self.min_us / 1000,
+            "max_ms": self.max_us / 1000,
+            "p50_ms": self.percentile(50) / 1000,
+            "p95_ms": self.percentile(95) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+        }
+
+
+class _NullSpan:
+    """未启用追踪时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args) -> None:
+        """空实现"""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一次阶段耗时记录，作为上下文管理器使用"""
+
+    __slots__ = ("tracer", "name", "category", "args", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_ns = 0
+
+    def set(self, **args) -> None:
+        """附加参数(导出到追踪事件的args中)"""
+        if self.args is None:
+            self.args = args
+        else:
+            self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.set(error=exc_type.__name__)
+        self.tracer._finish(self, end_ns)
+        return False
+
+
+# 追踪事件: (名称, 分类, 开始ns, 耗时ns, 线程ID, 参数)
+_Event = Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]
+
+
+class Tracer:
+    """分段耗时追踪器"""
+
+    def __init__(self, enabled: bool = False, max_events: int = 200_000, record_events: bool = True):
+        """
+        初始化追踪器
+
+        Args:
+            enabled: 是否启用
+            max_events: 保留的追踪事件上限，超出后丢弃最旧的事件(直方图不受影响)
+            record_events: 是否保留逐次事件用于导出；False时只统计直方图
+        """
+        self.enabled = enabled
+        self.record_events = record_events
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, StageHistogram] = {}
+        self._events: Deque[_Event] = deque(maxlen=max(1, max_events))
+        self._thread_names: Dict[int, str] = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._dropped = 0
+
+    def enable(self, record_events: Optional[bool] = None) -> None:
+        """启用追踪"""
+        if record_events is not None:
+            self.record_events = record_events
+        self.enabled = True
+
+    def disable(self) -> None:
+        """停用追踪(已收集的数据保留)"""
+        self.enabled = False
+
+    def span(self, name: str, category: str = "pipeline", **args) -> Union[Span, _NullSpan]:
+        """
+        创建阶段耗时记录
+
+        用法::
+
+            with tracer.span("capture"):
+                frame = capture()
+
+        Args:
+            name: 阶段名称
+            category: 分类(追踪查看器中用于过滤)
+            args: 附加参数
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args or None)
+
+    def traced(self, name: Optional[str] = None, category: str = "pipeline") -> Callable:
+        """函数装饰器：每次调用记录一个阶段"""
+
+        def decorator(func: Callable) -> Callable:
+            stage = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, stage, category, None):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _finish(self, span: Span, end_ns: int) -> None:
+        """记录结束的阶段"""
+        duration_ns = end_ns - span.start_ns
+        thread = threading.current_thread()
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = StageHistogram()
+            histogram.record(duration_ns / 1000)
+            if self.record_events:
+                if len(self._events) == self._events.maxlen:
+                    self._dropped += 1
+                self._events.append(
+                    (span.name, span.category, span.start_ns, duration_ns, thread.ident, span.args)
+                )
+                if thread.ident not in self._thread_names:
+                    self._thread_names[thread.ident] = thread.name
+
+    def get_stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各阶段的耗时统计
+
+        Returns:
+            Dict: 阶段名称 -> 次数、总耗时、平均、最小、最大和p50/p95/p99(毫秒)
+        """
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+
+    def get_event_count(self) -> int:
+        """当前保留的追踪事件数"""
+        with self._lock:
+            return len(self._events)
+
+    def reset(self) -> None:
+        """清空统计和事件"""
+        with self._lock:
+            self._histograms.clear()
+            self._events.clear()
+            self._thread_names.clear()
+            self._dropped = 0
+            self._origin_ns = time.perf_counter_ns()
+
+    def export_chrome_trace(self, path: Union[str, Path]) -> int:
+        """
+        导出Chrome Trace格式的JSON文件
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            int: 导出的事件数
+        """
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+            origin = self._origin_ns
+            dropped = self._dropped
+
+        pid = os.getpid()
+        trace_events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for name, category, start_ns, duration_ns, tid, args in events:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_ns - origin) / 1000,
+                "dur": duration_ns / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+
+        path = Path(path)
+        if path.parent and not path.parent.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "traceEvents": trace_events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"dropped_events": dropped},
+                },
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+        return len(events)
+
+
+_tracer = Tracer(enabled=os.environ.get("GAME_TRACE", "") not in ("", "0"))
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器"""
+    return _tracer
+
+
+def span(name: str, category: str = "pipeline", **args) -> Union[Span, _NullSpan]:
+    """在全局追踪器上创建阶段耗时记录"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return Span(_tracer, name, category, args or None)
+
+
+def traced(name: Optional[str] = None, category: str = "pipeline") -> Callable:
+    """全局追踪器的函数装饰器"""
+    return _tracer.traced(name, category)
+
+
+def _export_on_exit() -> None:
+    """GAME_TRACE_FILE指定路径时，退出时导出追踪文件"""
+    path = os.environ.get("GAME_TRACE_FILE")
+    if path and _tracer.get_event_count():
+        try:
+            _tracer.export_chrome_trace(path)
+        except Exception:
+            pass
+
+
+atexit.register(_export_on_exit)
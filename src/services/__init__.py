@@ -1,69 +1,25 @@
 # 基础服务（无外部依赖）
 from .config import Config, config
-
-# 可选服务（有外部依赖）
-__all__ = ['Config', 'config']
-
-# 按依赖顺序导入服务，避免循环导入
-try:
-    from .exceptions import GameAutomationError, WindowNotFoundError
-    __all__.extend(['GameAutomationError', 'WindowNotFoundError'])
-except ImportError:
-    GameAutomationError = None
-    WindowNotFoundError = None
-
-try:
-    from .logger import GameLogger
-    __all__.append('GameLogger')
-except ImportError:
-    GameLogger = None
-
-# 错误处理器（依赖于logger和exceptions）
-try:
-    from .error_handler import ErrorHandler
-    __all__.append('ErrorHandler')
-except ImportError:
-    ErrorHandler = None
-
-# 需要外部依赖的服务
-try:
-    from .window_manager import GameWindowManager
-    __all__.append('GameWindowManager')
-except ImportError:
-    GameWindowManager = None
-
-try:
-    from .image_processor import ImageProcessor
-    __all__.append('ImageProcessor')
-except ImportError:
-    ImageProcessor = None
-
-try:
-    from .action_simulator import ActionSimulator
-    __all__.append('ActionSimulator')
-except ImportError:
-    ActionSimulator = None
-
-try:
-    from .game_analyzer import GameAnalyzer
-    __all__.append('GameAnalyzer')
-except ImportError:
-    GameAnalyzer = None
-
-try:
-    from ..core.types import UnifiedGameState as GameState
-    __all__.append('GameState')
-except ImportError:
-    GameState = None
-
-try:
-    from .auto_operator import AutoOperator
-    __all__.append('AutoOperator')
-except ImportError:
-    AutoOperator = None
-
-try:
-    from .config import Config as ConfigManager
-    __all__.append('ConfigManager')
-except ImportError:
-    ConfigManager = None
\ No newline at end of file
+from ..common.lazy_import import lazy_exports
+
+# 可选服务（有外部依赖）按需导入：第一次访问时才加载对应模块，
+# 依赖缺失时与之前一样得到None
+_OPTIONAL_SERVICES = {
+    'GameAutomationError': ('.exceptions', 'GameAutomationError'),
+    'WindowNotFoundError': ('.exceptions', 'WindowNotFoundError'),
+    'GameLogger': ('.logger', 'GameLogger'),
+    # 错误处理器（依赖于logger和exceptions）
+    'ErrorHandler': ('.error_handler', 'ErrorHandler'),
+    # 需要外部依赖的服务
+    'GameWindowManager': ('.window_manager', 'GameWindowManager'),
+    'ImageProcessor': ('.image_processor', 'ImageProcessor'),
+    'ActionSimulator': ('.action_simulator', 'ActionSimulator'),
+    'GameAnalyzer': ('.game_analyzer', 'GameAnalyzer'),
+    'GameState': ('..core.types', 'UnifiedGameState'),
+    'AutoOperator': ('.auto_operator', 'AutoOperator'),
+    'ConfigManager': ('.config', 'Config'),
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _OPTIONAL_SERVICES, default=None)
+
+__all__ = ['Config', 'config', *_OPTIONAL_SERVICES]
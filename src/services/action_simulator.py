@@ -49,7 +49,7 @@ class ActionSimulator(QObject):
             self.is_initialized = True
             return True
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.ACTION_SIMULATOR_INIT_FAILED,
                     "动作模拟器初始化失败",
@@ -65,7 +65,7 @@ class ActionSimulator(QObject):
         """执行动作"""
         try:
             if not self.is_initialized:
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ActionError(
                         ErrorCode.ACTION_SIMULATOR_NOT_INITIALIZED,
                         "动作模拟器未初始化",
@@ -79,7 +79,7 @@ class ActionSimulator(QObject):
                 
             action_type = action.get('type')
             if not action_type:
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ActionError(
                         ErrorCode.INVALID_ACTION_TYPE,
                         "无效的动作类型",
@@ -100,7 +100,7 @@ class ActionSimulator(QObject):
             elif action_type == 'key_release':
                 return self.release_key(action['key'])
             else:
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ActionError(
                         ErrorCode.UNKNOWN_ACTION_TYPE,
                         f"未知的动作类型: {action_type}",
@@ -113,7 +113,7 @@ class ActionSimulator(QObject):
                 return False
                 
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.ACTION_EXECUTION_FAILED,
                     "动作执行失败",
@@ -144,7 +144,7 @@ class ActionSimulator(QObject):
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.MOUSE_MOVE_FAILED,
                     "鼠标移动失败",
@@ -177,7 +177,7 @@ class ActionSimulator(QObject):
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.MOUSE_CLICK_FAILED,
                     "鼠标点击失败",
@@ -200,7 +200,7 @@ class ActionSimulator(QObject):
             self.action_finished.emit("press_key")
             return True
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.KEY_PRESS_FAILED,
                     "按键按下失败",
@@ -223,7 +223,7 @@ class ActionSimulator(QObject):
             self.action_finished.emit("release_key")
             return True
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.KEY_RELEASE_FAILED,
                     "按键释放失败",
@@ -407,7 +407,7 @@ class ActionSimulator(QObject):
             x, y = pyautogui.position()
             return (x, y)
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.GET_POSITION_FAILED,
                     "获取鼠标位置失败",
@@ -435,7 +435,7 @@ class ActionSimulator(QObject):
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ActionError(
                     ErrorCode.MOUSE_RESET_FAILED,
                     "重置鼠标位置失败",
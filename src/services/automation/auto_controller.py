@@ -64,7 +64,7 @@ class AutoController:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "启动自动化失败",
                 ErrorContext(
@@ -101,7 +101,7 @@ class AutoController:
             
             # 检查超时
             if time.time() - self.start_time > action.timeout:
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ErrorCode.AUTO_CONTROL_ERROR,
                     f"动作 {action.name} 执行超时",
                     ErrorContext(
@@ -128,7 +128,7 @@ class AutoController:
             else:
                 self.retry_count += 1
                 if self.retry_count >= action.retry_count:
-                    self.error_handler.handle_error(
+                    self.error_handler.handle_error_async(
                         ErrorCode.AUTO_CONTROL_ERROR,
                         f"动作 {action.name} 重试次数超限",
                         ErrorContext(
@@ -143,7 +143,7 @@ class AutoController:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "执行自动化失败",
                 ErrorContext(
@@ -182,7 +182,7 @@ class AutoController:
                 raise ValueError(f"未知的动作类型: {action.type}")
                 
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 f"执行动作 {action.name} 失败",
                 ErrorContext(
@@ -211,7 +211,7 @@ class AutoController:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "执行点击动作失败",
                 ErrorContext(
@@ -239,7 +239,7 @@ class AutoController:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "执行按键动作失败",
                 ErrorContext(
@@ -264,7 +264,7 @@ class AutoController:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "执行等待动作失败",
                 ErrorContext(
@@ -296,7 +296,7 @@ class AutoController:
             return current_state.name == state_name
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.AUTO_CONTROL_ERROR,
                 "执行条件动作失败",
                 ErrorContext(
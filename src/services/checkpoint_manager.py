@@ -0,0 +1,314 @@
+"""
+检查点管理
+
+在后台线程写入训练检查点，保留最近N个；每个检查点先写入临时目录
+再原子重命名，latest.json指向最新的完整检查点。经验回放缓冲区按
+列存为数组文件(.npz)，恢复时无需逐条反序列化。
+"""
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# 可选依赖导入
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+    torch = None
+
+
+STATE_FILE = "state.pt"
+REPLAY_FILE = "replay.npz"
+LATEST_FILE = "latest.json"
+
+Transition = Tuple[np.ndarray, int, float, np.ndarray, bool]
+
+
+def _smallest_int_dtype(values: np.ndarray) -> np.dtype:
+    """选择能容纳所有值的最小整数类型"""
+    if values.size == 0:
+        return np.dtype(np.int64)
+    low, high = int(values.min()), int(values.max())
+    for dtype in (np.uint8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def replay_to_arrays(memory: Sequence[Transition]) -> Dict[str, np.ndarray]:
+    """
+    把经验回放缓冲区转换为按列存储的数组
+
+    Args:
+        memory: (state, action, reward, next_state, done)序列
+
+    Returns:
+        Dict: states, actions, rewards, next_states, dones
+    """
+    if len(memory) == 0:
+        return {
+            "states": np.zeros((0, 0), dtype=np.float32),
+            "actions": np.zeros(0, dtype=np.int64),
+            "rewards": np.zeros(0, dtype=np.float32),
+            "next_states": np.zeros((0, 0), dtype=np.float32),
+            "dones": np.zeros(0, dtype=bool),
+        }
+
+    states, actions, rewards, next_states, dones = zip(*memory)
+    actions = np.asarray(actions, dtype=np.int64)
+    return {
+        "states": np.asarray(states, dtype=np.float32),
+        "actions": actions.astype(_smallest_int_dtype(actions)),
+        "rewards": np.asarray(rewards, dtype=np.float32),
+        "next_states": np.asarray(next_states, dtype=np.float32),
+        "dones": np.asarray(dones, dtype=bool),
+    }
+
+
+def arrays_to_replay(arrays: Dict[str, np.ndarray]) -> List[Transition]:
+    """把按列存储的数组还原为经验列表"""
+    return list(zip(
+        arrays["states"],
+        arrays["actions"].astype(np.int64).tolist(),
+        arrays["rewards"].astype(np.float64).tolist(),
+        arrays["next_states"],
+        arrays["dones"].astype(bool).tolist(),
+    ))
+
+
+class CheckpointManager:
+    """
+    滚动检查点管理器
+
+    save_async在调用线程中只取快照(调用方负责传入不会再被修改的数据)，
+    序列化和磁盘写入在单个后台线程中按提交顺序执行。
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        keep: int = 3,
+        prefix: str = "checkpoint",
+        compress_replay: bool = False,
+        logger: Optional[Any] = None,
+    ):
+        """
+        初始化检查点管理器
+
+        Args:
+            directory: 检查点目录(首次保存时创建)
+            keep: 保留的检查点数量
+            prefix: 检查点目录名前缀
+            compress_replay: 是否压缩回放缓冲区(更小但更慢)
+            logger: 日志对象
+        """
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self.prefix = prefix
+        self.compress_replay = compress_replay
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        self.last_save_seconds = 0.0
+        self.saved_count = 0
+
+    def _checkpoint_name(self, step: int) -> str:
+        return f"{self.prefix}-{step:010d}"
+
+    def save_async(
+        self,
+        state: Dict[str, Any],
+        step: int,
+        memory: Optional[Sequence[Transition]] = None,
+    ) -> Future:
+        """
+        在后台保存检查点
+
+        Args:
+            state: 训练状态(模型、优化器参数等)的快照
+            step: 训练步数，用于命名和排序
+            memory: 经验回放缓冲区的快照，None表示不保存
+
+        Returns:
+            Future: 完成时结果为检查点目录
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Checkpoint")
+            future = self._executor.submit(self._write_checkpoint, state, step, memory)
+            self._pending = [f for f in self._pending if not f.done()] + [future]
+        return future
+
+    def save(
+        self,
+        state: Dict[str, Any],
+        step: int,
+        memory: Optional[Sequence[Transition]] = None,
+    ) -> Path:
+        """同步保存检查点(等待后台写入完成)"""
+        return self.save_async(state, step, memory).result()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有已提交的检查点写完
+
+        Returns:
+            bool: 是否在超时前全部完成
+        """
+        with self._lock:
+            pending = list(self._pending)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(remaining)
+            except Exception:
+                if not future.done():
+                    return False
+        return True
+
+    def close(self) -> None:
+        """等待写入完成并停止后台线程"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _write_checkpoint(
+        self,
+        state: Dict[str, Any],
+        step: int,
+        memory: Optional[Sequence[Transition]],
+    ) -> Path:
+        """写入检查点(后台线程)"""
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        name = self._checkpoint_name(step)
+        final_path = self.directory / name
+        temp_path = self.directory / f".{name}.tmp"
+        if temp_path.exists():
+            shutil.rmtree(temp_path)
+        temp_path.mkdir()
+
+        try:
+            payload = dict(state)
+            payload["step"] = step
+            with open(temp_path / STATE_FILE, "wb") as f:
+                if TORCH_AVAILABLE:
+                    torch.save(payload, f)
+                else:
+                    pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if memory is not None:
+                arrays = replay_to_arrays(memory)
+                save = np.savez_compressed if self.compress_replay else np.savez
+                with open(temp_path / REPLAY_FILE, "wb") as f:
+                    save(f, **arrays)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            # 同名检查点(同一步重复保存)先移走再替换
+            if final_path.exists():
+                shutil.rmtree(final_path)
+            os.replace(temp_path, final_path)
+            self._write_latest(name, step)
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            self.logger.error(f"保存检查点失败: {name}")
+            raise
+
+        self._prune()
+        self.last_save_seconds = time.perf_counter() - started
+        self.saved_count += 1
+        self.logger.info(f"保存检查点: {final_path} ({self.last_save_seconds * 1000:.1f}ms)")
+        return final_path
+
+    def _write_latest(self, name: str, step: int) -> None:
+        """原子更新最新检查点指针"""
+        temp = self.directory / f".{LATEST_FILE}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"name": name, "step": step}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.directory / LATEST_FILE)
+
+    def _prune(self) -> None:
+        """删除超出保留数量的旧检查点"""
+        for path in self.list_checkpoints()[:-self.keep]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def list_checkpoints(self) -> List[Path]:
+        """
+        列出完整的检查点
+
+        Returns:
+            List[Path]: 按步数升序排列的检查点目录
+        """
+        if not self.directory.exists():
+            return []
+        return sorted(
+            path for path in self.directory.glob(f"{self.prefix}-*")
+            if path.is_dir() and (path / STATE_FILE).exists()
+        )
+
+    def latest_checkpoint(self) -> Optional[Path]:
+        """获取最新的检查点目录，指针缺失或失效时按目录名查找"""
+        pointer = self.directory / LATEST_FILE
+        if pointer.exists():
+            try:
+                with open(pointer, "r", encoding="utf-8") as f:
+                    path = self.directory / json.load(f)["name"]
+                if (path / STATE_FILE).exists():
+                    return path
+            except (OSError, ValueError, KeyError):
+                pass
+        checkpoints = self.list_checkpoints()
+        return checkpoints[-1] if checkpoints else None
+
+    def load(
+        self, path: Optional[Union[str, Path]] = None, load_replay: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取检查点
+
+        Args:
+            path: 检查点目录，None表示最新的检查点
+            load_replay: 是否读取经验回放缓冲区
+
+        Returns:
+            Optional[Dict]: {'state': 训练状态, 'replay': 按列数组或None}，
+            没有检查点时返回None
+        """
+        path = Path(path) if path is not None else self.latest_checkpoint()
+        if path is None:
+            return None
+
+        with open(path / STATE_FILE, "rb") as f:
+            if TORCH_AVAILABLE:
+                state = torch.load(f, map_location="cpu", weights_only=False)
+            else:
+                state = pickle.load(f)
+
+        replay = None
+        replay_path = path / REPLAY_FILE
+        if load_replay and replay_path.exists():
+            with np.load(replay_path) as data:
+                replay = {key: data[key] for key in data.files}
+
+        return {"state": state, "replay": replay}
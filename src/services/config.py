@@ -6,9 +6,14 @@
 """
 
 import os
+import copy
 import json
+import atexit
 import logging
-from typing import Dict, Any, Optional, Union
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, List, Optional, Union
 from dataclasses import dataclass, field
 
 # PyQt6导入
@@ -20,12 +25,17 @@ except ImportError:
     PYQT6_AVAILABLE = False
     print("⚠️ PyQt6不可用，配置服务将使用JSON文件模式")
 
-# 可选依赖
-try:
-    import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+# 可选依赖(只检查是否安装，不导入)
+from ..common.lazy_import import is_available
+
+TORCH_AVAILABLE = is_available("torch")
+
+
+# 配置项不存在的标记
+_MISSING = object()
+
+# 配置变更回调: {键: 新值}，删除的键对应None，空字典表示全部配置被替换
+ConfigChangeListener = Callable[[Dict[str, Any]], None]
 
 
 @dataclass
@@ -124,11 +134,17 @@ class Config:
     支持两种模式：
     1. QSettings模式（推荐）- 使用系统原生配置存储
     2. JSON文件模式（备用）- 当PyQt6不可用时
+    
+    写入先作用于内存，再延迟合并落盘：单次set在autosave_delay秒内
+    没有新的修改后写入一次；batch()中的修改在结束时一次写入并只通知一次。
     """
     
     _instance = None
     _initialized = False
     
+    # 延迟保存的等待时间(秒)，0表示每次修改立即保存
+    DEFAULT_AUTOSAVE_DELAY = 0.5
+    
     def __new__(cls):
         """单例模式实现"""
         if cls._instance is None:
@@ -147,9 +163,28 @@ class Config:
         self._qsettings = None
         self._json_config = {}
         
+        # JSON模式下按完整键缓存查找结果，写入时失效；
+        # 失效时代数加一，查找期间发生过写入的结果不会进入缓存
+        self._lookup_cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        
+        # 批量修改与延迟保存
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._batch_changes: Dict[str, Any] = {}
+        self._batch_originals: Dict[str, Any] = {}
+        self._change_listeners: List[ConfigChangeListener] = []
+        self.autosave_delay = self.DEFAULT_AUTOSAVE_DELAY
+        self._dirty = False
+        self._last_change = 0.0
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_count = 0
+        
         # 初始化
         self._init_storage()
         self._ensure_directories()
+        atexit.register(self.sync)
         Config._initialized = True
     
     def _find_config_file(self) -> str:
@@ -250,12 +285,17 @@ class Config:
         except Exception as e:
             self.logger.error(f"JSON配置加载失败: {e}")
             self._json_config = self._create_default_config()
+        finally:
+            self._invalidate_cache()
     
     def _save_json_config(self):
         """保存JSON配置"""
         try:
-            with open(self._config_file, 'w', encoding='utf-8') as f:
+            temp_file = f"{self._config_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(self._json_config, f, indent=4, ensure_ascii=False)
+            os.replace(temp_file, self._config_file)
+            self._save_count += 1
         except Exception as e:
             self.logger.error(f"JSON配置保存失败: {e}")
     
@@ -305,17 +345,82 @@ class Config:
         """
         if self._use_qsettings:
             return self._qsettings.value(key, default)
-        else:
-            # JSON模式下的分层访问
-            keys = key.split('/')
-            value = self._json_config
+        
+        # JSON模式下的分层访问，结果按完整键缓存
+        value = self._lookup_cache.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self._cache_generation
+            value = self._lookup_json(key)
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    self._lookup_cache[key] = value
+        return default if value is _MISSING else value
+    
+    def _invalidate_cache(self) -> None:
+        """修改JSON配置之后调用，清空查找缓存"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._lookup_cache.clear()
+    
+    def _lookup_json(self, key: str) -> Any:
+        """在JSON配置中逐级查找，不存在时返回_MISSING"""
+        value = self._json_config
+        try:
+            for k in key.split('/'):
+                value = value[k]
+            return value
+        except (KeyError, TypeError, IndexError):
+            return _MISSING
+    
+    def _read_raw(self, key: str) -> Any:
+        """读取当前值，不存在时返回_MISSING"""
+        if self._use_qsettings:
+            return self._qsettings.value(key) if self._qsettings.contains(key) else _MISSING
+        return self._lookup_json(key)
+    
+    def _apply_set(self, key: str, value: Any) -> None:
+        """修改内存中的配置(不保存、不通知)"""
+        if self._use_qsettings:
+            self._qsettings.setValue(key, value)
+            return
+        
+        # JSON模式下的分层设置
+        keys = key.split('/')
+        config = self._json_config
+        
+        # 导航到父级
+        for k in keys[:-1]:
+            if k not in config:
+                config[k] = {}
+            config = config[k]
+        
+        # 设置值
+        config[keys[-1]] = value
+        self._invalidate_cache()
+    
+    def _apply_remove(self, key: str) -> bool:
+        """删除内存中的配置项(不保存、不通知)，返回是否存在"""
+        if self._use_qsettings:
+            existed = self._qsettings.contains(key) or key in self._qsettings.childGroups()
+            self._qsettings.remove(key)
+            return existed
+        
+        keys = key.split('/')
+        config = self._json_config
+        
+        try:
+            # 导航到父级
+            for k in keys[:-1]:
+                config = config[k]
             
-            try:
-                for k in keys:
-                    value = value[k]
-                return value
-            except (KeyError, TypeError):
-                return default
+            # 删除键
+            if keys[-1] in config:
+                del config[keys[-1]]
+                self._invalidate_cache()
+                return True
+        except (KeyError, TypeError):
+            pass
+        return False
     
     def set(self, key: str, value: Any):
         """
@@ -325,54 +430,204 @@ class Config:
             key: 配置键
             value: 配置值
         """
-        if self._use_qsettings:
-            self._qsettings.setValue(key, value)
-            self._qsettings.sync()
-        else:
-            # JSON模式下的分层设置
-            keys = key.split('/')
-            config = self._json_config
-            
-            # 导航到父级
-            for k in keys[:-1]:
-                if k not in config:
-                    config[k] = {}
-                config = config[k]
-            
-            # 设置值
-            config[keys[-1]] = value
-            self._save_json_config()
+        with self._lock:
+            self._remember_original(key)
+            self._apply_set(key, value)
+            changes = self._record_change(key, value)
+        
+        if changes:
+            self._notify_listeners(changes)
     
     def remove(self, key: str):
         """删除配置项"""
-        if self._use_qsettings:
-            self._qsettings.remove(key)
-            self._qsettings.sync()
-        else:
-            keys = key.split('/')
-            config = self._json_config
-            
-            try:
-                # 导航到父级
-                for k in keys[:-1]:
-                    config = config[k]
-                
-                # 删除键
-                if keys[-1] in config:
-                    del config[keys[-1]]
-                    self._save_json_config()
-            except (KeyError, TypeError):
-                pass
+        with self._lock:
+            self._remember_original(key)
+            if not self._apply_remove(key):
+                return
+            changes = self._record_change(key, None)
+        
+        if changes:
+            self._notify_listeners(changes)
     
     def clear(self):
-        """清空所有配置"""
+        """清空所有配置
+        
+        立即保存；在batch()中调用时不参与回滚。
+        """
+        with self._lock:
+            if self._use_qsettings:
+                self._qsettings.clear()
+            else:
+                self._json_config = self._create_default_config()
+                self._invalidate_cache()
+            self._dirty = True
+            self._batch_originals.clear()
+            self._batch_changes.clear()
+            self._persist()
+        
+        self._notify_listeners({})
+    
+    # === 批量修改与保存 ===
+    
+    @contextmanager
+    def batch(self) -> Iterator['Config']:
+        """
+        批量修改配置
+        
+        块内的set/remove只修改内存，正常结束时一次写入并发送一次变更通知；
+        块内抛出异常时恢复所有修改。批量期间其它线程的写入会等待。
+        可以嵌套，以最外层为准。
+        
+        用法:
+            with config.batch():
+                config.set('window/refresh_interval', 500)
+                config.set('automation/retry_count', 5)
+        """
+        self._lock.acquire()
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._rollback_batch()
+            self._lock.release()
+            raise
+        
+        self._batch_depth -= 1
+        changes = None
+        try:
+            if self._batch_depth == 0:
+                changes, self._batch_changes = self._batch_changes, {}
+                self._batch_originals = {}
+                if changes:
+                    self._persist()
+        finally:
+            self._lock.release()
+        
+        if changes:
+            self._notify_listeners(changes)
+    
+    def _remember_original(self, key: str) -> None:
+        """
+        批量修改中第一次修改某个键时记录原值，用于回滚
+        
+        同一批次可能先改子键再替换父键(或相反)，只记录单个键无法恢复。
+        JSON模式记录整个顶层分组的副本；QSettings模式同时记录该键下的所有子键。
+        """
+        if not self._batch_depth:
+            return
+        if not self._use_qsettings:
+            section = key.split('/')[0]
+            if section not in self._batch_originals:
+                original = self._json_config.get(section, _MISSING)
+                self._batch_originals[section] = original if original is _MISSING else copy.deepcopy(original)
+            return
+        
+        prefix = key + '/'
+        for name in [key] + [k for k in self._qsettings.allKeys() if k.startswith(prefix)]:
+            if name not in self._batch_originals:
+                self._batch_originals[name] = self._read_raw(name)
+    
+    def _record_change(self, key: str, value: Any) -> Optional[Dict[str, Any]]:
+        """记录一次修改，批量修改外返回需要立即通知的变更"""
+        if self._batch_depth:
+            self._batch_changes[key] = value
+            return None
+        
+        self._dirty = True
+        self._last_change = time.monotonic()
+        self._schedule_save()
+        return {key: value}
+    
+    def _rollback_batch(self) -> None:
+        """恢复批量修改前的值"""
+        if self._use_qsettings:
+            # 先删除所有改动过的键，再写回原值，父键的删除不会覆盖子键的恢复
+            for key in reversed(list(self._batch_originals)):
+                self._qsettings.remove(key)
+            for key, original in self._batch_originals.items():
+                if original is not _MISSING:
+                    self._qsettings.setValue(key, original)
+        else:
+            for section, original in self._batch_originals.items():
+                if original is _MISSING:
+                    self._json_config.pop(section, None)
+                else:
+                    self._json_config[section] = original
+            self._invalidate_cache()
+        self._batch_originals = {}
+        self._batch_changes = {}
+        self.logger.warning("批量配置修改失败，已回滚")
+    
+    def _schedule_save(self) -> None:
+        """安排延迟保存，等待期间的修改合并为一次写入"""
+        if self.autosave_delay <= 0:
+            self._persist()
+            return
+        if self._save_timer is None:
+            self._start_save_timer(self.autosave_delay)
+    
+    def _start_save_timer(self, delay: float) -> None:
+        timer = threading.Timer(delay, self._on_save_timer)
+        timer.daemon = True
+        self._save_timer = timer
+        timer.start()
+    
+    def _on_save_timer(self) -> None:
+        """延迟保存到期：最近一次修改后已安静autosave_delay秒才写入"""
+        with self._lock:
+            self._save_timer = None
+            if not self._dirty:
+                return
+            remaining = self._last_change + self.autosave_delay - time.monotonic()
+            if remaining > 0 or self._batch_depth:
+                self._start_save_timer(max(remaining, 0.01))
+                return
+            self._persist()
+    
+    def _persist(self) -> None:
+        """把内存中的配置写入存储"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        self._dirty = False
         if self._use_qsettings:
-            self._qsettings.clear()
             self._qsettings.sync()
+            self._save_count += 1
         else:
-            self._json_config = self._create_default_config()
             self._save_json_config()
     
+    def sync(self) -> None:
+        """立即写入尚未保存的修改"""
+        with self._lock:
+            if self._dirty and not self._batch_depth:
+                self._persist()
+    
+    def add_change_listener(self, listener: ConfigChangeListener) -> None:
+        """
+        添加配置变更监听器
+        
+        Args:
+            listener: 回调，参数为{键: 新值}；删除的键对应None，
+                空字典表示全部配置被替换
+        """
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: ConfigChangeListener) -> None:
+        """移除配置变更监听器"""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _notify_listeners(self, changes: Dict[str, Any]) -> None:
+        """通知监听器"""
+        for listener in list(self._change_listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                self.logger.error(f"配置变更回调失败: {e}")
+    
     # === 分组配置访问方法 ===
     
     def get_application_config(self) -> dict:
@@ -447,7 +702,10 @@ class Config:
         """获取存储信息"""
         info = {
             "mode": "QSettings" if self._use_qsettings else "JSON",
-            "pyqt6_available": PYQT6_AVAILABLE
+            "pyqt6_available": PYQT6_AVAILABLE,
+            "autosave_delay": self.autosave_delay,
+            "pending_save": self._dirty,
+            "save_count": self._save_count
         }
         
         if self._use_qsettings:
@@ -519,12 +777,16 @@ class Config:
             with open(file_path, 'r', encoding='utf-8') as f:
                 config_data = json.load(f)
             
-            if self._use_qsettings:
-                self._import_json_to_qsettings(config_data)
-            else:
-                self._json_config = config_data
-                self._save_json_config()
+            with self._lock:
+                if self._use_qsettings:
+                    self._import_json_to_qsettings(config_data)
+                else:
+                    self._json_config = config_data
+                    self._invalidate_cache()
+                    self._save_json_config()
+                self._dirty = False
             
+            self._notify_listeners({})
             self.logger.info(f"配置已从 {file_path} 导入")
             return True
             
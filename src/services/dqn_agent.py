@@ -2,21 +2,25 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
+import copy
 import numpy as np
 import random
 from collections import deque
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from PyQt6.QtCore import QObject, pyqtSignal
 from .config import Config
 from .logger import GameLogger
+from .state_encoder import StateEncoder
+from .vector_env import VectorEnv
+from .checkpoint_manager import CheckpointManager, arrays_to_replay
+from .policy_export import BACKEND_INT8, export_policy
 
-# 可选依赖导入
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
-    YOLO = None
+# 可选依赖：创建模型时才导入ultralytics
+from ..common.lazy_import import is_available, lazy_attr
+
+YOLO_AVAILABLE = is_available("ultralytics")
+YOLO = lazy_attr("ultralytics", "YOLO") if YOLO_AVAILABLE else None
 
 class DQN(nn.Module):
     """深度Q网络模型"""
@@ -103,6 +107,10 @@ class DQNAgent(QObject):
             self.epsilon_min = dqn_config.get('min_epsilon', 0.01)
             self.epsilon_decay = dqn_config.get('epsilon_decay', 0.995)
             self.batch_size = dqn_config.get('batch_size', 32)
+            state_cache_size = dqn_config.get('state_cache_size', 256)
+            self.signal_interval = dqn_config.get('signal_interval', 0.5)
+            checkpoint_dir = dqn_config.get('checkpoint_dir', 'checkpoints/dqn')
+            checkpoint_keep = dqn_config.get('checkpoint_keep', 3)
         else:
             # 使用默认值
             self.state_size = 84
@@ -115,9 +123,15 @@ class DQNAgent(QObject):
             self.epsilon_min = 0.01
             self.epsilon_decay = 0.995
             self.batch_size = 32
+            state_cache_size = 256
+            self.signal_interval = 0.5
+            checkpoint_dir = 'checkpoints/dqn'
+            checkpoint_keep = 3
         
         # 初始化经验回放缓冲区
         self.memory = deque(maxlen=memory_size)
+        # 网络更新次数，随检查点保存以便恢复训练进度
+        self.train_steps = 0
         
         # 初始化Q网络和目标网络
         self.device = torch.device(device)
@@ -131,6 +145,9 @@ class DQNAgent(QObject):
             lr=learning_rate
         )
         
+        # 检查点管理器(首次保存时才创建目录)
+        self.checkpoint_manager = CheckpointManager(checkpoint_dir, keep=checkpoint_keep, logger=logger)
+        
         logger.info(f"初始化DQN代理，状态大小: {self.state_size}, 动作大小: {self.action_size}")
         
         # 初始化YOLOv5模型（如果可用）
@@ -138,6 +155,10 @@ class DQNAgent(QObject):
             try:
                 self.yolo_model = YOLO('yolov5n.pt')
                 logger.info("YOLO模型初始化成功")
+            except ImportError as e:
+                # 已安装但导入失败(安装损坏)，与未安装一样回退
+                logger.warning(f"ultralytics库导入失败，DQN将不使用YOLO特征: {e}")
+                self.yolo_model = None
             except Exception as e:
                 logger.warning(f"YOLO模型初始化失败: {e}")
                 self.yolo_model = None
@@ -145,6 +166,14 @@ class DQNAgent(QObject):
             logger.warning("ultralytics库不可用，DQN将不使用YOLO特征")
             self.yolo_model = None
         
+        # 状态编码器：批量检测并缓存相同画面的编码
+        self.state_encoder = StateEncoder(
+            self.state_size,
+            detector=self.yolo_model,
+            cache_size=state_cache_size,
+            logger=logger
+        )
+        
         # 发送初始信号
         self.epsilon_updated.emit(self.epsilon)
     
@@ -162,6 +191,26 @@ class DQNAgent(QObject):
         """
         self.memory.append((state, action, reward, next_state, done))
     
+    def remember_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                       next_states: np.ndarray, dones: np.ndarray):
+        """
+        批量存储经验
+        
+        Args:
+            states: 形状(N, state_size)的当前状态
+            actions: 形状(N,)的动作
+            rewards: 形状(N,)的奖励
+            next_states: 形状(N, state_size)的下一个状态
+            dones: 形状(N,)的结束标记
+        """
+        self.memory.extend(zip(
+            np.asarray(states, dtype=np.float32),
+            np.asarray(actions).tolist(),
+            np.asarray(rewards, dtype=np.float64).tolist(),
+            np.asarray(next_states, dtype=np.float32),
+            np.asarray(dones, dtype=bool).tolist()
+        ))
+    
     def act(self, state: np.ndarray) -> int:
         """
         根据当前状态选择动作
@@ -186,6 +235,28 @@ class DQNAgent(QObject):
         
         return action
     
+    def act_batch(self, states: np.ndarray) -> np.ndarray:
+        """
+        为一批状态选择动作，整批只做一次前向传播
+        
+        Args:
+            states: 形状(N, state_size)的状态
+            
+        Returns:
+            形状(N,)的动作
+        """
+        states = np.asarray(states, dtype=np.float32)
+        count = len(states)
+        explore = np.random.random(count) < self.epsilon
+        actions = np.random.randint(self.action_size, size=count)
+        
+        if not explore.all():
+            with torch.no_grad():
+                q_values = self.model(torch.from_numpy(states[~explore]).to(self.device))
+            actions[~explore] = q_values.argmax(dim=1).cpu().numpy()
+        
+        return actions
+    
     def replay(self):
         """
         从经验回放缓冲区中学习
@@ -195,40 +266,151 @@ class DQNAgent(QObject):
             
         self.training_started.emit()
         try:
-            # 从缓冲区中随机采样
-            batch = random.sample(self.memory, self.batch_size)
-            states, actions, rewards, next_states, dones = zip(*batch)
-            
-            # 转换为张量
-            states = torch.FloatTensor(states).to(self.device)
-            actions = torch.LongTensor(actions).to(self.device)
-            rewards = torch.FloatTensor(rewards).to(self.device)
-            next_states = torch.FloatTensor(next_states).to(self.device)
-            dones = torch.FloatTensor(dones).to(self.device)
-            
-            # 计算当前Q值
-            current_q_values = self.model(states).gather(1, actions.unsqueeze(1))
-            
-            # 计算目标Q值
-            with torch.no_grad():
-                next_q_values = self.target_model(next_states).max(1)[0]
-                target_q_values = rewards + (1 - dones) * self.gamma * next_q_values
-            
-            # 计算损失
-            loss = F.mse_loss(current_q_values.squeeze(), target_q_values)
-            
-            # 优化模型
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            loss = self._learn_step()
             
             # 发送训练进度信号
-            self.training_progress.emit(loss.item())
-            self.model_updated.emit(loss.item())
+            self.training_progress.emit(loss)
+            self.model_updated.emit(loss)
+        finally:
+            self.training_finished.emit()
+    
+    def _learn_step(self) -> Optional[float]:
+        """
+        采样一批经验并更新一次Q网络，不发送信号
+        
+        Returns:
+            训练损失，经验不足时返回None
+        """
+        if len(self.memory) < self.batch_size:
+            return None
+        
+        # 从缓冲区中随机采样
+        batch = random.sample(self.memory, self.batch_size)
+        states, actions, rewards, next_states, dones = zip(*batch)
+        
+        # 先堆叠为连续数组再整体转换为张量
+        states = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device)
+        actions = torch.from_numpy(np.asarray(actions, dtype=np.int64)).to(self.device)
+        rewards = torch.from_numpy(np.asarray(rewards, dtype=np.float32)).to(self.device)
+        next_states = torch.from_numpy(np.asarray(next_states, dtype=np.float32)).to(self.device)
+        dones = torch.from_numpy(np.asarray(dones, dtype=np.float32)).to(self.device)
+        
+        # 计算当前Q值
+        current_q_values = self.model(states).gather(1, actions.unsqueeze(1))
+        
+        # 计算目标Q值
+        with torch.no_grad():
+            next_q_values = self.target_model(next_states).max(1)[0]
+            target_q_values = rewards + (1 - dones) * self.gamma * next_q_values
+        
+        # 计算损失
+        loss = F.mse_loss(current_q_values.squeeze(), target_q_values)
+        
+        # 优化模型
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        self.train_steps += 1
+        
+        self.logger.debug(f"训练损失: {loss.item():.4f}")
+        return loss.item()
+    
+    def train_vectorized(self, env: VectorEnv, total_steps: int, train_every: int = 1,
+                         target_update_interval: int = 1000,
+                         stop_requested: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        在向量化环境上训练
+        
+        每一步为所有环境批量选择动作、批量存储转移。训练循环内不发送信号，
+        进度、损失和探索率按signal_interval(秒)汇总后发送，可在无界面环境中运行。
+        
+        Args:
+            env: 向量化环境
+            total_steps: 环境步数(每步推进所有环境)
+            train_every: 每隔多少步更新一次网络
+            target_update_interval: 每隔多少次网络更新同步一次目标网络
+            stop_requested: 返回True时提前结束训练
             
-            self.logger.debug(f"训练损失: {loss.item():.4f}")
+        Returns:
+            训练统计：步数、转移数、完成回合数、更新次数、平均损失和平均回合回报
+        """
+        stats = {
+            'steps': 0,
+            'transitions': 0,
+            'episodes': 0,
+            'updates': 0,
+            'mean_loss': 0.0,
+            'mean_episode_return': 0.0
+        }
+        loss_total = 0.0
+        return_total = 0.0
+        pending_losses: List[float] = []
+        last_report = time.perf_counter()
+        
+        self.training_started.emit()
+        try:
+            states = env.reset()
+            for step in range(1, total_steps + 1):
+                if stop_requested is not None and stop_requested():
+                    break
+                
+                result = env.step(self.act_batch(states))
+                # 截断且没有真实后继状态的转移无法自举，不存入经验池
+                keep = np.array([info.get('next_state_valid', True) for info in result.infos], dtype=bool)
+                if keep.all():
+                    self.remember_batch(states, result.actions, result.rewards,
+                                        result.next_states, result.dones)
+                elif keep.any():
+                    self.remember_batch(states[keep], result.actions[keep], result.rewards[keep],
+                                        result.next_states[keep], result.dones[keep])
+                states = result.states
+                
+                stats['steps'] = step
+                stats['transitions'] += int(keep.sum())
+                for info in result.infos:
+                    if 'episode_return' in info:
+                        stats['episodes'] += 1
+                        return_total += info['episode_return']
+                
+                if step % train_every == 0:
+                    loss = self._learn_step()
+                    if loss is not None:
+                        stats['updates'] += 1
+                        loss_total += loss
+                        pending_losses.append(loss)
+                        if stats['updates'] % target_update_interval == 0:
+                            self.target_model.load_state_dict(self.model.state_dict())
+                        if self.epsilon > self.epsilon_min:
+                            self.epsilon *= self.epsilon_decay
+                
+                now = time.perf_counter()
+                if now - last_report >= self.signal_interval:
+                    self._report_progress(step / total_steps, pending_losses)
+                    pending_losses = []
+                    last_report = now
+            
+            self._report_progress(stats['steps'] / max(1, total_steps), pending_losses)
         finally:
             self.training_finished.emit()
+        
+        if stats['updates']:
+            stats['mean_loss'] = loss_total / stats['updates']
+        if stats['episodes']:
+            stats['mean_episode_return'] = return_total / stats['episodes']
+        self.logger.info(
+            f"向量化训练完成: {stats['steps']}步, {stats['transitions']}条转移, "
+            f"{stats['episodes']}个回合, {stats['updates']}次更新"
+        )
+        return stats
+    
+    def _report_progress(self, progress: float, losses: List[float]):
+        """汇总发送训练信号"""
+        if losses:
+            mean_loss = float(np.mean(losses))
+            self.training_progress.emit(mean_loss)
+            self.model_updated.emit(mean_loss)
+        self.epsilon_updated.emit(self.epsilon)
+        self.logger.debug(f"训练进度: {progress:.1%}, 探索率: {self.epsilon:.4f}")
     
     def update_target_model(self):
         """更新目标网络"""
@@ -253,7 +435,8 @@ class DQNAgent(QObject):
             'model_state_dict': self.model.state_dict(),
             'target_model_state_dict': self.target_model.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
-            'epsilon': self.epsilon
+            'epsilon': self.epsilon,
+            'train_steps': self.train_steps
         }, path)
         self.logger.info(f"保存模型到: {path}")
     
@@ -269,76 +452,145 @@ class DQNAgent(QObject):
         self.target_model.load_state_dict(checkpoint['target_model_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         self.epsilon = checkpoint['epsilon']
+        self.train_steps = checkpoint.get('train_steps', 0)
         self.epsilon_updated.emit(self.epsilon)
         self.logger.info(f"从 {path} 加载模型")
     
-    def get_state_from_image(self, image: np.ndarray) -> np.ndarray:
+    def export_inference_policy(self, path: str, backend: str = BACKEND_INT8,
+                                validation_states: Optional[np.ndarray] = None,
+                                **options) -> Dict[str, Any]:
         """
-        从图像中提取状态向量
+        导出只用于推理的策略网络(动态int8量化或ONNX)
+        
+        导出后与当前浮点模型比较Q值误差和动作一致率，并测量推理延迟。
         
         Args:
-            image: 游戏画面
+            path: 输出路径
+            backend: 'int8'或'onnx'
+            validation_states: 验证状态，None时从经验回放缓冲区采样
+            options: 传给policy_export.export_policy的其它参数
             
         Returns:
-            状态向量
+            导出报告，包含精度指标、是否通过和延迟对比
         """
-        # 检查YOLO模型是否可用
-        if not self.yolo_model:
-            # 如果没有YOLO模型，返回基本的图像特征
-            # 例如：图像的统计特征
-            gray = np.mean(image, axis=2) if len(image.shape) == 3 else image
-            # 计算图像的基本统计特征
-            features = [
-                np.mean(gray),      # 平均亮度
-                np.std(gray),       # 亮度标准差
-                np.min(gray),       # 最小亮度
-                np.max(gray),       # 最大亮度
-            ]
-            # 确保返回正确的状态大小
-            while len(features) < self.state_size:
-                features.append(0.0)
-            return np.array(features[:self.state_size])
+        if validation_states is None:
+            if self.memory:
+                samples = random.sample(self.memory, min(len(self.memory), 1024))
+                validation_states = np.asarray([sample[0] for sample in samples], dtype=np.float32)
+            else:
+                validation_states = np.random.standard_normal((256, self.state_size)).astype(np.float32)
         
+        self.model.eval()
         try:
-            # 使用YOLOv5检测元素
-            results = self.yolo_model(image)
-            
-            # 提取状态特征
-            state = []
-            
-            # 添加每个类别的元素数量
-            for class_name in self.yolo_model.names.values():
-                count = 0
-                for result in results:
-                    boxes = result.boxes
-                    if boxes is None:
-                        continue
-                    for box in boxes:
-                        cls_id = int(box.cls[0])
-                        if cls_id in self.yolo_model.names and self.yolo_model.names[cls_id] == class_name:
-                            count += 1
-                state.append(count)
+            return export_policy(self.model, path, self.state_size, validation_states,
+                                 backend=backend, **options)
+        finally:
+            self.model.train()
+    
+    def get_checkpoint_state(self) -> Dict[str, Any]:
+        """
+        获取训练状态快照
+        
+        参数复制到CPU，之后的训练不会改变快照内容，可以交给后台线程序列化。
+        
+        Returns:
+            模型、目标网络、优化器参数以及探索率和更新次数
+        """
+        def cpu_copy(state_dict):
+            return {key: value.detach().to('cpu', copy=True) for key, value in state_dict.items()}
+        
+        optimizer_state = self.optimizer.state_dict()
+        return {
+            'model_state_dict': cpu_copy(self.model.state_dict()),
+            'target_model_state_dict': cpu_copy(self.target_model.state_dict()),
+            'optimizer_state_dict': {
+                'state': {
+                    key: {
+                        name: value.detach().to('cpu', copy=True) if torch.is_tensor(value) else value
+                        for name, value in param_state.items()
+                    }
+                    for key, param_state in optimizer_state['state'].items()
+                },
+                'param_groups': copy.deepcopy(optimizer_state['param_groups'])
+            },
+            'epsilon': self.epsilon,
+            'train_steps': self.train_steps
+        }
+    
+    def save_checkpoint(self, include_replay: bool = True):
+        """
+        在后台保存检查点
+        
+        调用线程只复制参数和回放缓冲区的引用列表，序列化与写盘由
+        检查点管理器的后台线程完成。
+        
+        Args:
+            include_replay: 是否同时保存经验回放缓冲区
             
-            # 添加元素位置信息
-            for result in results:
-                boxes = result.boxes
-                if boxes is None:
-                    continue
-                for box in boxes:
-                    # 获取边界框坐标
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    # 计算中心点坐标
-                    center_x = (x1 + x2) / 2 / image.shape[1]  # 归一化
-                    center_y = (y1 + y2) / 2 / image.shape[0]  # 归一化
-                    state.extend([center_x, center_y])
+        Returns:
+            Future，完成时结果为检查点目录
+        """
+        memory = list(self.memory) if include_replay else None
+        return self.checkpoint_manager.save_async(self.get_checkpoint_state(), self.train_steps, memory)
+    
+    def restore_checkpoint(self, path: Optional[str] = None, load_replay: bool = True) -> bool:
+        """
+        从检查点恢复训练
+        
+        Args:
+            path: 检查点目录，None表示最新的检查点
+            load_replay: 是否恢复经验回放缓冲区
             
-            # 确保返回正确的状态大小
-            while len(state) < self.state_size:
-                state.append(0.0)
+        Returns:
+            是否找到并恢复了检查点
+        """
+        checkpoint = self.checkpoint_manager.load(path, load_replay=load_replay)
+        if checkpoint is None:
+            return False
+        
+        state = checkpoint['state']
+        self.model.load_state_dict(state['model_state_dict'])
+        self.target_model.load_state_dict(state['target_model_state_dict'])
+        self.optimizer.load_state_dict(state['optimizer_state_dict'])
+        self.epsilon = state['epsilon']
+        self.train_steps = state.get('train_steps', state.get('step', 0))
+        
+        if checkpoint['replay'] is not None:
+            self.memory.clear()
+            self.memory.extend(arrays_to_replay(checkpoint['replay']))
+        
+        self.epsilon_updated.emit(self.epsilon)
+        self.logger.info(f"从检查点恢复训练: 第{self.train_steps}次更新, 经验{len(self.memory)}条")
+        return True
+    
+    def get_state_from_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        从图像中提取状态向量
+        
+        Args:
+            image: 游戏画面
             
-            return np.array(state[:self.state_size])
+        Returns:
+            状态向量
+        """
+        return self.get_states_from_images([image])[0]
+    
+    def get_states_from_images(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        批量从图像中提取状态向量
+        
+        有YOLO模型时一次检测整批画面并向量化组装状态，否则使用图像统计特征；
+        相同画面直接使用缓存的编码。
+        
+        Args:
+            images: 游戏画面列表
             
+        Returns:
+            形状为(N, state_size)的状态矩阵
+        """
+        try:
+            return self.state_encoder.encode_batch(images)
         except Exception as e:
             self.logger.error(f"YOLO状态提取失败: {e}")
             # 返回零状态
-            return np.zeros(self.state_size) 
\ No newline at end of file
+            return np.zeros((len(images), self.state_size))
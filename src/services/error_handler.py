@@ -1,5 +1,6 @@
 import time
 import traceback
+from concurrent.futures import Future
 from typing import Dict, Any, Optional, Callable, List
 from threading import Lock
 from ..common.error_types import (
@@ -14,9 +15,9 @@ from ..common.error_types import (
     ModelError
 )
 from .logger import GameLogger
+from .recovery import BackoffPolicy, CircuitBreaker, RecoveryExecutor
+from ..common.metrics_sampler import get_metrics_sampler
 import numpy as np
-import psutil
-import os
 
 class ErrorHandler:
     """统一的错误处理服务"""
@@ -41,6 +42,16 @@ class ErrorHandler:
         self.recovery_attempts = 0
         self.max_recovery_attempts = 5
         self.last_recovery_time = 0
+        self.recovery_budget = 10.0  # 单次恢复(含重试和备用策略)的时间上限(秒)
+        self.backoff = BackoffPolicy(base_delay=0.5, max_delay=5.0)
+        
+        # 按子系统熔断，恢复在后台线程中执行
+        self.breaker_failure_threshold = self.max_recovery_attempts
+        self.breaker_reset_timeout = 30.0
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._executor = RecoveryExecutor()
+        # 正在执行的恢复的截止时间(time.monotonic)，恢复步骤之间的等待不超过它
+        self._recovery_deadline: Optional[float] = None
         
         # 服务引用（延迟初始化）
         self.window_manager = None
@@ -89,6 +100,36 @@ class ErrorHandler:
         Returns:
             bool: 是否成功恢复
         """
+        self._record_error(error)
+        
+        # 尝试恢复
+        return self._attempt_recovery(error)
+    
+    def handle_error_async(self, error: GameAutomationError) -> Future:
+        """处理错误并在后台线程中尝试恢复，调用方不会被重试等待阻塞
+        
+        同一子系统已有恢复在排队或执行时，返回该恢复的Future而不重复提交。
+        
+        Args:
+            error: 错误对象
+            
+        Returns:
+            Future: 完成时结果为是否成功恢复
+        """
+        self._record_error(error)
+        
+        subsystem = self._get_subsystem(error)
+        # 只检查不占用半开状态的试探许可，许可在后台执行恢复时获取
+        if self._get_breaker(subsystem).is_open():
+            self.logger.debug(f"子系统 {subsystem} 已熔断，跳过恢复")
+            future: Future = Future()
+            future.set_result(False)
+            return future
+        
+        return self._executor.submit(subsystem, lambda: self._attempt_recovery(error))
+    
+    def _record_error(self, error: GameAutomationError) -> None:
+        """更新错误统计并记录日志"""
         with self.error_lock:
             # 更新错误统计
             self.error_stats[error.error_code] = self.error_stats.get(error.error_code, 0) + 1
@@ -106,72 +147,135 @@ class ErrorHandler:
                 f"发生错误: {error.message} (错误码: {error.error_code.name})",
                 extra={"error_context": error.context.details}
             )
+    
+    def _get_subsystem(self, error: GameAutomationError) -> str:
+        """错误所属的子系统(按错误码的千位划分)"""
+        error_code = getattr(error, 'error_code', None)
+        if isinstance(error_code, ErrorCode):
+            try:
+                return ErrorCode((error_code.value // 1000) * 1000).name
+            except ValueError:
+                return error_code.name
+        return type(error).__name__
+    
+    def _get_breaker(self, subsystem: str) -> CircuitBreaker:
+        """获取子系统的熔断器"""
+        with self.error_lock:
+            breaker = self.circuit_breakers.get(subsystem)
+            if breaker is None:
+                breaker = self.circuit_breakers[subsystem] = CircuitBreaker(
+                    self.breaker_failure_threshold, self.breaker_reset_timeout
+                )
+            return breaker
+    
+    def _wait(self, delay: float, deadline: float) -> bool:
+        """在恢复时间预算内等待，预算用尽或正在关闭时返回False"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if self._executor.stop_event.wait(min(delay, remaining)):
+            return False
+        return delay < remaining
+    
+    def _pause(self, delay: float) -> bool:
+        """恢复处理函数中步骤之间的等待
         
-        # 尝试恢复
-        return self._attempt_recovery(error)
+        关闭时立即返回；在恢复流程中执行时不超过本次恢复的时间预算。
+        
+        Returns:
+            bool: 等待完成返回True，预算用尽或正在关闭时返回False(应放弃恢复)
+        """
+        deadline = self._recovery_deadline
+        if deadline is None:
+            return not self._executor.stop_event.wait(delay)
+        return self._wait(delay, deadline)
     
     def _attempt_recovery(self, error: GameAutomationError) -> bool:
         """尝试恢复错误
         
+        重试间隔按带抖动的指数退避，总耗时不超过recovery_budget；
+        同一子系统连续失败达到阈值后熔断，冷却期内直接返回失败。
+        
         Args:
             error: 错误对象
             
         Returns:
             bool: 是否成功恢复
         """
-        with self.recovery_lock:
-            current_time = time.time()
-            self.last_recovery_time = current_time
-            self.recovery_attempts += 1
-            
-            # 检查恢复尝试次数
-            if self.recovery_attempts > self.max_recovery_attempts:
-                self.recovery_attempts = 0
-                self.logger.warning("恢复尝试次数过多，等待较长时间后再尝试")
-                time.sleep(5.0)
-            
-            # 获取恢复处理函数
-            handler = self._get_recovery_handler(error.error_code)
-            if not handler:
-                self.logger.warning(f"未找到错误码 {error.error_code.name} 的恢复处理函数")
-                return False
-            
-            # 尝试恢复
-            for attempt in range(self.max_retries):
+        subsystem = self._get_subsystem(error)
+        breaker = self._get_breaker(subsystem)
+        if not breaker.allow():
+            self.logger.warning(f"子系统 {subsystem} 恢复连续失败，已熔断，{self.breaker_reset_timeout:.0f}秒内不再尝试")
+            return False
+        
+        success = False
+        try:
+            with self.recovery_lock:
+                self.last_recovery_time = time.time()
+                self.recovery_attempts += 1
+                self._recovery_deadline = deadline = time.monotonic() + self.recovery_budget
                 try:
-                    self.logger.info(f"尝试恢复 (第 {attempt + 1} 次)")
-                    handler()
-                    
-                    # 验证恢复是否成功
-                    if self._verify_recovery(error):
-                        self.logger.info("恢复成功")
-                        self.consecutive_errors = 0
-                        self.recovery_stats[error.error_code] = self.recovery_stats.get(error.error_code, 0) + 1
-                        return True
-                    else:
-                        self.logger.warning(f"恢复操作完成但验证失败 (尝试 {attempt + 1}/{self.max_retries})")
-                        if attempt < self.max_retries - 1:
-                            time.sleep(self.retry_delay * (attempt + 2))
-                        
-                except Exception as e:
-                    self.logger.error(f"恢复失败: {str(e)}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay * (attempt + 1))
-            
-            # 尝试备用恢复策略
-            try:
-                self.logger.warning("常规恢复策略失败，尝试备用恢复策略")
-                success = self._backup_recovery_strategy(error)
+                    success = self._run_recovery(error, deadline)
+                finally:
+                    self._recovery_deadline = None
                 if success:
-                    self.logger.info("备用恢复策略成功")
+                    self.recovery_attempts = 0
+        finally:
+            # 无论结果如何都要记录，半开状态的试探许可才会释放
+            if success:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        return success
+    
+    def _run_recovery(self, error: GameAutomationError, deadline: float) -> bool:
+        """执行恢复处理函数、重试和备用策略"""
+        # 获取恢复处理函数
+        handler = self._get_recovery_handler(error.error_code)
+        if not handler:
+            self.logger.warning(f"未找到错误码 {error.error_code.name} 的恢复处理函数")
+            return False
+        
+        # 尝试恢复
+        for attempt in range(self.max_retries):
+            try:
+                self.logger.info(f"尝试恢复 (第 {attempt + 1} 次)")
+                handler()
+                
+                # 验证恢复是否成功
+                if self._verify_recovery(error):
+                    self.logger.info("恢复成功")
                     self.consecutive_errors = 0
                     self.recovery_stats[error.error_code] = self.recovery_stats.get(error.error_code, 0) + 1
                     return True
+                else:
+                    self.logger.warning(f"恢复操作完成但验证失败 (尝试 {attempt + 1}/{self.max_retries})")
+                    
             except Exception as e:
-                self.logger.error(f"备用恢复策略失败: {str(e)}")
+                self.logger.error(f"恢复失败: {str(e)}")
             
-            self.logger.error("所有恢复尝试均失败")
+            if attempt < self.max_retries - 1 and not self._wait(self.backoff.delay(attempt), deadline):
+                self.logger.warning("恢复时间预算已用尽")
+                return False
+        
+        if time.monotonic() >= deadline:
+            self.logger.warning("恢复时间预算已用尽，跳过备用恢复策略")
             return False
+        
+        # 尝试备用恢复策略
+        try:
+            self.logger.warning("常规恢复策略失败，尝试备用恢复策略")
+            success = self._backup_recovery_strategy(error)
+            if success:
+                self.logger.info("备用恢复策略成功")
+                self.consecutive_errors = 0
+                self.recovery_stats[error.error_code] = self.recovery_stats.get(error.error_code, 0) + 1
+                return True
+        except Exception as e:
+            self.logger.error(f"备用恢复策略失败: {str(e)}")
+        
+        self.logger.error("所有恢复尝试均失败")
+        return False
     
     def _get_recovery_handler(self, error_code: ErrorCode) -> Optional[Callable]:
         """获取错误恢复处理函数
@@ -447,8 +551,9 @@ class ErrorHandler:
             # 记录错误
             self.logger.error(f"执行通用恢复策略: {str(error)}")
             
-            # 等待一段时间
-            time.sleep(self.retry_delay)
+            # 等待一段时间(关闭或预算用尽时放弃)
+            if not self._pause(self.retry_delay):
+                return False
             
             # 检查系统资源
             if self._check_system_resources():
@@ -462,21 +567,22 @@ class ErrorHandler:
     def _check_system_resources(self) -> bool:
         """检查系统资源状态"""
         try:
+            # 读取共享采样器的快照，不在恢复流程中阻塞采样CPU
+            snapshot = get_metrics_sampler().snapshot(("cpu", "memory", "disk"))
+            
             # 检查内存使用
-            memory = psutil.virtual_memory()
-            if memory.percent > 90:
+            if snapshot.memory_percent > 90:
                 self.logger.warning("内存使用率过高")
                 return False
                 
             # 检查CPU使用
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = snapshot.cpu_percent
             if cpu_percent > 90:
                 self.logger.warning("CPU使用率过高")
                 return False
                 
             # 检查磁盘空间
-            disk = psutil.disk_usage('/')
-            if disk.percent > 90:
+            if snapshot.disk_percent > 90:
                 self.logger.warning("磁盘空间不足")
                 return False
                 
@@ -512,13 +618,15 @@ class ErrorHandler:
                 if win32gui.IsIconic(current_hwnd):
                     win32gui.ShowWindow(current_hwnd, win32con.SW_RESTORE)
                     self.logger.info("恢复最小化窗口")
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                 
                 # 检查窗口是否可见
                 if not win32gui.IsWindowVisible(current_hwnd):
                     win32gui.ShowWindow(current_hwnd, win32con.SW_SHOW)
                     self.logger.info("显示隐藏窗口")
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                 
                 # 尝试激活窗口
                 if hasattr(self.window_manager, 'set_foreground'):
@@ -558,7 +666,8 @@ class ErrorHandler:
                             self.logger.info(f"找到匹配窗口: {title}")
                             if hasattr(self.window_manager, 'set_target_window'):
                                 self.window_manager.set_target_window(hwnd, title)
-                                time.sleep(0.5)
+                                if not self._pause(0.5):
+                                    return False
                                 
                                 if self._comprehensive_recovery_verification(error):
                                     return True
@@ -571,7 +680,8 @@ class ErrorHandler:
                 self.logger.info(f"使用第一个可见窗口作为备选: {title}")
                 if hasattr(self.window_manager, 'set_target_window'):
                     self.window_manager.set_target_window(hwnd, title)
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                     
                     if self._comprehensive_recovery_verification(error):
                         return True
@@ -636,7 +746,8 @@ class ErrorHandler:
                     if hasattr(self.window_manager, 'find_window'):
                         if self.window_manager.find_window():
                             self.logger.info("成功找到目标窗口")
-                            time.sleep(0.5)
+                            if not self._pause(0.5):
+                                return False
                             
                             # 验证恢复
                             if self._comprehensive_recovery_verification(error):
@@ -650,10 +761,12 @@ class ErrorHandler:
                     try:
                         if hasattr(self.window_manager, 'set_target_window'):
                             self.window_manager.set_target_window(hwnd, title)
-                            time.sleep(0.5)
+                            if not self._pause(0.5):
+                                return False
                         if hasattr(self.window_manager, 'set_foreground'):
                             self.window_manager.set_foreground()
-                            time.sleep(0.5)
+                            if not self._pause(0.5):
+                                return False
                         
                         # 尝试捕获
                         if hasattr(self.window_manager, 'capture_window'):
@@ -676,12 +789,14 @@ class ErrorHandler:
                         except:
                             pass
                             
-                    time.sleep(1.0)  # 等待较长时间确保资源释放
+                    if not self._pause(1.0):  # 等待较长时间确保资源释放
+                        return False
                     
                     # 重新创建捕获引擎
                     from .capture_engines import GameCaptureEngine
                     self.window_manager.capture_engine = GameCaptureEngine(self.logger)
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                     
                     # 再次尝试捕获
                     if hasattr(self.window_manager, 'capture_window'):
@@ -731,12 +846,14 @@ class ErrorHandler:
                 if win32gui.IsIconic(window_handle):
                     win32gui.ShowWindow(window_handle, win32con.SW_RESTORE)
                     self.logger.info("恢复最小化窗口")
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                 
                 # 尝试激活窗口
                 if hasattr(self.window_manager, 'set_foreground'):
                     self.window_manager.set_foreground()
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                 
                 # 再次检查窗口是否可见
                 if not win32gui.IsWindowVisible(window_handle):
@@ -800,7 +917,8 @@ class ErrorHandler:
             # 如果存在capture_engine，尝试清理并重新初始化
             if hasattr(self.window_manager, 'capture_engine'):
                 self.window_manager.capture_engine.cleanup()
-                time.sleep(0.5)  # 等待资源释放
+                if not self._pause(0.5):  # 等待资源释放
+                    return False
                 
                 # 重新初始化捕获引擎
                 from .capture_engines import GameCaptureEngine
@@ -821,13 +939,15 @@ class ErrorHandler:
                 if win32gui.IsIconic(window_handle):
                     win32gui.ShowWindow(window_handle, win32con.SW_RESTORE)
                     self.logger.info("恢复最小化窗口")
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                     
                 # 尝试激活窗口
                 if hasattr(self.window_manager, 'set_foreground'):
                     self.window_manager.set_foreground()
                     self.logger.info("激活窗口")
-                    time.sleep(0.5)
+                    if not self._pause(0.5):
+                        return False
                 
                 # 更新进程ID信息
                 if hasattr(self.window_manager, 'process_id') and not getattr(self.window_manager, 'process_id', None):
@@ -873,17 +993,20 @@ class ErrorHandler:
         try:
             self.logger.info("执行系统健康检查...")
             
+            # 共享采样器的快照，不在恢复流程中直接调用psutil
+            snapshot = get_metrics_sampler().snapshot(("cpu", "memory", "disk"))
+            
             # 检查内存使用率
-            memory = psutil.virtual_memory()
-            self.logger.info(f"内存使用率: {memory.percent}%")
-            if memory.percent > 95:
-                self.logger.error(f"内存使用率过高: {memory.percent}%")
+            memory_percent = snapshot.memory_percent
+            self.logger.info(f"内存使用率: {memory_percent}%")
+            if memory_percent > 95:
+                self.logger.error(f"内存使用率过高: {memory_percent}%")
                 return False
-            elif memory.percent > 85:
-                self.logger.warning(f"内存使用率较高: {memory.percent}%")
+            elif memory_percent > 85:
+                self.logger.warning(f"内存使用率较高: {memory_percent}%")
                 
             # 检查CPU使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = snapshot.cpu_percent
             self.logger.info(f"CPU使用率: {cpu_percent}%")
             if cpu_percent > 95:
                 self.logger.error(f"CPU使用率过高: {cpu_percent}%")
@@ -892,16 +1015,13 @@ class ErrorHandler:
                 self.logger.warning(f"CPU使用率较高: {cpu_percent}%")
                 
             # 检查磁盘空间
-            try:
-                disk = psutil.disk_usage('C:' if os.name == 'nt' else '/')
-                self.logger.info(f"磁盘使用率: {disk.percent}%")
-                if disk.percent > 95:
-                    self.logger.error(f"磁盘空间严重不足: {disk.percent}%")
-                    return False
-                elif disk.percent > 85:
-                    self.logger.warning(f"磁盘空间不足: {disk.percent}%")
-            except:
-                self.logger.warning("无法检查磁盘使用情况")
+            disk_percent = snapshot.disk_percent
+            self.logger.info(f"磁盘使用率: {disk_percent}%")
+            if disk_percent > 95:
+                self.logger.error(f"磁盘空间严重不足: {disk_percent}%")
+                return False
+            elif disk_percent > 85:
+                self.logger.warning(f"磁盘空间不足: {disk_percent}%")
                 
             self.logger.info("系统健康检查通过")
             return True
@@ -946,7 +1066,11 @@ class ErrorHandler:
                 "error_stats": self.error_stats,
                 "recovery_stats": self.recovery_stats,
                 "consecutive_errors": self.consecutive_errors,
-                "recovery_attempts": self.recovery_attempts
+                "recovery_attempts": self.recovery_attempts,
+                "circuit_breakers": {
+                    name: breaker.to_dict() for name, breaker in self.circuit_breakers.items()
+                },
+                "pending_recoveries": self._executor.pending_count()
             }
     
     def reset_stats(self):
@@ -955,4 +1079,14 @@ class ErrorHandler:
             self.error_stats.clear()
             self.recovery_stats.clear()
             self.consecutive_errors = 0
-            self.recovery_attempts = 0
\ No newline at end of file
+            self.recovery_attempts = 0
+    
+    def reset_circuit_breakers(self):
+        """关闭所有熔断器"""
+        with self.error_lock:
+            for breaker in self.circuit_breakers.values():
+                breaker.reset()
+    
+    def shutdown(self, timeout: float = 5.0):
+        """停止后台恢复线程，正在等待的恢复立即结束"""
+        self._executor.shutdown(timeout)
@@ -6,6 +6,7 @@ import time
 from .game_analyzer import GameAnalyzer
 from .logger import GameLogger
 from ..common.error_types import ErrorCode, StateError, ErrorContext
+from ..common.action_system import get_condition_signal
 import json
 import os
 
@@ -123,6 +124,9 @@ class GameState:
             # 保存状态
             self._save_state()
             
+            # 唤醒等待状态条件的动作
+            get_condition_signal().notify()
+            
             return True
             
         except Exception as e:
@@ -275,6 +279,7 @@ class StateManager:
         if self.current_state:
             self.state_history.append(self.current_state.name)
         self.current_state = new_state
+        get_condition_signal().notify()
         
     def predict_next_state(self, action: str) -> Optional[GameState]:
         """预测执行某个操作后的下一个状态"""
@@ -0,0 +1,161 @@
+"""
+感知哈希与汉明距离索引
+
+提供以整数存储的DCT感知哈希，以及按汉明距离检索近似重复图像的BK树。
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import cv2
+import numpy as np
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """
+    计算DCT感知哈希(pHash)
+
+    图像缩放到(hash_size * highfreq_factor)见方的灰度图后做DCT，
+    取左上角hash_size x hash_size的低频系数与其中位数比较得到各位。
+    相比均值哈希，对缩放、轻微模糊和亮度变化更稳定。
+
+    Args:
+        image: BGR或灰度图像
+        hash_size: 哈希边长，位数为hash_size的平方
+        highfreq_factor: DCT输入相对哈希边长的放大倍数
+
+    Returns:
+        int: 哈希值(最高位对应第一个系数)
+    """
+    if image is None or image.size == 0:
+        raise ValueError("图像为空，无法计算哈希")
+
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    size = hash_size * highfreq_factor
+    resized = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+    dct = cv2.dct(np.float32(resized))
+    low = dct[:hash_size, :hash_size].flatten()
+
+    # 直流分量只反映整体亮度，不参与中位数计算
+    median = np.median(low[1:])
+    bits = low > median
+    return int.from_bytes(np.packbits(bits).tobytes(), "big") >> (-len(bits) % 8)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """计算两个整数哈希的汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+def similarity_to_distance(similarity: float, bits: int = 64) -> int:
+    """
+    把相似度(0~1)换算为允许的最大汉明距离
+
+    Args:
+        similarity: 相似度阈值，1.0表示完全相同
+        bits: 哈希位数
+
+    Returns:
+        int: 最大汉明距离
+    """
+    similarity = min(1.0, max(0.0, similarity))
+    return int(round((1.0 - similarity) * bits))
+
+
+class BKTree:
+    """
+    汉明距离BK树
+
+    每个节点的子节点按与该节点的距离分组，查询时利用三角不等式
+    只访问距离在[d - r, d + r]内的子树，相同哈希的多个键共用一个节点。
+    """
+
+    def __init__(self, items: Optional[Iterable[Tuple[int, Any]]] = None):
+        # 节点: [哈希, 键列表, {距离: 子节点}]
+        self._root: Optional[list] = None
+        self._size = 0
+        if items:
+            for hash_value, key in items:
+                self.add(hash_value, key)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, hash_value: int, key: Any) -> None:
+        """添加哈希及其关联的键"""
+        self._size += 1
+        if self._root is None:
+            self._root = [hash_value, [key], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [key], {}]
+                return
+            node = child
+
+    def remove(self, hash_value: int, key: Any) -> bool:
+        """
+        移除键(节点保留用于路由)
+
+        Returns:
+            bool: 是否找到并移除
+        """
+        node = self._root
+        while node is not None:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                if key in node[1]:
+                    node[1].remove(key)
+                    self._size -= 1
+                    return True
+                return False
+            node = node[2].get(distance)
+        return False
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """
+        查找汉明距离不超过max_distance的所有键
+
+        Returns:
+            List[Tuple[int, Any]]: 按距离升序排列的(距离, 键)
+        """
+        results = []
+        if self._root is None:
+            return results
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, key) for key in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def nearest(self, hash_value: int, max_distance: int) -> Optional[Tuple[int, Any]]:
+        """查找距离最近的键，超出max_distance时返回None"""
+        results = self.search(hash_value, max_distance)
+        return results[0] if results else None
+
+    def get_statistics(self) -> Dict[str, int]:
+        """获取树的规模统计"""
+        nodes = 0
+        depth = 0
+        stack = [(self._root, 1)] if self._root is not None else []
+        while stack:
+            node, level = stack.pop()
+            nodes += 1
+            depth = max(depth, level)
+            stack.extend((child, level + 1) for child in node[2].values())
+        return {'keys': self._size, 'nodes': nodes, 'depth': depth}
@@ -14,6 +14,7 @@ from .logger import GameLogger
 from ..common.error_types import ErrorCode, ImageProcessingError, ErrorContext
 from dataclasses import dataclass
 from .error_handler import ErrorHandler
+from ..performance.tracing import traced
 
 @dataclass
 class TemplateMatchResult:
@@ -56,7 +57,7 @@ class ImageProcessor(QObject):
             self.is_initialized = True
             return True
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_PROCESSOR_INIT_FAILED,
                     "图像处理器初始化失败",
@@ -89,7 +90,7 @@ class ImageProcessor(QObject):
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "加载模板失败",
@@ -121,7 +122,7 @@ class ImageProcessor(QObject):
             return self.load_template(name, image, config)
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "从文件加载模板失败",
@@ -135,6 +136,7 @@ class ImageProcessor(QObject):
             )
             return False
     
+    @traced("image.match_template", category="image")
     def match_template(self, image: np.ndarray, template_name: str, threshold: float = 0.8) -> Optional[TemplateMatchResult]:
         """匹配模板
         
@@ -180,7 +182,7 @@ class ImageProcessor(QObject):
             return None
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.TEMPLATE_MATCH_ERROR,
                     "模板匹配失败",
@@ -244,6 +246,7 @@ class ImageProcessor(QObject):
                 results[template_name] = [matches.location]
         return results
     
+    @traced("image.color_detect", category="image")
     def color_detect(self, image: np.ndarray, lower_color: Tuple[int, int, int], 
                     upper_color: Tuple[int, int, int]) -> List[Tuple[int, int, int, int]]:
         """颜色检测
@@ -279,7 +282,7 @@ class ImageProcessor(QObject):
                 
             return boxes
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.COLOR_DETECTION_FAILED,
                     "颜色检测失败",
@@ -295,6 +298,7 @@ class ImageProcessor(QObject):
         """获取当前时间戳"""
         return time.time()
         
+    @traced("image.analyze_frame", category="image")
     def analyze_frame(self, frame: np.ndarray) -> Dict[str, Any]:
         """分析游戏画面，提取基本特征
         
@@ -330,7 +334,7 @@ class ImageProcessor(QObject):
             return state
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ANALYSIS_ERROR,
                     "分析游戏画面失败",
@@ -393,7 +397,7 @@ class ImageProcessor(QObject):
             return colors
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.DOMINANT_COLOR_DETECTION_FAILED,
                     "获取主要颜色失败",
@@ -421,7 +425,7 @@ class ImageProcessor(QObject):
             return float(np.mean(gray))
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.BRIGHTNESS_CALCULATION_FAILED,
                     "计算亮度失败",
@@ -450,7 +454,7 @@ class ImageProcessor(QObject):
             return edges
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.EDGE_DETECTION_FAILED,
                     "检测边缘失败",
@@ -541,12 +545,13 @@ class ImageProcessor(QObject):
             self.logger.error(f"安全图像操作失败: {e}")
             return None
     
+    @traced("image.preprocess", category="image")
     def process_image(self, image: np.ndarray) -> Optional[np.ndarray]:
         """处理图像"""
         try:
             # 使用验证方法检查输入
             if not self.validate_image_data(image):
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ImageProcessingError(
                         ErrorCode.IMAGE_PROCESSING_FAILED,
                         "无效的图像数据",
@@ -567,7 +572,7 @@ class ImageProcessor(QObject):
             result = self.safe_image_operation(_process_operation, image)
             
             if result is None:
-                self.error_handler.handle_error(
+                self.error_handler.handle_error_async(
                     ImageProcessingError(
                         ErrorCode.IMAGE_PROCESSING_FAILED,
                         "图像处理操作失败",
@@ -581,7 +586,7 @@ class ImageProcessor(QObject):
             return result
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_PROCESSING_FAILED,
                     "图像处理失败",
@@ -626,7 +631,7 @@ class ImageProcessor(QObject):
             return filtered_contours
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "查找轮廓失败",
@@ -667,7 +672,7 @@ class ImageProcessor(QObject):
             return [(x, y, r) for x, y, r in circles[0, :]]
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "查找圆形失败",
@@ -703,7 +708,7 @@ class ImageProcessor(QObject):
             return [(x1, y1, x2, y2) for x1, y1, x2, y2 in lines[:, 0]]
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "查找直线失败",
@@ -744,7 +749,7 @@ class ImageProcessor(QObject):
             return [(x, y) for x, y in corners.reshape(-1, 2)]
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "查找角点失败",
@@ -780,7 +785,7 @@ class ImageProcessor(QObject):
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "保存调试图像失败",
@@ -817,7 +822,7 @@ class ImageProcessor(QObject):
             return thresh
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ImageProcessingError(
                     ErrorCode.IMAGE_ERROR,
                     "高级图像预处理失败",
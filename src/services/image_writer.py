@@ -0,0 +1,351 @@
+"""
+异步图像写入服务
+
+把图像编码和磁盘写入移到后台线程，调用方只做一次入队。
+队列有界，满时按配置的策略丢弃或阻塞；关闭时保证写完已入队的图像。
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Union
+
+import numpy as np
+
+from ..common.lazy_import import lazy_import
+
+# 日志服务会创建写入器，cv2推迟到第一次编码时导入
+cv2 = lazy_import("cv2")
+
+
+class DropPolicy:
+    """队列满时的处理策略"""
+
+    DROP_NEWEST = "drop_newest"  # 丢弃新提交的图像
+    DROP_OLDEST = "drop_oldest"  # 丢弃队列中最旧的图像
+    BLOCK = "block"  # 阻塞调用方直到有空位(可设置超时)
+
+    ALL = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+# 写入完成回调: (路径, 是否成功, 错误信息)
+WriteCallback = Callable[[str, bool, Optional[str]], None]
+
+
+@dataclass
+class WriteRequest:
+    """单个写入请求"""
+
+    path: str
+    image: Union[np.ndarray, bytes]
+    callback: Optional[WriteCallback] = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class ImageWriter:
+    """后台图像写入器
+
+    ndarray按文件扩展名编码(PNG压缩级别、JPEG质量可配置)，
+    bytes视为已编码的数据直接写入。
+    """
+
+    LATENCY_WINDOW = 500
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        drop_policy: str = DropPolicy.DROP_OLDEST,
+        png_compression: int = 3,
+        jpeg_quality: int = 95,
+        block_timeout: Optional[float] = None,
+        name: str = "ImageWriter",
+    ):
+        """
+        初始化写入器
+
+        Args:
+            max_queue: 队列最大长度
+            drop_policy: 队列满时的策略，见DropPolicy
+            png_compression: PNG压缩级别(0-9)，越低编码越快
+            jpeg_quality: JPEG质量(0-100)
+            block_timeout: BLOCK策略下的最长等待时间(秒)，None表示一直等待
+            name: 写入线程名称
+        """
+        if drop_policy not in DropPolicy.ALL:
+            raise ValueError(f"未知的丢弃策略: {drop_policy}")
+
+        self.max_queue = max(1, max_queue)
+        self.drop_policy = drop_policy
+        self.png_compression = min(9, max(0, png_compression))
+        self.jpeg_quality = min(100, max(0, jpeg_quality))
+        self.block_timeout = block_timeout
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+        self._queue: Deque[WriteRequest] = deque()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._accepting = True
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._max_depth = 0
+        self._write_latencies: Deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+        self._queue_waits: Deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], prefix: str = "", **defaults) -> "ImageWriter":
+        """
+        从配置字典创建写入器
+
+        Args:
+            config: 配置字典
+            prefix: 键前缀，如'screenshot_'对应'screenshot_queue_size'等
+            defaults: 配置缺失时使用的构造参数
+        """
+        options = {
+            "max_queue": config.get(f"{prefix}queue_size", defaults.get("max_queue", 64)),
+            "drop_policy": config.get(
+                f"{prefix}drop_policy", defaults.get("drop_policy", DropPolicy.DROP_OLDEST)
+            ),
+            "png_compression": config.get(
+                f"{prefix}png_compression", defaults.get("png_compression", 3)
+            ),
+            "jpeg_quality": config.get(f"{prefix}jpeg_quality", defaults.get("jpeg_quality", 95)),
+        }
+        if "name" in defaults:
+            options["name"] = defaults["name"]
+        return cls(**options)
+
+    def start(self) -> None:
+        """启动写入线程"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._accepting = True
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        _register_for_exit(self)
+
+    def submit(
+        self,
+        path: str,
+        image: Union[np.ndarray, bytes],
+        callback: Optional[WriteCallback] = None,
+    ) -> bool:
+        """
+        提交写入请求
+
+        调用方在提交后不应再修改image(需要时先复制)。
+
+        Args:
+            path: 目标文件路径
+            image: 图像数组或已编码的数据
+            callback: 写入完成(或被丢弃)时在写入线程中调用
+
+        Returns:
+            bool: 是否已入队；DROP_NEWEST被丢弃、BLOCK超时或已关闭时返回False
+        """
+        if self._thread is None and self._accepting:
+            self.start()
+
+        request = WriteRequest(path, image, callback)
+        dropped: Optional[WriteRequest] = None
+
+        with self._condition:
+            if not self._accepting:
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                if self.drop_policy == DropPolicy.DROP_NEWEST:
+                    self._dropped += 1
+                    dropped = request
+                elif self.drop_policy == DropPolicy.DROP_OLDEST:
+                    self._dropped += 1
+                    dropped = self._queue.popleft()
+                else:
+                    has_space = self._condition.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._accepting,
+                        timeout=self.block_timeout,
+                    )
+                    if not has_space or not self._accepting:
+                        self._dropped += 1
+                        dropped = request
+
+            if dropped is not request:
+                self._queue.append(request)
+                self._submitted += 1
+                self._max_depth = max(self._max_depth, len(self._queue))
+                self._condition.notify_all()
+
+        if dropped is not None:
+            self._notify(dropped, False, "dropped")
+        return dropped is not request
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已入队的图像全部写完
+
+        Returns:
+            bool: 超时前全部写完返回True
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queue and self._in_flight == 0, timeout=timeout
+            )
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        停止接收新请求，写完队列中的图像后退出写入线程
+
+        Returns:
+            bool: 是否在超时前全部写完
+        """
+        with self._condition:
+            self._accepting = False
+            self._condition.notify_all()
+
+        completed = self.flush(timeout)
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        return completed
+
+    def _run(self) -> None:
+        """写入线程主循环"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._stopping)
+                if not self._queue:
+                    return
+                request = self._queue.popleft()
+                self._in_flight += 1
+                # 唤醒BLOCK策略下等待空位的提交方
+                self._condition.notify_all()
+
+            started = time.perf_counter()
+            error = None
+            try:
+                self._write(request)
+            except Exception as e:
+                error = str(e)
+            finished = time.perf_counter()
+
+            with self._condition:
+                self._in_flight -= 1
+                self._queue_waits.append(started - request.enqueued_at)
+                self._write_latencies.append(finished - started)
+                if error is None:
+                    self._written += 1
+                else:
+                    self._failed += 1
+                self._condition.notify_all()
+
+            if error is not None:
+                self.logger.error(f"写入图像失败 {request.path}: {error}")
+            self._notify(request, error is None, error)
+
+    def _write(self, request: WriteRequest) -> None:
+        """编码并写入单个图像"""
+        directory = os.path.dirname(request.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = request.image
+        if isinstance(data, np.ndarray):
+            ext = os.path.splitext(request.path)[1].lower() or ".png"
+            success, encoded = cv2.imencode(ext, data, self._encode_params(ext))
+            if not success:
+                raise IOError(f"图像编码失败: {ext}")
+            data = encoded.tobytes()
+
+        with open(request.path, "wb") as f:
+            f.write(data)
+
+    def _encode_params(self, ext: str) -> list:
+        """根据格式生成编码参数"""
+        if ext == ".png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        if ext in (".jpg", ".jpeg"):
+            return [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        return []
+
+    def _notify(self, request: WriteRequest, success: bool, error: Optional[str]) -> None:
+        """调用写入完成回调"""
+        if request.callback is None:
+            return
+        try:
+            request.callback(request.path, success, error)
+        except Exception as e:
+            self.logger.error(f"图像写入回调失败: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取写入统计
+
+        Returns:
+            Dict: 队列深度、提交/写入/丢弃/失败计数和写入延迟(毫秒)
+        """
+        with self._condition:
+            latencies = sorted(self._write_latencies)
+            waits = list(self._queue_waits)
+            metrics = {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_depth,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "avg_write_ms": 0.0,
+                "p95_write_ms": 0.0,
+                "max_write_ms": 0.0,
+                "avg_queue_wait_ms": 0.0,
+            }
+
+        if latencies:
+            count = len(latencies)
+            metrics["avg_write_ms"] = sum(latencies) / count * 1000
+            metrics["p95_write_ms"] = latencies[min(count - 1, int(count * 0.95))] * 1000
+            metrics["max_write_ms"] = latencies[-1] * 1000
+        if waits:
+            metrics["avg_queue_wait_ms"] = sum(waits) / len(waits) * 1000
+        return metrics
+
+
+_live_writers: "weakref.WeakSet[ImageWriter]" = weakref.WeakSet()
+_exit_hook_lock = threading.Lock()
+_exit_hook_registered = False
+
+
+def _register_for_exit(writer: ImageWriter) -> None:
+    """登记写入器，进程退出时写完所有队列"""
+    global _exit_hook_registered
+    with _exit_hook_lock:
+        _live_writers.add(writer)
+        if not _exit_hook_registered:
+            atexit.register(_flush_all_writers)
+            _exit_hook_registered = True
+
+
+def _flush_all_writers() -> None:
+    """进程退出时关闭所有写入器"""
+    for writer in list(_live_writers):
+        try:
+            writer.shutdown(timeout=10.0)
+        except Exception:
+            pass
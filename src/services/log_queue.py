@@ -0,0 +1,296 @@
+"""
+异步日志处理器
+
+日志记录在调用线程中只做一次入队，格式化和文件/控制台输出由后台线程完成，
+截图线程、自动化线程记录日志时不会被磁盘或控制台IO阻塞。
+队列有界，满时按DropPolicy处理；被丢弃的日志数量会在队列恢复后汇总输出一条警告。
+"""
+import atexit
+import copy
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .image_writer import DropPolicy
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    后台线程输出的日志处理器
+
+    目标处理器(文件、控制台等)只在写入线程中调用，
+    各自的级别和格式化器保持不变。
+    """
+
+    BATCH_SIZE = 256
+    LATENCY_WINDOW = 1000
+
+    def __init__(
+        self,
+        targets: Optional[List[logging.Handler]] = None,
+        max_queue: int = 10000,
+        drop_policy: str = DropPolicy.DROP_OLDEST,
+        block_timeout: Optional[float] = None,
+        name: str = "LogWriter",
+    ):
+        """
+        初始化处理器
+
+        Args:
+            targets: 实际输出日志的处理器
+            max_queue: 队列最大长度
+            drop_policy: 队列满时的策略，见DropPolicy
+            block_timeout: BLOCK策略下的最长等待时间(秒)，None表示一直等待
+            name: 写入线程名称
+        """
+        super().__init__(logging.NOTSET)
+        if drop_policy not in DropPolicy.ALL:
+            raise ValueError(f"未知的丢弃策略: {drop_policy}")
+
+        self.targets: List[logging.Handler] = list(targets or [])
+        self.max_queue = max(1, max_queue)
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.thread_name = name
+
+        self._queue: Deque[logging.LogRecord] = deque()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._accepting = True
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._dropped_by_level: Dict[str, int] = {}
+        self._unreported_drops = 0
+        self._max_depth = 0
+        self._enqueue_latencies: Deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+
+    def add_target(self, handler: logging.Handler) -> None:
+        """添加输出处理器"""
+        with self._condition:
+            self.targets.append(handler)
+
+    def start(self) -> None:
+        """启动写入线程"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._accepting = True
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+        _register_for_exit(self)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """
+        过滤后入队
+
+        不获取处理器锁，多个线程同时记录日志时只在入队时短暂竞争队列锁。
+        """
+        passed = self.filter(record)
+        if passed:
+            self.emit(record)
+        return bool(passed)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """入队一条日志(在记录日志的线程中调用)"""
+        started = time.perf_counter()
+        if self._thread is None and self._accepting:
+            self.start()
+
+        try:
+            record = self._prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._condition:
+            if not self._accepting:
+                return
+
+            if len(self._queue) >= self.max_queue:
+                if self.drop_policy == DropPolicy.DROP_NEWEST:
+                    self._count_drop(record)
+                    return
+                if self.drop_policy == DropPolicy.DROP_OLDEST:
+                    self._count_drop(self._queue.popleft())
+                else:
+                    has_space = self._condition.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._accepting,
+                        timeout=self.block_timeout,
+                    )
+                    if not has_space or not self._accepting:
+                        self._count_drop(record)
+                        return
+
+            self._queue.append(record)
+            self._enqueued += 1
+            self._max_depth = max(self._max_depth, len(self._queue))
+            self._enqueue_latencies.append(time.perf_counter() - started)
+            self._condition.notify_all()
+
+    def _prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        在调用线程中固定消息内容
+
+        参数和异常信息可能引用调用方之后会修改的对象，
+        入队前先合并为字符串，写入线程只处理不可变的数据。
+        同一条记录还会交给logger上的其它处理器，这里只修改副本。
+        """
+        prepared = copy.copy(record)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            if not prepared.exc_text:
+                prepared.exc_text = _exception_formatter.formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+    def _count_drop(self, record: logging.LogRecord) -> None:
+        """记录被丢弃的日志(需持有锁)"""
+        self._dropped += 1
+        self._unreported_drops += 1
+        level = record.levelname
+        self._dropped_by_level[level] = self._dropped_by_level.get(level, 0) + 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已入队的日志全部输出
+
+        Returns:
+            bool: 超时前全部输出返回True
+        """
+        with self._condition:
+            if self._thread is None:
+                return not self._queue
+            completed = self._condition.wait_for(
+                lambda: not self._queue and self._in_flight == 0, timeout=timeout
+            )
+        for target in list(self.targets):
+            try:
+                target.flush()
+            except Exception:
+                pass
+        return completed
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """停止接收新日志，输出剩余日志后关闭目标处理器"""
+        with self._condition:
+            self._accepting = False
+            self._condition.notify_all()
+
+        self.flush(timeout)
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+        for target in list(self.targets):
+            try:
+                target.close()
+            except Exception:
+                pass
+        super().close()
+
+    def _run(self) -> None:
+        """写入线程主循环：每次取出一批日志依次输出"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._stopping)
+                if not self._queue:
+                    return
+                count = min(len(self._queue), self.BATCH_SIZE)
+                batch = [self._queue.popleft() for _ in range(count)]
+                dropped = self._unreported_drops
+                self._unreported_drops = 0
+                self._in_flight += count
+                # 唤醒BLOCK策略下等待空位的调用方
+                self._condition.notify_all()
+
+            if dropped:
+                batch.append(self._drop_summary(batch[-1], dropped))
+            for record in batch:
+                self._dispatch(record)
+
+            with self._condition:
+                self._in_flight -= count
+                self._written += count
+                self._condition.notify_all()
+
+    def _drop_summary(self, last: logging.LogRecord, dropped: int) -> logging.LogRecord:
+        """生成丢弃汇总日志"""
+        return logging.LogRecord(
+            last.name, logging.WARNING, __file__, 0,
+            f"日志队列已满，丢弃了 {dropped} 条日志", None, None,
+        )
+
+    def _dispatch(self, record: logging.LogRecord) -> None:
+        """把日志交给各个目标处理器"""
+        for target in self.targets:
+            if record.levelno >= target.level:
+                try:
+                    target.handle(record)
+                except Exception:
+                    target.handleError(record)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取队列统计
+
+        Returns:
+            Dict: 队列深度、入队/输出/丢弃计数和入队耗时(微秒)
+        """
+        with self._condition:
+            latencies = sorted(self._enqueue_latencies)
+            metrics = {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_depth,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "dropped_by_level": dict(self._dropped_by_level),
+                "avg_enqueue_us": 0.0,
+                "p99_enqueue_us": 0.0,
+            }
+
+        if latencies:
+            count = len(latencies)
+            metrics["avg_enqueue_us"] = sum(latencies) / count * 1e6
+            metrics["p99_enqueue_us"] = latencies[min(count - 1, int(count * 0.99))] * 1e6
+        return metrics
+
+
+_exception_formatter = logging.Formatter()
+
+_live_handlers: "weakref.WeakSet[AsyncLogHandler]" = weakref.WeakSet()
+_exit_hook_lock = threading.Lock()
+_exit_hook_registered = False
+
+
+def _register_for_exit(handler: AsyncLogHandler) -> None:
+    """登记处理器，进程退出时输出所有剩余日志"""
+    global _exit_hook_registered
+    with _exit_hook_lock:
+        _live_handlers.add(handler)
+        if not _exit_hook_registered:
+            atexit.register(_flush_all_handlers)
+            _exit_hook_registered = True
+
+
+def _flush_all_handlers() -> None:
+    """进程退出时输出所有处理器中的剩余日志"""
+    for handler in list(_live_handlers):
+        try:
+            handler.flush(timeout=5.0)
+        except Exception:
+            pass
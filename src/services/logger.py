@@ -7,22 +7,36 @@ from typing import Optional, Dict, Any
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 from .config import Config
 from .exceptions import GameAutomationError
+from .image_writer import ImageWriter, DropPolicy
+from .log_queue import AsyncLogHandler
 from ..common.singleton import Singleton
 
 class ErrorDeduplicator:
-    """错误去重器"""
+    """错误去重器
+
+    窗口内重复出现的错误只记录第一次、第二次和之后每report_every次中的一次，
+    其间被抑制的次数累计下来，随下一次记录或过期时一并报告。
+    """
     
-    def __init__(self, dedupe_window: float = 60.0, max_count: int = 100):
+    def __init__(self, dedupe_window: float = 60.0, max_count: int = 100,
+                 report_every: int = 10, min_report_interval: float = 0.0):
         """
         初始化去重器
         
         Args:
             dedupe_window: 去重时间窗口（秒）
             max_count: 最大记录数量
+            report_every: 重复多少次记录一次
+            min_report_interval: 同一错误两次记录之间的最短间隔（秒），
+                高频重复时按时间而不是次数聚合
         """
         self.dedupe_window = dedupe_window
         self.max_count = max_count
+        self.report_every = max(1, report_every)
+        self.min_report_interval = max(0.0, min_report_interval)
         self._error_cache: Dict[str, Dict[str, Any]] = {}
+        # 过期或被淘汰时仍有未报告抑制次数的错误
+        self._expired_suppressed: Dict[str, int] = {}
         self._lock = threading.Lock()
     
     def should_log_error(self, error_key: str, timestamp: float) -> bool:
@@ -52,24 +66,78 @@ class ErrorDeduplicator:
                     error_info['last_time'] = timestamp
                     
                     # 只有第一次和特定间隔才记录
-                    if count == 1 or count % 10 == 0:  # 每10次重复记录一次
+                    if count == 1 or (
+                        count % self.report_every == 0
+                        and timestamp - error_info['last_reported'] >= self.min_report_interval
+                    ):
+                        error_info['last_reported'] = timestamp
                         return True
+                    error_info['suppressed'] += 1
                     return False
                 else:
                     # 超出窗口，重置计数
+                    self._stash_suppressed(error_key, error_info)
                     error_info['count'] = 1
                     error_info['last_time'] = timestamp
                     error_info['first_time'] = timestamp
+                    error_info['last_reported'] = timestamp
                     return True
             else:
                 # 新错误
                 self._error_cache[error_key] = {
                     'count': 1,
                     'first_time': timestamp,
-                    'last_time': timestamp
+                    'last_time': timestamp,
+                    'last_reported': timestamp,
+                    'suppressed': 0
                 }
                 return True
     
+    def take_suppressed(self, error_key: str) -> int:
+        """
+        取出并清零某个错误自上次记录以来被抑制的次数
+        
+        Args:
+            error_key: 错误标识键
+            
+        Returns:
+            int: 被抑制的次数
+        """
+        with self._lock:
+            suppressed = self._expired_suppressed.pop(error_key, 0)
+            error_info = self._error_cache.get(error_key)
+            if error_info is not None:
+                suppressed += error_info['suppressed']
+                error_info['suppressed'] = 0
+            return suppressed
+    
+    def drain_suppressed(self, timestamp: float, force: bool = False) -> Dict[str, int]:
+        """
+        取出已经不再重复的错误的未报告抑制次数
+        
+        Args:
+            timestamp: 当前时间戳
+            force: 为True时取出所有错误的抑制次数(如关闭日志时)
+            
+        Returns:
+            Dict[str, int]: 错误标识键 -> 被抑制的次数
+        """
+        with self._lock:
+            self._cleanup_expired(timestamp)
+            pending = self._expired_suppressed
+            self._expired_suppressed = {}
+            for key, info in self._error_cache.items():
+                if info['suppressed'] and (force or timestamp - info['last_time'] >= self.dedupe_window):
+                    pending[key] = pending.get(key, 0) + info['suppressed']
+                    info['suppressed'] = 0
+            return pending
+    
+    def _stash_suppressed(self, key: str, info: Dict[str, Any]):
+        """保存将被丢弃的抑制次数(需持有锁)"""
+        if info['suppressed']:
+            self._expired_suppressed[key] = self._expired_suppressed.get(key, 0) + info['suppressed']
+            info['suppressed'] = 0
+    
     def _cleanup_expired(self, current_time: float):
         """清理过期的错误记录"""
         expired_keys = []
@@ -78,19 +146,28 @@ class ErrorDeduplicator:
                 expired_keys.append(key)
         
         for key in expired_keys:
-            del self._error_cache[key]
+            self._stash_suppressed(key, self._error_cache.pop(key))
         
         # 限制缓存大小
         if len(self._error_cache) > self.max_count:
             # 移除最旧的记录
             oldest_key = min(self._error_cache.keys(), 
                            key=lambda k: self._error_cache[k]['first_time'])
-            del self._error_cache[oldest_key]
+            self._stash_suppressed(oldest_key, self._error_cache.pop(oldest_key))
     
     def get_error_summary(self) -> Dict[str, int]:
         """获取错误统计摘要"""
         with self._lock:
             return {key: info['count'] for key, info in self._error_cache.items()}
+    
+    def get_suppressed_summary(self) -> Dict[str, int]:
+        """获取尚未报告的抑制次数"""
+        with self._lock:
+            summary = dict(self._expired_suppressed)
+            for key, info in self._error_cache.items():
+                if info['suppressed']:
+                    summary[key] = summary.get(key, 0) + info['suppressed']
+            return summary
 
 class GameLogger(Singleton):
     """游戏自动化日志类 - 单例模式"""
@@ -130,6 +207,9 @@ class GameLogger(Singleton):
         log_format = log_config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
         
+        # 输出处理器(文件、控制台)
+        output_handlers = []
+        
         # 创建文件处理器
         if log_config.get('enable_file', True):
             max_size_str = log_config.get('max_size', '10MB')
@@ -151,14 +231,29 @@ class GameLogger(Singleton):
             )
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            output_handlers.append(file_handler)
         
         # 创建控制台处理器
         if log_config.get('enable_console', True):
             console_handler = logging.StreamHandler()
             console_handler.setLevel(logging.INFO)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            output_handlers.append(console_handler)
+        
+        # 默认经队列由后台线程输出，记录日志的线程不等待文件和控制台IO
+        self._output_handlers = output_handlers
+        self._queue_handler: Optional[AsyncLogHandler] = None
+        if log_config.get('async', True):
+            self._queue_handler = AsyncLogHandler(
+                output_handlers,
+                max_queue=log_config.get('queue_size', 10000),
+                drop_policy=log_config.get('overflow_policy', DropPolicy.DROP_OLDEST),
+                name=f'LogWriter-{name}'
+            )
+            self.logger.addHandler(self._queue_handler)
+        else:
+            for handler in output_handlers:
+                self.logger.addHandler(handler)
         
         # 递归保护
         self._recursion_lock = threading.RLock()
@@ -169,8 +264,10 @@ class GameLogger(Singleton):
         # 错误去重器
         self._error_deduplicator = ErrorDeduplicator(
             dedupe_window=60.0,  # 1分钟内的重复错误
-            max_count=1000
+            max_count=1000,
+            min_report_interval=log_config.get('dedupe_report_interval', 1.0)
         )
+        self._last_suppressed_check = 0.0
         
         # 性能统计
         self._stats = {
@@ -183,6 +280,12 @@ class GameLogger(Singleton):
         }
         self._stats_lock = threading.Lock()
         
+        # 截图在后台线程写入，队列满时丢弃最旧的截图
+        self._screenshot_writer = ImageWriter.from_config(
+            log_config, prefix='screenshot_',
+            drop_policy=DropPolicy.DROP_OLDEST, name='ScreenshotWriter'
+        )
+        
         self.logger.info("日志服务初始化完成")
         self._initialized = True
     
@@ -197,6 +300,8 @@ class GameLogger(Singleton):
             
             # 如果同一消息在短时间内重复出现，跳过
             if current_time - last_time < 0.1:  # 100毫秒内的相同消息被视为重复
+                with self._stats_lock:
+                    self._stats['deduplicated'] += 1
                 return
                 
             # 更新消息最后出现时间
@@ -264,35 +369,71 @@ class GameLogger(Singleton):
             # 获取重复次数信息
             error_summary = self._error_deduplicator.get_error_summary()
             repeat_count = error_summary.get(error_key, 1)
+            suppressed = self._error_deduplicator.take_suppressed(error_key)
             
-            # 如果有重复，在消息中包含重复次数
-            if repeat_count > 1:
+            # 如果有重复，在消息中包含重复次数和上次记录以来被抑制的次数
+            if suppressed:
+                enhanced_message = f"{message} (重复 {repeat_count} 次，已抑制 {suppressed} 条)"
+            elif repeat_count > 1:
                 enhanced_message = f"{message} (重复 {repeat_count} 次)"
             else:
                 enhanced_message = message
             
-            # 根据级别记录日志
-            if level >= logging.CRITICAL:
-                self.critical(enhanced_message)
-            elif level >= logging.ERROR:
-                self.error(enhanced_message)
-            elif level >= logging.WARNING:
-                self.warning(enhanced_message)
-            elif level >= logging.INFO:
-                self.info(enhanced_message)
-            else:
-                self.debug(enhanced_message)
+            self._log_at_level(level, enhanced_message)
         else:
             # 更新被去重的统计
             with self._stats_lock:
                 self._stats['deduplicated'] += 1
+        
+        # 已停止重复的错误补报被抑制的次数(每秒最多检查一次)
+        if current_time - self._last_suppressed_check >= 1.0:
+            self._last_suppressed_check = current_time
+            self.report_suppressed(current_time)
     
-    def log_screenshot(self, image: Optional[bytes], description: str = ''):
+    def report_suppressed(self, timestamp: Optional[float] = None, force: bool = False) -> int:
+        """
+        报告已停止重复的错误被抑制的次数
+        
+        Args:
+            timestamp: 当前时间戳，默认为现在
+            force: 为True时报告所有未报告的抑制次数
+            
+        Returns:
+            int: 报告的错误条数
+        """
+        pending = self._error_deduplicator.drain_suppressed(
+            time.time() if timestamp is None else timestamp, force
+        )
+        for error_key, suppressed in pending.items():
+            level_text, _, message = error_key.partition(':')
+            try:
+                level = int(level_text)
+            except ValueError:
+                level = logging.WARNING
+            self._log_at_level(level, f"{message} (已抑制 {suppressed} 条重复)")
+        return len(pending)
+    
+    def _log_at_level(self, level: int, message: str):
+        """根据级别记录日志"""
+        if level >= logging.CRITICAL:
+            self.critical(message)
+        elif level >= logging.ERROR:
+            self.error(message)
+        elif level >= logging.WARNING:
+            self.warning(message)
+        elif level >= logging.INFO:
+            self.info(message)
+        else:
+            self.debug(message)
+    
+    def log_screenshot(self, image: Optional[Any], description: str = ''):
         """
         记录截图
         
+        截图由后台线程写入，本方法只负责入队，不等待磁盘写入。
+        
         Args:
-            image: 截图数据
+            image: 截图数据(已编码的字节或图像数组)
             description: 截图描述
         """
         if image is None:
@@ -306,17 +447,50 @@ class GameLogger(Singleton):
         screenshot_dir = os.path.join(log_dir, 'screenshots')
         os.makedirs(screenshot_dir, exist_ok=True)
         
-        # 保存截图
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # 保存截图(同一秒内的多张截图用微秒区分)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
         filename = f'screenshot_{timestamp}.png'
         filepath = os.path.join(screenshot_dir, filename)
         
-        try:
-            with open(filepath, 'wb') as f:
-                f.write(image)
-            self.info(f"截图已保存: {filepath} - {description}")
-        except Exception as e:
-            self.error(f"保存截图失败: {e}")
+        def on_written(path: str, success: bool, error: Optional[str]):
+            if success:
+                self.info(f"截图已保存: {path} - {description}")
+            else:
+                self.error(f"保存截图失败: {error}")
+        
+        self._screenshot_writer.submit(filepath, image, on_written)
+    
+    def flush_screenshots(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的截图全部写完
+        
+        Returns:
+            bool: 超时前全部写完返回True
+        """
+        return self._screenshot_writer.flush(timeout)
+    
+    def get_screenshot_metrics(self) -> Dict[str, Any]:
+        """获取截图写入统计(队列深度、写入延迟等)"""
+        return self._screenshot_writer.get_metrics()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已记录的日志全部输出
+        
+        Returns:
+            bool: 超时前全部输出返回True
+        """
+        if self._queue_handler is not None:
+            return self._queue_handler.flush(timeout)
+        for handler in self._output_handlers:
+            handler.flush()
+        return True
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """获取日志队列统计(队列深度、丢弃数量、入队耗时等)"""
+        if self._queue_handler is None:
+            return {}
+        return self._queue_handler.get_metrics()
     
     def get_stats(self) -> Dict[str, int]:
         """
@@ -330,6 +504,9 @@ class GameLogger(Singleton):
     
     def cleanup(self):
         """清理日志资源"""
+        # 先写完待写入的截图
+        self._screenshot_writer.shutdown()
+        
         # 清理过期的日志文件
         try:
             log_config = self.config.get_logging_config()
@@ -352,10 +529,15 @@ class GameLogger(Singleton):
         except Exception as e:
             self.error(f"清理日志文件失败: {e}")
         
-        # 关闭所有处理器
-        for handler in self.logger.handlers:
+        # 补报被抑制的重复错误
+        self.report_suppressed(force=True)
+        
+        # 关闭所有处理器(队列处理器先输出剩余日志)
+        for handler in list(self.logger.handlers):
             handler.close()
             self.logger.removeHandler(handler)
+        for handler in self._output_handlers:
+            handler.close()
     
     def set_level(self, level):
         """设置日志级别
@@ -369,8 +551,8 @@ class GameLogger(Singleton):
         
         self.logger.setLevel(level)
         
-        # 更新所有处理器的级别
-        for handler in self.logger.handlers:
+        # 更新所有输出处理器的级别
+        for handler in self._output_handlers:
             if isinstance(handler, logging.FileHandler):
                 handler.setLevel(logging.DEBUG)  # 文件记录所有级别
             else:
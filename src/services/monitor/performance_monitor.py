@@ -4,10 +4,10 @@
 """
 from typing import Dict, List, Optional
 import time
-import psutil
 from dataclasses import dataclass
 from ..error_handler import ErrorHandler
 from ...common.error_types import ErrorCode, ErrorContext
+from ...common.metrics_sampler import MetricsSampler, get_metrics_sampler
 
 @dataclass
 class PerformanceMetrics:
@@ -23,13 +23,22 @@ class PerformanceMetrics:
 class PerformanceMonitor:
     """性能监控器"""
     
-    def __init__(self, error_handler: ErrorHandler):
+    # update()读取的指标组
+    METRIC_GROUPS = ("cpu", "memory", "disk_io", "network")
+    
+    def __init__(self, error_handler: ErrorHandler, sampler: Optional[MetricsSampler] = None,
+                 sample_interval: float = 1.0):
         """初始化
         
         Args:
             error_handler: 错误处理器
+            sampler: 系统指标采样器，默认使用全局共享实例
+            sample_interval: 要求的系统指标采样间隔（秒）
         """
         self.error_handler = error_handler
+        # update()每帧调用，系统指标只读取后台采样的快照
+        self.sampler = sampler or get_metrics_sampler()
+        self.sampler.register(self, sample_interval, metrics=self.METRIC_GROUPS)
         self.metrics_history: List[PerformanceMetrics] = []
         self.max_history_size = 1000
         self.last_frame_time = 0
@@ -45,11 +54,8 @@ class PerformanceMonitor:
             Optional[PerformanceMetrics]: 性能指标
         """
         try:
-            # 获取系统性能指标
-            cpu_percent = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            disk_io = psutil.disk_io_counters()
-            network_io = psutil.net_io_counters()
+            # 获取系统性能指标(最近一次快照，不阻塞)
+            snapshot = self.sampler.snapshot(self.METRIC_GROUPS)
             
             # 计算帧率
             current_time = time.time()
@@ -68,19 +74,19 @@ class PerformanceMonitor:
             
             # 创建性能指标
             metrics = PerformanceMetrics(
-                cpu_percent=cpu_percent,
-                memory_percent=memory.percent,
+                cpu_percent=snapshot.cpu_percent,
+                memory_percent=snapshot.memory_percent,
                 disk_io={
-                    "read_bytes": disk_io.read_bytes,
-                    "write_bytes": disk_io.write_bytes,
-                    "read_count": disk_io.read_count,
-                    "write_count": disk_io.write_count
+                    "read_bytes": snapshot.disk_read_bytes,
+                    "write_bytes": snapshot.disk_write_bytes,
+                    "read_count": snapshot.disk_read_count,
+                    "write_count": snapshot.disk_write_count
                 },
                 network_io={
-                    "bytes_sent": network_io.bytes_sent,
-                    "bytes_recv": network_io.bytes_recv,
-                    "packets_sent": network_io.packets_sent,
-                    "packets_recv": network_io.packets_recv
+                    "bytes_sent": snapshot.net_bytes_sent,
+                    "bytes_recv": snapshot.net_bytes_recv,
+                    "packets_sent": snapshot.net_packets_sent,
+                    "packets_recv": snapshot.net_packets_recv
                 },
                 fps=self.fps,
                 latency=latency,
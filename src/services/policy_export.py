@@ -0,0 +1,365 @@
+"""
+策略网络推理导出
+
+把训练好的DQN策略网络导出为只用于推理的形式，在纯CPU机器上降低单步延迟：
+- int8: 对全连接层做动态int8量化，保存为TorchScript
+- onnx: 导出ONNX计算图，用onnxruntime执行
+
+导出后与浮点模型在同一批状态上比较Q值误差和动作一致率，并测量各批大小的延迟。
+"""
+import copy
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+# 可选依赖导入
+try:
+    import torch
+    import torch.nn as nn
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+    torch = None
+    nn = None
+
+# onnxruntime只在加载ONNX策略时使用
+from ..common.lazy_import import is_available, lazy_import
+
+ONNXRUNTIME_AVAILABLE = is_available("onnxruntime")
+onnxruntime = lazy_import("onnxruntime") if ONNXRUNTIME_AVAILABLE else None
+
+
+BACKEND_INT8 = "int8"
+BACKEND_ONNX = "onnx"
+
+logger = logging.getLogger(__name__)
+
+QFunction = Callable[[np.ndarray], np.ndarray]
+
+
+class InferencePolicy(ABC):
+    """只用于推理的策略"""
+
+    @abstractmethod
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        """
+        计算Q值
+
+        Args:
+            states: 形状(N, state_size)的状态
+
+        Returns:
+            np.ndarray: 形状(N, action_size)的Q值
+        """
+
+    def act(self, states: np.ndarray) -> np.ndarray:
+        """选择Q值最大的动作"""
+        return self.q_values(states).argmax(axis=1)
+
+
+@contextmanager
+def torch_num_threads(num_threads: Optional[int]) -> Iterator[None]:
+    """临时设置torch的线程数(进程全局)，退出时恢复原值"""
+    if not num_threads:
+        yield
+        return
+    previous = torch.get_num_threads()
+    torch.set_num_threads(num_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+class TorchScriptPolicy(InferencePolicy):
+    """执行TorchScript模型(含量化模型)的策略"""
+
+    def __init__(self, path: Union[str, Path], num_threads: Optional[int] = None):
+        if not TORCH_AVAILABLE:
+            raise ImportError("torch库不可用，无法加载TorchScript策略")
+        # torch的线程数是进程全局的，只在推理期间临时设置
+        self.num_threads = num_threads
+        self.module = torch.jit.load(str(path), map_location="cpu")
+        self.module.eval()
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        tensor = torch.from_numpy(np.ascontiguousarray(states, dtype=np.float32))
+        with torch_num_threads(self.num_threads), torch.inference_mode():
+            return self.module(tensor).numpy()
+
+
+class OnnxPolicy(InferencePolicy):
+    """用onnxruntime执行ONNX计算图的策略"""
+
+    def __init__(self, path: Union[str, Path], num_threads: Optional[int] = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime库不可用，无法加载ONNX策略")
+        try:
+            options = onnxruntime.SessionOptions()
+        except ImportError as e:
+            raise ImportError(f"onnxruntime库导入失败，无法加载ONNX策略: {e}") from e
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        states = np.ascontiguousarray(states, dtype=np.float32)
+        return self.session.run(None, {self.input_name: states})[0]
+
+
+def _cpu_copy(model: Any) -> Any:
+    """复制模型到CPU，模型引用的配置和日志对象不参与复制"""
+    memo = {}
+    for name in ("config", "logger"):
+        shared = getattr(model, name, None)
+        if shared is not None:
+            memo[id(shared)] = shared
+    clone = copy.deepcopy(model, memo).cpu()
+    clone.eval()
+    return clone
+
+
+def export_int8(model: Any, path: Union[str, Path], state_size: int) -> Path:
+    """
+    导出动态int8量化的TorchScript模型
+
+    全连接层的权重量化为int8，激活在运行时动态量化。
+
+    Args:
+        model: 浮点策略网络
+        path: 输出路径(.pt)
+        state_size: 状态大小
+
+    Returns:
+        Path: 输出路径
+    """
+    if not TORCH_AVAILABLE:
+        raise ImportError("torch库不可用，无法导出量化模型")
+    path = Path(path)
+    quantized = torch.ao.quantization.quantize_dynamic(
+        _cpu_copy(model), {nn.Linear}, dtype=torch.qint8
+    )
+    example = torch.zeros(1, state_size)
+    with torch.inference_mode():
+        scripted = torch.jit.trace(quantized, example)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scripted.save(str(path))
+    return path
+
+
+def export_onnx(model: Any, path: Union[str, Path], state_size: int) -> Path:
+    """
+    导出ONNX计算图，批大小为动态维度
+
+    Args:
+        model: 浮点策略网络
+        path: 输出路径(.onnx)
+        state_size: 状态大小
+
+    Returns:
+        Path: 输出路径
+    """
+    if not TORCH_AVAILABLE:
+        raise ImportError("torch库不可用，无法导出ONNX模型")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.onnx.export(
+        _cpu_copy(model),
+        torch.zeros(1, state_size),
+        str(path),
+        input_names=["state"],
+        output_names=["q_values"],
+        dynamic_axes={"state": {0: "batch"}, "q_values": {0: "batch"}},
+    )
+    return path
+
+
+def load_policy(path: Union[str, Path], backend: str, num_threads: Optional[int] = None) -> InferencePolicy:
+    """
+    加载导出的策略
+
+    Args:
+        path: 导出文件路径
+        backend: 'int8'或'onnx'
+        num_threads: 推理线程数，None表示使用默认值
+    """
+    if backend == BACKEND_INT8:
+        return TorchScriptPolicy(path, num_threads)
+    if backend == BACKEND_ONNX:
+        return OnnxPolicy(path, num_threads)
+    raise ValueError(f"未知的推理后端: {backend}")
+
+
+def compare_policies(reference: QFunction, candidate: QFunction, states: np.ndarray) -> Dict[str, float]:
+    """
+    比较两个策略在同一批状态上的输出
+
+    Args:
+        reference: 参考(浮点)模型的Q值函数
+        candidate: 待验证模型的Q值函数
+        states: 验证状态
+
+    Returns:
+        Dict: 最大/平均绝对误差、按参考Q值幅度归一化的最大误差、动作一致率
+    """
+    expected = np.asarray(reference(states), dtype=np.float64)
+    actual = np.asarray(candidate(states), dtype=np.float64)
+    if expected.shape != actual.shape:
+        raise ValueError(f"输出形状不一致: {expected.shape} != {actual.shape}")
+
+    error = np.abs(expected - actual)
+    scale = max(float(np.abs(expected).max(initial=0.0)), 1e-12)
+    return {
+        "max_abs_error": float(error.max(initial=0.0)),
+        "mean_abs_error": float(error.mean()) if error.size else 0.0,
+        "max_rel_error": float(error.max(initial=0.0)) / scale,
+        "action_agreement": float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+        if len(expected) else 1.0,
+    }
+
+
+def _validate_states(states: np.ndarray) -> np.ndarray:
+    """检查验证/测速状态为非空的(N, state_size)数组"""
+    states = np.asarray(states, dtype=np.float32)
+    if states.ndim != 2 or len(states) == 0:
+        raise ValueError(f"需要至少一个形状为(N, state_size)的状态，实际形状: {states.shape}")
+    return states
+
+
+def benchmark_policy(
+    q_function: QFunction,
+    states: np.ndarray,
+    batch_sizes: Sequence[int] = (1, 8, 32),
+    iterations: int = 200,
+    warmup: int = 20,
+) -> Dict[int, Dict[str, float]]:
+    """
+    测量推理延迟
+
+    Args:
+        q_function: Q值函数
+        states: 用于取样的状态，按需重复到所需批大小
+        batch_sizes: 要测量的批大小
+        iterations: 每个批大小的计时次数
+        warmup: 计时前的预热次数
+
+    Returns:
+        Dict: 批大小 -> {'mean_ms', 'p50_ms', 'p95_ms', 'per_state_us'}
+
+    Raises:
+        ValueError: 状态为空、批大小或计时次数不是正数
+    """
+    states = _validate_states(states)
+    if iterations < 1:
+        raise ValueError(f"计时次数必须为正数: {iterations}")
+    if any(batch_size < 1 for batch_size in batch_sizes):
+        raise ValueError(f"批大小必须为正数: {list(batch_sizes)}")
+    results = {}
+    for batch_size in batch_sizes:
+        repeats = -(-batch_size // len(states))
+        batch = np.ascontiguousarray(np.tile(states, (repeats, 1))[:batch_size])
+
+        for _ in range(warmup):
+            q_function(batch)
+
+        timings = np.empty(iterations)
+        for i in range(iterations):
+            started = time.perf_counter()
+            q_function(batch)
+            timings[i] = time.perf_counter() - started
+
+        timings *= 1000
+        results[batch_size] = {
+            "mean_ms": float(timings.mean()),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95)),
+            "per_state_us": float(timings.mean() * 1000 / batch_size),
+        }
+    return results
+
+
+def export_policy(
+    model: Any,
+    path: Union[str, Path],
+    state_size: int,
+    validation_states: np.ndarray,
+    backend: str = BACKEND_INT8,
+    max_rel_error: float = 0.05,
+    min_action_agreement: float = 0.95,
+    batch_sizes: Sequence[int] = (1, 8, 32),
+    iterations: int = 200,
+    num_threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    导出推理策略并验证精度、测量延迟
+
+    Args:
+        model: 浮点策略网络
+        path: 输出路径
+        state_size: 状态大小
+        validation_states: 验证和测速用的状态
+        backend: 'int8'或'onnx'
+        max_rel_error: 允许的最大归一化Q值误差
+        min_action_agreement: 允许的最低动作一致率
+        batch_sizes: 测速的批大小
+        iterations: 每个批大小的计时次数
+        num_threads: 推理线程数
+
+    Returns:
+        Dict: 导出路径、后端、精度指标、是否通过，以及浮点/导出模型的延迟
+
+    Raises:
+        ValueError: 验证状态为空或后端未知
+    """
+    states = _validate_states(validation_states)
+    if backend == BACKEND_INT8:
+        path = export_int8(model, path, state_size)
+    elif backend == BACKEND_ONNX:
+        path = export_onnx(model, path, state_size)
+    else:
+        raise ValueError(f"未知的推理后端: {backend}")
+
+    policy = load_policy(path, backend, num_threads)
+    reference_model = _cpu_copy(model)
+
+    def reference(states: np.ndarray) -> np.ndarray:
+        # 与导出模型使用相同的线程数，延迟才可比
+        with torch_num_threads(num_threads), torch.inference_mode():
+            return reference_model(torch.from_numpy(np.ascontiguousarray(states, dtype=np.float32))).numpy()
+
+    accuracy = compare_policies(reference, policy.q_values, states)
+    passed = (
+        accuracy["max_rel_error"] <= max_rel_error
+        and accuracy["action_agreement"] >= min_action_agreement
+    )
+
+    report = {
+        "path": str(path),
+        "backend": backend,
+        "accuracy": accuracy,
+        "passed": passed,
+        "latency": {
+            "float": benchmark_policy(reference, states, batch_sizes, iterations),
+            backend: benchmark_policy(policy.q_values, states, batch_sizes, iterations),
+        },
+    }
+
+    if passed:
+        logger.info(
+            f"导出推理策略({backend}): {path}, 最大误差 {accuracy['max_rel_error']:.4f}, "
+            f"动作一致率 {accuracy['action_agreement']:.2%}"
+        )
+    else:
+        logger.warning(
+            f"导出的推理策略({backend})精度未达标: 最大误差 {accuracy['max_rel_error']:.4f}, "
+            f"动作一致率 {accuracy['action_agreement']:.2%}"
+        )
+    return report
@@ -0,0 +1,220 @@
+"""
+错误恢复的调度工具
+
+- BackoffPolicy: 带随机抖动的指数退避
+- CircuitBreaker: 按子系统熔断，连续恢复失败后在冷却期内直接跳过恢复
+- RecoveryExecutor: 在后台线程中串行执行恢复任务，同一子系统的重复请求合并为一次
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class BackoffPolicy:
+    """带抖动的指数退避"""
+
+    def __init__(self, base_delay: float = 0.5, factor: float = 2.0,
+                 max_delay: float = 5.0, jitter: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        """
+        初始化退避策略
+
+        Args:
+            base_delay: 第一次重试前的等待时间(秒)
+            factor: 每次重试的增长倍数
+            max_delay: 单次等待上限(秒)
+            jitter: 抖动比例，实际等待在[delay*(1-jitter), delay]内均匀分布，
+                避免多个子系统同时重试
+            rng: 随机数生成器(测试时可固定种子)
+        """
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """第attempt次(从0开始)重试前的等待时间"""
+        delay = min(self.max_delay, self.base_delay * (self.factor ** attempt))
+        return delay * (1.0 - self.jitter * self._rng.random())
+
+
+class CircuitBreaker:
+    """
+    单个子系统的熔断器
+
+    closed: 正常执行恢复
+    open: 连续失败达到阈值后打开，冷却期内直接拒绝
+    half_open: 冷却期结束后允许一次试探，成功则关闭，失败则重新打开；
+        试探结束前其它请求仍被拒绝
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        是否允许执行一次恢复
+
+        半开状态下只发放一个试探许可，获得许可的调用方必须随后调用
+        record_success或record_failure。
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._probing):
+                self.rejected += 1
+                return False
+            if state == self.HALF_OPEN:
+                self._probing = True
+            return True
+
+    def is_open(self) -> bool:
+        """当前是否会拒绝恢复(不占用试探许可)"""
+        with self._lock:
+            state = self._current_state()
+            return state == self.OPEN or (state == self.HALF_OPEN and self._probing)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+            self.rejected = 0
+
+    def to_dict(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "failures": self._failures,
+                "rejected": self.rejected,
+            }
+
+
+class RecoveryExecutor:
+    """后台恢复线程"""
+
+    def __init__(self, name: str = "ErrorRecovery"):
+        self._name = name
+        self._condition = threading.Condition()
+        self._queue: Deque[Tuple[str, Callable[[], bool], Future]] = deque()
+        self._pending: Dict[str, Future] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        # 恢复过程中的等待都在这个事件上进行，关闭时立即唤醒
+        self.stop_event = threading.Event()
+
+    def submit(self, key: str, task: Callable[[], bool]) -> Future:
+        """
+        提交恢复任务
+
+        Args:
+            key: 子系统标识，同一子系统已有排队或执行中的任务时直接返回该任务的Future
+            task: 恢复函数，返回是否恢复成功
+
+        Returns:
+            Future: 完成时结果为bool
+        """
+        with self._condition:
+            existing = self._pending.get(key)
+            if existing is not None:
+                return existing
+            future: Future = Future()
+            if self._stopped:
+                future.set_result(False)
+                return future
+            self._pending[key] = future
+            self._queue.append((key, task, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name=self._name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return future
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                key, task, future = self._queue.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                with self._condition:
+                    self._pending.pop(key, None)
+                continue
+            try:
+                result, error = bool(task()), None
+            except BaseException as e:
+                result, error = False, e
+
+            # 先移除再设置结果，完成回调中重新提交同一子系统时会排入新的任务
+            with self._condition:
+                self._pending.pop(key, None)
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def is_pending(self, key: str) -> bool:
+        with self._condition:
+            return key in self._pending
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """停止后台线程，未开始的任务以False结束"""
+        with self._condition:
+            self._stopped = True
+            self.stop_event.set()
+            for key, _, future in self._queue:
+                self._pending.pop(key, None)
+                if future.set_running_or_notify_cancel():
+                    future.set_result(False)
+            self._queue.clear()
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
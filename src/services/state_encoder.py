@@ -0,0 +1,278 @@
+"""
+状态编码器
+
+把游戏画面批量编码为DQN状态向量。检测结果(类别、边界框)以数组
+形式整体处理，不再逐框循环；相同画面的编码结果按内容哈希缓存。
+"""
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    """把检测输出(torch张量或数组)转换为numpy数组"""
+    if value is None:
+        return np.zeros(0)
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        value = value.numpy()
+    return np.asarray(value)
+
+
+def frame_key(image: np.ndarray) -> bytes:
+    """
+    计算画面的内容键
+
+    Args:
+        image: 画面数组
+
+    Returns:
+        bytes: 由形状、类型和像素内容得到的摘要
+    """
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((image.shape, image.dtype.str)).encode("ascii"))
+    digest.update(memoryview(image).cast("B"))
+    return digest.digest()
+
+
+def image_statistics(images: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    计算画面的亮度统计特征(平均、标准差、最小、最大)
+
+    尺寸相同的画面堆叠后一次计算。
+
+    Args:
+        images: 画面列表
+
+    Returns:
+        np.ndarray: 形状为(N, 4)的特征
+    """
+    grays = [np.mean(image, axis=2) if image.ndim == 3 else image for image in images]
+    if len({gray.shape for gray in grays}) == 1:
+        stacked = np.stack(grays).reshape(len(grays), -1).astype(np.float64)
+        return np.stack(
+            [stacked.mean(axis=1), stacked.std(axis=1), stacked.min(axis=1), stacked.max(axis=1)],
+            axis=1,
+        )
+    return np.array([[np.mean(g), np.std(g), np.min(g), np.max(g)] for g in grays], dtype=np.float64)
+
+
+def detections_to_states(
+    class_ids: Sequence[np.ndarray],
+    boxes: Sequence[np.ndarray],
+    image_shapes: Sequence[Sequence[int]],
+    class_columns: Dict[int, int],
+    state_size: int,
+) -> np.ndarray:
+    """
+    把一批检测结果组装为状态矩阵
+
+    每行依次为各类别的目标数量，随后是每个目标的归一化中心点(x, y)，
+    超出state_size的部分截断、不足的部分补零。
+
+    Args:
+        class_ids: 每帧的类别ID数组
+        boxes: 每帧的边界框数组，形状(M, 4)，格式xyxy
+        image_shapes: 每帧画面的形状(高, 宽, ...)
+        class_columns: 类别ID -> 计数所在列
+        state_size: 状态大小
+
+    Returns:
+        np.ndarray: 形状为(N, state_size)的状态矩阵
+    """
+    count = len(class_ids)
+    num_classes = len(class_columns)
+    states = np.zeros((count, state_size), dtype=np.float64)
+    if count == 0:
+        return states
+
+    lengths = np.array([len(ids) for ids in class_ids], dtype=np.int64)
+    if lengths.sum() == 0:
+        return states
+
+    frame_index = np.repeat(np.arange(count), lengths)
+    ids = np.concatenate([np.asarray(ids, dtype=np.int64).reshape(-1) for ids in class_ids])
+    xyxy = np.concatenate([np.asarray(b, dtype=np.float64).reshape(-1, 4) for b in boxes])
+
+    # 类别计数
+    lookup_size = max(max(class_columns, default=0), int(ids.max(initial=0))) + 1
+    lookup = np.full(lookup_size, -1, dtype=np.int64)
+    for class_id, column in class_columns.items():
+        if class_id >= 0:
+            lookup[class_id] = column
+    columns = np.where(ids >= 0, lookup[np.clip(ids, 0, None)], -1)
+    known = (columns >= 0) & (columns < state_size)
+    counts = np.zeros((count, max(num_classes, 1)), dtype=np.float64)
+    np.add.at(counts, (frame_index[known], columns[known]), 1.0)
+    width = min(num_classes, state_size)
+    states[:, :width] = counts[:, :width]
+
+    # 归一化中心点，坐标与逐框实现一样先取整
+    sizes = np.array([(shape[1], shape[0]) for shape in image_shapes], dtype=np.float64)
+    corners = np.trunc(xyxy)
+    centers = (corners[:, :2] + corners[:, 2:]) / 2 / sizes[frame_index]
+
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    rank = np.arange(len(ids)) - starts[frame_index]
+    position = num_classes + 2 * rank
+    for offset in (0, 1):
+        keep = position + offset < state_size
+        states[frame_index[keep], position[keep] + offset] = centers[keep, offset]
+
+    return states
+
+
+class StateEncoder:
+    """
+    批量状态编码器
+
+    有检测器时按检测结果编码，否则使用亮度统计特征。
+    编码结果按画面内容缓存(LRU)，重复画面不会再次检测。
+    """
+
+    def __init__(
+        self,
+        state_size: int,
+        detector: Any = None,
+        cache_size: int = 256,
+        logger: Optional[Any] = None,
+    ):
+        """
+        初始化编码器
+
+        Args:
+            state_size: 状态大小
+            detector: 检测模型(如ultralytics.YOLO)，接受画面列表并返回每帧结果
+            cache_size: 缓存的画面数，0表示不缓存
+            logger: 日志对象
+        """
+        self.state_size = state_size
+        self.detector = detector
+        self.cache_size = max(0, cache_size)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._class_columns = self._build_class_columns(detector)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _build_class_columns(detector: Any) -> Dict[int, int]:
+        """按检测器类别表的顺序分配计数列"""
+        names = getattr(detector, "names", None) or {}
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        return {int(class_id): column for column, class_id in enumerate(names)}
+
+    def encode(self, image: np.ndarray) -> np.ndarray:
+        """
+        编码单帧画面
+
+        Returns:
+            np.ndarray: 长度为state_size的状态向量
+        """
+        return self.encode_batch([image])[0]
+
+    def encode_batch(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        批量编码画面
+
+        缓存未命中的画面一次性送入检测器；同一批中的重复画面只编码一次。
+
+        Args:
+            images: 画面列表
+
+        Returns:
+            np.ndarray: 形状为(N, state_size)的状态矩阵
+        """
+        states = np.zeros((len(images), self.state_size), dtype=np.float64)
+        if len(images) == 0:
+            return states
+
+        keys = [frame_key(image) for image in images] if self.cache_size else None
+        pending: Dict[Any, List[int]] = OrderedDict()
+        for index, image in enumerate(images):
+            key = keys[index] if keys is not None else index
+            cached = self._cache.get(key) if keys is not None else None
+            if cached is not None:
+                self._cache.move_to_end(key)
+                states[index] = cached
+                self.hits += 1
+            else:
+                pending.setdefault(key, []).append(index)
+
+        if not pending:
+            return states
+
+        self.misses += len(pending)
+        first = [indices[0] for indices in pending.values()]
+        encoded = self._encode_uncached([images[i] for i in first])
+
+        for row, (key, indices) in zip(encoded, pending.items()):
+            states[indices] = row
+            if keys is not None:
+                self._store(key, row)
+
+        return states
+
+    def _encode_uncached(self, images: List[np.ndarray]) -> np.ndarray:
+        """对未缓存的画面执行检测和编码"""
+        if self.detector is None:
+            features = image_statistics(images)
+            states = np.zeros((len(images), self.state_size), dtype=np.float64)
+            width = min(features.shape[1], self.state_size)
+            states[:, :width] = features[:, :width]
+            return states
+
+        results = list(self.detector(images))
+        class_ids, boxes = [], []
+        for result in results:
+            result_boxes = getattr(result, "boxes", None)
+            if result_boxes is None:
+                class_ids.append(np.zeros(0, dtype=np.int64))
+                boxes.append(np.zeros((0, 4)))
+                continue
+            class_ids.append(_to_numpy(result_boxes.cls).reshape(-1))
+            boxes.append(_to_numpy(result_boxes.xyxy).reshape(-1, 4))
+
+        return detections_to_states(
+            class_ids,
+            boxes,
+            [image.shape for image in images],
+            self._class_columns,
+            self.state_size,
+        )
+
+    def _store(self, key: bytes, state: np.ndarray) -> None:
+        """写入缓存并淘汰最久未用的条目"""
+        state = state.copy()
+        state.flags.writeable = False
+        self._cache[key] = state
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """清空缓存"""
+        self._cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict: 条目数、容量、命中/未命中次数和命中率
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
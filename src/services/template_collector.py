@@ -3,23 +3,26 @@ import numpy as np
 import os
 import time
 import hashlib
-from typing import Dict, List, Tuple, Optional
+import shutil
+import threading
+from typing import Dict, List, Tuple, Optional, Any
 from .config import Config
 from .logger import GameLogger
 from .window_manager import GameWindowManager
+from .image_hash import BKTree, perceptual_hash, similarity_to_distance
+from .image_writer import ImageWriter, DropPolicy
 
-# 可选依赖导入
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
-    YOLO = None
+# 可选依赖：创建模型时才导入ultralytics
+from ..common.lazy_import import is_available, lazy_attr
+
+YOLO_AVAILABLE = is_available("ultralytics")
+YOLO = lazy_attr("ultralytics", "YOLO") if YOLO_AVAILABLE else None
 
 class TemplateCollector:
     """模板收集器，负责收集和分析游戏元素模板"""
     
-    def __init__(self, logger: GameLogger, window_manager: GameWindowManager, config: Config, output_dir: str = None):
+    def __init__(self, logger: GameLogger, window_manager: GameWindowManager, config: Config, output_dir: str = None,
+                 image_writer: Optional[ImageWriter] = None):
         """
         初始化模板收集器
         
@@ -28,6 +31,7 @@ class TemplateCollector:
             window_manager: 窗口管理器
             config: 配置对象
             output_dir: 模板输出目录
+            image_writer: 后台图像写入器，默认按模板配置创建
         """
         self.logger = logger
         self.window_manager = window_manager
@@ -35,7 +39,21 @@ class TemplateCollector:
         template_config = config.get_template_config()
         self.output_dir = output_dir or template_config.get('output_dir', 'templates')
         self.templates = {}  # 存储已收集的模板
-        self.template_hashes = set()  # 存储模板哈希值
+        self.template_hashes = set()  # 存储模板哈希值(整数感知哈希)
+        self.hash_index = BKTree()  # 按汉明距离检索近似重复模板
+        # 写入线程的失败回调会撤销登记，与采集线程共用这把锁
+        self._templates_lock = threading.RLock()
+        
+        # 近似重复阈值: 相似度越高，允许的汉明距离越小
+        self.hash_size = template_config.get('hash_size', 8)
+        self.similarity_threshold = template_config.get('similarity_threshold', 0.9)
+        self.class_similarity_thresholds = template_config.get('class_similarity_thresholds', {})
+        
+        # 裁剪图在后台线程写入，磁盘停顿不阻塞采集；队列满时丢弃新裁剪(后续帧还会再检测到)
+        self.image_writer = image_writer or ImageWriter.from_config(
+            template_config, prefix='writer_',
+            drop_policy=DropPolicy.DROP_NEWEST, name='TemplateWriter'
+        )
         self.is_collecting = False
         self.model = None
         self.class_names = {}  # 存储类别名称映射
@@ -64,6 +82,10 @@ class TemplateCollector:
                 # 获取类别名称
                 self.class_names = self.model.names
                 self.logger.info(f"模型类别: {self.class_names}")
+            except ImportError as e:
+                # 已安装但导入失败(安装损坏)，与未安装一样回退
+                self.logger.warning(f"ultralytics库导入失败，将以基本模式运行，不使用YOLO功能: {e}")
+                self.model = None
             except Exception as e:
                 self.logger.error(f"加载YOLOv5模型失败: {e}")
                 self.logger.warning("将以基本模式运行，不使用YOLOv5功能")
@@ -84,12 +106,7 @@ class TemplateCollector:
                     # 计算模板哈希值
                     template_hash = self._calculate_image_hash(template)
                     # 存储模板
-                    self.templates[filename] = {
-                        'image': template,
-                        'class': class_name,
-                        'hash': template_hash
-                    }
-                    self.template_hashes.add(template_hash)
+                    self._register_template(filename, template, class_name, template_hash)
                     self.logger.debug(f"已加载模板: {filename}")
                 else:
                     self.logger.warning(f"无法加载模板: {filename}")
@@ -129,6 +146,7 @@ class TemplateCollector:
             # 等待下一次收集
             time.sleep(interval)
         
+        self.image_writer.flush()
         self.logger.info("模板收集完成")
     
     def _analyze_frame(self, frame: np.ndarray):
@@ -168,26 +186,30 @@ class TemplateCollector:
                     
                     # 提取元素图像
                     element = frame[y1:y2, x1:x2]
+                    if element.size == 0:
+                        continue
                     
                     # 计算图像哈希
                     element_hash = self._calculate_image_hash(element)
                     
-                    # 检查是否为新元素
-                    if element_hash not in self.template_hashes:
-                        # 保存新模板
-                        template_path = os.path.join(
-                            self.output_dir, 
-                            f"{class_name}_{len(self.template_hashes)}.png"
-                        )
-                        cv2.imwrite(template_path, element)
-                        self.template_hashes.add(element_hash)
-                        
+                    # 检查是否为新元素(与已有模板不近似重复)，查重和登记在同一次加锁内完成
+                    with self._templates_lock:
+                        if self.find_duplicate(element_hash, class_name) is not None:
+                            continue
+                        filename = self._next_template_filename(class_name)
+                        element = element.copy()
+                        # 先登记再提交，写入失败或被丢弃时由回调撤销
+                        self._register_template(filename, element, class_name, element_hash)
+                    
+                    # 提交时不持有锁：阻塞策略下写入线程的回调需要获取锁
+                    template_path = os.path.join(self.output_dir, filename)
+                    if self.image_writer.submit(template_path, element, self._on_template_written):
                         self.logger.info(f"发现新模板: {template_path}")
         except Exception as e:
             self.logger.error(f"YOLO分析失败: {e}")
             self.logger.debug("将跳过当前帧的智能分析")
     
-    def _calculate_image_hash(self, image: np.ndarray) -> str:
+    def _calculate_image_hash(self, image: np.ndarray) -> int:
         """
         计算图像哈希值
         
@@ -195,20 +217,152 @@ class TemplateCollector:
             image: 输入图像
             
         Returns:
-            str: 图像哈希值
+            int: 感知哈希值
         """
-        # 调整图像大小
-        resized = cv2.resize(image, (8, 8))
+        return perceptual_hash(image, self.hash_size)
+    
+    def _on_template_written(self, path: str, success: bool, error: Optional[str]):
+        """模板写入完成回调(写入线程)，写入失败或被丢弃时撤销登记"""
+        if success:
+            return
+        self._unregister_template(os.path.basename(path))
+        self.logger.warning(f"模板未能保存 {path}: {error}")
+    
+    def close(self):
+        """写完所有待写入的模板并停止写入线程"""
+        self.image_writer.shutdown()
+    
+    def get_writer_metrics(self) -> Dict[str, Any]:
+        """获取模板写入统计"""
+        return self.image_writer.get_metrics()
+    
+    def _register_template(self, filename: str, image: np.ndarray, class_name: str, template_hash: int):
+        """记录模板并加入哈希索引"""
+        with self._templates_lock:
+            self.templates[filename] = {
+                'image': image,
+                'class': class_name,
+                'hash': template_hash
+            }
+            self.template_hashes.add(template_hash)
+            self.hash_index.add(template_hash, filename)
+    
+    def _unregister_template(self, filename: str):
+        """移除模板登记及其哈希索引(可能在写入线程中调用)"""
+        with self._templates_lock:
+            info = self.templates.pop(filename, None)
+            if info is None:
+                return
+            self.hash_index.remove(info['hash'], filename)
+            if not any(t['hash'] == info['hash'] for t in self.templates.values()):
+                self.template_hashes.discard(info['hash'])
+    
+    def _next_template_filename(self, class_name: str) -> str:
+        """生成不与已有文件冲突的模板文件名"""
+        with self._templates_lock:
+            index = len(self.templates)
+            while True:
+                filename = f"{class_name}_{index}.png"
+                if filename not in self.templates and not os.path.exists(
+                    os.path.join(self.output_dir, filename)
+                ):
+                    return filename
+                index += 1
+    
+    def get_max_distance(self, class_name: Optional[str] = None) -> int:
+        """
+        获取判定为重复的最大汉明距离
         
-        # 转换为灰度图
-        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+        Args:
+            class_name: 类别名称，可在class_similarity_thresholds中单独配置
+            
+        Returns:
+            int: 最大汉明距离
+        """
+        similarity = self.class_similarity_thresholds.get(class_name, self.similarity_threshold)
+        return similarity_to_distance(similarity, self.hash_size * self.hash_size)
+    
+    def find_similar(self, image: np.ndarray, max_distance: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        查找与图像近似的已有模板
         
-        # 计算平均值
-        avg = gray.mean()
+        Args:
+            image: 输入图像
+            max_distance: 最大汉明距离，默认使用全局相似度阈值
+            
+        Returns:
+            List[Tuple[int, str]]: 按距离排序的(距离, 模板文件名)
+        """
+        if max_distance is None:
+            max_distance = self.get_max_distance()
+        template_hash = self._calculate_image_hash(image)
+        with self._templates_lock:
+            return self.hash_index.search(template_hash, max_distance)
+    
+    def find_duplicate(self, template_hash: int, class_name: Optional[str] = None) -> Optional[Tuple[int, str]]:
+        """
+        查找与哈希近似重复的模板
+        
+        Returns:
+            Optional[Tuple[int, str]]: 最近的(距离, 模板文件名)，没有重复时返回None
+        """
+        with self._templates_lock:
+            return self.hash_index.nearest(template_hash, self.get_max_distance(class_name))
+    
+    def deduplicate_templates(self, similarity: Optional[float] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        批量去除模板库中的近似重复模板
+        
+        按尺寸从大到小保留模板(面积相同时按文件名)，与已保留模板近似重复的
+        文件移动到输出目录下的duplicates子目录，而不是直接删除。
+        
+        Args:
+            similarity: 相似度阈值，默认使用配置(含按类别的阈值)
+            dry_run: 为True时只报告不移动文件
+            
+        Returns:
+            Dict: {'kept': 保留数量, 'duplicates': [(文件名, 保留的模板, 距离)]}
+        """
+        bits = self.hash_size * self.hash_size
+        with self._templates_lock:
+            snapshot = list(self.templates.items())
+        ordered = sorted(
+            snapshot,
+            key=lambda item: (-item[1]['image'].shape[0] * item[1]['image'].shape[1], item[0])
+        )
+        
+        kept_index = BKTree()
+        duplicates = []
+        for filename, info in ordered:
+            if similarity is None:
+                max_distance = self.get_max_distance(info['class'])
+            else:
+                max_distance = similarity_to_distance(similarity, bits)
+            match = kept_index.nearest(info['hash'], max_distance)
+            if match is None:
+                kept_index.add(info['hash'], filename)
+            else:
+                duplicates.append((filename, match[1], match[0]))
+        
+        if not dry_run and duplicates:
+            duplicate_dir = os.path.join(self.output_dir, 'duplicates')
+            os.makedirs(duplicate_dir, exist_ok=True)
+            for filename, _, _ in duplicates:
+                try:
+                    shutil.move(
+                        os.path.join(self.output_dir, filename),
+                        os.path.join(duplicate_dir, filename)
+                    )
+                except OSError as e:
+                    self.logger.error(f"移动重复模板失败 {filename}: {e}")
+                    continue
+                self._unregister_template(filename)
         
-        # 生成哈希值
-        hash_str = ''.join(['1' if pixel > avg else '0' for pixel in gray.flatten()])
-        return hash_str
+        self.logger.info(
+            f"模板去重完成: 保留{len(kept_index)}个，重复{len(duplicates)}个"
+            + ("(仅预览)" if dry_run else "")
+        )
+        return {'kept': len(kept_index), 'duplicates': duplicates}
     
     def analyze_existing_templates(self):
         """分析已收集的模板"""
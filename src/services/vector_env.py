@@ -0,0 +1,262 @@
+"""
+向量化环境
+
+同时推进多个环境实例，每步接收一批动作、返回一批转移，
+供DQN代理批量决策和训练。ReplayEpisodeEnv从录制的回合文件回放，
+不依赖游戏窗口，可用于离线(无界面)训练。
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+@dataclass
+class VectorStep:
+    """
+    一步向量化转移
+
+    Attributes:
+        actions: 实际执行的动作(回放环境中为录制的动作)
+        rewards: 奖励
+        next_states: 执行动作后的状态(回合结束时为终止状态)
+        dones: 是否到达终止状态，为True时不应从next_states自举价值
+        states: 下一步的输入状态，已结束或被截断的环境为重置后的初始状态
+        infos: 每个环境的附加信息，被截断的环境带有"TimeLimit.truncated"
+        truncated: 回合因时间或数据用尽被截断(非终止)，None表示没有截断
+    """
+
+    actions: np.ndarray
+    rewards: np.ndarray
+    next_states: np.ndarray
+    dones: np.ndarray
+    states: np.ndarray
+    infos: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: Optional[np.ndarray] = None
+
+
+class VectorEnv(ABC):
+    """向量化环境接口，回合结束的环境在step内自动重置"""
+
+    num_envs: int
+    state_size: int
+    action_size: int
+
+    @abstractmethod
+    def reset(self) -> np.ndarray:
+        """
+        重置所有环境
+
+        Returns:
+            np.ndarray: 形状为(num_envs, state_size)的初始状态
+        """
+
+    @abstractmethod
+    def step(self, actions: np.ndarray) -> VectorStep:
+        """
+        所有环境各执行一个动作
+
+        Args:
+            actions: 形状为(num_envs,)的动作
+
+        Returns:
+            VectorStep: 这一步的转移
+        """
+
+    def close(self) -> None:
+        """释放环境资源"""
+
+
+@dataclass
+class EpisodeData:
+    """录制的回合数据，各数组按时间拼接，dones标记每个回合的最后一步"""
+
+    states: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    dones: np.ndarray
+    next_states: Optional[np.ndarray] = None
+
+    def episode_bounds(self) -> List[Tuple[int, int]]:
+        """每个回合的[起始, 结束)下标，末尾未标记结束的步也算作一个回合"""
+        ends = np.flatnonzero(self.dones) + 1
+        if len(ends) == 0 or ends[-1] != len(self.dones):
+            ends = np.append(ends, len(self.dones))
+        starts = np.concatenate([[0], ends[:-1]])
+        return [(int(s), int(e)) for s, e in zip(starts, ends) if e > s]
+
+
+def save_episodes(
+    path: Union[str, Path],
+    states: np.ndarray,
+    actions: np.ndarray,
+    rewards: np.ndarray,
+    dones: np.ndarray,
+    next_states: Optional[np.ndarray] = None,
+) -> None:
+    """
+    把录制的转移保存为回合文件(.npz)
+
+    Args:
+        path: 文件路径
+        states: 形状(T, state_size)的状态
+        actions: 形状(T,)的动作
+        rewards: 形状(T,)的奖励
+        dones: 形状(T,)的结束标记
+        next_states: 形状(T, state_size)的下一状态，None时由相邻状态推得
+    """
+    arrays = {
+        "states": np.asarray(states, dtype=np.float32),
+        "actions": np.asarray(actions, dtype=np.int64),
+        "rewards": np.asarray(rewards, dtype=np.float32),
+        "dones": np.asarray(dones, dtype=bool),
+    }
+    if next_states is not None:
+        arrays["next_states"] = np.asarray(next_states, dtype=np.float32)
+    np.savez_compressed(path, **arrays)
+
+
+def load_episodes(path: Union[str, Path]) -> EpisodeData:
+    """
+    读取回合文件
+
+    Raises:
+        ValueError: 文件缺少必要数组或长度不一致
+    """
+    with np.load(path) as data:
+        missing = {"states", "actions", "rewards", "dones"} - set(data.files)
+        if missing:
+            raise ValueError(f"回合文件缺少数据: {sorted(missing)}")
+        episodes = EpisodeData(
+            states=data["states"].astype(np.float32),
+            actions=data["actions"].astype(np.int64),
+            rewards=data["rewards"].astype(np.float32),
+            dones=data["dones"].astype(bool),
+            next_states=data["next_states"].astype(np.float32) if "next_states" in data.files else None,
+        )
+
+    length = len(episodes.states)
+    lengths = [len(episodes.actions), len(episodes.rewards), len(episodes.dones)]
+    if episodes.next_states is not None:
+        lengths.append(len(episodes.next_states))
+    if any(n != length for n in lengths):
+        raise ValueError("回合文件中各数组长度不一致")
+    return episodes
+
+
+class ReplayEpisodeEnv(VectorEnv):
+    """
+    回放录制回合的向量化环境
+
+    每个环境槽位依次回放一个回合，结束后换到下一个回合。
+    回放环境的转移是固定的：传入的动作被忽略，VectorStep.actions
+    返回录制时实际执行的动作，训练时应存入这些动作(离策略学习)。
+
+    dones直接使用录制的结束标记。录制数据在回合结束前用尽时作为截断处理
+    (truncated)，不当作终止状态；没有录制next_states时截断步缺少真实的后继状态，
+    其info中"next_state_valid"为False，训练时应丢弃这一条转移。
+    """
+
+    def __init__(
+        self,
+        episodes: Union[str, Path, EpisodeData],
+        num_envs: int = 8,
+        action_size: Optional[int] = None,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化回放环境
+
+        Args:
+            episodes: 回合文件路径或已加载的回合数据
+            num_envs: 并行的环境数
+            action_size: 动作空间大小，None时取录制动作的最大值加一
+            shuffle: 是否随机选择下一个回合
+            seed: 随机种子
+        """
+        if not isinstance(episodes, EpisodeData):
+            episodes = load_episodes(episodes)
+        self.data = episodes
+        self.bounds = episodes.episode_bounds()
+        if not self.bounds:
+            raise ValueError("回合数据为空")
+
+        self.num_envs = max(1, num_envs)
+        self.state_size = int(episodes.states.shape[1])
+        self.action_size = (
+            action_size if action_size is not None else int(episodes.actions.max(initial=0)) + 1
+        )
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+
+        self._next_episode = 0
+        self._episode = np.zeros(self.num_envs, dtype=np.int64)
+        self._cursor = np.zeros(self.num_envs, dtype=np.int64)
+        self._end = np.zeros(self.num_envs, dtype=np.int64)
+        self._episode_return = np.zeros(self.num_envs, dtype=np.float64)
+        self.completed_episodes = 0
+
+    def _pick_episode(self) -> int:
+        """选择下一个回放的回合"""
+        if self.shuffle:
+            return int(self._rng.integers(len(self.bounds)))
+        episode = self._next_episode
+        self._next_episode = (self._next_episode + 1) % len(self.bounds)
+        return episode
+
+    def _start(self, env_indices: Sequence[int]) -> None:
+        """让指定槽位开始新回合"""
+        for env in env_indices:
+            episode = self._pick_episode()
+            start, end = self.bounds[episode]
+            self._episode[env] = episode
+            self._cursor[env] = start
+            self._end[env] = end
+            self._episode_return[env] = 0.0
+
+    def reset(self) -> np.ndarray:
+        self._next_episode = 0
+        self._start(range(self.num_envs))
+        return self.data.states[self._cursor].copy()
+
+    def step(self, actions: np.ndarray) -> VectorStep:
+        index = self._cursor.copy()
+        last = index + 1 >= self._end
+
+        rewards = self.data.rewards[index]
+        dones = self.data.dones[index].copy()
+        truncated = last & ~dones
+        if self.data.next_states is not None:
+            next_states = self.data.next_states[index].copy()
+        else:
+            # 回合最后一步没有后继状态，沿用当前状态(终止时dones会屏蔽其价值)
+            next_states = self.data.states[np.where(last, index, index + 1)].copy()
+
+        self._episode_return += rewards
+        infos: List[Dict[str, Any]] = [{} for _ in range(self.num_envs)]
+        finished = np.flatnonzero(dones | truncated)
+        for env in finished:
+            infos[env] = {
+                "episode": int(self._episode[env]),
+                "episode_return": float(self._episode_return[env]),
+            }
+            if truncated[env]:
+                infos[env]["TimeLimit.truncated"] = True
+                infos[env]["next_state_valid"] = self.data.next_states is not None
+        self.completed_episodes += len(finished)
+
+        self._cursor += 1
+        self._start(finished.tolist())
+
+        return VectorStep(
+            actions=self.data.actions[index].copy(),
+            rewards=rewards.copy(),
+            next_states=next_states,
+            dones=dones,
+            states=self.data.states[self._cursor].copy(),
+            infos=infos,
+            truncated=truncated,
+        )
@@ -92,7 +92,7 @@ class StateRecognizer:
             return state
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.STATE_ANALYSIS_ERROR,
                 "分析游戏画面失败",
                 ErrorContext(
@@ -136,7 +136,7 @@ class StateRecognizer:
             return features
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.STATE_ANALYSIS_ERROR,
                 "提取特征失败",
                 ErrorContext(
@@ -205,7 +205,7 @@ class StateRecognizer:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.STATE_ANALYSIS_ERROR,
                 "保存调试图像失败",
                 ErrorContext(
@@ -48,7 +48,7 @@ class TemplateMatcher:
             return True
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.TEMPLATE_ERROR,
                 f"加载模板失败: {name}",
                 ErrorContext(
@@ -76,7 +76,7 @@ class TemplateMatcher:
             return self.load_template(name, template)
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.TEMPLATE_ERROR,
                 f"从文件加载模板失败: {name}",
                 ErrorContext(
@@ -127,7 +127,7 @@ class TemplateMatcher:
             )
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.TEMPLATE_ERROR,
                 f"匹配模板失败: {template_name}",
                 ErrorContext(
@@ -159,7 +159,7 @@ class TemplateMatcher:
             return results
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.TEMPLATE_ERROR,
                 "匹配所有模板失败",
                 ErrorContext(
@@ -212,7 +212,7 @@ class TemplateMatcher:
             return matches
             
         except Exception as e:
-            self.error_handler.handle_error(
+            self.error_handler.handle_error_async(
                 ErrorCode.TEMPLATE_ERROR,
                 f"多位置匹配模板失败: {template_name}",
                 ErrorContext(
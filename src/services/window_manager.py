@@ -31,6 +31,12 @@ WINEVENTPROC = ctypes.WINFUNCTYPE(
     wintypes.DWORD,    # dwmsEventTime
 )
 
+# 目标窗口几何/可见性变化事件(只对目标窗口所在进程注册)
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINDOW_STATE_EVENTS = (EVENT_OBJECT_SHOW, EVENT_OBJECT_HIDE, EVENT_OBJECT_LOCATIONCHANGE)
+
 @dataclass
 class WindowRegion:
     """窗口区域类"""
@@ -60,6 +66,7 @@ class GameWindowManager(QObject):
     region_added = pyqtSignal(str)  # 区域添加信号
     region_removed = pyqtSignal(str)  # 区域移除信号
     screenshot_updated = pyqtSignal(object)  # 截图更新信号
+    _target_hook_requested = pyqtSignal(int)  # 目标进程变化，在钩子线程上重新注册钩子
     
     def __init__(self, logger: GameLogger, config: Config, error_handler: ErrorHandler):
         """
@@ -93,6 +100,13 @@ class GameWindowManager(QObject):
         # 钩子相关变量
         self.hook = None
         self.hook_thread = None
+        self.hook_callback = None
+        self.target_hook = None
+        self._target_hook_pid = 0
+        self._target_hook_requested.connect(self._register_target_hook)
+        
+        # 目标窗口状态是否需要重新查询(由窗口事件钩子标记)
+        self._window_state_dirty = True
         
         # 监控的窗口类名和标题（使用统一配置系统）
         window_config = config.get_window_config()
@@ -146,14 +160,17 @@ class GameWindowManager(QObject):
                         self.on_window_created(hwnd, title)
             elif event == win32con.EVENT_OBJECT_DESTROY:
                 self.on_window_destroyed(hwnd)
+            elif event in WINDOW_STATE_EVENTS and hwnd == self.window_handle:
+                # 目标窗口移动、缩放、显示或隐藏，下一帧捕获前重新查询
+                self._window_state_dirty = True
         
         # 保持回调函数的引用
         self.hook_callback = win_event_callback
         
-        # 注册窗口事件钩子
+        # 注册全系统的窗口创建/销毁钩子，位置变化等高频事件只对目标进程注册
         self.hook = ctypes.windll.user32.SetWinEventHook(
             win32con.EVENT_OBJECT_CREATE,  # 窗口创建事件
-            win32con.EVENT_OBJECT_DESTROY,  # 窗口销毁事件
+            win32con.EVENT_OBJECT_DESTROY,  # 到窗口销毁事件
             0,  # 当前进程
             self.hook_callback,  # 回调函数
             0,  # 进程ID（0表示所有进程）
@@ -166,6 +183,52 @@ class GameWindowManager(QObject):
         else:
             self.logger.info("成功设置窗口钩子")
 
+    def _request_target_hook(self, hwnd: Optional[int]):
+        """请求为目标窗口所在进程重新注册状态事件钩子
+        
+        钩子回调投递到注册钩子的线程，因此通过信号回到该线程上注册。
+        
+        Args:
+            hwnd: 目标窗口句柄，None表示取消目标进程钩子
+        """
+        process_id = 0
+        if hwnd:
+            _, process_id = win32process.GetWindowThreadProcessId(hwnd)
+        self._target_hook_requested.emit(process_id)
+
+    def _register_target_hook(self, process_id: int):
+        """为目标进程注册显示、隐藏和位置变化事件钩子
+        
+        位置变化事件在全系统范围内非常频繁，只订阅目标窗口所在进程，
+        目标切换到其它进程时重新注册。
+        
+        Args:
+            process_id: 目标进程ID，0表示取消目标进程钩子
+        """
+        if process_id == self._target_hook_pid and (self.target_hook or not process_id):
+            return
+        
+        if self.target_hook:
+            ctypes.windll.user32.UnhookWinEvent(self.target_hook)
+            self.target_hook = None
+        self._target_hook_pid = process_id
+        
+        if process_id and self.hook_callback is not None:
+            self.target_hook = ctypes.windll.user32.SetWinEventHook(
+                EVENT_OBJECT_SHOW,  # 窗口显示事件
+                EVENT_OBJECT_LOCATIONCHANGE,  # 到窗口位置变化事件(含隐藏)
+                0,
+                self.hook_callback,
+                process_id,  # 只接收目标进程的事件
+                0,
+                win32con.WINEVENT_OUTOFCONTEXT
+            )
+            if not self.target_hook:
+                self.logger.error(f"设置目标进程窗口钩子失败: {process_id}")
+        
+        # 钩子生效前的变化没有被记录，下一帧捕获前重新查询
+        self._window_state_dirty = True
+
     def on_window_created(self, hwnd: int, title: str):
         """窗口创建事件处理"""
         self.logger.info(f"新窗口创建: {title}")
@@ -181,6 +244,8 @@ class GameWindowManager(QObject):
         if self.window_handle == hwnd:
             self.window_handle = None
             self.window_rect = None
+            self._window_state_dirty = True
+            self._request_target_hook(None)
             self.logger.warning("当前选择的窗口已被销毁")
         
         self.notify_window_changed()
@@ -285,10 +350,13 @@ class GameWindowManager(QObject):
             
             # 获取窗口区域
             self.window_rect = win32gui.GetWindowRect(hwnd)
+            # 新选择的窗口在首次捕获前需要完整检查一次状态
+            self._window_state_dirty = True
             
             # 获取进程ID
             _, process_id = win32process.GetWindowThreadProcessId(hwnd)
             self.process_id = process_id
+            self._request_target_hook(hwnd)
             
             # 检查是否是全屏窗口
             screen_width = win32api.GetSystemMetrics(win32con.SM_CXSCREEN)
@@ -683,6 +751,8 @@ class GameWindowManager(QObject):
         self.window_handle = hwnd
         self.window_title = title
         self.window_rect = win32gui.GetWindowRect(hwnd)
+        self._window_state_dirty = True
+        self._request_target_hook(hwnd)
         
         # 不使用日志记录，直接使用print输出信息，避免日志系统的递归
         print(f"已设置目标窗口: {title}")
@@ -708,6 +778,9 @@ class GameWindowManager(QObject):
             if self.hook:
                 ctypes.windll.user32.UnhookWinEvent(self.hook)
                 self.hook = None
+            if self.target_hook:
+                ctypes.windll.user32.UnhookWinEvent(self.target_hook)
+                self.target_hook = None
             
             # 清理新的捕获引擎
             if hasattr(self, 'capture_engine'):
@@ -745,33 +818,10 @@ class GameWindowManager(QObject):
                     self.logger.error("无法找到目标窗口，窗口可能已关闭或无法访问")
                     return None
             
-            # 验证窗口状态
-            if not win32gui.IsWindow(self.window_handle):
-                self.logger.warning("窗口句柄无效，窗口可能已被关闭")
-                self.window_handle = None
-                # 记录当前标题以便后续恢复
-                if hasattr(self, 'window_title') and self.window_title:
-                    self.target_title = self.window_title
-                # 触发窗口更改事件
-                self.notify_window_changed()
-                return None
-            
-            # 尝试激活窗口
-            if not win32gui.IsWindowVisible(self.window_handle) or win32gui.IsIconic(self.window_handle):
-                self.logger.warning("目标窗口不可见或已最小化，尝试激活窗口")
-                # 尝试激活窗口
-                self.set_foreground()
-                time.sleep(0.2)
-            
-            # 获取窗口位置和大小
-            try:
-                self.window_rect = win32gui.GetWindowRect(self.window_handle)
-            except Exception as e:
-                self.logger.error(f"获取窗口位置和大小失败: {e}")
-                if not win32gui.IsWindow(self.window_handle):
-                    self.window_handle = None
-                    self.notify_window_changed()
-                return None
+            # 目标进程钩子生效且目标窗口未报告变化时，直接复用缓存的窗口状态
+            if not self.target_hook or self._window_state_dirty:
+                if not self._refresh_window_state():
+                    return None
             
             # 准备目标信息
             target_info = TargetInfo(
@@ -803,6 +853,51 @@ class GameWindowManager(QObject):
             self.logger.error(f"捕获窗口画面失败: {e}")
             return None
     
+    def _refresh_window_state(self) -> bool:
+        """
+        重新查询目标窗口的有效性、可见性和位置
+        
+        Returns:
+            bool: 窗口是否可以捕获
+        """
+        # 先清除标记，查询期间发生的新事件会再次标记
+        self._window_state_dirty = False
+        
+        try:
+            # 验证窗口状态
+            if not win32gui.IsWindow(self.window_handle):
+                self.logger.warning("窗口句柄无效，窗口可能已被关闭")
+                self.window_handle = None
+                # 记录当前标题以便后续恢复
+                if hasattr(self, 'window_title') and self.window_title:
+                    self.target_title = self.window_title
+                # 触发窗口更改事件
+                self.notify_window_changed()
+                return False
+            
+            # 尝试激活窗口
+            if not win32gui.IsWindowVisible(self.window_handle) or win32gui.IsIconic(self.window_handle):
+                self.logger.warning("目标窗口不可见或已最小化，尝试激活窗口")
+                # 尝试激活窗口
+                self.set_foreground()
+                time.sleep(0.2)
+            
+            # 获取窗口位置和大小
+            try:
+                self.window_rect = win32gui.GetWindowRect(self.window_handle)
+            except Exception as e:
+                self.logger.error(f"获取窗口位置和大小失败: {e}")
+                if not win32gui.IsWindow(self.window_handle):
+                    self.window_handle = None
+                    self.notify_window_changed()
+                return False
+            
+            return True
+            
+        except Exception:
+            self._window_state_dirty = True
+            raise
+    
     def _validate_capture_result(self, frame: Any) -> Optional[np.ndarray]:
         """验证捕获结果的数据类型和有效性
         
@@ -0,0 +1,203 @@
+"""ActionSequence 并行执行与条件等待测试"""
+import threading
+import time
+from types import SimpleNamespace
+
+from ..src.common.action_system import (
+    ActionFactory, ActionSequence, ActionStatus, ActionType, AutomationAction,
+    ConditionSignal, InputArbiter, InputDevice,
+)
+from ..src.services.game_state import StateManager
+
+
+class RecordingExecutor:
+    """记录输入操作时间区间的执行器"""
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.intervals = []
+        self.lock = threading.Lock()
+
+    def _record(self, device):
+        start = time.perf_counter()
+        time.sleep(self.duration)
+        with self.lock:
+            self.intervals.append((device, start, time.perf_counter()))
+        return True
+
+    def click(self, x, y, button):
+        return self._record(InputDevice.MOUSE)
+
+    def send_key(self, key, hold_time):
+        return self._record(InputDevice.KEYBOARD)
+
+
+def overlaps(a, b):
+    """判断两个时间区间是否重叠"""
+    return a[1] < b[2] and b[1] < a[2]
+
+
+def make_parallel(*actions):
+    """创建并行序列"""
+    sequence = ActionSequence("parallel")
+    sequence.parallel_execution = True
+    sequence.add_actions(list(actions))
+    return sequence
+
+
+def test_independent_branches_run_concurrently():
+    """测试不同设备的分支并发执行"""
+    executor = RecordingExecutor()
+    sequence = make_parallel(
+        ActionFactory.create_click_action("click", 1, 2),
+        ActionFactory.create_key_action("key", "a"),
+    )
+    for action in sequence.actions:
+        action.post_delay = 0
+
+    assert sequence.execute(executor, InputArbiter())
+    mouse, keyboard = sorted(executor.intervals)
+    assert overlaps(mouse, keyboard)
+    assert sequence.get_progress() == 1.0
+
+
+def test_conflicting_actions_are_serialized():
+    """测试占用相同设备的分支被串行化"""
+    executor = RecordingExecutor()
+    arbiter = InputArbiter()
+    sequence = make_parallel(*[
+        ActionFactory.create_click_action(f"click{i}", i, i) for i in range(3)
+    ])
+
+    assert sequence.execute(executor, arbiter)
+    intervals = executor.intervals
+    assert len(intervals) == 3
+    for i in range(3):
+        for j in range(i + 1, 3):
+            assert not overlaps(intervals[i], intervals[j])
+
+
+def test_nested_branches_and_failure():
+    """测试嵌套序列作为分支，任一分支失败则整体失败"""
+    executor = RecordingExecutor(duration=0.01)
+    branch = ActionSequence("branch")
+    branch.add_actions([
+        ActionFactory.create_key_action("k1", "a"),
+        ActionFactory.create_key_action("k2", "b"),
+    ])
+    failing = AutomationAction(name="bad", type=ActionType.KEY, params={}, retry_count=0)
+    sequence = make_parallel(branch, failing)
+
+    assert sequence.execute(executor, InputArbiter()) is False
+    assert sequence.status == ActionStatus.FAILED
+    assert branch.status == ActionStatus.SUCCESS
+
+
+def test_condition_wakes_on_signal():
+    """测试条件动作在收到信号时立即完成"""
+    signal = ConditionSignal()
+    state = {"ready": False}
+    action = AutomationAction(
+        name="wait_ready", type=ActionType.CONDITION,
+        condition=lambda: state["ready"], params={"signal": signal},
+        timeout=5.0, post_delay=0,
+    )
+
+    def make_ready():
+        state["ready"] = True
+        signal.notify()
+
+    threading.Timer(0.05, make_ready).start()
+    started = time.perf_counter()
+    assert action._execute_condition(None)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_condition_wakes_on_state_update():
+    """测试未指定信号的条件动作由状态管理器的更新唤醒"""
+    manager = StateManager()
+    action = AutomationAction(
+        name="wait_state", type=ActionType.CONDITION,
+        condition=lambda: manager.current_state is not None,
+        timeout=5.0, post_delay=0,
+    )
+    threading.Timer(0.05, manager.update_state, args=(SimpleNamespace(name="main_menu"),)).start()
+    started = time.perf_counter()
+    assert action._execute_condition(None)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_retry_backoff_releases_device():
+    """测试重试等待期间其它分支可以使用同一设备"""
+
+    class FlakyExecutor(RecordingExecutor):
+        def __init__(self):
+            super().__init__(duration=0.02)
+            self.failed = False
+
+        def send_key(self, key, hold_time):
+            if key == "x" and not self.failed:
+                self.failed = True
+                return False
+            self.intervals.append((key, time.perf_counter()))
+            return True
+
+    executor = FlakyExecutor()
+    flaky = AutomationAction(name="x", type=ActionType.KEY, params={"key": "x"},
+                             retry_count=1, delay=0.3, post_delay=0)
+    other = ActionSequence("other")
+    other.add_actions([
+        ActionFactory.create_wait_action("settle", 0.05),
+        ActionFactory.create_key_action("y", "y"),
+    ])
+    for action in other.actions:
+        action.post_delay = 0
+
+    assert make_parallel(flaky, other).execute(executor, InputArbiter())
+    assert [key for key, _ in executor.intervals] == ["y", "x"]
+
+
+def test_condition_signal_timeout_without_polling():
+    """测试只依赖通知时条件函数不会被反复轮询"""
+    signal = ConditionSignal()
+    calls = []
+
+    assert signal.wait_for(lambda: calls.append(1) and False, timeout=0.2,
+                           fallback_interval=None) is False
+    assert len(calls) <= 2
+
+
+def test_condition_without_notify_is_reevaluated():
+    """测试不发出通知的条件在超时前成立时仍能完成"""
+    became_ready = time.perf_counter() + 0.15
+    action = AutomationAction(
+        name="wait_pixel", type=ActionType.CONDITION,
+        condition=lambda: time.perf_counter() >= became_ready,
+        timeout=2.0, post_delay=0,
+    )
+    started = time.perf_counter()
+    assert action._execute_condition(None)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_condition_event():
+    """测试条件动作直接等待threading.Event"""
+    event = threading.Event()
+    action = AutomationAction(
+        name="wait_event", type=ActionType.CONDITION,
+        params={"event": event}, timeout=0.05,
+    )
+    assert action._execute_condition(None) is False
+
+    event.set()
+    assert action._execute_condition(None) is True
+
+
+def test_input_devices_by_type():
+    """测试动作类型到输入设备的映射"""
+    assert ActionFactory.create_click_action("c", 0, 0).get_input_devices() == {InputDevice.MOUSE}
+    assert ActionFactory.create_wait_action("w", 0.1).get_input_devices() == frozenset()
+    battle = ActionFactory.create_battle_action("b", "attack")
+    assert battle.get_input_devices() == {InputDevice.MOUSE, InputDevice.KEYBOARD}
+    custom = AutomationAction(name="x", type=ActionType.KEY, params={"input_devices": []})
+    assert custom.get_input_devices() == frozenset()
@@ -0,0 +1,109 @@
+"""CheckpointManager 测试"""
+import json
+
+import numpy as np
+import pytest
+
+from ..src.services.checkpoint_manager import (
+    CheckpointManager,
+    LATEST_FILE,
+    arrays_to_replay,
+    replay_to_arrays,
+)
+
+
+def make_memory(count, state_size=4):
+    return [
+        (
+            np.full(state_size, i, dtype=np.float32),
+            i % 3,
+            float(i) / 2,
+            np.full(state_size, i + 1, dtype=np.float32),
+            i % 5 == 4,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = CheckpointManager(tmp_path / "ckpt", keep=2)
+    yield manager
+    manager.close()
+
+
+def test_replay_arrays_round_trip():
+    memory = make_memory(10)
+    arrays = replay_to_arrays(memory)
+
+    assert arrays["states"].shape == (10, 4)
+    assert arrays["actions"].dtype == np.uint8
+    assert arrays["dones"].dtype == bool
+
+    restored = arrays_to_replay(arrays)
+    assert len(restored) == 10
+    for original, loaded in zip(memory, restored):
+        np.testing.assert_array_equal(original[0], loaded[0])
+        assert original[1:3] == loaded[1:3]
+        np.testing.assert_array_equal(original[3], loaded[3])
+        assert original[4] == loaded[4]
+
+
+def test_empty_replay():
+    assert arrays_to_replay(replay_to_arrays([])) == []
+
+
+def test_save_async_and_load_latest(manager):
+    assert manager.load() is None
+
+    future = manager.save_async({"epsilon": 0.5, "weights": [1, 2]}, step=7, memory=make_memory(6))
+    path = future.result(timeout=10)
+
+    assert path.name == "checkpoint-0000000007"
+    checkpoint = manager.load()
+    assert checkpoint["state"]["epsilon"] == 0.5
+    assert checkpoint["state"]["step"] == 7
+    assert len(arrays_to_replay(checkpoint["replay"])) == 6
+
+    without_replay = manager.load(load_replay=False)
+    assert without_replay["replay"] is None
+
+
+def test_keeps_rolling_checkpoints(manager):
+    for step in (1, 2, 3, 4):
+        manager.save_async({"epsilon": step}, step=step)
+    assert manager.wait(timeout=10)
+
+    names = [path.name for path in manager.list_checkpoints()]
+    assert names == ["checkpoint-0000000003", "checkpoint-0000000004"]
+    assert manager.load()["state"]["epsilon"] == 4
+
+    with open(manager.directory / LATEST_FILE, encoding="utf-8") as f:
+        assert json.load(f) == {"name": "checkpoint-0000000004", "step": 4}
+    # 不留下临时文件
+    assert not list(manager.directory.glob(".*"))
+
+
+def test_latest_falls_back_to_directory_scan(manager):
+    manager.save({"epsilon": 1}, step=1)
+    manager.save({"epsilon": 2}, step=2)
+    (manager.directory / LATEST_FILE).write_text("not json", encoding="utf-8")
+
+    assert manager.latest_checkpoint().name == "checkpoint-0000000002"
+    assert manager.load(manager.list_checkpoints()[0])["state"]["epsilon"] == 1
+
+
+def test_failed_write_leaves_previous_checkpoint(manager):
+    manager.save({"epsilon": 1}, step=1)
+
+    class Unpicklable:
+        def __reduce__(self):
+            raise TypeError("cannot serialize")
+
+    future = manager.save_async({"epsilon": Unpicklable()}, step=2)
+    with pytest.raises(Exception):
+        future.result(timeout=10)
+
+    assert [p.name for p in manager.list_checkpoints()] == ["checkpoint-0000000001"]
+    assert manager.load()["state"]["epsilon"] == 1
+    assert not list(manager.directory.glob(".*.tmp"))
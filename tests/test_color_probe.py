@@ -0,0 +1,152 @@
+"""颜色探测与 ActionExecutor 批量取色测试"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from ..src.executor.color_probe import (
+    ScreenFrame,
+    bounding_region,
+    find_all_colors,
+    find_color,
+    match_points,
+    sample_colors,
+)
+from ..src.executor.action_executor import ActionExecutor
+
+
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+
+
+def make_screen(width=40, height=30):
+    """创建带两个色块的测试画面"""
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[5:8, 10:14] = RED
+    pixels[20, 30] = GREEN
+    return pixels
+
+
+@pytest.fixture
+def frame():
+    return ScreenFrame.from_image(make_screen(), origin=(100, 200))
+
+
+def test_from_image_drops_alpha():
+    rgba = np.zeros((4, 5, 4), dtype=np.uint8)
+    frame = ScreenFrame.from_image(rgba)
+    assert frame.pixels.shape == (4, 5, 3)
+    assert (frame.width, frame.height) == (5, 4)
+
+    with pytest.raises(ValueError):
+        ScreenFrame.from_image(np.zeros((4, 5), dtype=np.uint8))
+
+
+def test_bounding_region():
+    assert bounding_region([(10, 20), (15, 18), (12, 25)]) == (10, 18, 6, 8)
+    assert bounding_region([(3, 4)]) == (3, 4, 1, 1)
+    with pytest.raises(ValueError):
+        bounding_region([])
+
+
+def test_sample_colors_uses_screen_coordinates(frame):
+    colors = sample_colors(frame, [(110, 205), (130, 220), (0, 0)])
+    assert colors == [RED, GREEN, None]
+
+
+def test_match_points_with_tolerances(frame):
+    points = [(110, 205), (110, 205), (130, 220), (100, 200), (999, 999)]
+    colors = [RED, (250, 5, 0), GREEN, (3, 3, 3), (0, 0, 0)]
+    result = match_points(frame, points, colors, [0, 5, 0, 2, 255])
+    assert result.tolist() == [True, True, True, False, False]
+
+    # 标量容差广播到所有点
+    assert match_points(frame, points[:2], colors[:2], 4).tolist() == [True, False]
+
+
+def test_find_color_respects_region(frame):
+    assert find_color(frame, RED) == (110, 205)
+    assert find_color(frame, RED, region=(112, 206, 10, 10)) == (112, 206)
+    assert find_color(frame, RED, region=(120, 200, 5, 5)) is None
+    assert find_color(frame, (250, 0, 0), tolerance=5) == (110, 205)
+    # 区域完全在画面外
+    assert find_color(frame, RED, region=(0, 0, 5, 5)) is None
+
+
+def test_find_all_colors(frame):
+    matches = find_all_colors(frame, RED)
+    assert len(matches) == 12
+    assert matches[:3] == [(110, 205), (111, 205), (112, 205)]
+    assert find_all_colors(frame, RED, limit=2) == [(110, 205), (111, 205)]
+
+
+@pytest.fixture
+def executor():
+    # 不注册全局热键
+    with patch("keyboard.on_press_key"):
+        return ActionExecutor("Test Window")
+
+
+def _fake_screenshot(screen):
+    """按region裁剪的假截图函数"""
+
+    def screenshot(region=None):
+        if region is None:
+            return screen
+        x, y, w, h = region
+        return screen[y:y + h, x:x + w]
+
+    return screenshot
+
+
+def test_check_pixels_captures_bounding_region_once(executor):
+    screen = make_screen()
+    with patch("pyautogui.screenshot", side_effect=_fake_screenshot(screen)) as mock_shot:
+        result = executor.check_pixels([
+            (10, 5, RED),
+            (30, 20, GREEN),
+            (30, 20, (0, 250, 0), 10),
+            (12, 12, RED),
+        ])
+
+    assert result == [True, True, True, False]
+    mock_shot.assert_called_once_with(region=(10, 5, 21, 16))
+
+
+def test_get_pixel_colors_and_shared_frame(executor):
+    screen = make_screen()
+    with patch("pyautogui.screenshot", side_effect=_fake_screenshot(screen)) as mock_shot:
+        frame = executor.capture_frame()
+        assert executor.get_pixel_colors([(10, 5), (30, 20)], frame=frame) == [RED, GREEN]
+        assert executor.get_pixel_color(13, 7, frame=frame) == RED
+        assert executor.check_pixels([(0, 0, (0, 0, 0))], frame=frame) == [True]
+
+    mock_shot.assert_called_once_with()
+
+
+def test_search_color_searches_region(executor):
+    screen = make_screen()
+    with patch("pyautogui.screenshot", side_effect=_fake_screenshot(screen)) as mock_shot:
+        assert executor.search_color(GREEN) == (30, 20)
+        assert executor.search_color(RED, (12, 0, 10, 10)) == (12, 5)
+        assert executor.search_color(GREEN, (0, 0, 10, 10)) is None
+
+    assert mock_shot.call_count == 3
+    assert mock_shot.call_args_list[1].kwargs == {"region": (12, 0, 10, 10)}
+
+    with pytest.raises(ValueError):
+        executor.search_color((300, 0, 0))
+    with pytest.raises(ValueError):
+        executor.search_color(RED, (0, 0, 0, 10))
+
+
+def test_search_colors_share_one_capture(executor):
+    screen = make_screen()
+    with patch("pyautogui.screenshot", side_effect=_fake_screenshot(screen)) as mock_shot:
+        result = executor.search_colors([
+            (RED, (0, 0, 20, 10)),
+            (GREEN, (25, 15, 10, 10)),
+            ((250, 250, 0), (25, 15, 10, 10), 5),
+        ])
+
+    assert result == [(10, 5), (30, 20), None]
+    mock_shot.assert_called_once_with(region=(0, 0, 35, 25))
@@ -0,0 +1,170 @@
+"""Config 批量修改与延迟保存测试(JSON模式)"""
+import importlib
+import json
+import time
+
+import pytest
+
+from ..src.services.config import Config
+
+# services包导出了同名的config实例，这里取模块本身
+config_module = importlib.import_module(Config.__module__)
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """在临时目录中创建JSON模式的独立配置实例"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config_module, "PYQT6_AVAILABLE", False)
+    monkeypatch.setattr(Config, "_instance", None)
+    monkeypatch.setattr(Config, "_initialized", False)
+    instance = Config()
+    instance.autosave_delay = 0.05
+    yield instance
+    instance.sync()
+
+
+def saved(config):
+    with open(config._config_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_get_uses_lookup_table_and_sees_updates(config):
+    assert config.get("window/refresh_interval") == 1000
+    assert "window/refresh_interval" in config._lookup_cache
+    assert config.get("window/missing", "fallback") == "fallback"
+
+    config.set("window/refresh_interval", 250)
+    assert config.get("window/refresh_interval") == 250
+    config.set("window/extra/depth", 3)
+    assert config.get("window/extra") == {"depth": 3}
+
+    config.remove("window/extra")
+    assert config.get("window/extra") is None
+
+
+def test_single_sets_are_debounced(config):
+    saves_before = config.get_storage_info()["save_count"]
+    for i in range(20):
+        config.set("automation/retry_count", i)
+
+    assert config.get_storage_info()["pending_save"]
+    assert wait_until(lambda: not config.get_storage_info()["pending_save"])
+    assert config.get_storage_info()["save_count"] - saves_before == 1
+    assert saved(config)["automation"]["retry_count"] == 19
+
+
+def test_batch_writes_once_and_notifies_once(config):
+    notifications = []
+    config.add_change_listener(notifications.append)
+    saves_before = config.get_storage_info()["save_count"]
+
+    with config.batch():
+        for i in range(50):
+            config.set(f"dialog/value{i}", i)
+        config.remove("hotkeys/start_record")
+        # 批量期间读取到的是新值，但尚未写盘
+        assert config.get("dialog/value49") == 49
+        assert config.get_storage_info()["save_count"] == saves_before
+
+    assert config.get_storage_info()["save_count"] == saves_before + 1
+    assert len(notifications) == 1
+    assert len(notifications[0]) == 51
+    assert notifications[0]["hotkeys/start_record"] is None
+    assert saved(config)["dialog"]["value10"] == 10
+    assert "start_record" not in saved(config)["hotkeys"]
+
+
+def test_batch_rolls_back_on_error(config):
+    notifications = []
+    config.add_change_listener(notifications.append)
+
+    with pytest.raises(RuntimeError):
+        with config.batch():
+            config.set("window/refresh_interval", 1)
+            config.set("window/new_key", "x")
+            config.set("window", {"replaced": True})
+            config.remove("hotkeys/stop_record")
+            raise RuntimeError("boom")
+
+    assert config.get("window/refresh_interval") == 1000
+    assert config.get("window/new_key") is None
+    assert config.get("window/replaced") is None
+    assert config.get("hotkeys/stop_record") == "F10"
+    assert notifications == []
+    assert not config.get_storage_info()["pending_save"]
+
+
+@pytest.mark.parametrize("child_first", [True, False])
+def test_batch_rollback_restores_parent_and_child(config, child_first):
+    original_window = config.get("window")
+    original_window = json.loads(json.dumps(original_window))
+
+    with pytest.raises(RuntimeError):
+        with config.batch():
+            if child_first:
+                config.set("window/refresh_interval", 1)
+                config.set("window", {"replaced": True})
+            else:
+                config.set("window", {"replaced": True})
+                config.set("window/refresh_interval", 1)
+            config.set("brand_new/key", 1)
+            raise RuntimeError("boom")
+
+    assert config.get("window") == original_window
+    assert config.get("window/refresh_interval") == 1000
+    assert config.get("brand_new") is None
+
+
+def test_lookup_during_write_is_not_cached(config, monkeypatch):
+    """查找期间发生写入时，旧值不能留在缓存里"""
+    lookup = config._lookup_json
+
+    def racing_lookup(key):
+        value = lookup(key)
+        # 模拟另一个线程在查找完成后、写入缓存前修改了配置
+        monkeypatch.setattr(config, "_lookup_json", lookup)
+        config.set("window/refresh_interval", 250)
+        return value
+
+    monkeypatch.setattr(config, "_lookup_json", racing_lookup)
+    assert config.get("window/refresh_interval") == 1000
+    assert config.get("window/refresh_interval") == 250
+
+
+def test_nested_batches_commit_at_outermost(config):
+    notifications = []
+    config.add_change_listener(notifications.append)
+
+    with config.batch():
+        config.set("a/x", 1)
+        with config.batch():
+            config.set("a/y", 2)
+        assert notifications == []
+
+    assert notifications == [{"a/x": 1, "a/y": 2}]
+
+
+def test_listener_errors_do_not_break_set(config):
+    def broken(_changes):
+        raise ValueError("listener failed")
+
+    received = []
+    config.add_change_listener(broken)
+    config.add_change_listener(received.append)
+    config.set("a/b", 1)
+    assert received == [{"a/b": 1}]
+
+    config.remove_change_listener(broken)
+    config.remove_change_listener(received.append)
+    config.set("a/b", 2)
+    assert received == [{"a/b": 1}]
@@ -0,0 +1,135 @@
+"""DecisionEngine 规则索引与帧内缓存测试"""
+import time
+import pytest
+from ..src.engine.decision_engine import DecisionEngine, Rule
+
+
+def make_state(data, timestamp=None):
+    """构造状态更新"""
+    return {
+        "timestamp": time.time() if timestamp is None else timestamp,
+        "source": "test",
+        "data": data,
+    }
+
+
+@pytest.fixture
+def engine():
+    """创建 DecisionEngine 实例"""
+    return DecisionEngine()
+
+
+def test_rules_kept_in_priority_order(engine):
+    """测试规则注册后保持优先级顺序，同优先级按注册顺序"""
+    for name, priority in [("low", 1), ("high", 5), ("mid_a", 3), ("mid_b", 3)]:
+        engine.register_rule(Rule(name, lambda s: False, lambda s: None, priority))
+
+    names = [info["name"] for info in engine.get_all_rules_info()]
+    assert names == ["high", "mid_a", "mid_b", "low"]
+
+
+def test_highest_priority_match_wins(engine):
+    """测试返回优先级最高的满足条件的规则"""
+    executed = []
+    engine.register_rule(Rule("attack", lambda s: True, lambda s: executed.append("attack"), 1))
+    engine.register_rule(Rule("heal", lambda s: s["data"]["hp"] < 30,
+                              lambda s: executed.append("heal"), 10, reads=("hp",)))
+
+    engine.update_state(make_state({"hp": 20}))
+    assert engine.make_decision() == "heal"
+
+    engine.update_state(make_state({"hp": 80}))
+    assert engine.make_decision() == "attack"
+    assert executed == ["heal", "attack"]
+
+
+def test_rules_with_missing_keys_are_skipped(engine):
+    """测试读取键不在状态中的规则不被评估"""
+    calls = []
+
+    def needs_mana(state):
+        calls.append("mana")
+        return True
+
+    engine.register_rule(Rule("cast", needs_mana, lambda s: None, 10, reads=("mana",)))
+    engine.register_rule(Rule("idle", lambda s: True, lambda s: None, 0))
+
+    engine.update_state(make_state({"hp": 100}))
+    assert engine.make_decision() == "idle"
+    assert calls == []
+
+    engine.update_state(make_state({"hp": 100, "mana": 50}))
+    assert engine.make_decision() == "cast"
+    assert calls == ["mana"]
+
+
+def test_conditions_memoized_within_frame(engine):
+    """测试同一帧内相同条件函数只评估一次"""
+    calls = []
+
+    def in_combat(state):
+        calls.append(1)
+        return False
+
+    engine.register_rule(Rule("flee", in_combat, lambda s: None, 5))
+    engine.register_rule(Rule("fight", in_combat, lambda s: None, 3))
+    engine.update_state(make_state({"enemies": 2}))
+
+    assert engine.make_decision() is None
+    assert engine.make_decision() is None
+    assert len(calls) == 1
+
+    engine.update_state(make_state({"enemies": 0}))
+    engine.make_decision()
+    assert len(calls) == 2
+
+    metrics = engine.get_decision_metrics()
+    assert metrics["rules_evaluated"] == 2
+    assert metrics["memo_hits"] == 4
+
+
+def test_action_invalidates_memo(engine):
+    """测试规则动作修改状态后重新评估条件"""
+    def consume(state):
+        state["data"]["potions"] -= 1
+
+    engine.register_rule(Rule("drink", lambda s: s["data"]["potions"] > 0,
+                              consume, reads=("potions",)))
+    engine.update_state(make_state({"potions": 1}))
+
+    assert engine.make_decision() == "drink"
+    assert engine.make_decision() is None
+
+
+def test_failing_condition_is_skipped(engine):
+    """测试条件抛出异常时继续评估后续规则"""
+    engine.register_rule(Rule("broken", lambda s: 1 / 0, lambda s: None, 5))
+    engine.register_rule(Rule("fallback", lambda s: True, lambda s: None, 1))
+    engine.update_state(make_state({"hp": 1}))
+
+    assert engine.make_decision() == "fallback"
+
+
+def test_decision_metrics(engine):
+    """测试决策延迟统计"""
+    engine.register_rule(Rule("always", lambda s: True, lambda s: None))
+    engine.update_state(make_state({"hp": 1}))
+    for _ in range(5):
+        engine.make_decision()
+
+    metrics = engine.get_decision_metrics()
+    assert metrics["decisions"] == 5
+    assert metrics["matched"] == 5
+    assert 0 <= metrics["avg_latency_ms"] <= metrics["max_latency_ms"]
+    assert metrics["p95_latency_ms"] <= metrics["max_latency_ms"]
+
+
+def test_clear_rules_resets_index(engine):
+    """测试清除规则后索引同步清空"""
+    engine.register_rule(Rule("a", lambda s: True, lambda s: None, reads=("hp",)))
+    engine.clear_rules()
+    engine.register_rule(Rule("a", lambda s: True, lambda s: None))
+
+    engine.update_state(make_state({"hp": 1}))
+    assert engine.make_decision() == "a"
+    assert [info["name"] for info in engine.get_all_rules_info()] == ["a"]
@@ -0,0 +1,132 @@
+"""模块发现解析缓存测试"""
+import ast
+import json
+from unittest.mock import patch
+
+import pytest
+
+from ..src.common import module_discovery
+from ..src.common.module_discovery import ModuleDiscovery, parse_source
+from ..src.common.module_types import ModuleManagerConfig
+
+
+SOURCES = {
+    "pkg/__init__.py": "",
+    "pkg/services/runner.py": "import os\nfrom pkg.core.engine import Engine\n\nclass Runner:\n    pass\n",
+    "pkg/core/engine.py": "from pkg.common.util import helper\nclass Engine:\n    pass",
+    "pkg/common/util.py": "def helper():\n    return 1\n",
+    "pkg/broken.py": "def broken(:\n",
+    "pkg/tests/test_runner.py": "import pkg\n",
+    "pkg/.hidden/secret.py": "x = 1\n",
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "project"
+    for relative, content in SOURCES.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    return root
+
+
+def make_discovery(tmp_path, **overrides):
+    settings = dict(
+        discovery_cache_file=str(tmp_path / "cache" / "discovery.json"),
+        discovery_workers=1,
+        log_discoveries=False,
+    )
+    settings.update(overrides)
+    return ModuleDiscovery(ModuleManagerConfig(**settings))
+
+
+def scan(discovery, root):
+    modules = discovery.scan_directory(str(root))
+    return {module.name: module for module in modules}
+
+
+def test_parse_source_extracts_everything_in_one_pass():
+    parsed = parse_source("import a.b\nfrom c import d\nfrom . import e\nx = 1")
+    assert parsed == {"valid": True, "imports": ["a.b", "c"], "line_count": 4}
+    assert parse_source("def f(:\n")["valid"] is False
+
+
+def test_each_file_is_parsed_once(tmp_path, tree):
+    with patch.object(module_discovery.ast, "parse", wraps=ast.parse) as parse:
+        modules = scan(make_discovery(tmp_path), tree)
+
+    # 排除tests和隐藏目录，语法错误的文件不算模块
+    assert set(modules) == {"__init__", "runner", "engine", "util"}
+    assert parse.call_count == 5
+    assert modules["runner"].line_count == 5
+    assert modules["engine"].line_count == 3
+    assert modules["runner"].dependencies == ["pkg.core.engine"]
+
+
+def test_warm_scan_only_reparses_changed_files(tmp_path, tree):
+    cold = make_discovery(tmp_path)
+    cold_modules = scan(cold, tree)
+    assert cold.get_cache_stats()["misses"] == 5
+    assert (tmp_path / "cache" / "discovery.json").exists()
+
+    changed = tree / "pkg" / "common" / "util.py"
+    changed.write_text("import pkg.services.runner\n\ndef helper():\n    return 2\n", encoding="utf-8")
+
+    warm = make_discovery(tmp_path)
+    with patch.object(module_discovery.ast, "parse", wraps=ast.parse) as parse:
+        warm_modules = scan(warm, tree)
+
+    assert parse.call_count == 1
+    assert warm.get_cache_stats()["hits"] == 4
+    assert warm_modules["util"].dependencies == ["pkg.services.runner"]
+    assert warm_modules["runner"].dependencies == cold_modules["runner"].dependencies
+    assert warm_modules["runner"].line_count == cold_modules["runner"].line_count
+
+
+def test_removed_files_are_pruned(tmp_path, tree):
+    scan(make_discovery(tmp_path), tree)
+    (tree / "pkg" / "core" / "engine.py").unlink()
+
+    discovery = make_discovery(tmp_path)
+    assert "engine" not in scan(discovery, tree)
+
+    entries = json.loads((tmp_path / "cache" / "discovery.json").read_text(encoding="utf-8"))["entries"]
+    assert not any(key.endswith("engine.py") for key in entries)
+    assert len(entries) == 4
+
+
+def test_corrupt_cache_is_ignored(tmp_path, tree):
+    cache_file = tmp_path / "cache" / "discovery.json"
+    cache_file.parent.mkdir()
+    cache_file.write_text("{not json", encoding="utf-8")
+
+    discovery = make_discovery(tmp_path)
+    assert len(scan(discovery, tree)) == 4
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["version"] == module_discovery.DISCOVERY_CACHE_VERSION
+
+
+def test_cache_disabled_writes_nothing(tmp_path, tree):
+    discovery = make_discovery(tmp_path, cache_enabled=False)
+    assert len(scan(discovery, tree)) == 4
+    assert not (tmp_path / "cache").exists()
+    assert discovery.get_cache_stats()["cache_file"] is None
+
+
+def test_parallel_cold_scan_matches_serial(tmp_path, tree, monkeypatch):
+    for i in range(12):
+        (tree / "pkg" / "services" / f"extra_{i}.py").write_text(
+            f"from pkg.core.engine import Engine\nVALUE = {i}\n", encoding="utf-8"
+        )
+    serial = scan(make_discovery(tmp_path / "serial"), tree)
+
+    monkeypatch.setattr(module_discovery, "PARALLEL_PARSE_THRESHOLD", 4)
+    parallel_discovery = make_discovery(tmp_path / "parallel", discovery_workers=2)
+    parallel = scan(parallel_discovery, tree)
+
+    assert set(parallel) == set(serial)
+    for name, module in serial.items():
+        assert parallel[name].dependencies == module.dependencies
+        assert parallel[name].line_count == module.line_count
+    stats = parallel_discovery.get_cache_stats()
+    assert stats["misses"] == 17 and stats["hits"] == 0
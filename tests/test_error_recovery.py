@@ -0,0 +1,218 @@
+"""错误恢复调度测试(退避、熔断、时间预算和后台执行)"""
+import random
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from ..src.common.error_types import ErrorCode, ErrorContext, ImageProcessingError, WindowError
+from ..src.services.error_handler import ErrorHandler
+from ..src.services.logger import GameLogger
+from ..src.services.recovery import BackoffPolicy, CircuitBreaker, RecoveryExecutor
+
+
+def capture_error():
+    return WindowError("截图失败", ErrorCode.WINDOW_CAPTURE_ERROR, ErrorContext(source="test"))
+
+
+@pytest.fixture
+def handler():
+    instance = ErrorHandler(Mock(spec=GameLogger))
+    instance.backoff = BackoffPolicy(base_delay=0.05, max_delay=0.2, rng=random.Random(0))
+    # 恢复验证和备用策略依赖真实窗口，这里由注入的故障脚本决定结果
+    instance._verify_recovery = Mock(return_value=False)
+    instance._backup_recovery_strategy = Mock(return_value=False)
+    yield instance
+    instance.shutdown()
+
+
+def test_backoff_grows_with_jitter():
+    policy = BackoffPolicy(base_delay=0.5, factor=2.0, max_delay=5.0, jitter=0.5, rng=random.Random(1))
+    for attempt, full in enumerate([0.5, 1.0, 2.0, 4.0, 5.0, 5.0]):
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(full * 0.5 <= d <= full for d in delays)
+        assert len(set(delays)) > 1
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # 试探失败立即重新打开
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 20.0
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.to_dict()["rejected"] == 2
+
+
+def test_half_open_allows_single_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10.0
+    assert not breaker.is_open()
+    assert breaker.allow()
+    # 试探结束前其它请求仍被拒绝
+    assert breaker.is_open()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_executor_coalesces_same_subsystem():
+    executor = RecoveryExecutor()
+    release = threading.Event()
+    calls = []
+
+    def task():
+        calls.append(1)
+        release.wait(2.0)
+        return True
+
+    try:
+        first = executor.submit("WINDOW_ERROR", task)
+        assert executor.submit("WINDOW_ERROR", task) is first
+        other = executor.submit("ACTION_ERROR", lambda: False)
+        release.set()
+        assert first.result(2.0) is True
+        assert other.result(2.0) is False
+        assert len(calls) == 1
+        assert executor.pending_count() == 0
+    finally:
+        executor.shutdown()
+
+
+def test_recovery_respects_time_budget(handler):
+    handler.register_handler(ErrorCode.WINDOW_CAPTURE_ERROR, Mock())
+    handler.backoff = BackoffPolicy(base_delay=5.0, max_delay=5.0, jitter=0.0)
+    handler.recovery_budget = 0.2
+
+    started = time.monotonic()
+    assert handler.handle_error(capture_error()) is False
+    assert time.monotonic() - started < 1.0
+    # 预算用尽后不再执行备用策略
+    handler._backup_recovery_strategy.assert_not_called()
+
+
+def test_handler_pauses_are_bounded_by_budget(handler):
+    handler.retry_delay = 10.0
+    handler.max_retries = 1
+    handler.recovery_budget = 0.2
+    handler.register_handler(
+        ErrorCode.WINDOW_CAPTURE_ERROR, lambda: handler._generic_recovery_strategy(capture_error())
+    )
+
+    started = time.monotonic()
+    assert handler.handle_error(capture_error()) is False
+    assert time.monotonic() - started < 1.0
+
+
+def test_breaker_skips_recovery_for_failing_subsystem(handler):
+    recover = Mock()
+    handler.register_handler(ErrorCode.WINDOW_CAPTURE_ERROR, recover)
+    handler.max_retries = 1
+    handler.breaker_failure_threshold = 2
+
+    for _ in range(5):
+        assert handler.handle_error(capture_error()) is False
+    assert recover.call_count == 2
+
+    breakers = handler.get_error_stats()["circuit_breakers"]
+    assert breakers["WINDOW_ERROR"]["state"] == CircuitBreaker.OPEN
+    # 其它子系统不受影响
+    image_recover = Mock()
+    handler.register_handler(ErrorCode.IMAGE_PROCESSING_ERROR, image_recover)
+    handler.handle_error(ImageProcessingError("匹配失败", ErrorCode.IMAGE_ANALYSIS_ERROR))
+    image_recover.assert_called_once()
+
+    handler.reset_circuit_breakers()
+    handler.handle_error(capture_error())
+    assert recover.call_count == 3
+
+
+def test_main_loop_keeps_frame_rate_during_recovery(handler):
+    """脚本化故障注入：截图在第10帧开始失败，恢复在后台进行"""
+    handler.recovery_budget = 2.0
+    recovered = threading.Event()
+    attempts = []
+
+    def slow_recovery():
+        attempts.append(time.monotonic())
+        time.sleep(0.1)  # 模拟重新初始化截图引擎
+
+    handler.register_handler(ErrorCode.WINDOW_CAPTURE_ERROR, slow_recovery)
+    # 前两次验证失败，第三次成功
+    handler._verify_recovery = Mock(side_effect=[False, False, True])
+    futures = set()
+
+    frame_interval = 0.01
+    frame_times = []
+    for frame in range(60):
+        started = time.perf_counter()
+        if 10 <= frame and not recovered.is_set():
+            future = handler.handle_error_async(capture_error())
+            if future not in futures:
+                futures.add(future)
+                future.add_done_callback(lambda done: recovered.set())
+        time.sleep(frame_interval)
+        frame_times.append(time.perf_counter() - started)
+
+    assert recovered.wait(5.0)
+    # 重复的错误合并为一次恢复(三次尝试)
+    assert len(futures) == 1
+    assert futures.pop().result() is True
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.1
+    # 恢复期间每帧耗时仍接近帧间隔
+    assert max(frame_times) < frame_interval + 0.05
+    assert handler.get_error_stats()["recovery_stats"][ErrorCode.WINDOW_CAPTURE_ERROR] == 1
+
+
+def test_shutdown_interrupts_backoff_wait(handler):
+    handler.register_handler(ErrorCode.WINDOW_CAPTURE_ERROR, Mock())
+    handler.backoff = BackoffPolicy(base_delay=10.0, max_delay=10.0, jitter=0.0)
+    handler.recovery_budget = 30.0
+
+    future = handler.handle_error_async(capture_error())
+    time.sleep(0.1)
+    started = time.monotonic()
+    handler.shutdown()
+    assert future.result(2.0) is False
+    assert time.monotonic() - started < 1.0
+
+
+def test_half_open_probe_is_not_taken_by_submit(handler):
+    handler.breaker_failure_threshold = 1
+    handler.breaker_reset_timeout = 0.0
+    handler.max_retries = 1
+    recover = Mock()
+    handler.register_handler(ErrorCode.WINDOW_CAPTURE_ERROR, recover)
+    assert handler.handle_error(capture_error()) is False
+
+    # 冷却结束后，提交时只检查熔断状态，试探许可留给后台的恢复
+    handler._verify_recovery.return_value = True
+    assert handler.handle_error_async(capture_error()).result(2.0) is True
+    assert recover.call_count == 2
+
+
+def test_frame_path_does_not_block_on_recovery():
+    from ..src.services.image_processor import ImageProcessor
+
+    error_handler = Mock(spec=ErrorHandler)
+    processor = ImageProcessor(Mock(), Mock(), error_handler)
+    processor.validate_image_data = Mock(side_effect=RuntimeError("坏帧"))
+    assert processor.analyze_frame(None) == {}
+    error_handler.handle_error_async.assert_called_once()
+    error_handler.handle_error.assert_not_called()
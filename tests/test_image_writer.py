@@ -0,0 +1,141 @@
+"""异步图像写入服务测试"""
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from ..src.services.image_writer import ImageWriter, DropPolicy
+
+
+def make_image(value=0, size=(32, 32)):
+    """构造测试图像"""
+    rng = np.random.default_rng(value)
+    return rng.integers(0, 256, (*size, 3), dtype=np.uint8)
+
+
+class GatedWriter(ImageWriter):
+    """写入前等待放行，用于模拟磁盘停顿"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def _write(self, request):
+        self.started.set()
+        self.gate.wait(5)
+        super()._write(request)
+
+
+def test_submit_writes_in_background(tmp_path):
+    """测试提交后在后台写入并可读回"""
+    writer = ImageWriter()
+    image = make_image(1)
+    results = []
+    assert writer.submit(str(tmp_path / "a.png"), image, lambda p, ok, err: results.append(ok))
+    assert writer.flush(5)
+
+    assert np.array_equal(cv2.imread(str(tmp_path / "a.png")), image)
+    assert results == [True]
+    metrics = writer.get_metrics()
+    assert metrics["written"] == 1
+    assert metrics["queue_depth"] == 0
+    assert metrics["avg_write_ms"] > 0
+    writer.shutdown()
+
+
+def test_encoded_bytes_written_as_is(tmp_path):
+    """测试已编码的数据直接写入"""
+    writer = ImageWriter()
+    writer.submit(str(tmp_path / "raw.bin"), b"encoded")
+    writer.shutdown()
+    assert (tmp_path / "raw.bin").read_bytes() == b"encoded"
+
+
+def test_submit_does_not_block_on_slow_disk(tmp_path):
+    """测试磁盘停顿时提交仍立即返回"""
+    writer = GatedWriter(max_queue=4)
+    writer.submit(str(tmp_path / "0.png"), make_image())
+    assert writer.started.wait(5)
+
+    started = time.perf_counter()
+    for i in range(1, 4):
+        writer.submit(str(tmp_path / f"{i}.png"), make_image(i))
+    assert time.perf_counter() - started < 0.05
+    assert writer.get_metrics()["queue_depth"] == 3
+
+    writer.gate.set()
+    writer.shutdown(5)
+
+
+def test_drop_newest_policy(tmp_path):
+    """测试队列满时丢弃新提交的图像"""
+    writer = GatedWriter(max_queue=1, drop_policy=DropPolicy.DROP_NEWEST)
+    dropped = []
+    writer.submit(str(tmp_path / "0.png"), make_image())
+    assert writer.started.wait(5)
+    assert writer.submit(str(tmp_path / "1.png"), make_image())
+    assert not writer.submit(str(tmp_path / "2.png"), make_image(),
+                             lambda p, ok, err: dropped.append((p, ok, err)))
+
+    writer.gate.set()
+    writer.shutdown(5)
+    assert dropped == [(str(tmp_path / "2.png"), False, "dropped")]
+    assert (tmp_path / "1.png").exists() and not (tmp_path / "2.png").exists()
+    assert writer.get_metrics()["dropped"] == 1
+
+
+def test_drop_oldest_policy(tmp_path):
+    """测试队列满时丢弃最旧的排队图像"""
+    writer = GatedWriter(max_queue=1, drop_policy=DropPolicy.DROP_OLDEST)
+    writer.submit(str(tmp_path / "0.png"), make_image())
+    assert writer.started.wait(5)
+    writer.submit(str(tmp_path / "1.png"), make_image())
+    assert writer.submit(str(tmp_path / "2.png"), make_image())
+
+    writer.gate.set()
+    writer.shutdown(5)
+    assert not (tmp_path / "1.png").exists() and (tmp_path / "2.png").exists()
+
+
+def test_block_policy_times_out(tmp_path):
+    """测试阻塞策略在超时后放弃"""
+    writer = GatedWriter(max_queue=1, drop_policy=DropPolicy.BLOCK, block_timeout=0.05)
+    writer.submit(str(tmp_path / "0.png"), make_image())
+    assert writer.started.wait(5)
+    writer.submit(str(tmp_path / "1.png"), make_image())
+    assert not writer.submit(str(tmp_path / "2.png"), make_image())
+
+    writer.gate.set()
+    writer.shutdown(5)
+
+
+def test_shutdown_flushes_queue(tmp_path):
+    """测试关闭时写完所有排队的图像并拒绝新请求"""
+    writer = ImageWriter(max_queue=100)
+    for i in range(20):
+        writer.submit(str(tmp_path / f"{i}.png"), make_image(i))
+
+    assert writer.shutdown(10)
+    assert len(list(tmp_path.glob("*.png"))) == 20
+    assert not writer.submit(str(tmp_path / "late.png"), make_image())
+
+
+def test_png_compression_level(tmp_path):
+    """测试PNG压缩级别生效"""
+    image = np.zeros((256, 256, 3), dtype=np.uint8)
+    image[::2] = 255
+    fast = ImageWriter(png_compression=0)
+    small = ImageWriter(png_compression=9)
+    fast.submit(str(tmp_path / "fast.png"), image)
+    small.submit(str(tmp_path / "small.png"), image)
+    fast.shutdown(5)
+    small.shutdown(5)
+
+    assert (tmp_path / "fast.png").stat().st_size > (tmp_path / "small.png").stat().st_size
+
+
+def test_invalid_policy():
+    """测试未知丢弃策略"""
+    with pytest.raises(ValueError):
+        ImageWriter(drop_policy="never")
@@ -0,0 +1,210 @@
+"""异步日志队列与错误聚合测试"""
+import logging
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from ..src.common.singleton import SingletonMeta
+from ..src.services.image_writer import DropPolicy
+from ..src.services.log_queue import AsyncLogHandler
+from ..src.services.logger import ErrorDeduplicator, GameLogger
+
+
+class SlowHandler(logging.Handler):
+    """模拟慢速磁盘/控制台的处理器"""
+
+    def __init__(self, delay=0.0, gate=None):
+        super().__init__()
+        self.delay = delay
+        self.gate = gate
+        self.messages = []
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.delay:
+            time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_burst_does_not_block_caller():
+    target = SlowHandler(delay=0.002)
+    sync_logger = make_logger("test.sync", target)
+    started = time.perf_counter()
+    for i in range(50):
+        sync_logger.info("burst %d", i)
+    sync_elapsed = time.perf_counter() - started
+
+    handler = AsyncLogHandler([SlowHandler(delay=0.002)])
+    async_logger = make_logger("test.async", handler)
+    started = time.perf_counter()
+    for i in range(50):
+        async_logger.info("burst %d", i)
+    async_elapsed = time.perf_counter() - started
+
+    try:
+        assert async_elapsed < sync_elapsed / 5
+        assert handler.flush(timeout=5)
+        assert handler.targets[0].messages == [f"burst {i}" for i in range(50)]
+    finally:
+        handler.close()
+
+
+@pytest.mark.parametrize("policy, kept", [
+    (DropPolicy.DROP_OLDEST, ["m3", "m4"]),
+    (DropPolicy.DROP_NEWEST, ["m0", "m1"]),
+])
+def test_overflow_policy_and_drop_summary(policy, kept):
+    gate = threading.Event()
+    target = SlowHandler(gate=gate)
+    handler = AsyncLogHandler([target], max_queue=2, drop_policy=policy)
+    logger = make_logger(f"test.overflow.{policy}", handler)
+    try:
+        # 第一条被写入线程取走后阻塞在gate上
+        logger.warning("blocker")
+        assert wait_until(lambda: handler.get_metrics()["queue_depth"] == 0)
+        for i in range(5):
+            logger.info(f"m{i}")
+
+        metrics = handler.get_metrics()
+        assert metrics["dropped"] == 3
+        assert metrics["dropped_by_level"] == {"INFO": 3}
+
+        gate.set()
+        assert handler.flush(timeout=5)
+        assert target.messages == ["blocker"] + kept + ["日志队列已满，丢弃了 3 条日志"]
+    finally:
+        gate.set()
+        handler.close()
+
+
+def test_args_are_frozen_at_log_time():
+    gate = threading.Event()
+    target = SlowHandler(gate=gate)
+    handler = AsyncLogHandler([target])
+    logger = make_logger("test.frozen", handler)
+    state = {"hp": 1}
+    try:
+        logger.info("state %s", state)
+        state["hp"] = 2
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        gate.set()
+        assert handler.flush(timeout=5)
+        assert target.messages == ["state {'hp': 1}", "failed"]
+    finally:
+        gate.set()
+        handler.close()
+
+
+def test_shared_record_is_left_unchanged():
+    """后面的处理器仍能拿到原始的参数和异常信息"""
+    handler = AsyncLogHandler([SlowHandler()])
+    seen = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            seen.append((record.msg, record.args, record.exc_info))
+
+    logger = make_logger("test.shared", handler)
+    logger.addHandler(Recorder())
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed %s", "x")
+        msg, args, exc_info = seen[0]
+        assert msg == "failed %s" and args == ("x",)
+        assert exc_info is not None and exc_info[0] is ValueError
+    finally:
+        handler.close()
+
+
+def test_invalid_drop_policy():
+    with pytest.raises(ValueError):
+        AsyncLogHandler([], drop_policy="sometimes")
+
+
+def test_deduplicator_reports_suppressed_counts():
+    dedup = ErrorDeduplicator(dedupe_window=10.0, report_every=10)
+    reported = []
+    for t in range(25):
+        if dedup.should_log_error("e", 100.0 + t * 0.01):
+            reported.append(dedup.take_suppressed("e"))
+
+    # 第一次、第二次，之后每10次记录一次，每次记录带上期间被抑制的次数
+    assert reported == [0, 0, 8, 9]
+    assert dedup.get_suppressed_summary() == {"e": 4}
+
+    # 仍在窗口内时不补报；停止重复超过窗口后补报剩余的抑制次数
+    assert dedup.drain_suppressed(105.0) == {}
+    assert dedup.drain_suppressed(200.0) == {"e": 4}
+    assert dedup.drain_suppressed(200.0) == {}
+
+
+def test_deduplicator_aggregates_by_time_under_load():
+    dedup = ErrorDeduplicator(dedupe_window=60.0, min_report_interval=1.0)
+    logged = sum(dedup.should_log_error("e", 100.0 + i * 0.001) for i in range(1000))
+
+    # 1秒内的1000次重复只记录前两次
+    assert logged == 2
+    assert dedup.take_suppressed("e") == 998
+
+
+@pytest.fixture
+def game_logger(tmp_path, monkeypatch):
+    monkeypatch.setattr(SingletonMeta, "_instances", {})
+    config = MagicMock()
+    config.get_logging_config.return_value = {
+        "file": str(tmp_path / "logs" / "app.log"),
+        "enable_console": False,
+        "queue_size": 1000,
+    }
+    instance = GameLogger(config, "test_game_logger")
+    yield instance
+    instance.cleanup()
+
+
+def test_game_logger_writes_through_queue(game_logger, tmp_path):
+    assert isinstance(game_logger.logger.handlers[0], AsyncLogHandler)
+    for i in range(100):
+        game_logger.info(f"line {i}")
+    assert game_logger.flush(timeout=5)
+
+    log_files = list((tmp_path / "logs").glob("test_game_logger_*.log"))
+    content = log_files[0].read_text(encoding="utf-8")
+    assert "line 99" in content
+    assert game_logger.get_queue_metrics()["dropped"] == 0
+
+
+def test_game_logger_reports_suppressed_duplicates(game_logger, tmp_path):
+    for _ in range(50):
+        game_logger.log_with_deduplication(logging.ERROR, "capture failed")
+    game_logger.report_suppressed(force=True)
+    assert game_logger.flush(timeout=5)
+
+    content = next((tmp_path / "logs").glob("test_game_logger_*.log")).read_text(encoding="utf-8")
+    assert "capture failed (重复 2 次)" in content
+    assert "capture failed (已抑制 48 条重复)" in content
+    assert game_logger.get_stats()["deduplicated"] == 48
@@ -0,0 +1,119 @@
+"""宏文件格式测试"""
+import json
+import pytest
+from ..src.macro.macro_recorder import MacroEvent, MacroEventType
+from ..src.macro.macro_format import (
+    MacroBinaryReader, MacroBinaryWriter, convert_macro_file, events_to_json,
+    is_binary_macro, load_macro_events, save_binary_macro, save_json_macro,
+    simplify_mouse_path,
+)
+
+
+def mouse_move(timestamp, x, y, left=False):
+    """创建录制器格式的鼠标移动事件"""
+    return MacroEvent(
+        type=MacroEventType.MOUSE_MOVE,
+        timestamp=timestamp,
+        data={
+            "position": (x, y),
+            "buttons": {"left": left, "right": False, "middle": False},
+        },
+    )
+
+
+@pytest.fixture
+def events():
+    """创建包含各类事件的宏"""
+    result = [mouse_move(i * 0.001 + 0.1234567, i, 2 * i) for i in range(500)]
+    result += [
+        MacroEvent(MacroEventType.MOUSE_DOWN, 0.7, {
+            "position": (499, 998),
+            "buttons": {"left": True, "right": False, "middle": False},
+            "button": "left",
+        }),
+        MacroEvent(MacroEventType.DELAY, 0.7, {"duration": 0.05}),
+        MacroEvent(MacroEventType.KEY_DOWN, 0.75, {
+            "key": "中", "scan_code": 30,
+            "modifiers": {"shift": False, "ctrl": True, "alt": False},
+        }),
+        MacroEvent(MacroEventType.MOUSE_MOVE, 0.8, {"position": (1.5, 2.5), "buttons": {}}),
+    ]
+    return result
+
+
+def as_json(events):
+    """按JSON语义规范化事件列表"""
+    return json.loads(json.dumps(events_to_json(events)))
+
+
+def test_binary_roundtrip_is_lossless(events, tmp_path):
+    """测试二进制格式与JSON格式无损互转"""
+    path = tmp_path / "test.gmacro"
+    assert save_binary_macro(str(path), events, chunk_size=64) == len(events)
+
+    assert is_binary_macro(str(path))
+    assert as_json(load_macro_events(str(path))) == as_json(events)
+
+
+def test_convert_between_formats(events, tmp_path):
+    """测试JSON -> 二进制 -> JSON 转换"""
+    json_path = tmp_path / "macro.json"
+    binary_path = tmp_path / "macro.gmacro"
+    back_path = tmp_path / "back.json"
+    save_json_macro(str(json_path), events)
+
+    assert convert_macro_file(str(json_path), str(binary_path)) == len(events)
+    assert convert_macro_file(str(binary_path), str(back_path)) == len(events)
+
+    assert json.loads(back_path.read_text(encoding="utf-8")) == json.loads(
+        json_path.read_text(encoding="utf-8"))
+    assert binary_path.stat().st_size * 5 < json_path.stat().st_size
+
+
+def test_streaming_reader_yields_chunks(events, tmp_path):
+    """测试流式读写按块处理"""
+    path = tmp_path / "stream.gmacro"
+    with MacroBinaryWriter(str(path), chunk_size=100) as writer:
+        for event in events:
+            writer.write(event)
+
+    with MacroBinaryReader(str(path)) as reader:
+        chunk_sizes = [len(chunk) for chunk in reader.iter_chunks()]
+
+    assert chunk_sizes == [100, 100, 100, 100, 100, 4]
+
+
+def test_reader_rejects_json_file(events, tmp_path):
+    """测试读取器拒绝非二进制文件"""
+    path = tmp_path / "macro.json"
+    save_json_macro(str(path), events)
+
+    with pytest.raises(ValueError):
+        MacroBinaryReader(str(path))
+
+
+def test_simplify_mouse_path_straight_line():
+    """测试直线轨迹只保留端点"""
+    line = [mouse_move(i * 0.01, i, i) for i in range(100)]
+    simplified = simplify_mouse_path(line, tolerance=0.5)
+
+    assert [e.data["position"] for e in simplified] == [(0, 0), (99, 99)]
+    assert simplified[-1].timestamp == line[-1].timestamp
+
+
+def test_simplify_keeps_corners_and_other_events():
+    """测试简化保留拐点、按键变化和非移动事件"""
+    path = [mouse_move(i * 0.01, i, 0) for i in range(50)]
+    path += [mouse_move(0.5 + i * 0.01, 49, i) for i in range(1, 50)]
+    click = MacroEvent(MacroEventType.MOUSE_DOWN, 1.0, {"button": "left"})
+    drag = [mouse_move(1.0 + i * 0.01, 49 + i, 49, left=True) for i in range(20)]
+
+    simplified = simplify_mouse_path(path + [click] + drag, tolerance=1.0)
+    positions = [e.data.get("position") for e in simplified]
+
+    assert positions == [(0, 0), (49, 0), (49, 49), None, (49, 49), (68, 49)]
+
+
+def test_simplify_disabled_with_zero_tolerance(events):
+    """测试容差为0时不做简化"""
+    assert simplify_mouse_path(events, tolerance=0) == events
@@ -0,0 +1,194 @@
+"""指标历史列式存储测试"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ..src.infrastructure.adapters.performance_monitor_adapter import PerformanceMonitorServiceAdapter
+from ..src.infrastructure.repositories.metric_store import (
+    MetricStore,
+    QuantileSketch,
+    RingColumn,
+    read_metric_log,
+)
+
+
+def test_ring_column_keeps_latest_in_order():
+    ring = RingColumn(4)
+    for i in range(10):
+        ring.append(float(i), i * 10)
+    times, values = ring.arrays()
+    assert times.tolist() == [6.0, 7.0, 8.0, 9.0]
+    assert values.tolist() == [60, 70, 80, 90]
+    assert ring.tail(2)[0].tolist() == [8.0, 9.0]
+
+    ring.resize(2)
+    assert ring.arrays()[0].tolist() == [8.0, 9.0]
+    ring.append(10.0, 100)
+    assert ring.arrays()[0].tolist() == [9.0, 10.0]
+
+
+def test_rollups_aggregate_per_bucket():
+    store = MetricStore(raw_capacity=10)
+    # 3分钟、每秒4次采样
+    for i in range(720):
+        store.append("fps", 1000.0 + i * 0.25, float(i % 4))
+
+    seconds = store.rollup("fps", "1s")
+    assert len(seconds["start"]) == 180
+    assert seconds["count"].tolist() == [4] * 180
+    assert seconds["avg"][0] == pytest.approx(1.5)
+    assert seconds["min"][0] == 0 and seconds["max"][0] == 3
+
+    minutes = store.rollup("fps", "1m")
+    assert minutes["count"].sum() == 720
+    assert minutes["start"][0] == 960.0
+    assert store.rollup("fps", "1m", limit=1)["start"].tolist() == [1140.0]
+
+    with pytest.raises(ValueError):
+        store.rollup("fps", "1h")
+
+
+def test_sketch_quantiles_within_relative_error():
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    values = np.random.default_rng(0).lognormal(mean=2.0, sigma=1.0, size=20000)
+    for value in values:
+        sketch.add(float(value))
+
+    for q in (0.5, 0.95, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.02)
+    assert sketch.quantile(1.0) == pytest.approx(values.max())
+    assert sketch.bucket_count < 1000
+
+
+def test_summary_uses_raw_window_and_session_sketch():
+    store = MetricStore(raw_capacity=100)
+    for i in range(1000):
+        store.append("cpu", float(i), float(i))
+
+    stats = store.summary("cpu")
+    # avg/min/max只针对保留的原始窗口
+    assert stats["count"] == 100
+    assert stats["min"] == 900 and stats["max"] == 999
+    assert stats["avg"] == pytest.approx(949.5)
+    # 分位数覆盖整个会话
+    assert stats["total_count"] == 1000
+    assert stats["p50"] == pytest.approx(500, rel=0.02)
+    assert store.summary("missing") == {}
+
+
+def test_hours_of_history_fit_in_a_few_megabytes():
+    store = MetricStore(raw_capacity=1000)
+    metrics = {f"metric_{i}": 0.0 for i in range(20)}
+    for second in range(0, 3 * 3600, 30):
+        store.append_sample(metrics, float(second))
+    assert store.memory_usage() < 5 * 1024 * 1024
+
+
+def test_binary_log_is_append_only(tmp_path):
+    path = tmp_path / "metrics.bin"
+    store = MetricStore(raw_capacity=10)
+    store.attach_log(path)
+    store.append_sample({"cpu": 10.0, "mem": 50.0, "name": "skip", "flag": True}, 1.0)
+    store.append_sample({"cpu": 20.0}, 2.0)
+    store.detach_log()
+
+    # 新的会话续写同一文件，沿用已有的指标编号
+    other = MetricStore()
+    other.attach_log(path)
+    other.append_sample({"mem": 60.0, "gpu": 5.0}, 3.0)
+    other.detach_log()
+
+    data = read_metric_log(path)
+    assert set(data) == {"cpu", "mem", "gpu"}
+    assert data["cpu"][0].tolist() == [1.0, 2.0]
+    assert data["mem"][1].tolist() == [50.0, 60.0]
+
+    # 末尾不完整的记录被忽略
+    with open(path, "ab") as f:
+        f.write(b"S\x00")
+    assert read_metric_log(path)["cpu"][1].tolist() == [10.0, 20.0]
+
+
+def test_reopen_truncates_torn_record(tmp_path):
+    path = tmp_path / "metrics.bin"
+    store = MetricStore()
+    store.attach_log(path)
+    store.append("cpu", 1.0, 10.0)
+    store.detach_log()
+    with open(path, "ab") as f:
+        f.write(b"S\x00\x00\x01")  # 写入中断的半条记录
+
+    log = store.attach_log(path)
+    assert log.truncated_bytes == 4
+    store.append("cpu", 2.0, 20.0)
+    store.detach_log()
+    assert read_metric_log(path)["cpu"][1].tolist() == [10.0, 20.0]
+
+    (tmp_path / "other.bin").write_bytes(b"not a metric log")
+    with pytest.raises(ValueError):
+        store.attach_log(tmp_path / "other.bin")
+
+
+def test_large_counters_keep_precision(tmp_path):
+    store = MetricStore(raw_capacity=4)
+    counter = 123_456_789_012.0
+    store.attach_log(tmp_path / "metrics.bin")
+    store.append("net_bytes_sent", 1.0, counter)
+    store.append("net_bytes_sent", 2.0, counter + 1)
+    store.detach_log()
+
+    assert store.history("net_bytes_sent")[1].tolist() == [counter, counter + 1]
+    assert store.summary("net_bytes_sent")["max"] == counter + 1
+    assert store.rollup("net_bytes_sent", "1m")["max"].tolist() == [counter + 1]
+    assert read_metric_log(tmp_path / "metrics.bin")["net_bytes_sent"][1].tolist() == [counter, counter + 1]
+
+
+def test_export_binary_filters_time_range(tmp_path):
+    store = MetricStore()
+    for i in range(10):
+        store.append_sample({"cpu": float(i), "mem": float(i * 2)}, float(i))
+
+    assert store.export_binary(tmp_path / "out.bin", start_time=3, end_time=5) == 6
+    data = read_metric_log(tmp_path / "out.bin")
+    assert data["cpu"][0].tolist() == [3.0, 4.0, 5.0]
+    assert data["mem"][1].tolist() == [6.0, 8.0, 10.0]
+
+
+class _Adapter(PerformanceMonitorServiceAdapter):
+    """补全接口中未实现的抽象方法"""
+
+
+_Adapter.__abstractmethods__ = frozenset()
+
+
+def test_adapter_keeps_history_format(tmp_path):
+    adapter = _Adapter()
+    adapter._is_initialized = True
+    for i in range(5):
+        adapter._metrics_history.append_sample({"cpu_percent": i * 10.0, "timestamp": 100.0 + i}, 100.0 + i)
+
+    history = adapter.get_metric_history("cpu_percent", limit=2)
+    assert history == [{"value": 30.0, "timestamp": 103.0}, {"value": 40.0, "timestamp": 104.0}]
+    assert adapter.get_metric_history("unknown") == []
+
+    summary = adapter.get_performance_summary()["averages"]
+    assert summary["cpu_percent_avg"] == pytest.approx(20.0)
+    assert summary["cpu_percent_max"] == 40.0
+    assert adapter.get_metric_percentiles("cpu_percent", (50,))["p50"] == pytest.approx(20.0, rel=0.02)
+    assert adapter.get_metric_rollup("cpu_percent", "1m") == [
+        {"start": 60.0, "count": 5, "avg": 20.0, "min": 0.0, "max": 40.0}
+    ]
+
+    assert adapter.export_metrics_binary(str(tmp_path / "m.bin"), start_time=102)
+    assert read_metric_log(tmp_path / "m.bin")["cpu_percent"][1].tolist() == [20.0, 30.0, 40.0]
+
+
+def test_adapter_ignores_unreadable_binary_log(tmp_path):
+    path = tmp_path / "metrics.bin"
+    path.write_bytes(b"not a metric log")
+    config = {"performance_monitor.binary_log_path": str(path)}
+    adapter = _Adapter(config_service=SimpleNamespace(get=lambda key, default=None: config.get(key, default)))
+    adapter._load_configuration()
+    assert adapter._metrics_history._log is None
+    assert path.read_bytes() == b"not a metric log"
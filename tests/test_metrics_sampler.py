@@ -0,0 +1,155 @@
+"""共享系统指标采样器测试"""
+import gc
+import subprocess
+import sys
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ..src.common.metrics_sampler import MetricsSampler, SystemSnapshot
+from ..src.common.system_monitor import SystemMonitor
+from ..src.services.monitor.performance_monitor import PerformanceMonitor
+
+
+class Owner:
+    """订阅者占位对象"""
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def sampler():
+    instance = MetricsSampler(interval=60.0, slow_interval=60.0)
+    yield instance
+    instance.stop()
+
+
+def test_snapshot_contents(sampler):
+    snapshot = sampler.snapshot()
+    assert isinstance(snapshot, SystemSnapshot)
+    assert snapshot.cpu_count > 0
+    assert snapshot.memory_total > 0
+    assert snapshot.process_count > 0
+    own = snapshot.process()
+    assert own is not None and own.memory_rss > 0 and own.num_threads > 0
+    assert "processes" in snapshot.to_dict()
+
+
+def test_thread_runs_only_while_subscribed(sampler):
+    assert not sampler.is_running()
+    owner = Owner()
+    sampler.register(owner, 0.02)
+    assert wait_until(lambda: len(sampler.history()) >= 3)
+    assert sampler.is_running()
+
+    sampler.unregister(owner)
+    assert wait_until(lambda: not sampler.is_running())
+
+
+def test_interval_is_minimum_of_subscribers(sampler):
+    slow, fast = Owner(), Owner()
+    sampler.register(slow, 1.0)
+    assert sampler.interval == 1.0
+    sampler.register(fast, 0.2)
+    assert sampler.interval == 0.2
+
+    # 订阅者被回收后自动注销
+    del fast
+    gc.collect()
+    assert sampler.interval == 1.0
+    sampler.unregister(slow)
+
+
+def test_each_group_samples_at_its_own_interval(sampler):
+    fast, slow = Owner(), Owner()
+    sampler.register(fast, metrics={"processes": 0.02})
+    sampler.register(slow, 0.5, metrics=("memory",))
+    assert sampler.group_intervals == {"processes": 0.02, "memory": 0.5}
+    assert sampler.interval == 0.02
+
+    import psutil
+    with patch("psutil.disk_usage", wraps=psutil.disk_usage) as disk_usage, \
+            patch("psutil.virtual_memory", wraps=psutil.virtual_memory) as virtual_memory:
+        assert wait_until(lambda: len(sampler.history()) >= 10)
+    # 没有订阅者的组只在第一次采样时收集，低频组远少于高频组
+    assert disk_usage.call_count <= 1
+    assert virtual_memory.call_count <= 3
+    assert sampler.latest().memory_total > 0
+
+    with pytest.raises(ValueError):
+        sampler.register(Owner(), metrics=("gpu",))
+    sampler.unregister(fast)
+    sampler.unregister(slow)
+
+
+def test_snapshot_refreshes_only_requested_stale_groups(sampler):
+    first = sampler.sample()
+    sampler.default_interval = 0.0
+    with patch("psutil.net_io_counters") as net_io:
+        snapshot = sampler.snapshot(("memory",))
+    net_io.assert_not_called()
+    assert snapshot.timestamp > first.timestamp
+    assert snapshot.net_bytes_sent == first.net_bytes_sent
+    assert snapshot.process() is first.process()
+
+
+def test_process_count_is_sampled_slowly(sampler):
+    with patch("psutil.pids", wraps=__import__("psutil").pids) as pids:
+        for _ in range(5):
+            sampler.sample()
+    assert pids.call_count == 1
+
+
+def test_watched_process_is_dropped_after_exit(sampler):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        assert sampler.watch_process(child.pid)
+        assert sampler.sample().process(child.pid) is not None
+    finally:
+        child.kill()
+        child.wait()
+    assert sampler.sample().process(child.pid) is None
+    assert not sampler.watch_process(child.pid)
+
+
+def test_listeners_receive_snapshots(sampler):
+    received = []
+    sampler.add_listener(received.append)
+    snapshot = sampler.sample()
+    sampler.remove_listener(received.append)
+    sampler.sample()
+    assert received == [snapshot]
+
+
+def test_system_monitor_does_not_block(sampler):
+    monitor = SystemMonitor(check_interval=0.05, sampler=sampler)
+    sampler.snapshot()
+    with patch.object(sampler, "sample", side_effect=AssertionError("不应在调用线程中采样")):
+        started = time.perf_counter()
+        metrics = monitor._collect_metrics()
+        assert time.perf_counter() - started < 0.1
+    assert metrics.memory_percent > 0
+
+    monitor.start_monitoring()
+    assert wait_until(lambda: monitor.get_current_metrics() is not None)
+    started = time.perf_counter()
+    monitor.stop_monitoring()
+    assert time.perf_counter() - started < 1.0
+
+
+def test_frame_monitor_reads_shared_snapshot(sampler):
+    monitor = PerformanceMonitor(Mock(), sampler=sampler, sample_interval=0.05)
+    assert sampler.is_running()
+    sampler.snapshot()
+    with patch.object(sampler, "sample", side_effect=AssertionError("不应在调用线程中采样")):
+        for _ in range(100):
+            metrics = monitor.update()
+    assert metrics is not None and metrics.memory_percent > 0
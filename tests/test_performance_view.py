@@ -0,0 +1,95 @@
+"""性能视图数据结构测试"""
+import time
+import numpy as np
+import pytest
+from ..src.performance.performance_view import RingSeries, MetricsHistoryModel
+from ..src.core.types import UnifiedPerformanceMetrics as PerformanceMetrics
+
+
+def make_metrics(timestamp, cpu=10.0):
+    """构造性能指标"""
+    return PerformanceMetrics(
+        timestamp=timestamp,
+        cpu_percent=cpu,
+        memory_percent=20.0,
+        memory_used=64 * 1024 * 1024,
+        fps=60.0,
+        response_time=0.012,
+    )
+
+
+def test_ring_series_keeps_latest_in_order():
+    """测试环形序列覆盖最旧数据并保持时间顺序"""
+    series = RingSeries(5)
+    for i in range(8):
+        series.append(float(i), float(i * 10))
+
+    times, values = series.arrays()
+    assert len(series) == 5
+    assert times.tolist() == [3, 4, 5, 6, 7]
+    assert values.tolist() == [30, 40, 50, 60, 70]
+    assert series.latest_time() == 7
+
+
+def test_ring_series_window_downsamples_and_keeps_peaks():
+    """测试降采样限制点数并保留峰值"""
+    series = RingSeries(6000)
+    for i in range(6000):
+        series.append(i * 0.1, 0.0)
+    series.append(600.0, 100.0)  # 覆盖最旧的点
+    series.append(600.1, -50.0)
+
+    times, values = series.window(1000)
+    assert len(times) <= 1000
+    assert values.max() == 100.0
+    assert values.min() == -50.0
+    assert np.all(np.diff(times) >= 0)
+    assert times[-1] == pytest.approx(600.1)
+
+
+def test_ring_series_window_small_is_unchanged():
+    """测试点数不超过上限时原样返回"""
+    series = RingSeries(10)
+    for i in range(3):
+        series.append(float(i), float(i))
+
+    times, values = series.window(100)
+    assert times.tolist() == [0, 1, 2]
+
+
+def test_history_model_appends_only_new_rows():
+    """测试历史模型只追加新的采样"""
+    model = MetricsHistoryModel()
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    now = time.time()
+    batch = [make_metrics(now - 3), make_metrics(now - 2)]
+    assert model.append_metrics(batch) == 2
+    # 重复提交的旧采样被忽略
+    assert model.append_metrics(batch + [make_metrics(now - 1, cpu=55.5)]) == 1
+
+    assert model.rowCount() == 3
+    assert inserted == [(0, 1), (2, 2)]
+    assert model.data(model.index(2, 1)) == "55.5%"
+    assert model.data(model.index(2, 3)) == "64.0 MB"
+    assert model.data(model.index(2, 5)) == "12.0 ms"
+
+
+def test_history_model_trims_expired_rows():
+    """测试历史模型从头部移除过期采样"""
+    model = MetricsHistoryModel()
+    model.append_metrics([make_metrics(float(t), cpu=float(t)) for t in range(1, 101)])
+
+    assert model.trim_before(61.0) == 60
+    assert model.rowCount() == 40
+    assert model.data(model.index(0, 1)) == "61.0%"
+    assert model.last_timestamp() == 100.0
+
+    model.append_metrics([make_metrics(101.0)])
+    assert model.rowCount() == 41
+    assert model.trim_before(1.0) == 0
+
+    model.clear()
+    assert model.rowCount() == 0
+    assert model.last_timestamp() is None
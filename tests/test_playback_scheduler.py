@@ -0,0 +1,121 @@
+"""宏播放调度器测试"""
+import threading
+import time
+import pytest
+from ..src.macro.playback_scheduler import PlaybackScheduler
+from ..src.macro.macro_player import MacroPlayer, PlaybackStatus
+from ..src.macro.macro_recorder import MacroEvent, MacroEventType
+
+
+@pytest.fixture
+def scheduler():
+    """创建调度器实例"""
+    scheduler = PlaybackScheduler()
+    scheduler.start()
+    return scheduler
+
+
+@pytest.fixture
+def player():
+    """创建不触发真实输入的播放器，记录事件执行时间"""
+    player = MacroPlayer()
+    player.executed = []
+
+    def record(data):
+        player.executed.append((time.perf_counter(), data))
+
+    for event_type in player.event_handlers:
+        player.event_handlers[event_type] = record
+    return player
+
+
+def make_moves(count, interval):
+    """创建等间隔的鼠标移动事件"""
+    return [
+        MacroEvent(
+            type=MacroEventType.MOUSE_MOVE,
+            timestamp=i * interval,
+            data={"position": (i, i)},
+        )
+        for i in range(count)
+    ]
+
+
+def test_wait_until_targets_absolute_time(scheduler):
+    """测试调度器按绝对时间等待，误差不累积"""
+    for i in range(1, 21):
+        assert scheduler.wait_until(i * 0.005)
+
+    stats = scheduler.get_statistics()
+    assert stats.event_count == 20
+    assert stats.min_error_ms >= 0
+    # 最终漂移与单个事件误差同量级，而不是逐个累加
+    assert stats.final_drift_ms < 20
+    assert abs(scheduler.elapsed() - 0.1) < 0.05
+
+
+def test_stop_wakes_waiter(scheduler):
+    """测试停止会立即唤醒等待"""
+    threading.Timer(0.05, scheduler.stop).start()
+    started = time.perf_counter()
+
+    assert scheduler.wait_until(5.0) is False
+    assert time.perf_counter() - started < 1.0
+
+
+def test_pause_shifts_schedule(scheduler):
+    """测试暂停期间不推进调度时间"""
+    scheduler.pause()
+    threading.Timer(0.15, scheduler.resume).start()
+    started = time.perf_counter()
+
+    assert scheduler.wait_until(0.05)
+    waited = time.perf_counter() - started
+
+    assert waited >= 0.19
+    assert scheduler.get_statistics().paused_seconds >= 0.14
+
+
+def test_player_playback_reports_statistics(player):
+    """测试播放完成后给出时间误差统计"""
+    player.load_events(make_moves(30, 0.005))
+    player.start()
+    player.play_thread.join(timeout=5)
+
+    assert len(player.executed) == 30
+    stats = player.get_timing_statistics()
+    assert stats["event_count"] == 30
+    assert stats["final_drift_ms"] < 20
+    assert player.status == PlaybackStatus.STOPPED
+
+
+def test_player_delay_events_are_not_doubled(player):
+    """测试录制生成的DELAY事件不会让间隔翻倍"""
+    events = [
+        MacroEvent(MacroEventType.KEY_DOWN, 0.0, {"key": "a"}),
+        MacroEvent(MacroEventType.DELAY, 0.0, {"duration": 0.1}),
+        MacroEvent(MacroEventType.KEY_UP, 0.1, {"key": "a"}),
+    ]
+    player.load_events(events)
+    player.start()
+    player.play_thread.join(timeout=5)
+
+    assert len(player.executed) == 2
+    gap = player.executed[1][0] - player.executed[0][0]
+    assert 0.09 <= gap < 0.15
+
+
+def test_player_pause_resume(player):
+    """测试暂停期间不执行事件"""
+    player.load_events(make_moves(10, 0.02))
+    player.start()
+    time.sleep(0.05)
+    player.pause()
+    executed_at_pause = len(player.executed)
+    time.sleep(0.1)
+
+    assert len(player.executed) == executed_at_pause
+
+    player.resume()
+    player.play_thread.join(timeout=5)
+    assert len(player.executed) == 10
@@ -0,0 +1,99 @@
+"""策略推理导出测试"""
+import numpy as np
+import pytest
+
+from ..src.services import policy_export
+from ..src.services.policy_export import benchmark_policy, compare_policies, load_policy
+
+
+WEIGHTS = np.array([[1.0, -1.0, 0.5], [0.2, 0.3, -0.4]])
+
+
+def linear_q(states):
+    return np.asarray(states) @ WEIGHTS
+
+
+def test_compare_identical_policies():
+    states = np.random.default_rng(0).standard_normal((50, 2))
+    result = compare_policies(linear_q, linear_q, states)
+    assert result["max_abs_error"] == 0.0
+    assert result["action_agreement"] == 1.0
+
+
+def test_compare_detects_error_and_action_changes():
+    states = np.array([[1.0, 0.0], [0.0, 1.0]])
+
+    def shifted(s):
+        q = linear_q(s)
+        q[1, 0] += 1.0  # 第二个状态的最优动作从1变为0
+        return q
+
+    result = compare_policies(linear_q, shifted, states)
+    assert result["max_abs_error"] == pytest.approx(1.0)
+    assert result["max_rel_error"] == pytest.approx(1.0)
+    assert result["action_agreement"] == 0.5
+
+    with pytest.raises(ValueError):
+        compare_policies(linear_q, lambda s: linear_q(s)[:, :2], states)
+
+
+def test_benchmark_reports_each_batch_size():
+    seen = []
+
+    def q_function(batch):
+        seen.append(len(batch))
+        return linear_q(batch)
+
+    result = benchmark_policy(q_function, np.ones((3, 2)), batch_sizes=(1, 8), iterations=5, warmup=2)
+
+    assert set(result) == {1, 8}
+    assert seen == [1] * 7 + [8] * 7
+    for stats in result.values():
+        assert stats["p95_ms"] >= stats["p50_ms"] >= 0
+        assert stats["per_state_us"] >= 0
+
+
+def test_empty_states_are_rejected():
+    with pytest.raises(ValueError, match="状态"):
+        benchmark_policy(linear_q, np.empty((0, 2)))
+    with pytest.raises(ValueError):
+        benchmark_policy(linear_q, np.ones((3, 2)), batch_sizes=(0,))
+    # 在导出之前检查，不会留下导出文件
+    with pytest.raises(ValueError, match="状态"):
+        policy_export.export_policy(object(), "unused.pt", 2, np.empty((0, 2)))
+
+
+def test_load_policy_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        load_policy("policy.bin", "fp16")
+
+
+@pytest.mark.skipif(not policy_export.TORCH_AVAILABLE, reason="需要torch")
+def test_int8_export_matches_float_model(tmp_path):
+    torch = policy_export.torch
+    model = torch.nn.Sequential(
+        torch.nn.Linear(8, 32), torch.nn.ReLU(), torch.nn.Linear(32, 4)
+    )
+    states = np.random.default_rng(1).standard_normal((64, 8)).astype(np.float32)
+
+    report = policy_export.export_policy(
+        model, tmp_path / "policy.pt", 8, states, batch_sizes=(1,), iterations=5
+    )
+
+    assert (tmp_path / "policy.pt").exists()
+    assert report["accuracy"]["max_rel_error"] < 0.1
+    assert set(report["latency"]) == {"float", "int8"}
+
+
+@pytest.mark.skipif(not policy_export.TORCH_AVAILABLE, reason="需要torch")
+def test_export_restores_torch_thread_count(tmp_path):
+    torch = policy_export.torch
+    previous = torch.get_num_threads()
+    model = torch.nn.Sequential(torch.nn.Linear(4, 4))
+    states = np.ones((4, 4), dtype=np.float32)
+
+    policy_export.export_policy(
+        model, tmp_path / "policy.pt", 4, states, batch_sizes=(1,), iterations=2,
+        num_threads=max(1, previous - 1) if previous > 1 else 2,
+    )
+    assert torch.get_num_threads() == previous
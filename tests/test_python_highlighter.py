@@ -0,0 +1,121 @@
+"""Python语法高亮器测试"""
+import sys
+import pytest
+from PyQt6.QtGui import QGuiApplication, QTextDocument, QTextCursor
+from ..src.editor.script_editor import PythonHighlighter
+
+
+@pytest.fixture(scope="module")
+def app():
+    """创建QGuiApplication实例"""
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    yield app
+
+
+class CountingHighlighter(PythonHighlighter):
+    """记录被高亮的块号"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.highlighted = []
+
+    def highlightBlock(self, text):
+        self.highlighted.append(self.currentBlock().blockNumber())
+        super().highlightBlock(text)
+
+
+@pytest.fixture
+def document(app):
+    """创建带高亮器的文档"""
+    document = QTextDocument()
+    # 文档只在存在布局时发出内容变化信号
+    document.documentLayout()
+    document.highlighter = CountingHighlighter(document)
+    # 处理高亮器挂载时排队的延迟重新高亮，之后的编辑同步高亮
+    app.processEvents()
+    return document
+
+
+def block_formats(document, number):
+    """获取块中(起点, 长度, 前景色)列表"""
+    layout = document.findBlockByNumber(number).layout()
+    return [
+        (r.start, r.length, r.format.foreground().color().name())
+        for r in layout.formats()
+    ]
+
+
+def color_at(document, number, column):
+    """获取块中某列的前景色"""
+    for start, length, color in block_formats(document, number):
+        if start <= column < start + length:
+            return color
+    return None
+
+
+def test_single_pass_tokens(document):
+    """测试关键字、内置函数、字符串、注释、数字和定义名"""
+    document.setPlainText('def run(x): return len("a#b") + 42  # done')
+    keyword = document.highlighter.formats["keyword"].foreground().color().name()
+    function = document.highlighter.formats["function"].foreground().color().name()
+    builtin = document.highlighter.formats["builtin"].foreground().color().name()
+    string = document.highlighter.formats["string"].foreground().color().name()
+    comment = document.highlighter.formats["comment"].foreground().color().name()
+    number = document.highlighter.formats["number"].foreground().color().name()
+
+    text = document.toPlainText()
+    assert color_at(document, 0, 0) == keyword
+    assert color_at(document, 0, text.index("run")) == function
+    assert color_at(document, 0, text.index("x")) is None
+    assert color_at(document, 0, text.index("len")) == builtin
+    # 字符串内的#不是注释
+    assert color_at(document, 0, text.index("#b")) == string
+    assert color_at(document, 0, text.index("42")) == number
+    assert color_at(document, 0, text.index("# done")) == comment
+
+
+def test_identifiers_are_not_partially_matched(document):
+    """测试标识符中的关键字片段不被高亮"""
+    document.setPlainText("printer = format_value")
+    assert block_formats(document, 0) == []
+
+
+def test_multiline_string_state(document):
+    """测试三引号字符串跨块传递状态"""
+    document.setPlainText('x = """start\nif inside:\nend""" if y else 1\nif z: pass')
+    string = document.highlighter.formats["string"].foreground().color().name()
+    keyword = document.highlighter.formats["keyword"].foreground().color().name()
+
+    assert color_at(document, 1, 0) == string
+    assert document.findBlockByNumber(1).userState() == PythonHighlighter.STATE_DOUBLE_TRIPLE
+    assert color_at(document, 2, 0) == string
+    assert color_at(document, 2, len('end""" ')) == keyword
+    assert document.findBlockByNumber(2).userState() == PythonHighlighter.STATE_NORMAL
+    assert color_at(document, 3, 0) == keyword
+
+
+def test_edit_rehighlights_only_affected_blocks(document):
+    """测试普通编辑只重新高亮被修改的块"""
+    document.setPlainText("\n".join(f"value_{i} = {i}" for i in range(200)))
+    document.highlighter.highlighted.clear()
+
+    cursor = QTextCursor(document.findBlockByNumber(100))
+    cursor.insertText("if ")
+    assert document.highlighter.highlighted == [100]
+
+
+def test_opening_triple_quote_propagates(document):
+    """测试打开三引号时状态向后传递直到恢复一致"""
+    document.setPlainText("\n".join(f"value_{i} = {i}" for i in range(50)))
+    document.highlighter.highlighted.clear()
+
+    cursor = QTextCursor(document.findBlockByNumber(10))
+    cursor.insertText("'''")
+    assert document.findBlockByNumber(49).userState() == PythonHighlighter.STATE_SINGLE_TRIPLE
+
+    document.highlighter.highlighted.clear()
+    cursor = QTextCursor(document.findBlockByNumber(20))
+    cursor.insertText("'''")
+    assert document.findBlockByNumber(21).userState() == PythonHighlighter.STATE_NORMAL
+    assert document.findBlockByNumber(49).userState() == PythonHighlighter.STATE_NORMAL
+    assert document.highlighter.highlighted[0] == 20
@@ -0,0 +1,160 @@
+"""启动导入分析和重型依赖延迟加载测试"""
+import sys
+
+import pytest
+
+from ..src.common.lazy_import import get_version, is_available, lazy_attr, lazy_import, parse_version
+from ..src.performance.startup_profiler import (
+    StartupBudgetExceeded,
+    StartupProfile,
+    parse_importtime,
+    profile_imports,
+)
+
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2000 |     numpy.core
+import time:      3000 |       5000 |   numpy
+import time:       500 |       5620 | app
+RuntimeWarning: something unrelated
+import time:     40000 |      40000 | torch
+"""
+
+
+@pytest.fixture
+def fake_heavy(tmp_path, monkeypatch):
+    """临时目录中的模块，导入时记录次数"""
+    (tmp_path / "fake_heavy_dep.py").write_text(
+        "import builtins\n"
+        "builtins.fake_heavy_loads = getattr(builtins, 'fake_heavy_loads', 0) + 1\n"
+        "class Model:\n"
+        "    def __init__(self, path):\n"
+        "        self.path = path\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "fake_heavy_dep", raising=False)
+    import builtins
+    monkeypatch.setattr(builtins, "fake_heavy_loads", 0, raising=False)
+    yield builtins
+    sys.modules.pop("fake_heavy_dep", None)
+
+
+@pytest.fixture
+def broken_heavy(tmp_path, monkeypatch):
+    """已安装但导入时失败的模块(例如缺少动态库)"""
+    (tmp_path / "broken_heavy_dep.py").write_text(
+        "import builtins\n"
+        "builtins.broken_heavy_loads = getattr(builtins, 'broken_heavy_loads', 0) + 1\n"
+        "raise OSError('libfoo.so: cannot open shared object file')\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "broken_heavy_dep", raising=False)
+    import builtins
+    monkeypatch.setattr(builtins, "broken_heavy_loads", 0, raising=False)
+    yield builtins
+    sys.modules.pop("broken_heavy_dep", None)
+
+
+def test_parse_importtime():
+    records = parse_importtime(SAMPLE)
+    assert [r.module for r in records] == ["_io", "numpy.core", "numpy", "app", "torch"]
+    assert [r.depth for r in records] == [1, 2, 1, 0, 0]
+    assert records[2].cumulative_ms == 5.0
+
+    profile = StartupProfile(records, "import app")
+    assert profile.total_ms == pytest.approx(45.62)
+    assert [r.module for r in profile.top(2)] == ["torch", "app"]
+    assert profile.top(1, by="self")[0].module == "torch"
+    assert list(profile.by_package())[:2] == ["torch", "numpy"]
+    assert profile.is_loaded("numpy") and not profile.is_loaded("num")
+    assert "numpy" in profile.format_report()
+
+
+def test_budget_violations():
+    profile = StartupProfile(parse_importtime(SAMPLE))
+    assert profile.check_budget(total_ms=100, per_module_ms={"app": 10}, forbidden=("cv2",)) == []
+
+    with pytest.raises(StartupBudgetExceeded) as excinfo:
+        profile.assert_budget(total_ms=20, per_module_ms={"numpy": 1}, forbidden=("torch", "cv2"))
+    violations = excinfo.value.violations
+    assert len(violations) == 3
+    assert "torch" in violations[2]
+
+
+def test_lazy_import_defers_until_first_use(fake_heavy):
+    module = lazy_import("fake_heavy_dep")
+    Model = lazy_attr("fake_heavy_dep", "Model")
+    assert "fake_heavy_dep" not in sys.modules
+    assert not module.is_loaded
+
+    assert Model("a.pt").path == "a.pt"
+    assert module.Model is Model.resolve()
+    assert module.is_loaded
+    assert fake_heavy.fake_heavy_loads == 1
+
+
+def test_availability_checks_do_not_import(fake_heavy):
+    assert is_available("fake_heavy_dep")
+    assert not is_available("definitely_not_installed_dep")
+    assert get_version("definitely_not_installed_dep") is None
+    assert "fake_heavy_dep" not in sys.modules
+    assert parse_version("4.8.0.76") == (4, 8)
+    assert parse_version("2.1.0+cpu", parts=3) == (2, 1, 0)
+
+
+def test_broken_install_falls_back(broken_heavy):
+    # 启动检查只查找模块规格，安装损坏时仍报告为已安装
+    assert is_available("broken_heavy_dep")
+
+    module = lazy_import("broken_heavy_dep")
+    assert not module.is_importable
+    with pytest.raises(ImportError, match="libfoo"):
+        module.Model
+    # 失败结果被记住，不重复执行模块代码
+    assert broken_heavy.broken_heavy_loads == 1
+
+    with pytest.raises(ImportError):
+        lazy_attr("broken_heavy_dep", "Model")("a.pt")
+
+
+def test_missing_attribute_is_import_error(fake_heavy):
+    assert lazy_attr("fake_heavy_dep", "Model").is_importable
+    missing = lazy_attr("fake_heavy_dep", "Missing")
+    assert not missing.is_importable
+    with pytest.raises(ImportError):
+        missing()
+
+
+def test_onnx_policy_reports_broken_onnxruntime(broken_heavy, monkeypatch):
+    from ..src.services import policy_export
+
+    monkeypatch.setattr(policy_export, "ONNXRUNTIME_AVAILABLE", True)
+    monkeypatch.setattr(policy_export, "onnxruntime", lazy_import("broken_heavy_dep"))
+    with pytest.raises(ImportError, match="onnxruntime"):
+        policy_export.OnnxPolicy("policy.onnx")
+
+
+def test_profile_real_subprocess():
+    profile = profile_imports(
+        "from src.common.lazy_import import get_version; assert get_version('numpy')"
+    )
+    assert profile.is_loaded("src.common.lazy_import")
+    # 读取版本号不导入numpy本身
+    assert not profile.is_loaded("numpy")
+
+    with pytest.raises(RuntimeError):
+        profile_imports("import definitely_not_installed_dep")
+
+
+def test_main_startup_budget():
+    pytest.importorskip("PyQt6")
+    profile = profile_imports("import src.main")
+    # 入口模块只加载配置，不加载重型依赖和图像处理栈
+    profile.assert_budget(
+        total_ms=3000,
+        forbidden=("torch", "torchvision", "ultralytics", "onnxruntime", "cv2", "src.services.logger"),
+    )
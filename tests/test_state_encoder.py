@@ -0,0 +1,137 @@
+"""StateEncoder 批量状态编码测试"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ..src.services.state_encoder import StateEncoder, detections_to_states, frame_key
+
+
+def reference_state(class_ids, boxes, shape, names, state_size):
+    """逐框组装状态(原 get_state_from_image 的实现)"""
+    state = []
+    for class_name in names.values():
+        state.append(sum(1 for c in class_ids if names.get(int(c)) == class_name))
+    for x1, y1, x2, y2 in boxes:
+        x1, y1, x2, y2 = map(int, (x1, y1, x2, y2))
+        state.extend([(x1 + x2) / 2 / shape[1], (y1 + y2) / 2 / shape[0]])
+    state.extend([0.0] * (state_size - len(state)))
+    return np.array(state[:state_size])
+
+
+class FakeDetector:
+    """按画面首像素决定检测结果的假检测器"""
+
+    names = {0: "player", 1: "enemy", 2: "item"}
+
+    def __init__(self, detections):
+        self.detections = detections
+        self.calls = []
+
+    def __call__(self, images):
+        self.calls.append(len(images))
+        results = []
+        for image in images:
+            class_ids, boxes = self.detections[int(image[0, 0, 0])]
+            results.append(SimpleNamespace(boxes=SimpleNamespace(
+                cls=np.asarray(class_ids, dtype=np.float32),
+                xyxy=np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+            )))
+        return results
+
+
+def frame(tag, shape=(60, 80, 3)):
+    image = np.zeros(shape, dtype=np.uint8)
+    image[0, 0, 0] = tag
+    return image
+
+
+DETECTIONS = {
+    0: ([0, 1, 1], [[10, 10, 20, 30], [40.7, 5, 60, 15.9], [0, 0, 8, 8]]),
+    1: ([], []),
+    2: ([2, 5], [[70, 50, 80, 60], [1, 1, 3, 3]]),
+}
+
+
+@pytest.mark.parametrize("state_size", [3, 8, 20])
+def test_detections_match_per_box_reference(state_size):
+    names = FakeDetector.names
+    class_columns = {class_id: column for column, class_id in enumerate(names)}
+    shapes = [(60, 80, 3), (60, 80, 3), (30, 40, 3)]
+    tags = [0, 1, 2]
+
+    states = detections_to_states(
+        [np.asarray(DETECTIONS[t][0]) for t in tags],
+        [np.asarray(DETECTIONS[t][1], dtype=np.float64).reshape(-1, 4) for t in tags],
+        shapes,
+        class_columns,
+        state_size,
+    )
+
+    assert states.shape == (3, state_size)
+    for row, tag, shape in zip(states, tags, shapes):
+        class_ids, boxes = DETECTIONS[tag]
+        expected = reference_state(class_ids, boxes, shape, names, state_size)
+        np.testing.assert_allclose(row, expected)
+
+
+def test_encode_batch_runs_detector_once_and_caches():
+    detector = FakeDetector(DETECTIONS)
+    encoder = StateEncoder(12, detector=detector, cache_size=8)
+
+    images = [frame(0), frame(1), frame(0), frame(2)]
+    states = encoder.encode_batch(images)
+
+    # 同一批里的重复画面只检测一次
+    assert detector.calls == [3]
+    np.testing.assert_array_equal(states[0], states[2])
+    assert states[0, :3].tolist() == [1, 2, 0]
+
+    again = encoder.encode_batch([frame(2), frame(1)])
+    assert detector.calls == [3]
+    np.testing.assert_array_equal(again, states[[3, 1]])
+
+    stats = encoder.get_cache_stats()
+    assert stats["size"] == 3
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+
+
+def test_cache_evicts_least_recently_used():
+    detector = FakeDetector(DETECTIONS)
+    encoder = StateEncoder(6, detector=detector, cache_size=2)
+
+    encoder.encode(frame(0))
+    encoder.encode(frame(1))
+    encoder.encode(frame(0))
+    encoder.encode(frame(2))  # 淘汰frame(1)
+    encoder.encode(frame(0))
+    assert detector.calls == [1, 1, 1]
+
+    encoder.encode(frame(1))
+    assert detector.calls == [1, 1, 1, 1]
+
+
+def test_cached_states_are_not_shared_with_caller():
+    encoder = StateEncoder(6, detector=FakeDetector(DETECTIONS))
+    first = encoder.encode(frame(0))
+    first[:] = -1
+    assert encoder.encode(frame(0))[0] == 1
+
+
+def test_statistics_without_detector():
+    encoder = StateEncoder(6, cache_size=0)
+    images = [np.full((4, 4, 3), 10, dtype=np.uint8), np.arange(16, dtype=np.uint8).reshape(4, 4)]
+    states = encoder.encode_batch(images)
+
+    gray = images[1].astype(np.float64)
+    np.testing.assert_allclose(states[0], [10, 0, 10, 10, 0, 0])
+    np.testing.assert_allclose(states[1, :4], [gray.mean(), gray.std(), 0, 15])
+    assert encoder.get_cache_stats()["size"] == 0
+
+
+def test_frame_key_depends_on_content_and_shape():
+    image = frame(3)
+    assert frame_key(image) == frame_key(image.copy())
+    assert frame_key(image) != frame_key(frame(4))
+    assert frame_key(np.zeros((2, 6), np.uint8)) != frame_key(np.zeros((3, 4), np.uint8))
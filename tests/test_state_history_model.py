@@ -0,0 +1,116 @@
+"""StateHistoryModel 环形缓冲历史测试"""
+import json
+import random
+
+import pytest
+
+from ..src.models.state_history_model import StateHistoryModel
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return StateHistoryModel(max_records=5)
+
+
+def brute_force_statistics(records, state_name):
+    values = []
+    for record in records:
+        if state_name in record:
+            try:
+                values.append(float(record[state_name]))
+            except (ValueError, TypeError):
+                pass
+    if not values:
+        return {}
+    return {"min": min(values), "max": max(values), "avg": sum(values) / len(values), "count": len(values)}
+
+
+def test_ring_buffer_keeps_latest_records(model):
+    for i in range(8):
+        model.add_record({"hp": i, "timestamp": float(i)})
+
+    assert len(model) == 5
+    assert [r["hp"] for r in model.history] == [3, 4, 5, 6, 7]
+    assert [r["hp"] for r in model.get_recent_records(2)] == [6, 7]
+    assert model.get_recent_records(0) == []
+
+
+def test_incremental_statistics_match_full_scan(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = StateHistoryModel(max_records=50)
+    rng = random.Random(3)
+    kept = []
+
+    for i in range(500):
+        record = {"timestamp": float(i)}
+        if rng.random() < 0.7:
+            record["hp"] = rng.randint(0, 100)
+        if rng.random() < 0.3:
+            record["mode"] = rng.choice(["idle", "fight", "12.5"])
+        model.add_record(record)
+        kept = (kept + [record])[-50:]
+
+        for state in ("hp", "mode"):
+            expected = brute_force_statistics(kept, state)
+            actual = model.get_state_statistics(state)
+            assert {k: actual.get(k) for k in expected} == pytest.approx(expected)
+            if not expected:
+                assert actual == {}
+
+    assert model.get_state_counts()["hp"] == sum(1 for r in kept if "hp" in r)
+
+
+def test_state_durations(model):
+    model.add_record({"fight": 1, "timestamp": 10.0})
+    model.add_record({"fight": 1, "timestamp": 12.0})
+    model.add_record({"idle": 1, "timestamp": 15.0})
+    model.add_record({"fight": 1, "timestamp": 16.0})
+
+    durations = model.get_state_durations()
+    assert durations["fight"] == pytest.approx(5.0)
+    assert durations["idle"] == pytest.approx(1.0)
+
+    # 淘汰最旧的记录后，它贡献的持续时间一并扣除
+    model.add_record({"idle": 1, "timestamp": 17.0})
+    model.add_record({"idle": 1, "timestamp": 18.0})
+    assert model.get_state_durations()["fight"] == pytest.approx(4.0)
+
+
+def test_time_range_query(model):
+    for t in (1.0, 2.0, 2.0, 4.0, 8.0, 9.0, 10.0):
+        model.add_record({"t": t, "timestamp": t})
+
+    assert [r["t"] for r in model.get_records_between(2.0, 8.0)] == [2.0, 4.0, 8.0]
+    assert [r["t"] for r in model.get_records_between(start_time=9.0)] == [9.0, 10.0]
+    assert [r["t"] for r in model.get_records_between(end_time=3.0)] == [2.0]
+    assert model.get_records_between(11.0, 20.0) == []
+
+
+def test_out_of_order_timestamps_are_clamped(model):
+    model.add_record({"a": 1, "timestamp": 5.0})
+    model.add_record({"a": 2, "timestamp": 3.0})
+    assert [r["a"] for r in model.get_records_between(5.0, 5.0)] == [1, 2]
+
+
+def test_save_and_load_compact(model):
+    for i in range(3):
+        model.add_record({"hp": i, "timestamp": float(i)})
+    model.save_to_file("history.json")
+
+    text = (model.storage_dir / "history.json").read_text(encoding="utf-8")
+    assert "\n" not in text
+    assert json.loads(text) == model.history
+
+    other = StateHistoryModel(max_records=2)
+    other.load_from_file("history.json")
+    assert [r["hp"] for r in other.history] == [1, 2]
+    assert other.get_state_statistics("hp")["avg"] == 1.5
+
+
+def test_clear_history(model):
+    model.add_record({"hp": 1})
+    model.clear_history()
+    assert len(model) == 0
+    assert model.get_state_statistics("hp") == {}
+    assert model.get_records_by_state("hp") == []
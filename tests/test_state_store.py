@@ -0,0 +1,149 @@
+"""写后缓存状态持久化测试"""
+import json
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ..src.infrastructure.repositories.state_store import (
+    Durability,
+    WriteBehindStore,
+    atomic_write_json,
+)
+from ..src.infrastructure.adapters.game_state_adapter import GameStateServiceAdapter
+from ..src.infrastructure.adapters.state_manager_adapter import StateManagerServiceAdapter
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_atomic_write_keeps_old_file_when_replace_fails(tmp_path):
+    path = tmp_path / "state.json"
+    atomic_write_json(path, {"value": 1})
+
+    with patch("os.replace", side_effect=OSError("disk gone")):
+        with pytest.raises(OSError):
+            atomic_write_json(path, {"value": 2})
+
+    assert read_json(path) == {"value": 1}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_interval_mode_coalesces_bursts(tmp_path):
+    data = {"count": 0}
+    store = WriteBehindStore(tmp_path / "s.json", lambda: dict(data), interval=0.05)
+    try:
+        for i in range(1, 101):
+            data["count"] = i
+            store.mark_dirty()
+
+        assert wait_until(lambda: not store.dirty)
+        assert read_json(tmp_path / "s.json") == {"count": 100}
+        stats = store.get_statistics()
+        assert stats["changes"] == 100
+        assert stats["writes"] < 10
+        assert stats["coalesced"] == stats["changes"] - stats["writes"]
+    finally:
+        store.close()
+
+
+def test_on_shutdown_mode_writes_only_on_close(tmp_path):
+    data = {"value": "a"}
+    store = WriteBehindStore(tmp_path / "s.json", lambda: dict(data), durability=Durability.ON_SHUTDOWN)
+    store.mark_dirty()
+    data["value"] = "b"
+    store.mark_dirty()
+    assert not (tmp_path / "s.json").exists()
+
+    assert store.close()
+    assert read_json(tmp_path / "s.json") == {"value": "b"}
+    assert store.get_statistics()["writes"] == 1
+
+
+def test_failed_write_is_retried_by_flush(tmp_path):
+    errors = []
+    store = WriteBehindStore(
+        tmp_path / "s.json", lambda: {"v": 1}, durability=Durability.ON_SHUTDOWN, on_error=errors.append
+    )
+    store.mark_dirty()
+    with patch("os.replace", side_effect=OSError("busy")):
+        assert not store.flush()
+    assert store.dirty and len(errors) == 1
+
+    assert store.flush()
+    assert not store.dirty
+    assert read_json(tmp_path / "s.json") == {"v": 1}
+
+
+def test_invalid_durability():
+    with pytest.raises(ValueError):
+        WriteBehindStore("s.json", dict, durability="sometimes")
+
+
+def concrete(cls):
+    """适配器尚未实现接口的全部抽象方法，测试时去掉抽象标记"""
+    subclass = type(cls.__name__, (cls,), {})
+    subclass.__abstractmethods__ = frozenset()
+    return subclass
+
+
+def make_config(prefix, path, durability, interval=0.05, **extra):
+    values = {
+        f"{prefix}.save_file_path": str(path),
+        f"{prefix}.persistence_durability": durability,
+        f"{prefix}.persistence_interval": interval,
+    }
+    values.update({f"{prefix}.{key}": value for key, value in extra.items()})
+    config = MagicMock()
+    config.get.side_effect = lambda key, default=None: values.get(key, default)
+    return config
+
+
+@pytest.mark.parametrize("durability", [Durability.IMMEDIATE, Durability.INTERVAL])
+def test_game_state_updates_survive_crash(tmp_path, durability):
+    path = tmp_path / "game_state.json"
+    adapter = concrete(GameStateServiceAdapter)(config_service=make_config("game_state", path, durability))
+    for i in range(50):
+        assert adapter.set_state_data(f"key{i}", i)
+
+    if durability == Durability.INTERVAL:
+        # interval模式下等待后台写入完成
+        assert wait_until(lambda: adapter._persistence is not None and not adapter._persistence.dirty)
+
+    # 模拟崩溃：不调用shutdown，直接用新实例从磁盘恢复
+    restored = concrete(GameStateServiceAdapter)(config_service=make_config("game_state", path, durability))
+    assert all(restored.get_state_data(f"key{i}") == i for i in range(50))
+
+    adapter.shutdown()
+    restored.shutdown()
+
+
+def test_state_manager_shutdown_flushes_pending_changes(tmp_path):
+    path = tmp_path / "state_manager.json"
+    config = make_config("state_manager", path, Durability.ON_SHUTDOWN, strict_mode=False)
+
+    adapter = concrete(StateManagerServiceAdapter)(config_service=config)
+    assert adapter.add_state("running")
+    assert adapter.set_state("running")
+    assert not path.exists()
+
+    adapter.shutdown()
+    saved = read_json(path)
+    assert saved["current_state"] == "running"
+    assert "running" in saved["states"]
+
+    restored = concrete(StateManagerServiceAdapter)(config_service=config)
+    assert restored.get_current_state() == "running"
+    restored.shutdown()
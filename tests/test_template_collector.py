@@ -0,0 +1,148 @@
+"""TemplateCollector 感知哈希去重测试"""
+import threading
+from unittest.mock import Mock
+import cv2
+import numpy as np
+import pytest
+from ..src.services.image_hash import BKTree, hamming_distance, perceptual_hash, similarity_to_distance
+from ..src.services.template_collector import TemplateCollector
+
+
+def make_pattern(seed, size=(64, 64)):
+    """生成带结构的测试图像"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return cv2.resize(small, size, interpolation=cv2.INTER_NEAREST)
+
+
+@pytest.fixture
+def collector(tmp_path):
+    """创建使用临时目录的模板收集器"""
+    config = Mock()
+    config.get_template_config.return_value = {'similarity_threshold': 0.9}
+    del config.get_yolo_config
+    cv2.imwrite(str(tmp_path / "button_0.png"), make_pattern(1))
+    cv2.imwrite(str(tmp_path / "button_1.png"), make_pattern(1, (70, 70)))  # 缩放后的近似重复
+    cv2.imwrite(str(tmp_path / "icon_2.png"), make_pattern(2))
+    collector = TemplateCollector(Mock(), Mock(), config, output_dir=str(tmp_path))
+    collector.model = None
+    return collector
+
+
+def test_perceptual_hash_is_stable_under_small_changes():
+    """测试感知哈希对缩放和亮度变化稳定，对不同图像区分明显"""
+    image = make_pattern(7)
+    base = perceptual_hash(image)
+
+    assert isinstance(base, int) and 0 <= base < 2 ** 64
+    assert hamming_distance(base, perceptual_hash(cv2.resize(image, (50, 50)))) <= 6
+    brighter = cv2.convertScaleAbs(image, alpha=1.0, beta=20)
+    assert hamming_distance(base, perceptual_hash(brighter)) <= 6
+    assert hamming_distance(base, perceptual_hash(make_pattern(8))) > 12
+
+
+def test_similarity_to_distance():
+    """测试相似度阈值换算"""
+    assert similarity_to_distance(0.9) == 6
+    assert similarity_to_distance(1.0) == 0
+    assert similarity_to_distance(0.5, bits=16) == 8
+
+
+def test_bk_tree_matches_linear_scan():
+    """测试BK树查询结果与线性扫描一致"""
+    rng = np.random.default_rng(0)
+    hashes = [int(h) for h in rng.integers(0, 2 ** 63, 500, dtype=np.int64)]
+    hashes += [hashes[0] ^ 0b101, hashes[0] ^ 0b1]
+    tree = BKTree((h, i) for i, h in enumerate(hashes))
+
+    for query in hashes[:20]:
+        expected = sorted(
+            (hamming_distance(query, h), i) for i, h in enumerate(hashes)
+            if hamming_distance(query, h) <= 10
+        )
+        assert sorted(tree.search(query, 10)) == expected
+
+    assert tree.nearest(hashes[0], 2)[0] == 0
+    assert tree.remove(hashes[0], 0)
+    assert tree.nearest(hashes[0], 2) == (1, 501)
+    assert len(tree) == len(hashes) - 1
+
+
+def test_existing_templates_are_indexed(collector):
+    """测试加载已有模板时建立整数哈希索引"""
+    assert len(collector.templates) == 3
+    assert all(isinstance(t['hash'], int) for t in collector.templates.values())
+
+    matches = collector.find_similar(make_pattern(1, (40, 40)))
+    assert {name for _, name in matches} == {"button_0.png", "button_1.png"}
+
+
+def test_near_duplicate_detected(collector):
+    """测试近似重复的新元素被识别"""
+    near = perceptual_hash(cv2.GaussianBlur(make_pattern(2), (3, 3), 0))
+    assert collector.find_duplicate(near)[1] == "icon_2.png"
+    assert collector.find_duplicate(perceptual_hash(make_pattern(3))) is None
+
+
+def test_class_specific_threshold(collector):
+    """测试按类别配置相似度阈值"""
+    collector.class_similarity_thresholds = {'strict': 1.0}
+    assert collector.get_max_distance('strict') == 0
+    assert collector.get_max_distance('button') == 6
+
+
+def test_bulk_deduplicate(collector, tmp_path):
+    """测试批量去重保留较大的模板并移走重复项"""
+    report = collector.deduplicate_templates(dry_run=True)
+    assert report['kept'] == 2
+    assert report['duplicates'][0][:2] == ("button_0.png", "button_1.png")
+    assert (tmp_path / "button_0.png").exists()
+
+    collector.deduplicate_templates()
+    assert not (tmp_path / "button_0.png").exists()
+    assert (tmp_path / "duplicates" / "button_0.png").exists()
+    assert sorted(collector.templates) == ["button_1.png", "icon_2.png"]
+    assert len(collector.hash_index) == 2
+
+
+def test_new_crops_written_in_background(collector, tmp_path):
+    """测试检测到的新元素经后台写入器保存"""
+    box = Mock()
+    box.xyxy = [[0, 0, 40, 40]]
+    box.cls = [0]
+    result = Mock()
+    result.boxes = [box]
+    collector.model = Mock(return_value=[result])
+    collector.class_names = {0: "panel"}
+
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    frame[:40, :40] = make_pattern(5, (40, 40))
+    collector._analyze_frame(frame)
+    collector._analyze_frame(frame)  # 重复帧不会再次保存
+    collector.close()
+
+    saved = [name for name in collector.templates if name.startswith("panel_")]
+    assert len(saved) == 1
+    assert (tmp_path / saved[0]).exists()
+    assert collector.get_writer_metrics()["written"] == 1
+
+
+def test_failed_write_unregisters_under_lock(collector, tmp_path):
+    """测试写入线程的失败回调与采集线程互斥地修改模板登记"""
+    image = make_pattern(7)
+    collector._register_template("panel_9.png", image, "panel", collector._calculate_image_hash(image))
+    callback = threading.Thread(
+        target=collector._on_template_written,
+        args=(str(tmp_path / "panel_9.png"), False, "磁盘已满"),
+    )
+
+    with collector._templates_lock:
+        callback.start()
+        callback.join(0.1)
+        # 采集线程持有锁期间回调不能修改登记
+        assert callback.is_alive()
+        assert "panel_9.png" in collector.templates
+
+    callback.join(1.0)
+    assert "panel_9.png" not in collector.templates
+    assert len(collector.hash_index) == len(collector.templates)
@@ -0,0 +1,190 @@
+"""TemplateRepository 模板包与缓存测试"""
+import json
+import os
+import cv2
+import numpy as np
+import pytest
+from ..src.infrastructure.repositories.template_repository import TemplateRepository, LRUCache
+from ..src.infrastructure.repositories.template_pack import TemplatePack, build_template_pack
+
+
+class FakeConfigRepository:
+    """只提供模板配置的配置仓储"""
+
+    def __init__(self, templates):
+        self.templates = templates
+
+    def get_config(self, key, default=None):
+        return self.templates if key == 'templates' else default
+
+
+def write_template(base, template_id, color, category="ui"):
+    """写入模板JSON和PNG"""
+    with open(base / f"{template_id}.json", "w", encoding="utf-8") as f:
+        json.dump({"name": template_id, "category": category}, f)
+    image = np.zeros((8, 12, 3), dtype=np.uint8)
+    image[:] = color
+    cv2.imwrite(str(base / f"{template_id}.png"), image)
+
+
+def bump_mtime(path, seconds=10):
+    """推后文件修改时间，确保指纹变化"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    """创建包含两个模板的目录"""
+    write_template(tmp_path, "start_button", (0, 0, 255))
+    write_template(tmp_path, "ok_button", (0, 255, 0), category="dialog")
+    return tmp_path
+
+
+def make_repository(template_dir, **options):
+    """创建模板仓储"""
+    return TemplateRepository(config_repository=FakeConfigRepository(
+        {"base_path": str(template_dir), "cache_size": 10, **options}
+    ))
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """测试LRU淘汰与命中率"""
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.hits == 1 and cache.misses == 1
+    assert cache.hit_rate() == 0.5
+
+
+def test_pack_is_built_and_memory_mapped(template_dir):
+    """测试初始化时编译模板包并从映射中读取"""
+    repository = make_repository(template_dir)
+    templates = repository.list_templates()
+
+    assert (template_dir / "templates.pack").exists()
+    assert sorted(t['id'] for t in templates) == ["ok_button", "start_button"]
+    assert [t['id'] for t in repository.list_templates("dialog")] == ["ok_button"]
+
+    image = repository.get_template_image("start_button")
+    assert image.shape == (8, 12, 3)
+    assert tuple(image[0, 0]) == (255, 0, 0)  # RGB
+    gray = repository.get_template_gray("ok_button")
+    assert gray.shape == (8, 12)
+    assert gray[0, 0] == cv2.cvtColor(np.array([[[0, 255, 0]]], np.uint8), cv2.COLOR_BGR2GRAY)[0, 0]
+
+
+def test_pack_reads_do_not_touch_sources(template_dir):
+    """测试模板包可以脱离源文件提供数据"""
+    pack, stats = build_template_pack(template_dir, template_dir / "templates.pack")
+    assert stats["compiled"] == 2
+    pack.close()
+
+    repository = make_repository(template_dir, auto_reload=False)
+    (template_dir / "start_button.png").unlink()
+    (template_dir / "start_button.json").unlink()
+
+    assert repository.get_template("start_button")["category"] == "ui"
+    assert repository.get_template_image("start_button") is not None
+
+
+def test_incremental_rebuild_only_recompiles_changes(template_dir):
+    """测试源文件变化后只重新编译变化的模板"""
+    pack, _ = build_template_pack(template_dir, template_dir / "templates.pack")
+
+    write_template(template_dir, "start_button", (255, 255, 255))
+    bump_mtime(template_dir / "start_button.png")
+    write_template(template_dir, "close_button", (10, 10, 10))
+
+    pack, stats = build_template_pack(template_dir, template_dir / "templates.pack", previous=pack)
+    assert stats == {"reused": 1, "compiled": 2, "removed": 0}
+    assert tuple(pack.get_image("start_button")[0, 0]) == (255, 255, 255)
+    assert pack.get_metadata("close_button")["name"] == "close_button"
+    pack.close()
+
+    reopened = TemplatePack.open(template_dir / "templates.pack")
+    assert len(reopened) == 3
+    reopened.close()
+
+
+def test_auto_reload_picks_up_new_templates(template_dir):
+    """测试目录变化后自动增量重新编译"""
+    repository = make_repository(template_dir)
+    assert len(repository.list_templates()) == 2
+
+    write_template(template_dir, "close_button", (10, 10, 10))
+    bump_mtime(template_dir)
+
+    assert len(repository.list_templates()) == 3
+    stats = repository.get_cache_stats()
+    assert stats['pack_templates'] == 3
+    assert stats['pack_reused'] >= 2
+
+
+def test_auto_reload_picks_up_in_place_edits(template_dir):
+    """测试原地覆盖模板文件(目录修改时间不变)后重新加载"""
+    repository = make_repository(template_dir)
+    assert tuple(repository.get_template_image("start_button")[0, 0]) == (255, 0, 0)
+    assert repository.get_template("start_button")["category"] == "ui"
+
+    dir_mtime_ns = template_dir.stat().st_mtime_ns
+    write_template(template_dir, "start_button", (255, 255, 255), category="menu_button")
+    image = np.full((10, 10, 3), 255, dtype=np.uint8)
+    cv2.imwrite(str(template_dir / "start_button.png"), image)
+    os.utime(template_dir, ns=(template_dir.stat().st_atime_ns, dir_mtime_ns))
+
+    # 节流间隔内仍返回缓存数据，清空缓存后立即重新检查
+    repository.clear_cache()
+    assert repository.get_template_image("start_button").shape == (10, 10, 3)
+    assert repository.get_template("start_button")["category"] == "menu_button"
+
+    # 间隔为0时每次访问都比较指纹
+    fast = make_repository(template_dir, reload_interval=0)
+    fast.get_template_gray("ok_button")
+    write_template(template_dir, "ok_button", (1, 2, 3), category="dialog_button")
+    os.utime(template_dir, ns=(template_dir.stat().st_atime_ns, dir_mtime_ns))
+    assert fast.get_template("ok_button")["category"] == "dialog_button"
+    assert tuple(fast.get_template_image("ok_button")[0, 0]) == (3, 2, 1)
+
+
+def test_repository_writes_are_visible_before_rebuild(template_dir):
+    """测试通过仓储保存/删除的模板立即可见"""
+    repository = make_repository(template_dir, auto_reload=False)
+    repository.save_template("ok_button", {"name": "OK", "category": "renamed"})
+    image = np.full((4, 4, 3), 7, dtype=np.uint8)
+    repository.save_template_image("ok_button", image)
+    repository.delete_template("start_button")
+
+    templates = repository.list_templates()
+    assert [(t['id'], t['category']) for t in templates] == [("ok_button", "renamed")]
+    assert repository.get_template_image("ok_button").shape == (4, 4, 3)
+    assert repository.get_template("start_button") is None
+
+    assert repository.refresh_pack()
+    assert [t['id'] for t in repository.list_templates()] == ["ok_button"]
+
+
+def test_cache_hit_rate_is_reported(template_dir):
+    """测试缓存命中率统计"""
+    repository = make_repository(template_dir)
+    repository.get_template_image("start_button")
+    for _ in range(3):
+        repository.get_template_image("start_button")
+
+    stats = repository.get_cache_stats()
+    assert stats['image_cache_hit_rate'] == 0.75
+    assert 0 < stats['cache_hit_rate'] <= 1
+
+
+def test_pack_disabled_uses_files(template_dir):
+    """测试禁用模板包时直接读取源文件"""
+    repository = make_repository(template_dir, use_pack=False)
+
+    assert len(repository.list_templates()) == 2
+    assert repository.get_template_image("ok_button") is not None
+    assert not (template_dir / "templates.pack").exists()
@@ -0,0 +1,149 @@
+"""帧处理流水线分段追踪测试"""
+import json
+import threading
+import time
+
+import pytest
+
+from ..src.performance.tracing import StageHistogram, Tracer, get_tracer, span, traced
+
+
+@pytest.fixture
+def tracer():
+    return Tracer(enabled=True)
+
+
+def test_disabled_span_is_shared_noop():
+    tracer = Tracer(enabled=False)
+    first = tracer.span("capture")
+    assert first is tracer.span("decision")
+    with first as s:
+        s.set(frame=1)
+    assert tracer.get_stage_stats() == {}
+    assert tracer.get_event_count() == 0
+
+
+def test_disabled_overhead_is_small():
+    tracer = Tracer(enabled=False)
+    iterations = 100_000
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with tracer.span("capture"):
+            pass
+    per_call = (time.perf_counter() - started) / iterations
+    # 远低于一帧的耗时(毫秒级)，这里留足余量避免在慢机器上误报
+    assert per_call < 5e-6
+
+
+def test_histogram_percentiles():
+    histogram = StageHistogram()
+    for value in range(1, 1001):
+        histogram.record(float(value * 10))  # 10us .. 10ms
+
+    stats = histogram.to_dict()
+    assert stats["count"] == 1000
+    assert stats["min_ms"] == pytest.approx(0.01)
+    assert stats["max_ms"] == pytest.approx(10.0)
+    assert stats["avg_ms"] == pytest.approx(5.005)
+    # 对数分桶的分位数误差在桶宽(约20%)以内
+    assert stats["p50_ms"] == pytest.approx(5.0, rel=0.2)
+    assert stats["p95_ms"] == pytest.approx(9.5, rel=0.2)
+    assert stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_spans_build_stage_stats(tracer):
+    for _ in range(5):
+        with tracer.span("frame"):
+            with tracer.span("capture"):
+                time.sleep(0.002)
+            with tracer.span("match"):
+                pass
+
+    stats = tracer.get_stage_stats()
+    assert set(stats) == {"frame", "capture", "match"}
+    assert stats["capture"]["count"] == 5
+    assert stats["capture"]["min_ms"] >= 1.5
+    assert stats["frame"]["total_ms"] >= stats["capture"]["total_ms"]
+
+
+def test_exception_is_recorded_and_propagated(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("decision"):
+            raise ValueError("boom")
+    assert tracer.get_stage_stats()["decision"]["count"] == 1
+
+
+def test_traced_decorator_checks_enabled_at_call_time(tracer):
+    @tracer.traced("ocr")
+    def recognize(x):
+        return x * 2
+
+    tracer.disable()
+    assert recognize(2) == 4
+    assert tracer.get_stage_stats() == {}
+
+    tracer.enable()
+    assert recognize(3) == 6
+    assert tracer.get_stage_stats()["ocr"]["count"] == 1
+    assert recognize.__name__ == "recognize"
+
+
+def test_chrome_trace_export(tracer, tmp_path):
+    def worker():
+        with tracer.span("input", category="automation", action="click"):
+            pass
+
+    with tracer.span("capture", category="automation") as s:
+        s.set(width=640)
+    thread = threading.Thread(target=worker, name="AutomationThread")
+    thread.start()
+    thread.join()
+
+    path = tmp_path / "trace" / "frame.json"
+    assert tracer.export_chrome_trace(path) == 2
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    complete = [e for e in data["traceEvents"] if e["ph"] == "X"]
+    metadata = [e for e in data["traceEvents"] if e["ph"] == "M"]
+    assert [e["name"] for e in complete] == ["capture", "input"]
+    assert complete[0]["args"] == {"width": 640}
+    assert complete[1]["args"] == {"action": "click"}
+    assert all(e["ts"] >= 0 and e["dur"] >= 0 for e in complete)
+    assert "AutomationThread" in {e["args"]["name"] for e in metadata}
+
+
+def test_event_buffer_is_bounded(tmp_path):
+    tracer = Tracer(enabled=True, max_events=10)
+    for _ in range(25):
+        with tracer.span("capture"):
+            pass
+    assert tracer.get_event_count() == 10
+    # 直方图统计全部调用
+    assert tracer.get_stage_stats()["capture"]["count"] == 25
+
+    tracer.export_chrome_trace(tmp_path / "t.json")
+    data = json.loads((tmp_path / "t.json").read_text(encoding="utf-8"))
+    assert data["otherData"]["dropped_events"] == 15
+
+    tracer.reset()
+    assert tracer.get_stage_stats() == {}
+
+
+def test_module_helpers_use_global_tracer():
+    tracer = get_tracer()
+    was_enabled = tracer.enabled
+    tracer.reset()
+    try:
+        tracer.enable()
+
+        @traced("global.stage")
+        def work():
+            with span("global.inner"):
+                return 1
+
+        assert work() == 1
+        assert set(tracer.get_stage_stats()) == {"global.stage", "global.inner"}
+    finally:
+        tracer.enabled = was_enabled
+        tracer.reset()
@@ -0,0 +1,121 @@
+"""回放向量化环境测试"""
+import numpy as np
+import pytest
+
+from ..src.services.vector_env import (
+    EpisodeData,
+    ReplayEpisodeEnv,
+    load_episodes,
+    save_episodes,
+)
+
+
+def make_episodes():
+    """两个回合：长度3和2，状态值等于全局步号"""
+    states = np.arange(5, dtype=np.float32).reshape(5, 1).repeat(2, axis=1)
+    return EpisodeData(
+        states=states,
+        actions=np.array([0, 1, 2, 3, 0]),
+        rewards=np.array([1, 1, 10, 2, 5], dtype=np.float32),
+        dones=np.array([False, False, True, False, True]),
+    )
+
+
+def test_episode_bounds_include_unterminated_tail():
+    data = make_episodes()
+    assert data.episode_bounds() == [(0, 3), (3, 5)]
+
+    data.dones[-1] = False
+    assert data.episode_bounds() == [(0, 3), (3, 5)]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    data = make_episodes()
+    path = tmp_path / "episodes.npz"
+    save_episodes(path, data.states, data.actions, data.rewards, data.dones)
+
+    loaded = load_episodes(path)
+    np.testing.assert_array_equal(loaded.states, data.states)
+    np.testing.assert_array_equal(loaded.actions, data.actions)
+    np.testing.assert_array_equal(loaded.dones, data.dones)
+    assert loaded.next_states is None
+
+    np.savez(tmp_path / "broken.npz", states=data.states)
+    with pytest.raises(ValueError):
+        load_episodes(tmp_path / "broken.npz")
+
+
+def test_replay_env_steps_all_slots_and_auto_resets():
+    env = ReplayEpisodeEnv(make_episodes(), num_envs=2, shuffle=False)
+    assert (env.state_size, env.action_size) == (2, 4)
+
+    states = env.reset()
+    assert states[:, 0].tolist() == [0, 3]
+
+    step = env.step(np.array([3, 3]))
+    # 回放环境返回录制的动作
+    assert step.actions.tolist() == [0, 3]
+    assert step.rewards.tolist() == [1, 2]
+    assert step.next_states[:, 0].tolist() == [1, 4]
+    assert step.dones.tolist() == [False, False]
+
+    step = env.step(np.zeros(2, dtype=np.int64))
+    assert step.dones.tolist() == [False, True]
+    # 终止转移保留最后的状态，下一步输入换成新回合的初始状态
+    assert step.next_states[1, 0] == 4
+    assert step.states[:, 0].tolist() == [2, 0]
+    assert step.infos[1] == {"episode": 1, "episode_return": 7.0}
+
+    step = env.step(np.zeros(2, dtype=np.int64))
+    assert step.dones.tolist() == [True, False]
+    assert step.infos[0]["episode_return"] == 12.0
+    assert env.completed_episodes == 2
+
+
+def test_replay_env_uses_recorded_next_states():
+    data = make_episodes()
+    data.next_states = data.states + 100
+    env = ReplayEpisodeEnv(data, num_envs=1, shuffle=False)
+    env.reset()
+    step = env.step(np.zeros(1, dtype=np.int64))
+    assert step.next_states[0, 0] == 100
+
+
+def test_shuffled_replay_is_reproducible():
+    first = ReplayEpisodeEnv(make_episodes(), num_envs=3, seed=7)
+    second = ReplayEpisodeEnv(make_episodes(), num_envs=3, seed=7)
+    np.testing.assert_array_equal(first.reset(), second.reset())
+    for _ in range(6):
+        a = first.step(np.zeros(3, dtype=np.int64))
+        b = second.step(np.zeros(3, dtype=np.int64))
+        np.testing.assert_array_equal(a.states, b.states)
+
+
+def test_running_out_of_data_is_truncation_not_termination():
+    data = make_episodes()
+    data.dones[-1] = False  # 第二个回合录制到一半结束
+    env = ReplayEpisodeEnv(data, num_envs=1, shuffle=False)
+    env.reset()
+    for _ in range(3):
+        step = env.step(np.zeros(1, dtype=np.int64))
+    assert step.dones.tolist() == [True]
+    assert step.truncated.tolist() == [False]
+
+    env.step(np.zeros(1, dtype=np.int64))
+    step = env.step(np.zeros(1, dtype=np.int64))
+    assert step.dones.tolist() == [False]
+    assert step.truncated.tolist() == [True]
+    assert step.infos[0]["TimeLimit.truncated"] is True
+    # 没有录制后继状态，这条转移不能用于自举
+    assert step.infos[0]["next_state_valid"] is False
+    assert step.states[0, 0] == 0
+    assert env.completed_episodes == 2
+
+    data.next_states = data.states + 100
+    env = ReplayEpisodeEnv(data, num_envs=1, shuffle=False)
+    env.reset()
+    for _ in range(5):
+        step = env.step(np.zeros(1, dtype=np.int64))
+    assert step.truncated.tolist() == [True]
+    assert step.infos[0]["next_state_valid"] is True
+    assert step.next_states[0, 0] == 104
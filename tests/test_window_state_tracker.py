@@ -0,0 +1,193 @@
+"""WindowStateTracker 单元测试"""
+import pytest
+from ..src.core.interfaces.window_manager import IWindowStateBackend, WindowEventType
+from ..src.core.domain.window_models import WindowInfo, WindowRect
+from ..src.infrastructure.window_manager.window_state_tracker import WindowStateTracker
+
+
+class FakeWindowBackend(IWindowStateBackend):
+    """内存中的窗口后端，用于在非Windows平台上驱动跟踪器"""
+
+    def __init__(self):
+        self.windows = {}
+        self.callback = None
+        self.query_count = 0
+        self.enumerate_count = 0
+
+    def add(self, handle, title, rect=(0, 0, 800, 600), visible=True, foreground=False, process_id=0):
+        self.windows[handle] = WindowInfo(
+            handle=handle,
+            title=title,
+            process_id=process_id,
+            rect=WindowRect.from_tuple(rect),
+            is_visible=visible,
+            is_active=foreground,
+            is_foreground=foreground,
+        )
+
+    def enumerate_windows(self):
+        self.enumerate_count += 1
+        return list(self.windows.values())
+
+    def query_window(self, handle):
+        self.query_count += 1
+        return self.windows.get(handle)
+
+    def start(self, callback):
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def emit(self, event_type, handle):
+        self.callback(event_type, handle)
+
+
+class ScopedWindowBackend(FakeWindowBackend):
+    """只为目标进程推送状态事件的后端，模拟按进程注册的Win32钩子"""
+
+    def __init__(self):
+        super().__init__()
+        self.target_process = None
+
+    def set_target_process(self, process_id):
+        self.target_process = process_id
+
+    def tracks_process(self, process_id):
+        return process_id == self.target_process
+
+
+@pytest.fixture
+def backend():
+    """创建带两个窗口的后端"""
+    fake = FakeWindowBackend()
+    fake.add(1, "Game Window", foreground=True)
+    fake.add(2, "Editor")
+    return fake
+
+
+@pytest.fixture
+def events():
+    """收集跟踪器发出的事件"""
+    return []
+
+
+@pytest.fixture
+def tracker(backend, events):
+    """创建并启动跟踪器"""
+    tracker = WindowStateTracker(backend, event_sink=lambda t, w: events.append((t, w.handle)))
+    tracker.start()
+    yield tracker
+    tracker.stop()
+
+
+def test_start_enumerates_once(tracker, backend):
+    """测试启动时只做一次完整枚举"""
+    assert backend.enumerate_count == 1
+    assert sorted(tracker.get_handles()) == [1, 2]
+    assert backend.callback is not None
+
+
+def test_lookups_read_cache(tracker, backend):
+    """测试热路径查询不访问后端"""
+    backend.query_count = 0
+
+    for _ in range(100):
+        assert tracker.get_window(1).title == "Game Window"
+        tracker.get_snapshot()
+
+    assert backend.query_count == 0
+    assert tracker.get_snapshot() is tracker.get_snapshot()
+
+
+def test_move_and_resize_events_update_geometry(tracker, backend, events):
+    """测试位置变化事件更新几何信息并区分移动和缩放"""
+    backend.add(1, "Game Window", rect=(100, 50, 800, 600))
+    backend.emit(WindowEventType.MOVED, 1)
+    assert tracker.get_window(1).rect == WindowRect(100, 50, 800, 600)
+    assert events[-1] == (WindowEventType.MOVED, 1)
+
+    backend.add(1, "Game Window", rect=(100, 50, 1280, 720))
+    backend.emit(WindowEventType.MOVED, 1)
+    assert tracker.get_window(1).rect.width == 1280
+    assert events[-1] == (WindowEventType.RESIZED, 1)
+
+
+def test_create_and_destroy(tracker, backend, events):
+    """测试窗口创建和销毁事件"""
+    backend.add(3, "Launcher")
+    backend.emit(WindowEventType.CREATED, 3)
+    assert tracker.get_window(3) is not None
+    assert len(tracker.get_snapshot()) == 3
+
+    del backend.windows[3]
+    backend.emit(WindowEventType.DESTROYED, 3)
+    assert tracker.get_window(3) is None
+    assert len(tracker.get_snapshot()) == 2
+    assert events == [(WindowEventType.CREATED, 3), (WindowEventType.DESTROYED, 3)]
+
+
+def test_moves_of_untracked_windows_are_ignored(tracker, backend):
+    """测试未跟踪窗口的位置变化不触发查询"""
+    backend.query_count = 0
+    backend.emit(WindowEventType.MOVED, 999)
+    assert backend.query_count == 0
+
+
+def test_foreground_change_deactivates_previous(tracker, backend, events):
+    """测试前台切换时刷新失去激活的窗口"""
+    backend.add(1, "Game Window", foreground=False)
+    backend.add(2, "Editor", foreground=True)
+    backend.emit(WindowEventType.ACTIVATED, 2)
+
+    assert tracker.get_window(2).is_foreground
+    assert not tracker.get_window(1).is_foreground
+    assert events == [(WindowEventType.DEACTIVATED, 1), (WindowEventType.ACTIVATED, 2)]
+
+
+def test_refresh_window_does_not_notify(tracker, backend, events):
+    """测试主动刷新单个窗口不发送事件"""
+    backend.add(2, "Editor", rect=(10, 10, 640, 480))
+    info = tracker.refresh_window(2)
+
+    assert info.rect == WindowRect(10, 10, 640, 480)
+    assert tracker.get_snapshot().get_window_by_handle(2).rect.width == 640
+    assert events == []
+
+
+def test_statistics(tracker, backend):
+    """测试统计信息"""
+    backend.emit(WindowEventType.TITLE_CHANGED, 1)
+    stats = tracker.get_statistics()
+
+    assert stats['running'] is True
+    assert stats['tracked_windows'] == 2
+    assert stats['events_received'] == 1
+    assert stats['resyncs'] == 1
+
+
+def test_windows_outside_target_process_are_requeried():
+    """测试后端只跟踪目标进程时，其它进程的窗口在读取时重新查询"""
+    backend = ScopedWindowBackend()
+    backend.add(1, "Game Window", process_id=100)
+    backend.add(2, "Editor", process_id=200)
+    tracker = WindowStateTracker(backend)
+    tracker.start()
+
+    tracker.set_target_window(1)
+    assert backend.target_process == 100
+
+    backend.add(1, "Game Window", rect=(50, 50, 800, 600), process_id=100)
+    backend.add(2, "Editor", rect=(10, 10, 640, 480), process_id=200)
+    backend.query_count = 0
+
+    # 目标窗口没有收到事件，继续读取缓存
+    assert tracker.get_window(1).rect == WindowRect(0, 0, 800, 600)
+    assert backend.query_count == 0
+    # 非目标进程的窗口收不到位置事件，读取时重新查询
+    assert tracker.get_window(2).rect == WindowRect(10, 10, 640, 480)
+    assert backend.query_count == 1
+
+    tracker.set_target_window(None)
+    assert backend.target_process is None
+    tracker.stop()